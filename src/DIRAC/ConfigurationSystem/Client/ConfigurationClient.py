@@ -38,6 +38,20 @@ class CSJSONClient(TornadoClient):
             retVal["Value"]["data"] = b64decode(retVal["Value"]["data"])
         return retVal
 
+    def getCompressedPatchIfNewer(self, sClientVersion):
+        """
+        Transmit request to service and get data in base64,
+        it decode base64 before returning.
+
+        :returns: Modifications of the configuration or whole configuration, if changed, compressed
+        """
+        retVal = self.executeRPC("getCompressedPatchIfNewer", sClientVersion)
+        if retVal["OK"]:
+            for key in ("data", "patch"):
+                if key in retVal["Value"]:
+                    retVal["Value"][key] = b64decode(retVal["Value"][key])
+        return retVal
+
     def commitNewData(self, sData):
         """
         Transmit request to service by encoding data in base64.
@@ -1,10 +1,15 @@
 """ Helper for /Registry section
 """
 import errno
+import _thread
 
 from DIRAC import S_OK, S_ERROR
 from DIRAC.ConfigurationSystem.Client.Config import gConfig
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
 from DIRAC.ConfigurationSystem.Client.Helpers.CSGlobals import getVO
+from DIRAC.ConfigurationSystem.private.Refresher import gRefresher
+from DIRAC.Core.Utilities import List
+from DIRAC.Core.Utilities.LockRing import LockRing
 
 ID_DN_PREFIX = "/O=DIRAC/CN="
 
@@ -13,6 +18,111 @@ ID_DN_PREFIX = "/O=DIRAC/CN="
 gBaseRegistrySection = "/Registry"
 
 
+class RegistryIndex:
+    """Reverse lookup tables for the /Registry section
+
+    Answering "which user owns this DN" or "which groups have this property" from the
+    configuration means walking every user or group section. The index does that walk once
+    per merged configuration and keeps the answers in dictionaries. It is dropped when a new
+    CS version is received and rebuilt lazily on the next lookup.
+    """
+
+    #: Group options for which a value -> groups mapping is kept
+    indexedGroupAttributes = ("Users", "Properties", "VO")
+
+    __index = None
+    __indexLock = LockRing().getLock()
+
+    def __init__(self, mergedCFG=None, syncCount=None):
+        """C'tor
+
+        :param mergedCFG: merged CFG object the index is built from, used to detect changes
+        :param int syncCount: gConfigurationData.syncCount when the index is built, the merged
+                              CFG may be patched in place
+        """
+        self.mergedCFG = mergedCFG
+        self.syncCount = syncCount
+        # DN -> [usernames], in the order of the /Registry/Users sections
+        self.usersForDN = {}
+        # DN -> [hostnames], in the order of the /Registry/Hosts sections
+        self.hostsForDN = {}
+        # attribute -> {value -> [groups]}
+        self.groupsWithAttr = {attrName: {} for attrName in self.indexedGroupAttributes}
+        # group -> [properties], only for groups defining the Properties option
+        self.propertiesForGroup = {}
+        # VOMSRole -> [groups], in the order of the /Registry/Groups sections
+        self.groupsForVOMSRole = {}
+
+    def build(self):
+        """Fill the lookup tables from the current configuration"""
+        for username in gConfig.getSections(f"{gBaseRegistrySection}/Users").get("Value", []):
+            for dn in gConfig.getValue(f"{gBaseRegistrySection}/Users/{username}/DN", []):
+                self.usersForDN.setdefault(dn, []).append(username)
+
+        for hostname in gConfig.getSections(f"{gBaseRegistrySection}/Hosts").get("Value", []):
+            for dn in gConfig.getValue(f"{gBaseRegistrySection}/Hosts/{hostname}/DN", []):
+                self.hostsForDN.setdefault(dn, []).append(hostname)
+
+        for group in gConfig.getSections(f"{gBaseRegistrySection}/Groups").get("Value", []):
+            result = gConfig.getOptionsDict(f"{gBaseRegistrySection}/Groups/{group}")
+            if not result["OK"]:
+                continue
+            groupOptions = result["Value"]
+            for attrName in self.indexedGroupAttributes:
+                if attrName not in groupOptions:
+                    continue
+                values = List.fromChar(groupOptions[attrName], ",")
+                for value in values:
+                    self.groupsWithAttr[attrName].setdefault(value, []).append(group)
+                if attrName == "Properties":
+                    self.propertiesForGroup[group] = values
+            self.groupsForVOMSRole.setdefault(groupOptions.get("VOMSRole", ""), []).append(group)
+
+        for groupsDict in self.groupsWithAttr.values():
+            for groups in groupsDict.values():
+                groups.sort()
+
+    @classmethod
+    def get(cls):
+        """Get the index matching the current configuration, building it if needed
+
+        :return: RegistryIndex
+        """
+        gRefresher.refreshConfigurationIfNeeded()
+        mergedCFG = gConfigurationData.mergedCFG
+        syncCount = gConfigurationData.syncCount
+        index = cls.__index
+        if index is not None and index.mergedCFG is mergedCFG and index.syncCount == syncCount:
+            return index
+        cls.__indexLock.acquire()
+        try:
+            index = cls.__index
+            if index is None or index.mergedCFG is not mergedCFG or index.syncCount != syncCount:
+                index = cls(mergedCFG, syncCount)
+                index.build()
+                cls.__index = index
+            return index
+        finally:
+            try:
+                cls.__indexLock.release()
+            except _thread.error:
+                pass
+
+    @classmethod
+    def reset(cls, *args):
+        """Drop the index, it will be rebuilt by the next lookup
+
+        Registered as a CS new version listener, hence the unused arguments
+
+        :return: S_OK()
+        """
+        cls.__index = None
+        return S_OK()
+
+
+gRefresher.addListenerToNewVersionEvent(RegistryIndex.reset)
+
+
 def getUsernameForDN(dn, usersList=None):
     """Find DIRAC user for DN
 
@@ -22,13 +132,11 @@ def getUsernameForDN(dn, usersList=None):
     :return: S_OK(str)/S_ERROR()
     """
     dn = dn.strip()
-    if not usersList:
-        result = gConfig.getSections(f"{gBaseRegistrySection}/Users")
-        if not result["OK"]:
-            return result
-        usersList = result["Value"]
-    for username in usersList:
-        if dn in gConfig.getValue(f"{gBaseRegistrySection}/Users/{username}/DN", []):
+    candidates = RegistryIndex.get().usersForDN.get(dn, [])
+    if candidates and not usersList:
+        return S_OK(candidates[0])
+    for username in usersList or []:
+        if username in candidates:
             return S_OK(username)
     return S_ERROR(f"No username found for dn {dn}")
 
@@ -77,6 +185,10 @@ def __getGroupsWithAttr(attrName, value):
 
     :return: S_OK(list)/S_ERROR() -- contain list of groups
     """
+    if attrName in RegistryIndex.indexedGroupAttributes:
+        groups = list(RegistryIndex.get().groupsWithAttr[attrName].get(value, []))
+        return S_OK(groups) if groups else S_ERROR(f"No groups found for {attrName}={value}")
+
     result = gConfig.getSections(f"{gBaseRegistrySection}/Groups")
     if not result["OK"]:
         return result
@@ -131,13 +243,9 @@ def getHostnameForDN(dn):
     :return: S_OK()/S_ERROR()
     """
     dn = dn.strip()
-    result = gConfig.getSections(f"{gBaseRegistrySection}/Hosts")
-    if not result["OK"]:
-        return result
-    hostList = result["Value"]
-    for hostname in hostList:
-        if dn in gConfig.getValue(f"{gBaseRegistrySection}/Hosts/{hostname}/DN", []):
-            return S_OK(hostname)
+    hostnames = RegistryIndex.get().hostsForDN.get(dn)
+    if hostnames:
+        return S_OK(hostnames[0])
     return S_ERROR(f"No hostname found for dn {dn}")
 
 
@@ -269,8 +377,13 @@ def getPropertiesForGroup(groupName, defaultValue=None):
 
     :return: defaultValue or list
     """
+    if defaultValue is None or isinstance(defaultValue, list):
+        properties = RegistryIndex.get().propertiesForGroup.get(groupName)
+        if properties is None:
+            return [] if defaultValue is None else defaultValue
+        return list(properties)
     option = f"{gBaseRegistrySection}/Groups/{groupName}/Properties"
-    return gConfig.getValue(option, [] if defaultValue is None else defaultValue)
+    return gConfig.getValue(option, defaultValue)
 
 
 def getPropertiesForHost(hostName, defaultValue=None):
@@ -480,11 +593,7 @@ def getGroupsWithVOMSAttribute(vomsAttr):
 
     :return: list
     """
-    groups = []
-    for group in gConfig.getSections(f"{gBaseRegistrySection}/Groups").get("Value", []):
-        if vomsAttr == gConfig.getValue(f"{gBaseRegistrySection}/Groups/{group}/VOMSRole", ""):
-            groups.append(group)
-    return groups
+    return list(RegistryIndex.get().groupsForVOMSRole.get(vomsAttr, []))
 
 
 def getVOs():
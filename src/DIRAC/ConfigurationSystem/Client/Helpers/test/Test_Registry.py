@@ -0,0 +1,118 @@
+""" Unit tests for the Registry helper reverse lookups
+"""
+import pytest
+from diraccfg import CFG
+
+from DIRAC import gConfig
+from DIRAC.ConfigurationSystem.Client.Helpers import Registry
+
+testRegistryCFG = """
+Registry
+{
+  Users
+  {
+    userA
+    {
+      DN = /User/test/DN/CN=userA
+    }
+    userB
+    {
+      DN = /User/test/DN/CN=userB, /User/test/DN/CN=userBOther
+    }
+    userC
+    {
+      DN = /User/test/DN/CN=userB
+    }
+  }
+  Hosts
+  {
+    test.hostA.ch
+    {
+      DN = /User/test/DN/CN=test.hostA.ch
+      Properties = TrustedHost
+    }
+  }
+  Groups
+  {
+    group_user
+    {
+      Users = userA, userB
+      VO = testVO
+      Properties = NormalUser
+      VOMSRole = /testVO
+    }
+    group_admin
+    {
+      Users = userB
+      VO = testVO
+      Properties = NormalUser, ServiceAdministrator
+      VOMSRole = /testVO/Role=admin
+    }
+    group_empty
+    {
+      Users = userC
+      VO = otherVO
+      Properties =
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def registry():
+    cfg = CFG()
+    cfg.loadFromBuffer(testRegistryCFG)
+    gConfig.loadCFG(cfg)
+    yield Registry
+
+
+def test_getUsernameForDN(registry):
+    assert registry.getUsernameForDN("/User/test/DN/CN=userA")["Value"] == "userA"
+    assert registry.getUsernameForDN(" /User/test/DN/CN=userBOther ")["Value"] == "userB"
+    # The first user section owning the DN wins, unless a list of candidates is given
+    assert registry.getUsernameForDN("/User/test/DN/CN=userB")["Value"] == "userB"
+    assert registry.getUsernameForDN("/User/test/DN/CN=userB", ["userA", "userC"])["Value"] == "userC"
+    assert not registry.getUsernameForDN("/User/test/DN/CN=userA", ["userB"])["OK"]
+    assert not registry.getUsernameForDN("/User/test/DN/CN=unknown")["OK"]
+
+
+def test_getHostnameForDN(registry):
+    assert registry.getHostnameForDN("/User/test/DN/CN=test.hostA.ch")["Value"] == "test.hostA.ch"
+    assert not registry.getHostnameForDN("/User/test/DN/CN=userA")["OK"]
+
+
+def test_groupLookups(registry):
+    assert registry.getGroupsForUser("userB")["Value"] == ["group_admin", "group_user"]
+    assert registry.getGroupsForDN("/User/test/DN/CN=userA")["Value"] == ["group_user"]
+    assert not registry.getGroupsForUser("unknown")["OK"]
+    assert registry.getGroupsWithProperty("NormalUser")["Value"] == ["group_admin", "group_user"]
+    assert registry.getGroupsWithProperty("ServiceAdministrator")["Value"] == ["group_admin"]
+    assert not registry.getGroupsWithProperty("Unknown")["OK"]
+    assert registry.getGroupsWithVOMSAttribute("/testVO/Role=admin") == ["group_admin"]
+    assert registry.getGroupsWithVOMSAttribute("/unknown") == []
+
+
+def test_getPropertiesForGroup(registry):
+    assert registry.getPropertiesForGroup("group_admin") == ["NormalUser", "ServiceAdministrator"]
+    assert registry.getPropertiesForGroup("group_empty") == []
+    assert registry.getPropertiesForGroup("unknown") == []
+    assert registry.getPropertiesForGroup("unknown", ["Default"]) == ["Default"]
+    # Callers are free to modify the returned list
+    registry.getPropertiesForGroup("group_admin").append("Extra")
+    assert registry.getPropertiesForGroup("group_admin") == ["NormalUser", "ServiceAdministrator"]
+
+
+def test_indexFollowsConfiguration(registry):
+    index = registry.RegistryIndex.get()
+    assert registry.RegistryIndex.get() is index
+
+    cfg = CFG()
+    cfg.loadFromBuffer("Registry\n{\n Users\n {\n  userD\n  {\n   DN = /User/test/DN/CN=userD\n  }\n }\n}\n")
+    gConfig.loadCFG(cfg)
+    assert registry.RegistryIndex.get() is not index
+    assert registry.getUsernameForDN("/User/test/DN/CN=userD")["Value"] == "userD"
+
+    index = registry.RegistryIndex.get()
+    assert registry.RegistryIndex.reset("CSNewVersion", "version")["OK"]
+    assert registry.RegistryIndex.get() is not index
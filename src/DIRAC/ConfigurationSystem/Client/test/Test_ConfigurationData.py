@@ -0,0 +1,315 @@
+""" Unit tests for the configuration patches sent by the servers to refresh the clients
+"""
+import errno
+
+import pytest
+from diraccfg import CFG
+
+from DIRAC import S_ERROR, S_OK
+from DIRAC.ConfigurationSystem.private.ConfigurationData import ConfigurationData
+from DIRAC.ConfigurationSystem.private.RefresherBase import _updateFromRemoteLocation
+
+remoteCFGData = """
+DIRAC
+{
+  Configuration
+  {
+    Version = 1
+    Servers = dips://server1:9135/Configuration/Server
+  }
+  Setup = Production
+}
+Registry
+{
+  # The users
+  Users
+  {
+    user1
+    {
+      DN = /O=Test/CN=user1
+    }
+    user2
+    {
+      DN = /O=Test/CN=user2
+    }
+  }
+  DefaultGroup = user
+}
+Systems
+{
+  Framework
+  {
+    Production
+    {
+      Services
+      {
+        Monitoring
+        {
+          Port = 9142
+        }
+      }
+    }
+  }
+}
+"""
+
+localCFGData = """
+DIRAC
+{
+  Setup = Certification
+  Security
+  {
+    UseServerCertificate = yes
+  }
+}
+Systems
+{
+  LocalSystem
+  {
+    Option = value
+  }
+  Framework
+  {
+    Certification
+    {
+      Port = 1234
+    }
+  }
+}
+LocalSection
+{
+  Option = value
+}
+"""
+
+
+def _modifyRegistry(cfg):
+    cfg.setOption("Registry/Users/user1/DN", "/O=Test/CN=user1, /O=Test/CN=user1bis")
+    cfg.createNewSection("Registry/Users/user0", "New user")
+    cfg.setOption("Registry/Users/user0/DN", "/O=Test/CN=user0")
+    cfg.deleteKey("Registry/Users/user2")
+    cfg.setOption("Registry/DefaultGroup", "admin")
+
+
+def _modifyComments(cfg):
+    cfg["Registry"].setComment("Users", "All the users")
+    cfg["Systems"].setComment("Framework", "Framework system")
+
+
+def _modifyLocalOptions(cfg):
+    cfg.setOption("DIRAC/Setup", "Development")
+    cfg.createNewSection("LocalSection/Remote")
+    cfg.setOption("Systems/LocalSystem/Remote", "value")
+
+
+def _addSectionsAndOptions(cfg):
+    cfg["DIRAC"].addKey("NewOption", "value", "", "Configuration")
+    cfg.createNewSection("NewSection")
+    cfg.setOption("NewSection/Option", "value")
+    cfg.setOption("Systems/Framework/Production/Services/Monitoring/Protocol", "dips")
+    cfg.createNewSection("Systems/DataManagement/Production")
+
+
+def _deleteSections(cfg):
+    cfg.deleteKey("Systems/Framework")
+    cfg.deleteKey("Registry/DefaultGroup")
+
+
+@pytest.fixture
+def server():
+    """Configuration server with a first version of the configuration"""
+    serverData = ConfigurationData(False)
+    serverData.setAsService()
+    remoteCFG = CFG().loadFromBuffer(remoteCFGData)
+    # Patches are only sent when smaller than the whole configuration
+    for i in range(100):
+        remoteCFG.createNewSection(f"Registry/Users/bulk{i}")
+        remoteCFG.setOption(f"Registry/Users/bulk{i}/DN", f"/O=Test/CN=bulk{i}")
+    serverData.setRemoteCFG(remoteCFG)
+    return serverData
+
+
+@pytest.fixture
+def client(server):
+    """Client with the first version of the configuration, and a local configuration"""
+    clientData = ConfigurationData(False)
+    clientData.mergeWithLocal(CFG().loadFromBuffer(localCFGData))
+    clientData.loadRemoteCFGFromCompressedMem(server.getCompressedData())
+    return clientData
+
+
+def _newVersion(server, version, modifyFunction):
+    remoteCFG = server.getRemoteCFG().clone()
+    modifyFunction(remoteCFG)
+    remoteCFG.setOption("DIRAC/Configuration/Version", version)
+    server.setRemoteCFG(remoteCFG)
+
+
+def _checkClient(client, server):
+    assert client.getVersion() == server.getVersion()
+    assert str(client.remoteCFG) == str(server.remoteCFG)
+    assert str(client.mergedCFG) == str(server.remoteCFG.mergeWith(client.localCFG))
+
+
+@pytest.mark.parametrize(
+    "modifyFunction", [_modifyRegistry, _modifyComments, _modifyLocalOptions, _addSectionsAndOptions, _deleteSections]
+)
+def test_patch(server, client, modifyFunction):
+    """The patched configuration is the same as the one loaded from scratch"""
+    _newVersion(server, "2", modifyFunction)
+    syncCount = client.syncCount
+
+    patch = server.getCompressedPatch("1")
+    assert patch is not None
+    result = client.loadRemoteCFGPatchFromCompressedMem(patch)
+    assert result["OK"], result["Message"]
+    _checkClient(client, server)
+    assert client.syncCount > syncCount
+
+
+def test_patchSeveralVersions(server, client):
+    """Patches are chained, including the modifications done without a new version"""
+    _newVersion(server, "2", _modifyRegistry)
+    _newVersion(server, "3", _addSectionsAndOptions)
+    server.setOptionInCFG("Registry/DefaultGroup", "unversioned", server.remoteCFG)
+
+    result = client.loadRemoteCFGPatchFromCompressedMem(server.getCompressedPatch("1"))
+    assert result["OK"], result["Message"]
+    _checkClient(client, server)
+    assert client.extractOptionFromCFG("/Registry/DefaultGroup") == "unversioned"
+
+    # A client with an unknown version gets no patch
+    assert server.getCompressedPatch("0") is None
+
+    # Neither does one for which the patch would be bigger than the configuration
+    def _modifyAllUsers(cfg):
+        for user in cfg["Registry/Users"].listSections():
+            cfg.setOption(f"Registry/Users/{user}/DN", f"/O=Other/CN={user}")
+
+    _newVersion(server, "4", _modifyAllUsers)
+    assert server.getCompressedPatch("3") is None
+
+
+def test_patchHistorySize(server):
+    """Only the last versions can be patched"""
+    server.setOptionInCFG("DIRAC/Configuration/PatchHistorySize", "2", server.localCFG)
+    for version in range(2, 6):
+        _newVersion(server, str(version), lambda cfg: cfg.setOption("DIRAC/Counter", version))
+    assert server.getCompressedPatch("2") is None
+    assert server.getCompressedPatch("3") is not None
+    assert server.getCompressedPatch("4") is not None
+
+
+def test_patchFailure(server, client):
+    """A patch that does not apply is refused and leaves the configuration untouched"""
+    _newVersion(server, "2", _modifyRegistry)
+    patch = server.getCompressedPatch("1")
+    client.remoteCFG.deleteKey("Registry/Users/user2")
+    client.sync()
+    remoteCFG = str(client.remoteCFG)
+
+    result = client.loadRemoteCFGPatchFromCompressedMem(patch)
+    assert not result["OK"]
+    assert str(client.remoteCFG) == remoteCFG
+    assert client.getVersion() == "1"
+
+    assert not client.loadRemoteCFGPatchFromCompressedMem(b"not a patch")["OK"]
+
+
+class FakeServiceClient:
+    """Client of a configuration server, possibly not knowing about patches"""
+
+    def __init__(self, server, supportsPatches):
+        self.serverURL = f"dips://server{int(supportsPatches)}:9135/Configuration/Server"
+        self.server = server
+        self.supportsPatches = supportsPatches
+        # Error of the next patch request, e.g. a timeout
+        self.patchError = None
+        self.calls = []
+
+    def getCompressedPatchIfNewer(self, sClientVersion):
+        self.calls.append("patch")
+        if not self.supportsPatches:
+            return S_ERROR("Unknown method getCompressedPatchIfNewer")
+        if self.patchError:
+            result, self.patchError = self.patchError, None
+            return result
+        retDict = {"newestVersion": self.server.getVersion()}
+        patch = self.server.getCompressedPatch(sClientVersion)
+        if patch is not None:
+            retDict["patch"] = patch
+        return S_OK(retDict)
+
+    def getCompressedDataIfNewer(self, sClientVersion):
+        self.calls.append("data")
+        return S_OK({"newestVersion": self.server.getVersion(), "data": self.server.getCompressedData()})
+
+
+@pytest.mark.parametrize(
+    "supportsPatches, expectedCalls", [(True, ["patch", "patch"]), (False, ["patch", "data", "data"])]
+)
+def test_updateFromRemoteLocation(mocker, server, client, supportsPatches, expectedCalls):
+    """The refresher gets patches from the servers that support them"""
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase.gConfigurationData", client)
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase._serversWithoutPatches", set())
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase.gEventDispatcher")
+    serviceClient = FakeServiceClient(server, supportsPatches)
+
+    for version in ("2", "3"):
+        _newVersion(server, version, _addSectionsAndOptions if version == "2" else _modifyRegistry)
+        assert _updateFromRemoteLocation(serviceClient)["OK"]
+        _checkClient(client, server)
+    assert serviceClient.calls == expectedCalls
+
+
+def test_updateFromRemoteLocationError(mocker, server, client):
+    """A server failing to send a patch is still asked for patches afterwards"""
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase.gConfigurationData", client)
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase._serversWithoutPatches", set())
+    mocker.patch("DIRAC.ConfigurationSystem.private.RefresherBase.gEventDispatcher")
+    serviceClient = FakeServiceClient(server, True)
+
+    for version, patchError in (("2", S_ERROR(errno.ETIMEDOUT, "Timeout")), ("3", None)):
+        serviceClient.patchError = patchError
+        _newVersion(server, version, _addSectionsAndOptions if version == "2" else _modifyRegistry)
+        assert _updateFromRemoteLocation(serviceClient)["OK"]
+        _checkClient(client, server)
+    assert serviceClient.calls == ["patch", "data", "patch"]
+
+
+def test_optionCache(mocker, client):
+    """The options of the merged CFG are looked up once per configuration"""
+    assert client.extractOptionFromCFG("/DIRAC/Setup") == "Certification"
+    assert client.extractOptionFromCFG("/DIRAC/Unknown") is None
+
+    # Cached values, missing ones included, are read without entering the danger zone
+    dangerZoneStart = mocker.patch.object(client, "dangerZoneStart")
+    assert client.extractOptionFromCFG("/DIRAC/Setup") == "Certification"
+    assert client.extractOptionFromCFG("/DIRAC/Unknown") is None
+    dangerZoneStart.assert_not_called()
+    mocker.stopall()
+
+    # The cache is dropped by a sync
+    client.setOptionInCFG("/DIRAC/Unknown", "known")
+    assert client.extractOptionFromCFG("/DIRAC/Unknown") == "known"
+
+    # And when the merged CFG is replaced without one
+    mergedCFG = client.mergedCFG.clone()
+    mergedCFG.setOption("DIRAC/Setup", "Replaced")
+    client.mergedCFG = mergedCFG
+    assert client.extractOptionFromCFG("/DIRAC/Setup") == "Replaced"
+
+    # Other CFGs are not cached
+    assert client.extractOptionFromCFG("/DIRAC/Setup", client.remoteCFG) == "Production"
+    assert client.extractOptionFromCFG("/DIRAC/Setup", client.localCFG) == "Certification"
+
+
+def test_optionCachePatch(server, client):
+    """The cache is dropped when the merged CFG is patched in place"""
+    assert client.extractOptionFromCFG("/Registry/DefaultGroup") == "user"
+    _newVersion(server, "2", _modifyRegistry)
+    mergedCFG = client.mergedCFG
+
+    assert client.loadRemoteCFGPatchFromCompressedMem(server.getCompressedPatch("1"))["OK"]
+    assert client.mergedCFG is mergedCFG
+    assert client.extractOptionFromCFG("/Registry/DefaultGroup") == "admin"
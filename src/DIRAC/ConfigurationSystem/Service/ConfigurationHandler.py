@@ -51,6 +51,20 @@ class ConfigurationHandler(RequestHandler):
             retDict["data"] = gServiceInterface.getCompressedConfigurationData()
         return S_OK(retDict)
 
+    types_getCompressedPatchIfNewer = [str]
+
+    @classmethod
+    def export_getCompressedPatchIfNewer(cls, sClientVersion):
+        sVersion = gServiceInterface.getVersion()
+        retDict = {"newestVersion": sVersion}
+        if sClientVersion < sVersion:
+            sPatch = gServiceInterface.getCompressedConfigurationPatch(sClientVersion)
+            if sPatch is None:
+                retDict["data"] = gServiceInterface.getCompressedConfigurationData()
+            else:
+                retDict["patch"] = sPatch
+        return S_OK(retDict)
+
     types_publishSlaveServer = [str]
 
     @classmethod
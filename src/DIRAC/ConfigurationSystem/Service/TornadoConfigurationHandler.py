@@ -57,6 +57,23 @@ class TornadoConfigurationHandler(TornadoService):
             retDict["data"] = b64encode(self.ServiceInterface.getCompressedConfigurationData()).decode()
         return S_OK(retDict)
 
+    def export_getCompressedPatchIfNewer(self, sClientVersion):
+        """
+        Returns the modifications since the client version if a newer configuration exists,
+        or the whole configuration if they are not known, if not just returns the version
+
+        :param sClientVersion: Version used by client
+        """
+        sVersion = self.ServiceInterface.getVersion()
+        retDict = {"newestVersion": sVersion}
+        if sClientVersion < sVersion:
+            sPatch = self.ServiceInterface.getCompressedConfigurationPatch(sClientVersion)
+            if sPatch is None:
+                retDict["data"] = b64encode(self.ServiceInterface.getCompressedConfigurationData()).decode()
+            else:
+                retDict["patch"] = b64encode(sPatch).decode()
+        return S_OK(retDict)
+
     def export_publishSlaveServer(self, sURL):
         """
         Used by slave server to register as a slave server.
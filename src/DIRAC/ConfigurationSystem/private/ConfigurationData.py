@@ -2,6 +2,7 @@
 """
 
 import os.path
+import json
 import zlib
 import zipfile
 import _thread
@@ -17,6 +18,122 @@ from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.Core.Utilities.LockRing import LockRing
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 
+_notCached = object()
+
+
+def _checkModifications(cfg, modList, parentPath=""):
+    """Check, without modifying it, that a list of modifications can be applied to a CFG
+
+    :param cfg: CFG to check
+    :param list modList: modifications as returned by CFG.getModifications
+    :return: S_OK() / S_ERROR()
+    """
+    for modAction in modList:
+        action, key = modAction[0], modAction[1]
+        path = f"{parentPath}/{key}"
+        if action in ("addOpt", "addSec"):
+            if cfg.existsKey(key):
+                return S_ERROR(f"{path} already exists")
+        elif action in ("modOpt", "delOpt"):
+            if not cfg.isOption(key):
+                return S_ERROR(f"Option {path} does not exist")
+        elif action in ("modSec", "delSec"):
+            if not cfg.isSection(key):
+                return S_ERROR(f"Section {path} does not exist")
+            if action == "modSec":
+                result = _checkModifications(cfg[key], modAction[3], path)
+                if not result["OK"]:
+                    return result
+        else:
+            return S_ERROR(f"Unknown modification {action} for {path}")
+    return S_OK()
+
+
+def _getMergedBeforeKey(mergedCFG, remoteCFG, localCFG, key):
+    """Get the key before which a remote key is in the merged CFG, as built by CFG.mergeWith:
+    the remote options, the local ones, then the remote sections and the local ones. Sections
+    that are not defined locally are copies of the remote ones
+
+    :return: key, or "" if it is the last one
+    """
+    if localCFG is None:
+        remoteKeys = remoteCFG.listAll()
+        for remoteKey in remoteKeys[remoteKeys.index(key) + 1 :]:
+            if mergedCFG.existsKey(remoteKey):
+                return remoteKey
+        return ""
+    isOption = remoteCFG.isOption(key)
+    remoteKeys = remoteCFG.listOptions() if isOption else remoteCFG.listSections()
+    remotePositions = {remoteKey: position for position, remoteKey in enumerate(remoteKeys)}
+    keyPosition = remotePositions[key]
+    for mergedKey in mergedCFG.listAll():
+        if mergedKey == key:
+            continue
+        # Remote keys of the same type that are before the key
+        if remotePositions.get(mergedKey, keyPosition) < keyPosition:
+            continue
+        # Options are before sections
+        if not isOption and mergedCFG.isOption(mergedKey):
+            continue
+        return mergedKey
+    return ""
+
+
+def _moveMergedKey(mergedCFG, remoteCFG, localCFG, key):
+    """Move a key of the merged CFG to its position, if the remote modifications changed it"""
+    beforeKey = _getMergedBeforeKey(mergedCFG, remoteCFG, localCFG, key)
+    mergedKeys = mergedCFG.listAll()
+    position = mergedKeys.index(key)
+    nextKey = mergedKeys[position + 1] if position + 1 < len(mergedKeys) else ""
+    if nextKey != beforeKey:
+        value = mergedCFG[key]
+        comment = mergedCFG.getComment(key)
+        mergedCFG.deleteKey(key)
+        mergedCFG.addKey(key, value, comment, beforeKey)
+
+
+def _patchMergedCFG(mergedCFG, remoteCFG, localCFG, modList):
+    """Apply to a merged CFG the modifications already applied to the remote CFG it was merged
+    from, so that it is the same as remoteCFG.mergeWith( localCFG )
+
+    :param mergedCFG: merged CFG, modified in place
+    :param remoteCFG: remote CFG, with the modifications applied
+    :param localCFG: local CFG, or None if there is no corresponding local section
+    :param list modList: modifications as returned by CFG.getModifications
+    :return: True, or False if a modification involves a local option or section and the
+             merged CFG has to be rebuilt (it may then have been partially modified)
+    """
+    for modAction in modList:
+        action, key = modAction[0], modAction[1]
+        localSection = None
+        if localCFG is not None and localCFG.existsKey(key):
+            # Only the remote part of a section defined in both can be patched
+            if action != "modSec" or not localCFG.isSection(key):
+                return False
+            localSection = localCFG[key]
+        if action in ("delOpt", "delSec"):
+            mergedCFG.deleteKey(key)
+            continue
+        comment = modAction[4].strip()
+        if action == "addOpt":
+            mergedCFG.addKey(key, modAction[3], comment, _getMergedBeforeKey(mergedCFG, remoteCFG, localCFG, key))
+            continue
+        if action == "addSec":
+            mergedCFG.addKey(
+                key, remoteCFG[key].clone(), comment, _getMergedBeforeKey(mergedCFG, remoteCFG, localCFG, key)
+            )
+            continue
+        if action == "modOpt":
+            mergedCFG.setOption(key, modAction[3], comment)
+        else:
+            # The comment of a section defined in both comes from the local one
+            if localSection is None:
+                mergedCFG.setComment(key, comment)
+            if not _patchMergedCFG(mergedCFG[key], remoteCFG[key], localSection, modAction[3]):
+                return False
+        _moveMergedKey(mergedCFG, remoteCFG, localCFG, key)
+    return True
+
 
 class ConfigurationData:
     def __init__(self, loadDefaultCFG=True):
@@ -30,6 +147,15 @@ class ConfigurationData:
             self.runningThreadsNumber = 0
 
         self.__compressedConfigurationData = None
+        # Version and copy of the remote CFG when its version was last changed (only kept by services)
+        self.__versionSnapshot = None
+        # { older version : ( next version, modifications from the older version to the next one ) }
+        self.__versionPatches = {}
+        self.__compressedPatches = {}
+        # Incremented each time the merged CFG changes
+        self.syncCount = 0
+        # ( merged CFG, { path : value of the option in the merged CFG } )
+        self.__optionCache = (None, {})
         self.configurationPath = "/DIRAC/Configuration"
         self.backupsDir = os.path.join(DIRAC.rootPath, "etc", "csbackup")
         self._isService = False
@@ -51,6 +177,13 @@ class ConfigurationData:
     def sync(self):
         gLogger.debug("Updating configuration internals")
         self.mergedCFG = self.remoteCFG.mergeWith(self.localCFG)
+        self.__updateInternals()
+
+    def __updateInternals(self):
+        """Update what is derived from the merged and remote CFGs"""
+        self.syncCount += 1
+        # Swapped as a whole, so that the cached values always belong to the merged CFG they are read with
+        self.__optionCache = (self.mergedCFG, {})
         self.remoteServerList = []
         localServers = self.extractOptionFromCFG(
             f"{self.configurationPath}/Servers", self.localCFG, disableDangerZones=True
@@ -64,6 +197,56 @@ class ConfigurationData:
             self.remoteServerList.extend(List.fromChar(remoteServers, ","))
         self.remoteServerList = List.uniqueElements(self.remoteServerList)
         self.__compressedConfigurationData = None
+        if self._isService:
+            self.__recordVersionPatch()
+
+    def __recordVersionPatch(self):
+        """Keep the modifications of the remote CFG between its last versions, to send patches to the clients"""
+        version = self.getVersion(self.remoteCFG)
+        snapshot = self.__versionSnapshot
+        # The remote CFG may also have been modified without changing its version
+        self.__compressedPatches = {}
+        if snapshot is not None and snapshot[0] == version:
+            return
+        if snapshot is not None:
+            versionPatches = dict(self.__versionPatches)
+            versionPatches[snapshot[0]] = (version, snapshot[1].getModifications(self.remoteCFG))
+            historySize = self.getPatchHistorySize()
+            for oldVersion in list(versionPatches)[: max(len(versionPatches) - historySize, 0)]:
+                del versionPatches[oldVersion]
+            self.__versionPatches = versionPatches
+        self.__versionSnapshot = (version, self.remoteCFG.clone())
+
+    def getCompressedPatch(self, fromVersion):
+        """Get the modifications bringing the remote CFG from an older version to the current one
+
+        :param str fromVersion: version of the remote CFG to patch
+        :return: compressed JSON list of modification lists (see CFG.getModifications) to apply in order,
+                 or None if no patch can be built for this version
+        """
+        compressedPatches = self.__compressedPatches
+        if fromVersion in compressedPatches:
+            return compressedPatches[fromVersion]
+        snapshot = self.__versionSnapshot
+        versionPatches = self.__versionPatches
+        if snapshot is None:
+            return None
+        modLists = []
+        version = fromVersion
+        while version != snapshot[0]:
+            if version not in versionPatches or len(modLists) >= len(versionPatches):
+                return None
+            version, modList = versionPatches[version]
+            modLists.append(modList)
+        lastModList = snapshot[1].getModifications(self.remoteCFG)
+        if lastModList:
+            modLists.append(lastModList)
+        compressedPatch = zlib.compress(json.dumps(modLists).encode(), 9)
+        # No point in sending a patch bigger than the whole configuration
+        if len(compressedPatch) >= len(self.getCompressedData()):
+            compressedPatch = None
+        compressedPatches[fromVersion] = compressedPatch
+        return compressedPatch
 
     def loadFile(self, fileName):
         try:
@@ -98,6 +281,48 @@ class ConfigurationData:
         self.unlock()
         self.sync()
 
+    def loadRemoteCFGPatchFromCompressedMem(self, data):
+        """Apply a patch built by getCompressedPatch to the remote CFG. The merged CFG is
+        updated in place as well, unless the modifications involve local options
+
+        :param data: compressed patch
+        :return: S_OK() / S_ERROR() if a modification list can't be applied. The ones applied
+                 before are kept, so that the configuration is consistent at an intermediate version
+        """
+        if isinstance(data, str):
+            data = data.encode(errors="surrogateescape")
+        try:
+            modLists = json.loads(zlib.decompress(data).decode())
+        except (zlib.error, ValueError) as e:
+            return S_ERROR(f"Can't decode configuration patch: {repr(e)}")
+        result = S_OK()
+        applied = False
+        for modList in modLists:
+            self.lock()
+            try:
+                result = _checkModifications(self.remoteCFG, modList)
+                if not result["OK"]:
+                    break
+                result = self.remoteCFG.applyModifications(modList)
+                if not result["OK"]:
+                    # Should not happen after the check, the merged CFG has to be rebuilt from scratch
+                    self.mergedCFG = self.remoteCFG.mergeWith(self.localCFG)
+                    applied = True
+                    break
+                applied = True
+                try:
+                    patched = _patchMergedCFG(self.mergedCFG, self.remoteCFG, self.localCFG, modList)
+                except Exception as e:
+                    gLogger.debug("Can't patch merged CFG", repr(e))
+                    patched = False
+                if not patched:
+                    self.mergedCFG = self.remoteCFG.mergeWith(self.localCFG)
+            finally:
+                self.unlock()
+        if applied:
+            self.__updateInternals()
+        return result
+
     def loadConfigurationData(self, fileName=False):
         name = self.getName()
         self.lock()
@@ -152,20 +377,38 @@ class ConfigurationData:
         return self.dangerZoneEnd(None)
 
     def extractOptionFromCFG(self, path, cfg=False, disableDangerZones=False):
-        if not cfg:
-            cfg = self.mergedCFG
+        if cfg and cfg is not self.mergedCFG:
+            return self.__extractOption(path, cfg, disableDangerZones)
+        # The values already looked up in the merged CFG are read without entering the danger zone
+        mergedCFG, optionCache = self.__optionCache
+        if mergedCFG is self.mergedCFG:
+            value = optionCache.get(path, _notCached)
+            if value is not _notCached:
+                return value
+        else:
+            # The merged CFG has been replaced without a sync
+            mergedCFG = self.mergedCFG
+            optionCache = {}
+            self.__optionCache = (mergedCFG, optionCache)
+        value = self.__extractOption(path, mergedCFG, disableDangerZones)
+        optionCache[path] = value
+        return value
+
+    def __extractOption(self, path, cfg, disableDangerZones):
         if not disableDangerZones:
             self.dangerZoneStart()
         try:
             levelList = [level.strip() for level in path.split("/") if level.strip() != ""]
             for section in levelList[:-1]:
                 cfg = cfg[section]
-            if levelList[-1] in cfg.listOptions():
-                return self.dangerZoneEnd(cfg[levelList[-1]])
+            if cfg.isOption(levelList[-1]):
+                return cfg[levelList[-1]]
         except Exception:
             pass
-        if not disableDangerZones:
-            self.dangerZoneEnd()
+        finally:
+            if not disableDangerZones:
+                self.dangerZoneEnd()
+        return None
 
     def setOptionInCFG(self, path, value, cfg=False, disableDangerZones=False):
         if not cfg:
@@ -241,6 +484,12 @@ class ConfigurationData:
         except Exception:
             return 600
 
+    def getPatchHistorySize(self):
+        try:
+            return int(self.extractOptionFromCFG(f"{self.configurationPath}/PatchHistorySize", self.mergedCFG))
+        except Exception:
+            return 10
+
     def mergingEnabled(self):
         try:
             val = self.extractOptionFromCFG(f"{self.configurationPath}/EnableAutoMerge", self.mergedCFG)
@@ -1,3 +1,4 @@
+import errno
 import time
 import random
 
@@ -6,27 +7,65 @@ from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationDat
 from DIRAC.ConfigurationSystem.Client.PathFinder import getGatewayURLs
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 from DIRAC.Core.Utilities import List
+from DIRAC.Core.Utilities.DErrno import cmpError
 from DIRAC.Core.Utilities.EventDispatcher import gEventDispatcher
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 
 
+# Servers that do not support getCompressedPatchIfNewer
+_serversWithoutPatches = set()
+
+
+def _isUnknownMethod(result):
+    """
+    Whether a call failed because the server does not know the method: DISET answers "Unknown method",
+    or "Cannot forward unknown method" through a gateway, and HTTPS answers that it is not implemented
+    """
+    return cmpError(result, errno.ENOSYS) or "unknown method" in result["Message"].lower()
+
+
 def _updateFromRemoteLocation(serviceClient):
     """
-    Refresh the configuration
+    Refresh the configuration, applying only the modifications since the local version if the server can send them
     """
     gLogger.debug("", f"Trying to refresh from {serviceClient.serverURL}")
     localVersion = gConfigurationData.getVersion()
+    if serviceClient.serverURL not in _serversWithoutPatches:
+        retVal = serviceClient.getCompressedPatchIfNewer(localVersion)
+        if retVal["OK"] and "patch" in retVal["Value"]:
+            newestVersion = retVal["Value"]["newestVersion"]
+            gLogger.debug("New version available", f"Patching to version {newestVersion}...")
+            result = gConfigurationData.loadRemoteCFGPatchFromCompressedMem(retVal["Value"]["patch"])
+            if result["OK"]:
+                gLogger.debug(f"Updated to version {gConfigurationData.getVersion()}")
+                gEventDispatcher.triggerEvent("CSNewVersion", newestVersion, threaded=True)
+                return S_OK()
+            gLogger.warn("Can't apply configuration patch, getting the whole configuration", result["Message"])
+            localVersion = gConfigurationData.getVersion()
+        elif retVal["OK"]:
+            return _loadRemoteData(localVersion, retVal["Value"])
+        elif _isUnknownMethod(retVal):
+            # The server does not know about patches
+            _serversWithoutPatches.add(serviceClient.serverURL)
+        else:
+            gLogger.debug("Can't get a configuration patch, getting the whole configuration", retVal["Message"])
     retVal = serviceClient.getCompressedDataIfNewer(localVersion)
-    if retVal["OK"]:
-        dataDict = retVal["Value"]
-        newestVersion = dataDict["newestVersion"]
-        if localVersion < newestVersion:
-            gLogger.debug("New version available", f"Updating to version {newestVersion}...")
-            gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict["data"])
-            gLogger.debug(f"Updated to version {gConfigurationData.getVersion()}")
-            gEventDispatcher.triggerEvent("CSNewVersion", newestVersion, threaded=True)
-        return S_OK()
-    return retVal
+    if not retVal["OK"]:
+        return retVal
+    return _loadRemoteData(localVersion, retVal["Value"])
+
+
+def _loadRemoteData(localVersion, dataDict):
+    """
+    Load the whole configuration returned by the server, if newer
+    """
+    newestVersion = dataDict["newestVersion"]
+    if localVersion < newestVersion:
+        gLogger.debug("New version available", f"Updating to version {newestVersion}...")
+        gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict["data"])
+        gLogger.debug(f"Updated to version {gConfigurationData.getVersion()}")
+        gEventDispatcher.triggerEvent("CSNewVersion", newestVersion, threaded=True)
+    return S_OK()
 
 
 class RefresherBase:
@@ -246,6 +246,9 @@ class ServiceInterfaceBase:
     def getCompressedConfigurationData(self):
         return gConfigurationData.getCompressedData()
 
+    def getCompressedConfigurationPatch(self, fromVersion):
+        return gConfigurationData.getCompressedPatch(fromVersion)
+
     def getVersion(self):
         return gConfigurationData.getVersion()
 
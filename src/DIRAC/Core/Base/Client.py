@@ -8,6 +8,7 @@ from functools import partial, partialmethod
 
 from DIRAC.Core.Tornado.Client.ClientSelector import RPCClientSelector
 from DIRAC.Core.Tornado.Client.TornadoClient import TornadoClient
+from DIRAC.Core.Utilities import AsyncRPC
 from DIRAC.Core.Utilities.Extensions import extensionsByPriority
 from DIRAC.Core.Utilities.Decorators import deprecated
 from DIRAC.Core.DISET import DEFAULT_RPC_TIMEOUT
@@ -94,6 +95,19 @@ class Client:
         # Execute the method
         return getattr(rpcClient, toExecute)(*parms)
 
+    def callAsync(self, method, *parms, **kws):
+        """Call a service method without waiting for its result, see :py:mod:`~DIRAC.Core.Utilities.AsyncRPC`
+
+        :param str method: name of the service method
+        :param parms: arguments of the method
+        :param kws: timeout and url, as for executeRPC. An rpc client can't be given,
+                    since they can't be used by several threads
+        :return: concurrent.futures.Future of the S_OK/S_ERROR result
+        """
+        if kws.get("rpc"):
+            raise ValueError("callAsync does not accept an rpc client")
+        return AsyncRPC.submit(self.executeRPC, *parms, call=method, **kws)
+
     def _getRPC(self, rpc=None, url="", timeout=None):
         """Return an RPCClient object constructed following the attributes.
 
@@ -110,8 +124,12 @@ class Client:
 
             self.__kwargs["timeout"] = timeout
 
+            # Copy the arguments, the calls may be done by several threads (see callAsync)
             rpc = RPCClientSelector(
-                url, httpsClient=self.httpsClient, diracxClient=getattr(self, "diracxClient", None), **self.__kwargs
+                url,
+                httpsClient=self.httpsClient,
+                diracxClient=getattr(self, "diracxClient", None),
+                **dict(self.__kwargs, timeout=timeout),
             )
         return rpc
 
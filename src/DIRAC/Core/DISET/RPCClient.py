@@ -1,6 +1,7 @@
 """ RPCClient object is used to create RPC connection to services
 """
 from DIRAC.Core.DISET.private.InnerRPCClient import InnerRPCClient
+from DIRAC.Core.Utilities import AsyncRPC
 
 
 class _MagicMethod:
@@ -81,6 +82,18 @@ class RPCClient:
         """
         return self.__innerRPCClient.executeRPC(sFunctionName, args, **kwargs)
 
+    def callAsync(self, sFunctionName, *args):
+        """Call a remote function without waiting for its result, see :py:mod:`~DIRAC.Core.Utilities.AsyncRPC`.
+        The call is done by a new RPCClient with the same arguments, since they can't be used by several threads
+
+        :param sFunctionName: name of the remote function
+        :param args: arguments to pass to the function
+        :return: concurrent.futures.Future of the S_OK/S_ERROR result
+        """
+        serviceName = self.__innerRPCClient._destinationSrv
+        kwargs = dict(self.__innerRPCClient.kwargs)
+        return AsyncRPC.submit(lambda: getattr(RPCClient(serviceName, **kwargs), sFunctionName)(*args))
+
     def __getattr__(self, attrName):
         """Function for emulating the existence of functions.
 
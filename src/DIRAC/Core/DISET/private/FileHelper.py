@@ -266,6 +266,31 @@ class FileHelper:
         self.__fileBytes = sentBytes
         return S_OK()
 
+    def iterableToNetwork(self, iterable):
+        """Send the chunks of data produced by an iterable as they come, without holding all of them in memory"""
+        self.__oMD5 = hashlib.md5()
+        iPacketSize = self.packetSize
+        self.__fileBytes = 0
+        sentBytes = 0
+        try:
+            for sBuffer in iterable:
+                for ioffset in range(0, len(sBuffer), iPacketSize):
+                    dRetVal = self.sendData(sBuffer[ioffset : ioffset + iPacketSize])
+                    if not dRetVal["OK"]:
+                        return dRetVal
+                    if "AbortTransfer" in dRetVal and dRetVal["AbortTransfer"]:
+                        self.__log.verbose("Transfer aborted")
+                        return S_OK()
+                sentBytes += len(sBuffer)
+            self.sendEOF()
+        except Exception as e:
+            gLogger.exception("Error while sending data")
+            # Let the client know that what it received is incomplete
+            self.sendError(f"Error while sending data: {str(e)}")
+            return S_ERROR(f"Error while sending data: {str(e)}")
+        self.__fileBytes = sentBytes
+        return S_OK()
+
     def getFileDescriptor(self, uFile, sFileMode):
         closeAfter = True
         if isinstance(uFile, str):
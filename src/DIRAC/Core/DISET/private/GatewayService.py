@@ -247,6 +247,17 @@ class GatewayService(Service):
                 if clientVersion < serviceVersion:
                     retDict["data"] = gConfigurationData.getCompressedData()
                 return S_OK(retDict)
+            if method == "getCompressedPatchIfNewer":
+                serviceVersion = gConfigurationData.getVersion()
+                retDict = {"newestVersion": serviceVersion}
+                clientVersion = params[0]
+                if clientVersion < serviceVersion:
+                    patch = gConfigurationData.getCompressedPatch(clientVersion)
+                    if patch is None:
+                        retDict["data"] = gConfigurationData.getCompressedData()
+                    else:
+                        retDict["patch"] = patch
+                return S_OK(retDict)
         # Default
         rpcClient = RPCClient(targetService, **clientInitArgs)
         methodObj = getattr(rpcClient, method)
@@ -23,6 +23,7 @@
 # pylint: disable=broad-except
 
 from DIRAC.Core.Tornado.Client.private.TornadoBaseClient import TornadoBaseClient
+from DIRAC.Core.Utilities import AsyncRPC
 from DIRAC.Core.Utilities.JEncode import encode
 from DIRAC.Core.Utilities.File import getGlobbedTotalSize
 
@@ -64,6 +65,20 @@ class TornadoClient(TornadoBaseClient):
         retVal["rpcStub"] = (self._getBaseStub(), method, list(args))
         return retVal
 
+    def callAsync(self, method, *args):
+        """
+        Calls a remote service without waiting for the response, see :py:mod:`~DIRAC.Core.Utilities.AsyncRPC`.
+        The call is done by a new client with the same arguments, sharing the same connections (see
+        :py:class:`~DIRAC.Core.Tornado.Client.private.TornadoBaseClient.SessionPool`)
+
+        :param str method: remote procedure name
+        :param args: list of arguments
+        :returns: concurrent.futures.Future of the response from server
+        """
+        serviceName = self._destinationSrv
+        kwargs = dict(self.kwargs)
+        return AsyncRPC.submit(lambda: type(self)(serviceName, **kwargs).executeRPC(method, *args))
+
     def receiveFile(self, destFile, *args):
         """
         Equivalent of :py:meth:`~DIRAC.Core.DISET.TransferClient.TransferClient.receiveFile`
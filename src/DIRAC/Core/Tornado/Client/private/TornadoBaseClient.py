@@ -7,6 +7,10 @@
     KeepAlive lapse is also removed because managed by request,
     see https://requests.readthedocs.io/en/latest/user/advanced/#keep-alive
 
+    The requests sessions, and so their connections, are shared by all the clients of the process
+    talking to the same host with the same credentials (see :py:class:`SessionPool`), so that
+    short-lived clients do not pay a new TLS handshake for each call.
+
     If necessary this class can be modified to define number of retry in requests, documentation does not give
     lot of informations but you can see this simple solution from StackOverflow.
     After some tests request seems to retry 3 times by default.
@@ -23,13 +27,18 @@
 """
 
 # pylint: disable=broad-except
+import atexit
 import io
 import errno
+import hashlib
 import os
 import requests
 import ssl
 import tempfile
+import threading
+import time
 from http import HTTPStatus
+from urllib.parse import urlparse
 
 
 from DIRAC import S_OK, S_ERROR, gLogger
@@ -42,7 +51,7 @@ from DIRAC.ConfigurationSystem.Client.PathFinder import getServiceURLs, getGatew
 
 from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
 from DIRAC.Core.Security import Locations
-from DIRAC.Core.Utilities import Network
+from DIRAC.Core.Utilities import MsgPackEncode, Network
 from DIRAC.Core.Utilities.JEncode import decode, encode
 
 
@@ -99,7 +108,7 @@ class TornadoBaseClient:
 
         self._destinationSrv = serviceName
         self._serviceName = serviceName
-        self.__session = None
+        self.__caLocation = None
 
         self.kwargs = kwargs
         self.__idp = None
@@ -114,6 +123,10 @@ class TornadoBaseClient:
         # RPCClient('dips://volhcb38.cern.ch:9162/Framework/SystemAdministrator')
         self.__nbOfUrls = 1
         self.__bannedUrls = []
+        # Ask for msgpack encoded responses if possible, the services that do not support it answer in JSON
+        self.__acceptMsgPack = MsgPackEncode.isAvailable() and os.environ.get(
+            "DIRAC_HTTPS_MSGPACK", "yes"
+        ).lower() not in ("n", "no", "false", "0", "off")
 
         # For pylint...
         self.setup = None
@@ -223,10 +236,12 @@ class TornadoBaseClient:
 
         # Prepare the session
         skip_ca_check = self.kwargs.get(self.KW_SKIP_CA_CHECK, False if self.__useCertificates else skipCACheck())
-        retVal = _create_session(verified=not skip_ca_check)
-        if not retVal["OK"]:  # pylint: disable=unsubscriptable-object
-            return retVal
-        self.__session = retVal["Value"]  # pylint: disable=unsubscriptable-object
+        if skip_ca_check:
+            self.__caLocation = False
+        else:
+            self.__caLocation = Locations.getCAsLocation()
+            if not self.__caLocation:
+                return S_ERROR("No CAs found!")
 
         # Use tokens?
         if self.KW_USE_ACCESS_TOKEN in self.kwargs:
@@ -508,6 +523,7 @@ class TornadoBaseClient:
             return url
         url = url["Value"]
 
+        proxyString = None
         if self.kwargs.get(self.KW_PROXY_LOCATION):
             auth = {"cert": self.kwargs[self.KW_PROXY_LOCATION]}
         # getting certificate
@@ -547,16 +563,23 @@ class TornadoBaseClient:
             auth = {"headers": {"Authorization": f"Bearer {token['access_token']}"}}
         elif self.kwargs.get(self.KW_PROXY_STRING):
             # TODO: This code path cannot work with DiracX
-            tmpHandle, cert = tempfile.mkstemp()
-            fp = os.fdopen(tmpHandle, "w")
-            fp.write(self.kwargs[self.KW_PROXY_STRING])
-            fp.close()
+            # The session pool writes the proxy to the certificate file of the session
+            proxyString = self.kwargs[self.KW_PROXY_STRING]
+            auth = {}
         else:
             auth = {"cert": Locations.getProxyLocation()}
             if not auth["cert"]:
                 gLogger.error("No proxy found")
                 return S_ERROR("No proxy found")
 
+        if self.__acceptMsgPack:
+            auth.setdefault("headers", {})["Accept"] = f"{MsgPackEncode.CONTENT_TYPE}, application/json"
+
+        retVal = gSessionPool.getSession(url, auth.get("cert"), self.__caLocation, proxyString=proxyString)
+        if not retVal["OK"]:
+            return retVal
+        session = retVal["Value"]
+
         # We have a try/except for all the exceptions
         # whose default behavior is to try again,
         # maybe to different server
@@ -568,7 +591,7 @@ class TornadoBaseClient:
 
                 # Default case, just return the result
                 if not outputFile:
-                    call = self.__session.post(url, data=kwargs, timeout=self.timeout, **auth)
+                    call = session.post(url, data=kwargs, timeout=self.timeout, **auth)
                     # raising the exception for status here
                     # means essentialy that we are losing here the information of what is returned by the server
                     # as error message, since it is not passed to the exception
@@ -577,6 +600,8 @@ class TornadoBaseClient:
                     # Note that we would get an exception only if there is an exception on the server side which
                     # is not handled.
                     # Any standard S_ERROR will be transfered as an S_ERROR with a correct code.
+                    if call.ok and call.headers.get("Content-Type", "").startswith(MsgPackEncode.CONTENT_TYPE):
+                        return MsgPackEncode.decode(call.content)[0]
                     rawText = call.text
                     call.raise_for_status()
                     return decode(rawText)[0]
@@ -587,7 +612,7 @@ class TornadoBaseClient:
                     rawText = None
                     # Stream download
                     # https://requests.readthedocs.io/en/latest/user/advanced/#body-content-workflow
-                    with self.__session.post(url, data=kwargs, timeout=self.timeout, stream=True, **auth) as r:
+                    with session.post(url, data=kwargs, timeout=self.timeout, stream=True, **auth) as r:
                         rawText = r.text
                         r.raise_for_status()
 
@@ -627,6 +652,8 @@ class TornadoBaseClient:
 
             errStr = f"{str(e)}: {rawText}"
             return S_ERROR(errStr)
+        finally:
+            gSessionPool.releaseSession(session)
 
 
 # --- TODO ----
@@ -648,7 +675,7 @@ class _ContextAdapter(requests.adapters.HTTPAdapter):
 
 
 @convertToReturnValue
-def _create_session(verified=True):
+def _create_session(verified=True, poolSize=requests.adapters.DEFAULT_POOLSIZE):
     ctx = ssl.create_default_context()
     if ssl_ciphers := os.environ.get("DIRAC_HTTPS_SSL_CIPHERS"):
         ctx.set_ciphers(ssl_ciphers)
@@ -657,7 +684,7 @@ def _create_session(verified=True):
     if maximum_tls_version := os.environ.get("DIRAC_HTTPS_SSL_METHOD_MAX"):
         ctx.maximum_version = getattr(ssl.TLSVersion, maximum_tls_version)
     session = requests.Session()
-    session.mount("https://", _ContextAdapter(ssl_context=ctx))
+    session.mount("https://", _ContextAdapter(ssl_context=ctx, pool_maxsize=poolSize))
     if verified:
         ca_location = Locations.getCAsLocation()
         if not ca_location:
@@ -667,3 +694,154 @@ def _create_session(verified=True):
         ctx.check_hostname = False
         session.verify = False
     return session
+
+
+class SessionPool:
+    """Process wide pool of requests sessions, shared by all the TornadoBaseClient instances.
+
+    There is one session per host, credentials and CA location. Each session keeps its
+    connections to the host open between the calls, so they do not need a new TLS handshake.
+    The credentials include the modification time of the certificate file, so that a renewed
+    proxy gets new connections. A proxy given as a string is identified by the hash of its
+    content, and written to a temporary file used as the certificate of its session, which is
+    removed with the session. Sessions that are not used for longer than the idle timeout
+    are closed. A forked child process starts with an empty pool, as the connections of the
+    parent can not be shared.
+
+    It is configured with the environment variables:
+
+      * DIRAC_HTTPS_POOL_SIZE: number of connections kept open per session (default 10)
+      * DIRAC_HTTPS_POOL_IDLE_TIMEOUT: seconds after which an unused session is closed (default 300)
+      * DIRAC_HTTPS_KEEP_ALIVE: if ``false`` or ``no``, connections are closed after each call (default yes)
+    """
+
+    def __init__(self):
+        self.poolSize = int(os.environ.get("DIRAC_HTTPS_POOL_SIZE", requests.adapters.DEFAULT_POOLSIZE))
+        self.idleTimeout = int(os.environ.get("DIRAC_HTTPS_POOL_IDLE_TIMEOUT", 300))
+        self.keepAlive = os.environ.get("DIRAC_HTTPS_KEEP_ALIVE", "yes").lower() not in ("n", "no", "false", "0", "off")
+        self.__lock = threading.Lock()
+        # key -> [session, last time it was used, number of calls in progress, temporary proxy file or None]
+        self.__sessions = {}
+        self.__stats = {"Created": 0, "Reused": 0, "Expired": 0}
+
+    def _resetAfterFork(self):
+        """Forget the sessions of the parent process, without closing their connections
+        nor removing their proxy files, which still belong to the parent"""
+        self.__lock = threading.Lock()
+        self.__sessions = {}
+
+    def __getKey(self, url, cert, caLocation, proxyString=None):
+        """Key of the session to use for a call"""
+        if proxyString:
+            return (urlparse(url).netloc, hashlib.sha256(proxyString.encode()).hexdigest(), None, caLocation)
+        certFile = cert[0] if isinstance(cert, (tuple, list)) else cert
+        try:
+            certTime = os.stat(certFile).st_mtime if certFile else None
+        except OSError:
+            certTime = None
+        return (urlparse(url).netloc, tuple(cert) if isinstance(cert, list) else cert, certTime, caLocation)
+
+    def getSession(self, url, cert, caLocation, proxyString=None):
+        """Get a session for a call, it has to be given back with releaseSession
+
+        :param str url: URL called
+        :param cert: certificate (and key) used for the call, as given to requests
+        :param caLocation: CA location used to verify the server, or False not to verify it
+        :param str proxyString: proxy used for the call instead of cert, which is then the certificate of the session
+        :return: S_OK(requests.Session)/S_ERROR()
+        """
+        key = self.__getKey(url, cert, caLocation, proxyString)
+        now = time.time()
+        with self.__lock:
+            self.__closeIdleSessions(now)
+            entry = self.__sessions.get(key)
+            if entry:
+                self.__stats["Reused"] += 1
+            else:
+                result = _create_session(verified=bool(caLocation), poolSize=self.poolSize)
+                if not result["OK"]:
+                    return result
+                session = result["Value"]
+                if caLocation:
+                    session.verify = caLocation
+                if not self.keepAlive:
+                    session.headers["Connection"] = "close"
+                proxyFile = None
+                if proxyString:
+                    tmpHandle, proxyFile = tempfile.mkstemp()
+                    with os.fdopen(tmpHandle, "w") as fp:
+                        fp.write(proxyString)
+                    session.cert = proxyFile
+                entry = [session, now, 0, proxyFile]
+                self.__sessions[key] = entry
+                self.__stats["Created"] += 1
+            entry[1] = now
+            entry[2] += 1
+            return S_OK(entry[0])
+
+    def releaseSession(self, session):
+        """Give back a session obtained with getSession, once the call is over"""
+        now = time.time()
+        with self.__lock:
+            for entry in self.__sessions.values():
+                if entry[0] is session:
+                    entry[1] = now
+                    entry[2] -= 1
+                    break
+
+    def __closeIdleSessions(self, now):
+        """Close the sessions that are not used since the idle timeout. Called with the lock held"""
+        for key, (session, lastUsed, inUse, proxyFile) in list(self.__sessions.items()):
+            if not inUse and now - lastUsed > self.idleTimeout:
+                del self.__sessions[key]
+                session.close()
+                if proxyFile:
+                    try:
+                        os.unlink(proxyFile)
+                    except OSError:
+                        pass
+                self.__stats["Expired"] += 1
+
+    def closeAll(self):
+        """Close all the sessions that are not in use"""
+        with self.__lock:
+            self.__closeIdleSessions(float("inf"))
+
+    def getStats(self):
+        """Statistics of the pool
+
+        :return: dictionary with the number of sessions created, reused and closed after the idle
+                 timeout, and for each open session its host, credentials, number of calls in
+                 progress, idle time, number of connections in its pools and of requests sent
+        """
+        now = time.time()
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["Sessions"] = []
+            for (host, cert, _certTime, _caLocation), (session, lastUsed, inUse, _proxyFile) in self.__sessions.items():
+                nConnections = nRequests = 0
+                for adapter in session.adapters.values():
+                    poolManager = getattr(adapter, "poolmanager", None)
+                    if poolManager is None:
+                        continue
+                    for poolKey in poolManager.pools.keys():
+                        pool = poolManager.pools.get(poolKey)
+                        if pool is not None:
+                            nConnections += pool.num_connections
+                            nRequests += pool.num_requests
+                stats["Sessions"].append(
+                    {
+                        "Host": host,
+                        "Credentials": cert,
+                        "InUse": inUse,
+                        "IdleTime": now - lastUsed,
+                        "Connections": nConnections,
+                        "Requests": nRequests,
+                    }
+                )
+        return stats
+
+
+gSessionPool = SessionPool()
+os.register_at_fork(after_in_child=gSessionPool._resetAfterFork)
+atexit.register(gSessionPool.closeAll)
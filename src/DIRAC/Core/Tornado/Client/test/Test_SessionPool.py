@@ -0,0 +1,147 @@
+""" Test the pool of requests sessions shared by the Tornado clients
+"""
+import os
+import select
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from DIRAC.Core.Tornado.Client.private.TornadoBaseClient import SessionPool, gSessionPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answer all the POST requests, keeping the connection open"""
+
+    protocol_version = "HTTP/1.1"
+    clientAddresses = []
+
+    def do_POST(self):
+        self.clientAddresses.append(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serverURL():
+    KeepAliveHandler.clientAddresses = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/Framework/Dummy"
+    server.shutdown()
+    server.server_close()
+
+
+def _call(pool, url, cert=None, proxyString=None):
+    result = pool.getSession(url, cert, False, proxyString=proxyString)
+    assert result["OK"], result["Message"]
+    session = result["Value"]
+    try:
+        session.post(url, data={"method": "ping"}, timeout=10).raise_for_status()
+    finally:
+        pool.releaseSession(session)
+    return session
+
+
+def test_connectionReuse(serverURL):
+    """Calls to the same host with the same credentials share their connection"""
+    pool = SessionPool()
+    sessions = {_call(pool, serverURL) for _ in range(5)}
+    assert len(sessions) == 1
+
+    stats = pool.getStats()
+    assert stats["Created"] == 1
+    assert stats["Reused"] == 4
+    assert len(stats["Sessions"]) == 1
+    assert stats["Sessions"][0]["Connections"] == 1
+    assert stats["Sessions"][0]["Requests"] == 5
+    assert stats["Sessions"][0]["InUse"] == 0
+    assert len(set(KeepAliveHandler.clientAddresses)) == 1
+
+
+def test_credentials(serverURL, tmp_path):
+    """Different or renewed credentials get their own session"""
+    pool = SessionPool()
+    proxy = tmp_path / "proxy"
+    proxy.write_text("first")
+    first = _call(pool, serverURL, str(proxy))
+    assert _call(pool, serverURL, str(proxy)) is first
+    assert _call(pool, serverURL, (str(proxy), str(proxy))) is not first
+
+    proxy.write_text("renewed")
+    os.utime(proxy, (proxy.stat().st_atime, proxy.stat().st_mtime + 10))
+    assert _call(pool, serverURL, str(proxy)) is not first
+    assert pool.getStats()["Created"] == 3
+
+
+def test_idleTimeout(serverURL):
+    """Unused sessions are closed after the idle timeout, not the ones in use"""
+    pool = SessionPool()
+    pool.idleTimeout = -1
+    session = pool.getSession(serverURL, None, False)["Value"]
+    # The session in use is kept
+    assert pool.getSession(serverURL, None, False)["Value"] is session
+    pool.releaseSession(session)
+    pool.releaseSession(session)
+
+    assert _call(pool, serverURL) is not session
+    assert pool.getStats()["Expired"] == 1
+
+    pool.closeAll()
+    assert pool.getStats()["Sessions"] == []
+
+
+def test_keepAlive(monkeypatch, serverURL):
+    """Connections are not reused when keep alive is disabled"""
+    monkeypatch.setenv("DIRAC_HTTPS_KEEP_ALIVE", "no")
+    monkeypatch.setenv("DIRAC_HTTPS_POOL_SIZE", "2")
+    pool = SessionPool()
+    assert pool.poolSize == 2
+    for _ in range(3):
+        _call(pool, serverURL)
+    assert len(set(KeepAliveHandler.clientAddresses)) == 3
+
+
+def test_proxyString(serverURL):
+    """A proxy given as a string is written once per session, and removed with it"""
+    pool = SessionPool()
+    first = _call(pool, serverURL, proxyString="proxy")
+    assert _call(pool, serverURL, proxyString="proxy") is first
+    assert open(first.cert).read() == "proxy"
+    other = _call(pool, serverURL, proxyString="other proxy")
+    assert other is not first
+    assert pool.getStats()["Created"] == 2
+
+    pool.closeAll()
+    assert not os.path.exists(first.cert)
+    assert not os.path.exists(other.cert)
+
+
+def test_fork(serverURL):
+    """A forked child starts with an empty pool, and leaves the proxy files of its parent"""
+    session = _call(gSessionPool, serverURL, proxyString="proxy")
+    readFd, writeFd = os.pipe()
+    pid = os.fork()
+    if not pid:
+        try:
+            ok = not gSessionPool.getStats()["Sessions"] and _call(gSessionPool, serverURL) is not session
+            gSessionPool.closeAll()
+            os.write(writeFd, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.close(writeFd)
+    assert select.select([readFd], [], [], 30)[0], "The child process is stuck"
+    assert os.read(readFd, 1) == b"1"
+    os.close(readFd)
+    os.waitpid(pid, 0)
+
+    assert os.path.exists(session.cert)
+    assert _call(gSessionPool, serverURL, proxyString="proxy") is session
+    gSessionPool.closeAll()
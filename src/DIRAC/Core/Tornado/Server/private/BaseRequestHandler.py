@@ -7,6 +7,7 @@
 import time
 import inspect
 import threading
+from collections.abc import Iterator
 from datetime import datetime
 
 from http import HTTPStatus
@@ -22,7 +23,7 @@ from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
 from DIRAC.Core.Utilities import DErrno
 from DIRAC.Core.DISET.AuthManager import AuthManager
 from DIRAC.Core.Utilities.JEncode import decode, encode
-from DIRAC.Core.Utilities import Network, TimeUtilities
+from DIRAC.Core.Utilities import MsgPackEncode, Network, TimeUtilities
 from DIRAC.Core.Utilities.ReturnValues import isReturnStructure
 from DIRAC.Core.Security.X509Chain import X509Chain  # pylint: disable=import-error
 from DIRAC.Resources.IdProvider.Utilities import getIdProviderIdentifiers
@@ -964,17 +965,65 @@ class BaseRequestHandler(RequestHandler):
         elif self.get_argument("rawContent", default=False):
             # See 4.5.1 http://www.rfc-editor.org/rfc/rfc2046.txt
             self.set_header("Content-Type", "application/octet-stream")
-            self.finish(self.__result)
+            # An iterator of chunks is sent as the chunks are produced
+            if isinstance(self.__result, Iterator):
+                await self.__streamResult(self.__result)
+            else:
+                self.finish(self.__result)
 
         # Return simple text or html
         elif isinstance(self.__result, (str, bytes)):
             self.finish(self.__result)
 
+        # msgpack if the client accepts it and the handler does not have its own encoding
+        elif (encodedResult := self.__encodeMsgPack(self.__result)) is not None:
+            self.set_header("Content-Type", MsgPackEncode.CONTENT_TYPE)
+            self.finish(encodedResult)
+
         # JSON
         else:
             self.set_header("Content-Type", "application/json")
             self.finish(self.encode(self.__result))
 
+    async def __streamResult(self, chunks):
+        """Send chunks of data as they are produced, without holding all of them in memory.
+        The chunks are produced in the executor, as producing them may take time, e.g. reading them from a DB.
+
+        :param chunks: iterator of bytes
+        """
+        ioloop = IOLoop.current()
+        try:
+            while (chunk := await ioloop.run_in_executor(None, next, chunks, None)) is not None:
+                self.write(chunk)
+                await self.flush()
+        except Exception as e:  # pylint: disable=broad-except
+            # The status is already sent, so the only way to let the client know that
+            # what it received is incomplete is to close the connection before the end
+            self.log.exception("Error while streaming the result", lException=e)
+            self.request.connection.stream.close()
+            return
+        finally:
+            if callable(close := getattr(chunks, "close", None)):
+                close()
+        self.finish()
+
+    def __encodeMsgPack(self, result):
+        """Encode the result with msgpack if the client accepts it
+
+        :return: bytes, or None if JSON has to be used
+        """
+        if (
+            not MsgPackEncode.isAvailable()
+            or self.encode is not encode
+            or MsgPackEncode.CONTENT_TYPE not in self.request.headers.get("Accept", "")
+        ):
+            return None
+        try:
+            return MsgPackEncode.encode(result)
+        except (TypeError, OverflowError, ValueError) as e:
+            self.log.debug("Result can't be encoded with msgpack, using JSON", repr(e))
+            return None
+
     # Make a coroutine, see https://www.tornadoweb.org/en/branch5.1/guide/coroutines.html#coroutines for details
     async def get(self, *args, **kwargs):  # pylint: disable=arguments-differ
         """Method to handle incoming ``GET`` requests.
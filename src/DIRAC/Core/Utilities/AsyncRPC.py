@@ -0,0 +1,94 @@
+""" Asynchronous RPC calls
+
+    The DIRAC clients are synchronous: each call blocks until the service answers. This module
+    runs the calls in a process wide pool of threads, so that independent calls to one or several
+    services are done concurrently. It works the same for DISET and HTTPS services, since the calls
+    are done by the usual clients, and nothing changes on the service side.
+
+    The calls are started with the ``callAsync`` method of :py:class:`~DIRAC.Core.Base.Client.Client`,
+    :py:class:`~DIRAC.Core.DISET.RPCClient.RPCClient` and
+    :py:class:`~DIRAC.Core.Tornado.Client.TornadoClient.TornadoClient`, which return a
+    :py:class:`concurrent.futures.Future`. The result of the future is always an S_OK/S_ERROR
+    structure, exceptions included. Example::
+
+      from DIRAC.Core.Utilities.AsyncRPC import gather
+
+      futures = [JobMonitoringClient().callAsync("getJobStatus", jobID) for jobID in jobIDs]
+      for jobID, result in zip(jobIDs, gather(futures, timeout=600)):
+        ...
+
+    From asyncio code, the futures can be awaited with ``await asyncio.wrap_future(future)``.
+
+    The number of threads is given by the DIRAC_ASYNC_RPC_WORKERS environment variable
+    (default 10). The calls submitted when all of them are busy wait for one to be free.
+
+    The delegated DN, group and setup of the :py:class:`~DIRAC.Core.DISET.ThreadConfig.ThreadConfig`
+    of the calling thread are used for the call, as if it was done synchronously.
+"""
+import errno
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from DIRAC import S_ERROR, gLogger
+from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
+
+_executor = None
+_executorLock = threading.Lock()
+
+
+def getExecutor():
+    """Get the pool of threads doing the asynchronous calls, creating it if needed
+
+    :return: concurrent.futures.ThreadPoolExecutor
+    """
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            maxWorkers = int(os.environ.get("DIRAC_ASYNC_RPC_WORKERS", 10))
+            _executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="AsyncRPC")
+        return _executor
+
+
+def _execute(threadConfig, func, args, kwargs):
+    """Execute a call in a worker thread with the ThreadConfig of the caller, returning a S_ERROR for exceptions"""
+    # The worker threads are reused, so nothing must be left from a previous call
+    tc = ThreadConfig()
+    tc.reset()
+    tc.load(threadConfig)
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        gLogger.exception("Exception in asynchronous call", lException=e)
+        return S_ERROR(f"Exception in asynchronous call: {e!r}")
+    finally:
+        tc.reset()
+
+
+def submit(func, *args, **kwargs):
+    """Call a function returning S_OK/S_ERROR in the pool of threads
+
+    :param func: function to call, it must not use objects that are not thread safe, like RPC clients
+    :return: concurrent.futures.Future of the result of the function
+    """
+    return getExecutor().submit(_execute, ThreadConfig().dump(), func, args, kwargs)
+
+
+def gather(futures, timeout=None):
+    """Wait for asynchronous calls and collect their results
+
+    :param list futures: futures returned by submit or callAsync
+    :param timeout: seconds to wait for all the calls, None waits as long as needed
+    :return: list of S_OK/S_ERROR, in the order of the futures. The calls that are not over
+             after the timeout get a S_ERROR, and are cancelled if they did not start
+    """
+    futures = list(futures)
+    done, _notDone = wait(futures, timeout=timeout)
+    results = []
+    for future in futures:
+        if future in done:
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append(S_ERROR(errno.ETIMEDOUT, f"Asynchronous call not over after {timeout} seconds"))
+    return results
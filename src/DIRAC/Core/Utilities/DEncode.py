@@ -16,6 +16,7 @@ import os
 
 import functools
 import inspect
+import itertools
 import traceback
 
 from collections import defaultdict
@@ -219,14 +220,24 @@ _dateTimeType = type(_dateTimeObject)
 _dateType = type(_dateTimeObject.date())
 _timeType = type(_dateTimeObject.time())
 
+# The encoding functions append the encoded value to a bytearray, and the decoding functions
+# take the encoded data and the position of the value in it, and return the value with the
+# position following it. They are looked up by type and by type character in these tables.
+# The lists, tuples and dictionaries encode and decode the strings, integers and None they
+# contain directly, without going through the tables, since these are by far the most common
 g_dEncodeFunctions = {}
 g_dDecodeFunctions = {}
 
+_ord_e = _ord("e")
+_ord_i = _ord("i")
+_ord_n = _ord("n")
+_ord_s = _ord("s")
 
-def encodeInt(iValue, eList):
+
+def encodeInt(iValue, eBuffer):
     """Encoding ints"""
 
-    eList.extend((b"i", str(iValue).encode(), b"e"))
+    eBuffer += b"i%de" % iValue
 
 
 def decodeInt(data, i):
@@ -239,21 +250,21 @@ def decodeInt(data, i):
 
 
 g_dEncodeFunctions[types.IntType] = encodeInt
-g_dDecodeFunctions[_ord("i")] = decodeInt
+g_dDecodeFunctions[_ord_i] = decodeInt
 
 
-def encodeLong(iValue, eList):
+def encodeLong(iValue, eBuffer):
     """Encoding longs"""
 
     # corrected by KGG   eList.extend( ( "l", str( iValue ), "e" ) )
-    eList.extend((b"I", str(iValue).encode(), b"e"))
+    eBuffer += b"I%de" % iValue
 
 
 def decodeLong(data, i):
     """Decoding longs"""
 
     i += 1
-    end = data.index(_ord("e"), i)
+    end = data.index(_ord_e, i)
     value = int(data[i:end])
     return (value, end + 1)
 
@@ -261,10 +272,10 @@ def decodeLong(data, i):
 g_dDecodeFunctions[_ord("I")] = decodeLong
 
 
-def encodeFloat(iValue, eList):
+def encodeFloat(iValue, eBuffer):
     """Encoding floats"""
 
-    eList.extend((b"f", str(iValue).encode(), b"e"))
+    eBuffer += b"f%se" % str(iValue).encode()
 
 
 def decodeFloat(data, i):
@@ -285,13 +296,10 @@ g_dEncodeFunctions[types.FloatType] = encodeFloat
 g_dDecodeFunctions[_ord("f")] = decodeFloat
 
 
-def encodeBool(bValue, eList):
+def encodeBool(bValue, eBuffer):
     """Encoding booleans"""
 
-    if bValue:
-        eList.append(b"b1")
-    else:
-        eList.append(b"b0")
+    eBuffer += b"b1" if bValue else b"b0"
 
 
 def decodeBool(data, i):
@@ -307,34 +315,32 @@ g_dEncodeFunctions[types.BooleanType] = encodeBool
 g_dDecodeFunctions[_ord("b")] = decodeBool
 
 
-def encodeString(sValue, eList):
+def encodeString(sValue, eBuffer):
     """Encoding strings"""
     if not isinstance(sValue, bytes):
         sValue = sValue.encode()
-    eList.extend((b"s", str(len(sValue)).encode(), b":", sValue))
+    eBuffer += b"s%d:" % len(sValue)
+    eBuffer += sValue
 
 
 def decodeString(data, i):
     """Decoding strings"""
     i += 1
     colon = data.index(b":", i)
-    value = int(data[i:colon].decode())
-    colon += 1
-    end = colon + value
-    retVal = data[colon:end]
-    retVal = retVal.decode(errors="surrogateescape")
-    return (retVal, end)
+    end = colon + 1 + int(data[i:colon])
+    return (data[colon + 1 : end].decode(errors="surrogateescape"), end)
 
 
 g_dEncodeFunctions[types.StringType] = encodeString
 g_dEncodeFunctions[bytes] = encodeString
-g_dDecodeFunctions[_ord("s")] = decodeString
+g_dDecodeFunctions[_ord_s] = decodeString
 
 
-def encodeUnicode(sValue, eList):
+def encodeUnicode(sValue, eBuffer):
     """Encoding unicode strings"""
     valueStr = sValue.encode("utf-8")
-    eList.extend((b"u", str(len(valueStr)).encode(), b":", valueStr))
+    eBuffer += b"u%d:" % len(valueStr)
+    eBuffer += valueStr
 
 
 def decodeUnicode(data, i):
@@ -351,7 +357,7 @@ def decodeUnicode(data, i):
 g_dDecodeFunctions[_ord("u")] = decodeString
 
 
-def encodeDateTime(oValue, eList):
+def encodeDateTime(oValue, eBuffer):
     """Encoding datetime"""
 
     if isinstance(oValue, _dateTimeType):
@@ -365,19 +371,19 @@ def encodeDateTime(oValue, eList):
             oValue.microsecond,
             oValue.tzinfo,
         )
-        eList.append(b"za")
+        eBuffer += b"za"
         # corrected by KGG encode( tDateTime, eList )
-        g_dEncodeFunctions[type(tDateTime)](tDateTime, eList)
+        g_dEncodeFunctions[type(tDateTime)](tDateTime, eBuffer)
     elif isinstance(oValue, _dateType):
         tData = (oValue.year, oValue.month, oValue.day)
-        eList.append(b"zd")
+        eBuffer += b"zd"
         # corrected by KGG encode( tData, eList )
-        g_dEncodeFunctions[type(tData)](tData, eList)
+        g_dEncodeFunctions[type(tData)](tData, eBuffer)
     elif isinstance(oValue, _timeType):
         tTime = (oValue.hour, oValue.minute, oValue.second, oValue.microsecond, oValue.tzinfo)
-        eList.append(b"zt")
+        eBuffer += b"zt"
         # corrected by KGG encode( tTime, eList )
-        g_dEncodeFunctions[type(tTime)](tTime, eList)
+        g_dEncodeFunctions[type(tTime)](tTime, eBuffer)
     else:
         raise Exception(f"Unexpected type {str(type(oValue))} while encoding a datetime object")
 
@@ -406,10 +412,10 @@ g_dEncodeFunctions[_timeType] = encodeDateTime
 g_dDecodeFunctions[_ord("z")] = decodeDateTime
 
 
-def encodeNone(_oValue, eList):
+def encodeNone(_oValue, eBuffer):
     """Encoding None"""
 
-    eList.append(b"n")
+    eBuffer += b"n"
 
 
 def decodeNone(_data, i):
@@ -419,43 +425,86 @@ def decodeNone(_data, i):
 
 
 g_dEncodeFunctions[types.NoneType] = encodeNone
-g_dDecodeFunctions[_ord("n")] = decodeNone
+g_dDecodeFunctions[_ord_n] = decodeNone
+
+
+def _encodeItems(items, eBuffer):
+    """Encode the items of a list, a tuple or the keys and values of a dictionary one after the other"""
+
+    encodeFunctions = g_dEncodeFunctions
+    for uObject in items:
+        oType = type(uObject)
+        if oType is str:
+            uObject = uObject.encode()
+            eBuffer += b"s%d:" % len(uObject)
+            eBuffer += uObject
+        elif oType is int:
+            eBuffer += b"i%de" % uObject
+        elif uObject is None:
+            eBuffer += b"n"
+        else:
+            encodeFunctions[oType](uObject, eBuffer)
 
 
-def encodeList(lValue, eList):
+def _decodeItems(data, i):
+    """Decode the items of a list, a tuple or the keys and values of a dictionary
+
+    :param data: encoded data
+    :param i: position of the first item
+    :return: (list of items, position following the end of the container)
+    """
+    items = []
+    append = items.append
+    index = data.index
+    decodeFunctions = g_dDecodeFunctions
+    while True:
+        typeChar = data[i]
+        if typeChar == _ord_s:
+            colon = index(b":", i + 1)
+            end = colon + 1 + int(data[i + 1 : colon])
+            append(data[colon + 1 : end].decode(errors="surrogateescape"))
+            i = end
+        elif typeChar == _ord_i:
+            end = index(b"e", i + 1)
+            append(int(data[i + 1 : end]))
+            i = end + 1
+        elif typeChar == _ord_n:
+            append(None)
+            i += 1
+        elif typeChar == _ord_e:
+            return (items, i + 1)
+        else:
+            item, i = decodeFunctions[typeChar](data, i)
+            append(item)
+
+
+def encodeList(lValue, eBuffer):
     """Encoding list"""
 
-    eList.append(b"l")
-    for uObject in lValue:
-        g_dEncodeFunctions[type(uObject)](uObject, eList)
-    eList.append(b"e")
+    eBuffer += b"l"
+    _encodeItems(lValue, eBuffer)
+    eBuffer += b"e"
 
 
 def decodeList(data, i):
     """Decoding list"""
 
-    oL = []
-    i += 1
-    while data[i] != _ord("e"):
-        ob, i = g_dDecodeFunctions[data[i]](data, i)
-        oL.append(ob)
-    return (oL, i + 1)
+    return _decodeItems(data, i + 1)
 
 
 g_dEncodeFunctions[types.ListType] = encodeList
 g_dDecodeFunctions[_ord("l")] = decodeList
 
 
-def encodeTuple(lValue, eList):
+def encodeTuple(lValue, eBuffer):
     """Encoding tuple"""
 
     if DIRAC_DEBUG_DENCODE_CALLSTACK:
         printDebugCallstack("Encoding tuples")
 
-    eList.append(b"t")
-    for uObject in lValue:
-        g_dEncodeFunctions[type(uObject)](uObject, eList)
-    eList.append(b"e")
+    eBuffer += b"t"
+    _encodeItems(lValue, eBuffer)
+    eBuffer += b"e"
 
 
 def decodeTuple(data, i):
@@ -464,7 +513,7 @@ def decodeTuple(data, i):
     if DIRAC_DEBUG_DENCODE_CALLSTACK:
         printDebugCallstack("Decoding tuples")
 
-    oL, i = decodeList(data, i)
+    oL, i = _decodeItems(data, i + 1)
     return (tuple(oL), i)
 
 
@@ -472,7 +521,7 @@ g_dEncodeFunctions[types.TupleType] = encodeTuple
 g_dDecodeFunctions[_ord("t")] = decodeTuple
 
 
-def encodeDict(dValue, eList):
+def encodeDict(dValue, eBuffer):
     """Encoding dictionary"""
 
     if DIRAC_DEBUG_DENCODE_CALLSTACK:
@@ -480,27 +529,23 @@ def encodeDict(dValue, eList):
         if any([isinstance(x, (int,) + (float,)) for x in dValue]):
             printDebugCallstack("Encoding dict with numeric keys")
 
-    eList.append(b"d")
-    for key in dValue:
-        g_dEncodeFunctions[type(key)](key, eList)
-        g_dEncodeFunctions[type(dValue[key])](dValue[key], eList)
-    eList.append(b"e")
+    eBuffer += b"d"
+    _encodeItems(itertools.chain.from_iterable(dValue.items()), eBuffer)
+    eBuffer += b"e"
 
 
 def decodeDict(data, i):
     """Decoding dictionary"""
 
-    oD = {}
-    i += 1
-    while data[i] != _ord("e"):
-        if DIRAC_DEBUG_DENCODE_CALLSTACK:
-            # If we have numbers as keys
-            if data[i] in (_ord("i"), _ord("I"), _ord("f")):
-                printDebugCallstack("Decoding dict with numeric keys")
-
-        k, i = g_dDecodeFunctions[data[i]](data, i)
-        oD[k], i = g_dDecodeFunctions[data[i]](data, i)
-    return (oD, i + 1)
+    items, i = _decodeItems(data, i + 1)
+    if len(items) % 2:
+        raise ValueError(f"Missing value for key {items[-1]!r} while decoding a dictionary")
+    keys = items[::2]
+    if DIRAC_DEBUG_DENCODE_CALLSTACK:
+        # If we have numbers as keys
+        if any(type(key) in (int, float) for key in keys):
+            printDebugCallstack("Decoding dict with numeric keys")
+    return (dict(zip(keys, items[1::2])), i)
 
 
 g_dEncodeFunctions[types.DictType] = encodeDict
@@ -510,17 +555,15 @@ g_dDecodeFunctions[_ord("d")] = decodeDict
 # Encode function
 def encode(uObject):
     """Generic encoding function"""
-    eList = []
-    # print("ENCODE FUNCTION : %s" % g_dEncodeFunctions[ type( uObject ) ])
-    g_dEncodeFunctions[type(uObject)](uObject, eList)
-    return b"".join(eList)
+    eBuffer = bytearray()
+    g_dEncodeFunctions[type(uObject)](uObject, eBuffer)
+    return bytes(eBuffer)
 
 
 def decode(data):
     """Generic decoding function"""
     if not data:
         return data
-    # print("DECODE FUNCTION : %s" % g_dDecodeFunctions[ sStream [ iIndex ] ])
     if not isinstance(data, bytes):
         raise NotImplementedError("This should never happen")
     return g_dDecodeFunctions[data[0]](data, 0)
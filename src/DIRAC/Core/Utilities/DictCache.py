@@ -2,7 +2,10 @@
   DictCache.
 """
 import datetime
+import heapq
+import itertools
 import threading
+import time
 
 # DIRAC
 from DIRAC.Core.Utilities.LockRing import LockRing
@@ -20,6 +23,8 @@ class ThreadLocalDict(threading.local):
         # Note: it is on purpose that the threading.local constructor is not called
         # Dictionary, local to a thread, that will be used as such
         self.cache = {}
+        # Heap of (expirationTime, sequence, key), local to a thread, ordering the cache entries by expiration
+        self.heap = []
 
 
 class MockLockRing:
@@ -36,43 +41,62 @@ class DictCache:
     The user can decide whether this cache should be shared among the threads or not, but it is always thread safe
     Note that when shared, the access to the cache is protected by a lock, but not necessarily the
     object you are retrieving from it.
+
+    Each shared cache has its own lock. Expired entries are removed lazily: a heap ordered by expiration
+    time is kept next to the cache, so that purging only looks at the entries that actually expired.
+    The cache can optionally be bounded in size, in which case the least recently used entries are evicted.
     """
 
-    def __init__(self, deleteFunction=False, threadLocal=False):
+    def __init__(self, deleteFunction=False, threadLocal=False, maxSize=0):
         """Initialize the dict cache.
 
         :param deleteFunction: if not False, invoked when deleting a cached object
         :param threadLocal: if False, the cache will be shared among all the threads, otherwise,
                             each thread gets its own cache.
+        :param int maxSize: if not 0, maximum number of entries in the cache (per thread if threadLocal).
+                            When full, the least recently used entry is evicted.
         """
 
         self.__threadLocal = threadLocal
+        self.__maxSize = max(0, maxSize)
 
-        # Placeholder either for a LockRing if the cache is shared,
+        # Placeholder either for a lock if the cache is shared,
         # or a mock class if not.
         self.__lock = None
 
-        # One of the following two objects is returned
-        # by the __cache property, depending on the threadLocal strategy
+        # One of the following two objects is used
+        # by the __cache and __heap properties, depending on the threadLocal strategy
 
-        # This is the Placeholder for a shared cache
+        # This is the Placeholder for a shared cache: key -> (expirationTime, value, sequence)
         self.__sharedCache = {}
-        # This is the Placeholder for a shared cache
+        # and its heap of (expirationTime, sequence, key)
+        self.__sharedHeap = []
+        # This is the Placeholder for a thread local cache
         self.__threadLocalCache = ThreadLocalDict()
 
+        # Tie breaker for the heap entries, so that the keys are never compared
+        self.__sequence = itertools.count()
+
         # Function to clean the elements
         self.__deleteFunction = deleteFunction
 
+        # Counters, see getStats
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
     @property
     def lock(self):
         """Return the lock.
-        In practice, if the cache is shared among threads, it is a LockRing.
+        In practice, if the cache is shared among threads, it is a recursive lock owned by this cache only.
         Otherwise, it is just a mock object.
         """
 
         if not self.__lock:
             if not self.__threadLocal:
-                self.__lock = LockRing().getLock(self.__class__.__name__, recursive=True)
+                # Anonymous lock from the LockRing, so that it is reset in forked processes
+                self.__lock = LockRing().getLock(recursive=True)
             else:
                 self.__lock = MockLockRing()
 
@@ -88,6 +112,50 @@ class DictCache:
 
         return self.__sharedCache
 
+    @property
+    def __heap(self):
+        """Returns the expiration heap matching the cache returned by __cache"""
+        if self.__threadLocal:
+            return self.__threadLocalCache.heap
+
+        return self.__sharedHeap
+
+    def __lookup(self, cKey, validSeconds):
+        """Return the entry for cKey if it is valid for validSeconds, delete it if it is not.
+        Must be called with the lock held.
+
+        :return: None or the (expirationTime, value, sequence) entry
+        """
+        entry = self.__cache.get(cKey)
+        if entry is None:
+            return None
+        if entry[0] > time.time() + validSeconds:
+            if self.__maxSize:
+                # Mark it as the most recently used
+                self.__cache[cKey] = self.__cache.pop(cKey)
+            return entry
+        # Delete expired
+        self.__expirations += 1
+        self.delete(cKey)
+        return None
+
+    def __remove(self, cKey):
+        """Remove a key from the cache, calling the delete function. Must be called with the lock held."""
+        entry = self.__cache.pop(cKey)
+        if self.__deleteFunction:
+            self.__deleteFunction(entry[1])
+
+    def __compactHeap(self):
+        """Rebuild the heap from the cache once it holds too many entries of deleted or replaced keys.
+        Must be called with the lock held.
+        """
+        heap = self.__heap
+        cache = self.__cache
+        if len(heap) <= 2 * len(cache) + 64:
+            return
+        heap[:] = [(expTime, sequence, cKey) for cKey, (expTime, _value, sequence) in cache.items()]
+        heapq.heapify(heap)
+
     def exists(self, cKey, validSeconds=0):
         """Returns True/False if the key exists for the given number of seconds
 
@@ -98,16 +166,7 @@ class DictCache:
         """
         self.lock.acquire()
         try:
-            # Is the key in the cache?
-            if cKey in self.__cache:
-                expTime = self.__cache[cKey]["expirationTime"]
-                # If it's valid return True!
-                if expTime > datetime.datetime.now() + datetime.timedelta(seconds=validSeconds):
-                    return True
-
-                # Delete expired
-                self.delete(cKey)
-            return False
+            return self.__lookup(cKey, validSeconds) is not None
         finally:
             self.lock.release()
 
@@ -120,9 +179,8 @@ class DictCache:
         try:
             if cKey not in self.__cache:
                 return
-            if self.__deleteFunction:
-                self.__deleteFunction(self.__cache[cKey]["value"])
-            del self.__cache[cKey]
+            self.__remove(cKey)
+            self.__compactHeap()
         finally:
             self.lock.release()
 
@@ -137,8 +195,17 @@ class DictCache:
             return
         self.lock.acquire()
         try:
-            vD = {"expirationTime": datetime.datetime.now() + datetime.timedelta(seconds=validSeconds), "value": value}
-            self.__cache[cKey] = vD
+            cache = self.__cache
+            expTime = time.time() + validSeconds
+            sequence = next(self.__sequence)
+            # Replacing a key moves it to the most recently used position
+            cache.pop(cKey, None)
+            cache[cKey] = (expTime, value, sequence)
+            heapq.heappush(self.__heap, (expTime, sequence, cKey))
+            while self.__maxSize and len(cache) > self.__maxSize:
+                self.__evictions += 1
+                self.__remove(next(iter(cache)))
+            self.__compactHeap()
         finally:
             self.lock.release()
 
@@ -152,16 +219,12 @@ class DictCache:
         """
         self.lock.acquire()
         try:
-            # Is the key in the cache?
-            if cKey in self.__cache:
-                expTime = self.__cache[cKey]["expirationTime"]
-                # If it's valid return True!
-                if expTime > datetime.datetime.now() + datetime.timedelta(seconds=validSeconds):
-                    return self.__cache[cKey]["value"]
-
-                # Delete expired
-                self.delete(cKey)
-            return None
+            entry = self.__lookup(cKey, validSeconds)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            return entry[1]
         finally:
             self.lock.release()
 
@@ -173,11 +236,11 @@ class DictCache:
         self.lock.acquire()
         try:
             data = []
-            for cKey, cValue in self.__cache.items():
+            for cKey, (expTime, value, _sequence) in self.__cache.items():
                 data.append(f"{cKey}:")
-                data.append(f"\tExp: {cValue['expirationTime']}")
-                if cValue["value"]:
-                    data.append(f"\tVal: {cValue['Value']}")
+                data.append(f"\tExp: {datetime.datetime.fromtimestamp(expTime)}")
+                if value:
+                    data.append(f"\tVal: {value}")
             return "\n".join(data)
         finally:
             self.lock.release()
@@ -191,12 +254,28 @@ class DictCache:
         """
         self.lock.acquire()
         try:
-            keys = []
-            limitTime = datetime.datetime.now() + datetime.timedelta(seconds=validSeconds)
-            for cKey, cValue in self.__cache.items():
-                if cValue["expirationTime"] > limitTime:
-                    keys.append(cKey)
-            return keys
+            limitTime = time.time() + validSeconds
+            return [cKey for cKey, entry in self.__cache.items() if entry[0] > limitTime]
+        finally:
+            self.lock.release()
+
+    def getStats(self):
+        """Get the usage counters of the cache, e.g. to size it
+
+        :return: dict with the current number of entries (Size), the maximum size (MaxSize, 0 if unbounded),
+                 the number of get hits (Hits) and misses (Misses), the number of entries evicted to respect
+                 MaxSize (Evictions) and the number of expired entries removed (Expirations)
+        """
+        self.lock.acquire()
+        try:
+            return {
+                "Size": len(self.__cache),
+                "MaxSize": self.__maxSize,
+                "Hits": self.__hits,
+                "Misses": self.__misses,
+                "Evictions": self.__evictions,
+                "Expirations": self.__expirations,
+            }
         finally:
             self.lock.release()
 
@@ -207,15 +286,16 @@ class DictCache:
         """
         self.lock.acquire()
         try:
-            keys = []
-            limitTime = datetime.datetime.now() + datetime.timedelta(seconds=expiredInSeconds)
-            for cKey, cValue in self.__cache.items():
-                if cValue["expirationTime"] < limitTime:
-                    keys.append(cKey)
-            for key in keys:
-                if self.__deleteFunction:
-                    self.__deleteFunction(self.__cache[key]["value"])
-                del self.__cache[key]
+            cache = self.__cache
+            heap = self.__heap
+            limitTime = time.time() + expiredInSeconds
+            while heap and heap[0][0] < limitTime:
+                _expTime, sequence, cKey = heapq.heappop(heap)
+                entry = cache.get(cKey)
+                # Skip the heap entries of keys that were deleted or replaced since
+                if entry is not None and entry[2] == sequence:
+                    self.__expirations += 1
+                    self.__remove(cKey)
         finally:
             self.lock.release()
 
@@ -229,9 +309,8 @@ class DictCache:
             self.lock.acquire()
         try:
             for cKey in list(self.__cache):
-                if self.__deleteFunction:
-                    self.__deleteFunction(self.__cache[cKey]["value"])
-                del self.__cache[cKey]
+                self.__remove(cKey)
+            del self.__heap[:]
         finally:
             if useLock:
                 self.lock.release()
@@ -249,3 +328,4 @@ class DictCache:
             del self.__threadLocalCache
         else:
             del self.__sharedCache
+            del self.__sharedHeap
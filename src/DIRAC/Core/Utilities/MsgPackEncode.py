@@ -0,0 +1,85 @@
+""" DIRAC Encoding utilities based on msgpack
+
+    Binary alternative to :py:mod:`~DIRAC.Core.Utilities.JEncode` for the HTTPS services, negotiated
+    with the ``Accept`` header: the services answer with msgpack when the client accepts it, and
+    JSON otherwise. The same types as JEncode are supported, with msgpack extension types for the
+    datetime and date objects and for the :py:class:`~DIRAC.Core.Utilities.JEncode.JSerializable`
+    objects. Unlike JSON, the keys of the dictionaries keep their type, as with DISET.
+
+    msgpack is an optional dependency: if it is not installed, JSON is used.
+"""
+import datetime
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from DIRAC.Core.Utilities.JEncode import DJSONDecoder, JSerializable
+
+#: Content type of the msgpack encoded data
+CONTENT_TYPE = "application/x-msgpack"
+
+# Extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_JSERIALIZABLE = 3
+
+# The datetimes are sent as the number of seconds since the epoch, and the dates as their
+# ordinal, both as signed 64 bits integers. As with JEncode, the time zone and the microseconds
+# are not kept
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+_INT64 = struct.Struct(">q")
+
+
+def isAvailable():
+    """Whether msgpack is installed"""
+    return msgpack is not None
+
+
+def _default(obj):
+    """Encode the types that msgpack does not know about"""
+    # datetime is a subclass of date, it has to be checked first
+    if isinstance(obj, datetime.datetime):
+        seconds = (obj.replace(tzinfo=None) - _EPOCH) // _ONE_SECOND
+        return msgpack.ExtType(EXT_DATETIME, _INT64.pack(seconds))
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, _INT64.pack(obj.toordinal()))
+    if isinstance(obj, JSerializable):
+        return msgpack.ExtType(EXT_JSERIALIZABLE, encode(obj._toJSON()))  # pylint: disable=protected-access
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def _extHook(code, data):
+    """Decode the extension types"""
+    if code == EXT_DATETIME:
+        return _EPOCH + datetime.timedelta(seconds=_INT64.unpack(data)[0])
+    if code == EXT_DATE:
+        return datetime.date.fromordinal(_INT64.unpack(data)[0])
+    if code == EXT_JSERIALIZABLE:
+        return DJSONDecoder.dict_to_object(decode(data)[0])
+    return msgpack.ExtType(code, data)
+
+
+def encode(inData):
+    """Encode the input data with msgpack
+
+    :param inData: anything that JEncode can encode
+    :return: bytes
+    :raises TypeError: if the data can't be encoded, e.g. integers of more than 64 bits
+    """
+    return msgpack.packb(inData, default=_default, use_bin_type=True)
+
+
+def decode(encodedData):
+    """Decode msgpack encoded data
+
+    :param bytes encodedData: msgpack encoded data
+    :return: the decoded objects, encoded object length (as JEncode.decode)
+    """
+    return (
+        msgpack.unpackb(encodedData, ext_hook=_extHook, raw=False, strict_map_key=False),
+        len(encodedData),
+    )
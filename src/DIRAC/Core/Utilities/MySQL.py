@@ -463,6 +463,17 @@ class ConnectionPool:
             if self.__graceTime and now - data[2] > self.__graceTime:
                 self.__pop(thid)
 
+    def getDedicated(self, dbName):
+        """Return a new connection to the DB, which is not assigned to the current thread.
+        It is not managed by the pool, so it is up to the caller to close it.
+        """
+        try:
+            conn = self.__newConn()
+            conn.select_db(dbName)
+        except MySQLdb.MySQLError as excp:
+            return S_ERROR(DErrno.EMYSQL, f"Could not connect: {excp}")
+        return S_OK(conn)
+
     def transactionStart(self, dbName):
         result = self.get(dbName)
         if not result["OK"]:
@@ -1679,3 +1690,44 @@ class MySQL:
             pass
 
         return retDict
+
+    # For the procedures that execute a select whose result is too big to be held in memory
+    def executeStoredProcedureWithStreamingCursor(self, packageName, parameters, chunkSize=10000):
+        """Execute a stored procedure that executes a select, and read its result progressively
+        with a server side cursor.
+
+        The query runs on a dedicated connection, so that the result can be read from any thread
+        while the other queries go on. The connection is closed when the result is fully read, or
+        when the returned generator is closed or garbage collected.
+
+        :param str packageName: name of the stored procedure
+        :param parameters: list of parameters of the procedure
+        :param int chunkSize: maximum number of rows in each chunk
+        :returns: S_OK(generator of tuples of at most chunkSize rows)
+        """
+        result = self.__connectionPool.getDedicated(self.__dbName)
+        if not result["OK"]:
+            return result
+        connection = result["Value"]
+
+        execStr = "call {}({});".format(
+            packageName,
+            ",".join(['"%s"' % param if isinstance(param, str) else str(param) for param in parameters]),
+        )
+        try:
+            cursor = connection.cursor(MySQLdb.cursors.SSCursor)
+            cursor.execute(execStr)
+        except Exception as x:
+            connection.close()
+            return self._except("_query", x, "Execution failed.", packageName)
+        return S_OK(self.__fetchChunks(connection, cursor, chunkSize))
+
+    @staticmethod
+    def __fetchChunks(connection, cursor, chunkSize):
+        """Yield the rows of a server side cursor by chunks, and close its connection at the end"""
+        try:
+            while rows := cursor.fetchmany(chunkSize):
+                yield rows
+        finally:
+            # Closing the cursor would read all the remaining rows, closing the connection aborts the query
+            connection.close()
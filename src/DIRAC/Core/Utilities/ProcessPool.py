@@ -789,7 +789,7 @@ class ProcessPool:
             self.__spawnWorkingProcess()
             time.sleep(0.1)
 
-    def queueTask(self, task, blocking=True, usePoolCallbacks=False):
+    def queueTask(self, task, blocking=True, usePoolCallbacks=False, throttle=True):
         """
         Enqueue new task into pending queue
 
@@ -797,6 +797,7 @@ class ProcessPool:
         :param ProcessTask task: new task to execute
         :param bool blocking: flag to block if necessary and new empty slot is available (default = block)
         :param bool usePoolCallbacks: flag to trigger execution of pool callbacks (default = don't execute)
+        :param bool throttle: flag to sleep a bit after enqueueing, to allow task state propagation (default = sleep)
         """
         if not isinstance(task, ProcessTask):
             raise TypeError("Tasks added to the process pool must be ProcessTask instances")
@@ -814,7 +815,8 @@ class ProcessPool:
 
         self.__spawnNeededWorkingProcesses()
         # throttle a bit to allow task state propagation
-        time.sleep(0.1)
+        if throttle:
+            time.sleep(0.1)
         return S_OK()
 
     def createAndQueueTask(
@@ -828,6 +830,7 @@ class ProcessPool:
         blocking=True,
         usePoolCallbacks=False,
         timeOut=0,
+        throttle=True,
     ):
         """
         Create new processTask and enqueue it in pending task queue
@@ -842,9 +845,10 @@ class ProcessPool:
         :param bool blocking: flag to block queue if necessary until free slot is available
         :param bool usePoolCallbacks: fire execution of pool defined callbacks after task callbacks
         :param int timeOut: time you want to spend executing :taskFunction:
+        :param bool throttle: flag to sleep a bit after enqueueing, to allow task state propagation
         """
         task = ProcessTask(taskFunction, args, kwargs, taskID, callback, exceptionCallback, usePoolCallbacks, timeOut)
-        return self.queueTask(task, blocking)
+        return self.queueTask(task, blocking, throttle=throttle)
 
     def hasPendingTasks(self):
         """
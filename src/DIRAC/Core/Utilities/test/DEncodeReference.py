@@ -0,0 +1,194 @@
+""" Reference implementation of the DEncode format
+
+    This is the straightforward implementation DEncode used to have, appending the pieces of
+    the encoded data to a list and decoding each value with its own function. It is kept to
+    check that the optimised DEncode produces and reads exactly the same data, and as the
+    baseline of tests/Performance/Tornado/encodingBenchmark.py
+"""
+import datetime
+
+encodeFunctions = {}
+decodeFunctions = {}
+
+
+def encodeInt(iValue, eList):
+    eList.extend((b"i", str(iValue).encode(), b"e"))
+
+
+def decodeInt(data, i):
+    i += 1
+    end = data.index(b"e", i)
+    return (int(data[i:end]), end + 1)
+
+
+encodeFunctions[int] = encodeInt
+decodeFunctions[ord("i")] = decodeInt
+decodeFunctions[ord("I")] = decodeInt
+
+
+def encodeFloat(fValue, eList):
+    eList.extend((b"f", str(fValue).encode(), b"e"))
+
+
+def decodeFloat(data, i):
+    i += 1
+    end = data.index(b"e", i)
+    if end + 1 < len(data) and data[end + 1] in (ord("+"), ord("-")):
+        eI = end
+        end = data.index(b"e", end + 1)
+        value = float(data[i:eI].decode()) * 10 ** int(data[eI + 1 : end].decode())
+    else:
+        value = float(data[i:end].decode())
+    return (value, end + 1)
+
+
+encodeFunctions[float] = encodeFloat
+decodeFunctions[ord("f")] = decodeFloat
+
+
+def encodeBool(bValue, eList):
+    eList.append(b"b1" if bValue else b"b0")
+
+
+def decodeBool(data, i):
+    return (data[i + 1] != ord("0"), i + 2)
+
+
+encodeFunctions[bool] = encodeBool
+decodeFunctions[ord("b")] = decodeBool
+
+
+def encodeString(sValue, eList):
+    if not isinstance(sValue, bytes):
+        sValue = sValue.encode()
+    eList.extend((b"s", str(len(sValue)).encode(), b":", sValue))
+
+
+def decodeString(data, i):
+    i += 1
+    colon = data.index(b":", i)
+    value = int(data[i:colon].decode())
+    colon += 1
+    end = colon + value
+    return (data[colon:end].decode(errors="surrogateescape"), end)
+
+
+encodeFunctions[str] = encodeString
+encodeFunctions[bytes] = encodeString
+decodeFunctions[ord("s")] = decodeString
+decodeFunctions[ord("u")] = decodeString
+
+
+def encodeDateTime(oValue, eList):
+    if isinstance(oValue, datetime.datetime):
+        eList.append(b"za")
+        tValue = (
+            oValue.year,
+            oValue.month,
+            oValue.day,
+            oValue.hour,
+            oValue.minute,
+            oValue.second,
+            oValue.microsecond,
+            oValue.tzinfo,
+        )
+    elif isinstance(oValue, datetime.date):
+        eList.append(b"zd")
+        tValue = (oValue.year, oValue.month, oValue.day)
+    else:
+        eList.append(b"zt")
+        tValue = (oValue.hour, oValue.minute, oValue.second, oValue.microsecond, oValue.tzinfo)
+    encodeTuple(tValue, eList)
+
+
+def decodeDateTime(data, i):
+    i += 1
+    dataType = data[i]
+    tupleObject, i = decodeFunctions[data[i + 1]](data, i + 1)
+    dtClass = {ord("a"): datetime.datetime, ord("d"): datetime.date, ord("t"): datetime.time}[dataType]
+    return (dtClass(*tupleObject), i)
+
+
+encodeFunctions[datetime.datetime] = encodeDateTime
+encodeFunctions[datetime.date] = encodeDateTime
+encodeFunctions[datetime.time] = encodeDateTime
+decodeFunctions[ord("z")] = decodeDateTime
+
+
+def encodeNone(_oValue, eList):
+    eList.append(b"n")
+
+
+def decodeNone(_data, i):
+    return (None, i + 1)
+
+
+encodeFunctions[type(None)] = encodeNone
+decodeFunctions[ord("n")] = decodeNone
+
+
+def encodeList(lValue, eList):
+    eList.append(b"l")
+    for uObject in lValue:
+        encodeFunctions[type(uObject)](uObject, eList)
+    eList.append(b"e")
+
+
+def decodeList(data, i):
+    oL = []
+    i += 1
+    while data[i] != ord("e"):
+        ob, i = decodeFunctions[data[i]](data, i)
+        oL.append(ob)
+    return (oL, i + 1)
+
+
+encodeFunctions[list] = encodeList
+decodeFunctions[ord("l")] = decodeList
+
+
+def encodeTuple(tValue, eList):
+    eList.append(b"t")
+    for uObject in tValue:
+        encodeFunctions[type(uObject)](uObject, eList)
+    eList.append(b"e")
+
+
+def decodeTuple(data, i):
+    oL, i = decodeList(data, i)
+    return (tuple(oL), i)
+
+
+encodeFunctions[tuple] = encodeTuple
+decodeFunctions[ord("t")] = decodeTuple
+
+
+def encodeDict(dValue, eList):
+    eList.append(b"d")
+    for key in dValue:
+        encodeFunctions[type(key)](key, eList)
+        encodeFunctions[type(dValue[key])](dValue[key], eList)
+    eList.append(b"e")
+
+
+def decodeDict(data, i):
+    oD = {}
+    i += 1
+    while data[i] != ord("e"):
+        k, i = decodeFunctions[data[i]](data, i)
+        oD[k], i = decodeFunctions[data[i]](data, i)
+    return (oD, i + 1)
+
+
+encodeFunctions[dict] = encodeDict
+decodeFunctions[ord("d")] = decodeDict
+
+
+def encode(uObject):
+    eList = []
+    encodeFunctions[type(uObject)](uObject, eList)
+    return b"".join(eList)
+
+
+def decode(data):
+    return decodeFunctions[data[0]](data, 0)
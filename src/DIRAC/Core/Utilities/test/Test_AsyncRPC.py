@@ -0,0 +1,87 @@
+""" Test the asynchronous RPC calls
+"""
+import errno
+import threading
+
+from DIRAC import S_ERROR, S_OK
+from DIRAC.Core.Base.Client import Client
+from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
+from DIRAC.Core.Utilities import AsyncRPC
+
+
+def test_gather():
+    """The results are in the order of the calls, exceptions become errors"""
+
+    def call(value):
+        if value == "raise":
+            raise RuntimeError("Boom")
+        if value == "error":
+            return S_ERROR("Error")
+        return S_OK(value)
+
+    results = AsyncRPC.gather([AsyncRPC.submit(call, value) for value in ("a", "error", "raise", "b")])
+    assert [result["OK"] for result in results] == [True, False, False, True]
+    assert results[0]["Value"] == "a"
+    assert results[1]["Message"] == "Error"
+    assert "Boom" in results[2]["Message"]
+    assert results[3]["Value"] == "b"
+
+
+def test_gatherTimeout():
+    """The calls not over after the timeout are errors"""
+    event = threading.Event()
+    futures = [AsyncRPC.submit(lambda: S_OK()), AsyncRPC.submit(lambda: S_OK(event.wait(10)))]
+    try:
+        results = AsyncRPC.gather(futures, timeout=0.5)
+    finally:
+        event.set()
+    assert results[0]["OK"]
+    assert not results[1]["OK"]
+    assert results[1]["Errno"] == errno.ETIMEDOUT
+
+
+def test_clientCallAsync(mocker):
+    """The calls of a Client are done concurrently, each with its own RPC client"""
+    nCalls = 4
+    barrier = threading.Barrier(nCalls, timeout=10)
+    rpcClients = []
+
+    class FakeRPCClient:
+        def __init__(self, url, **kwargs):
+            self.url = url
+            self.timeout = kwargs["timeout"]
+            rpcClients.append(self)
+
+        def ping(self, value):
+            # All the calls have to be in progress at the same time to pass the barrier
+            barrier.wait()
+            return S_OK((self.url, self.timeout, value))
+
+    mocker.patch("DIRAC.Core.Base.Client.RPCClientSelector", side_effect=FakeRPCClient)
+    client = Client(url="Framework/Dummy")
+    futures = [client.callAsync("ping", value, timeout=value + 1) for value in range(nCalls)]
+    results = AsyncRPC.gather(futures, timeout=30)
+
+    assert [result["Value"] for result in results] == [("Framework/Dummy", i + 1, i) for i in range(nCalls)]
+    assert len(rpcClients) == nCalls
+
+
+def test_threadConfig():
+    """The calls are done on behalf of the same user as the calling thread"""
+
+    def call():
+        tc = ThreadConfig()
+        return S_OK((tc.getDN(), tc.getGroup(), tc.getSetup()))
+
+    tc = ThreadConfig()
+    tc.setID("/DN=user", "user_group")
+    tc.setSetup("MySetup")
+    try:
+        results = AsyncRPC.gather([AsyncRPC.submit(call) for _ in range(20)], timeout=30)
+    finally:
+        tc.reset()
+    assert all(result["Value"] == ("/DN=user", "user_group", "MySetup") for result in results)
+
+    # Nothing is left in the worker threads for the next calls
+    results = AsyncRPC.gather([AsyncRPC.submit(call) for _ in range(20)], timeout=30)
+    assert all(result["Value"] == (False, False, False) for result in results)
@@ -0,0 +1,101 @@
+""" Check that DEncode produces and reads exactly the same data as its reference implementation
+"""
+import datetime
+
+from hypothesis import HealthCheck, given, settings
+from hypothesis.strategies import (
+    binary,
+    booleans,
+    data,
+    dates,
+    datetimes,
+    dictionaries,
+    floats,
+    integers,
+    lists,
+    none,
+    recursive,
+    text,
+    times,
+    tuples,
+)
+from pytest import raises
+
+from DIRAC.Core.Utilities import DEncode
+from DIRAC.Core.Utilities.test import DEncodeReference
+
+# Unlike in Test_Encode, the encoded data are compared, so the floats and the microseconds can be used
+baseStrategies = (
+    none()
+    | booleans()
+    | text()
+    | binary()
+    | integers()
+    | floats(allow_nan=False)
+    | datetimes(timezones=none())
+    | dates()
+    | times(timezones=none())
+)
+keyStrategies = text() | integers() | booleans() | floats(allow_nan=False)
+nestedStrategy = recursive(
+    baseStrategies,
+    lambda x: lists(x) | tuples(x, x) | dictionaries(keyStrategies, x),
+    max_leaves=50,
+)
+
+
+def _decodeOrError(decodeFunc, encodedData):
+    """Decoded data, or the fact that it can't be decoded"""
+    try:
+        return decodeFunc(encodedData)
+    except Exception:
+        return "Error"
+
+
+@settings(suppress_health_check=(HealthCheck.too_slow,))
+@given(value=nestedStrategy)
+def test_sameEncoding(value):
+    """The encoded data is the same, and decodes to the same values with both implementations"""
+    encodedData = DEncode.encode(value)
+    assert encodedData == DEncodeReference.encode(value)
+    assert DEncode.decode(encodedData) == DEncodeReference.decode(encodedData)
+    assert DEncode.decode(encodedData)[1] == len(encodedData)
+
+
+@settings(suppress_health_check=(HealthCheck.too_slow,))
+@given(value=nestedStrategy, randomData=data())
+def test_truncatedData(value, randomData):
+    """Truncated data can't be decoded, or decode to the same values with both implementations"""
+    encodedData = DEncode.encode(value)
+    encodedData = encodedData[: randomData.draw(integers(1, len(encodedData)))]
+    assert _decodeOrError(DEncode.decode, encodedData) == _decodeOrError(DEncodeReference.decode, encodedData)
+
+
+def test_specialValues():
+    """Values with a special handling"""
+    for value in (
+        {"key": [1, 2**70, -(2**70), 1e300, -1e-300, float("inf"), "é", None]},
+        {1: {2.5: {True: (None,)}}},
+        [datetime.datetime(2023, 1, 2, 3, 4, 5, 6), datetime.date(1, 1, 1), datetime.time(23, 59)],
+        [[], {}, (), ""],
+    ):
+        encodedData = DEncode.encode(value)
+        assert encodedData == DEncodeReference.encode(value)
+        assert DEncode.decode(encodedData) == (value, len(encodedData))
+
+    # The exponent of the floats is after an 'e', like the end of the value
+    assert DEncode.decode(b"f1.5e+3e") == (1500.0, 8)
+
+    # Bytes are decoded as strings, even when they are not valid UTF-8
+    assert DEncode.decode(DEncode.encode(b"\xff")) == ("\udcff", 4)
+
+
+def test_errors():
+    """Data that can't be encoded or decoded"""
+    with raises(KeyError):
+        DEncode.encode({"key": object()})
+    with raises(KeyError):
+        DEncode.encode(datetime.datetime.now(datetime.timezone.utc))
+    for encodedData in (b"ds3:keye", b"li1e", b"{}", b"x"):
+        with raises(Exception):
+            DEncode.decode(encodedData)
@@ -0,0 +1,140 @@
+""" Test case for DIRAC.Core.Utilities.DictCache module
+"""
+import threading
+import time
+
+# sut
+from DIRAC.Core.Utilities.DictCache import DictCache
+
+
+def testAddGetExists():
+    """add, get, exists and delete tests"""
+    cache = DictCache()
+    cache.add("key", 100, "value")
+    # Zero or negative validity: nothing is added
+    cache.add("nothing", 0, "value")
+    cache.add("negative", -1, "value")
+
+    assert cache.get("key") == "value"
+    assert cache.exists("key")
+    assert cache.get("nothing") is None
+    assert not cache.exists("negative")
+    # Not valid long enough: the entry is removed
+    assert cache.get("key", validSeconds=200) is None
+    assert not cache.exists("key")
+
+    cache.add("key", 100, "value")
+    cache.delete("key")
+    cache.delete("unknown")
+    assert cache.getKeys() == []
+
+
+def testPurgeExpired(mocker):
+    """purgeExpired removes only the expired entries, even when keys are replaced"""
+    deleted = []
+    cache = DictCache(deleteFunction=deleted.append)
+    now = time.time()
+    mockTime = mocker.patch("DIRAC.Core.Utilities.DictCache.time.time", return_value=now)
+
+    cache.add("short", 10, "short")
+    cache.add("long", 1000, "long")
+    cache.add("replaced", 10, "old")
+    cache.add("replaced", 1000, "new")
+    # Keys that cannot be ordered must not be an issue for the heap
+    cache.add(("a", None), 10, "tuple")
+
+    cache.purgeExpired()
+    assert sorted(cache.getKeys(), key=str) == sorted(["short", "long", "replaced", ("a", None)], key=str)
+
+    # Purge what will expire in the next minute
+    cache.purgeExpired(expiredInSeconds=60)
+    assert sorted(cache.getKeys(), key=str) == ["long", "replaced"]
+    assert sorted(deleted) == ["short", "tuple"]
+    assert cache.get("replaced") == "new"
+
+    mockTime.return_value = now + 2000
+    cache.purgeExpired()
+    assert cache.getKeys() == []
+    assert sorted(deleted) == ["long", "new", "short", "tuple"]
+    assert cache.getStats()["Expirations"] == 4
+
+
+def testMaxSize():
+    """The least recently used entries are evicted from a bounded cache"""
+    deleted = []
+    cache = DictCache(deleteFunction=deleted.append, maxSize=2)
+    cache.add("a", 100, "a")
+    cache.add("b", 100, "b")
+    # Using "a" makes "b" the least recently used
+    assert cache.get("a") == "a"
+    cache.add("c", 100, "c")
+
+    assert sorted(cache.getKeys()) == ["a", "c"]
+    assert deleted == ["b"]
+    assert cache.get("b") is None
+
+    stats = cache.getStats()
+    assert stats["Size"] == 2
+    assert stats["MaxSize"] == 2
+    assert stats["Hits"] == 1
+    assert stats["Misses"] == 1
+    assert stats["Evictions"] == 1
+
+
+def testHeapCompaction():
+    """Replacing the same keys over and over does not grow the cache internals"""
+    cache = DictCache()
+    for i in range(10000):
+        cache.add(i % 10, 100, i)
+    assert len(cache.getKeys()) == 10
+    assert len(cache._DictCache__sharedHeap) < 100
+
+
+def testPurgeAll():
+    """purgeAll tests"""
+    deleted = []
+    cache = DictCache(deleteFunction=deleted.append)
+    cache.add("a", 100, "a")
+    cache.add("b", 100, "b")
+    cache.purgeAll()
+    assert cache.getKeys() == []
+    assert sorted(deleted) == ["a", "b"]
+    cache.purgeExpired(expiredInSeconds=1000)
+
+
+def testLocks():
+    """Each shared cache has its own lock"""
+    cacheA = DictCache()
+    cacheB = DictCache()
+    assert cacheA.lock is not cacheB.lock
+
+    # Holding the lock of one cache does not block the other one
+    cacheA.lock.acquire()
+    try:
+        thread = threading.Thread(target=cacheB.add, args=("key", 100, "value"))
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    finally:
+        cacheA.lock.release()
+    assert cacheB.get("key") == "value"
+
+
+def testThreadLocal():
+    """Thread local caches are not shared"""
+    cache = DictCache(threadLocal=True)
+    cache.add("key", 100, "main")
+
+    results = {}
+
+    def otherThread():
+        results["before"] = cache.get("key")
+        cache.add("key", 100, "other")
+        results["after"] = cache.get("key")
+
+    thread = threading.Thread(target=otherThread)
+    thread.start()
+    thread.join()
+
+    assert results == {"before": None, "after": "other"}
+    assert cache.get("key") == "main"
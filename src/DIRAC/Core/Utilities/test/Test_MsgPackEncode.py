@@ -0,0 +1,79 @@
+""" Test the msgpack encoding of the HTTPS responses
+"""
+import datetime
+
+import pytest
+from hypothesis import given
+from hypothesis.strategies import binary, booleans, dictionaries, floats, integers, lists, none, recursive, text
+
+from DIRAC.Core.Utilities import MsgPackEncode
+from DIRAC.Core.Utilities.JEncode import JSerializable
+
+pytest.importorskip("msgpack")
+
+
+class Serializable(JSerializable):
+    """Dummy class inheriting from JSerializable"""
+
+    _attrToSerialize = ["instAttr", "otherAttr"]
+
+    def __init__(self, instAttr=None, otherAttr=None):
+        self.instAttr = instAttr
+        self.otherAttr = otherAttr
+
+
+def _roundTrip(data):
+    decodedData, length = MsgPackEncode.decode(MsgPackEncode.encode(data))
+    assert length > 0
+    return decodedData
+
+
+nestedStrategy = recursive(
+    none() | booleans() | text() | binary() | integers(-(2**63), 2**64 - 1) | floats(allow_nan=False),
+    lambda x: lists(x) | dictionaries(text() | integers(-(2**63), 2**63 - 1), x),
+)
+
+
+@given(data=nestedStrategy)
+def test_nestedStructure(data):
+    """Base types, and the keys of the dictionaries, are preserved"""
+    assert _roundTrip(data) == data
+
+
+def test_extensionTypes():
+    """Dates and JSerializable objects are decoded, also when nested"""
+    now = datetime.datetime(2023, 5, 17, 12, 30, 45)
+    # As with JEncode, the microseconds are not kept
+    assert _roundTrip(now.replace(microsecond=123)) == now
+    assert _roundTrip(datetime.datetime(1900, 1, 1)) == datetime.datetime(1900, 1, 1)
+    data = {
+        "OK": True,
+        "Value": {
+            "datetime": now,
+            "date": now.date(),
+            "object": Serializable(instAttr=[now, {"a": 1}], otherAttr=Serializable(instAttr=b"bytes")),
+        },
+    }
+    decodedData = _roundTrip(data)
+    value = decodedData["Value"]
+    assert value["datetime"] == now
+    assert value["date"] == now.date()
+    assert isinstance(value["object"], Serializable)
+    assert value["object"].instAttr == [now, {"a": 1}]
+    assert isinstance(value["object"].otherAttr, Serializable)
+    assert value["object"].otherAttr.instAttr == b"bytes"
+    assert value["object"].otherAttr.otherAttr is None
+
+
+def test_dictionariesNotMistakenForObjects():
+    """Only the JSerializable objects are instantiated, not the dictionaries looking like them"""
+    data = {"__dCls": "Serializable", "__dMod": __name__, "instAttr": 1}
+    assert _roundTrip(data) == data
+
+
+def test_nonSerializable():
+    """Unknown types and integers of more than 64 bits raise TypeError, so that JSON can be used instead"""
+    with pytest.raises(TypeError):
+        MsgPackEncode.encode({"a": object()})
+    with pytest.raises(TypeError):
+        MsgPackEncode.encode([2**64])
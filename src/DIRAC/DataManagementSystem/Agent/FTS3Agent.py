@@ -103,6 +103,8 @@ class FTS3Agent(AgentModule):
         self.maxDelete = self.am_getOption("DeleteLimitPerCycle", 100)
         # lifetime of the proxy we download to delegate to FTS
         self.proxyLifetime = self.am_getOption("ProxyLifetime", PROXY_LIFETIME)
+        # Monitor the jobs with one multi-job query per server and credentials
+        self.bulkMonitoring = self.am_getOption("BulkMonitoring", False)
 
         return S_OK()
 
@@ -249,8 +251,9 @@ class FTS3Agent(AgentModule):
             filesStatus = res["Value"]
 
             # Specify the job ftsGUID to make sure we do not overwrite
-            # status of files already taken by newer jobs
-            res = self.fts3db.updateFileStatus(filesStatus, ftsGUID=ftsJob.ftsGUID)
+            # status of files already taken by newer jobs.
+            # Only the files that changed are updated, in a few transactions
+            res = self.fts3db.updateFileStatusBulk(filesStatus, ftsGUID=ftsJob.ftsGUID)
 
             if not res["OK"]:
                 log.error("Error updating file fts status", f"{ftsJob.ftsGUID}, {res}")
@@ -276,6 +279,101 @@ class FTS3Agent(AgentModule):
             log.exception("Exception while monitoring job", repr(e))
             return ftsJob, S_ERROR(0, f"Exception {repr(e)}")
 
+    def _monitorJobGroup(self, ftsJobs):
+        """* query the FTS server for the status of jobs sharing the same server and credentials,
+          with a single request
+
+        :param ftsJobs: list of FTS jobs with the same (username, userGroup, ftsServer)
+
+        :return: ftsJobs, S_OK( { ftsGUID : S_OK(filesStatus)/S_ERROR } )/S_ERROR()
+        """
+        # General try catch to avoid that the tread dies
+        try:
+            threadID = current_process().name
+            ftsJob = ftsJobs[0]
+
+            res = self.getFTS3Context(ftsJob.username, ftsJob.userGroup, ftsJob.ftsServer, threadID=threadID)
+            if not res["OK"]:
+                return ftsJobs, res
+
+            return ftsJobs, FTS3Job.monitorBulk(res["Value"], ftsJobs)
+
+        except Exception as e:
+            gLogger.exception("Exception while monitoring jobs", repr(e))
+            return ftsJobs, S_ERROR(0, f"Exception {repr(e)}")
+
+    def _monitorJobsBulk(self, activeJobs):
+        """* group the jobs by (username, userGroup, ftsServer)
+        * query the status of each group in one go, the groups being spread over the thread pool
+        * update all the FTSFiles and FTSJobs in one DB pass
+
+        The jobs of the groups that could not be queried in one go are monitored
+        one by one with :py:meth:`_monitorJob`.
+
+        :param activeJobs: FTS jobs to monitor
+
+        :return: list of AsyncResult of the jobs monitored one by one
+        """
+        log = gLogger.getSubLogger("monitorJobsBulk")
+
+        jobGroups = {}
+        for ftsJob in activeJobs:
+            jobGroups.setdefault((ftsJob.username, ftsJob.userGroup, ftsJob.ftsServer), []).append(ftsJob)
+        log.info("Querying the jobs in bulk", f"{len(activeJobs)} jobs in {len(jobGroups)} groups")
+
+        # { ftsGUID : { fileID : { status, error } } }
+        filesStatus = {}
+        # { jobID : { status, error, completeness } }
+        upDict = {}
+        monitoredJobs = []
+        fallbackJobs = []
+        for ftsJobs, groupRes in self.jobsThreadPool.map(self._monitorJobGroup, jobGroups.values()):
+            if not groupRes["OK"]:
+                log.warn("Could not query the jobs in bulk, monitoring them one by one", groupRes["Message"])
+                fallbackJobs.extend(ftsJobs)
+                continue
+
+            for ftsJob in ftsJobs:
+                jobRes = groupRes["Value"][ftsJob.ftsGUID]
+                if not jobRes["OK"]:
+                    log.error("Error monitoring job", f"{ftsJob.ftsGUID}: {jobRes['Message']}")
+
+                    # If the job was not found on the server, update the DB
+                    if cmpError(jobRes, errno.ESRCH):
+                        cancelRes = self.fts3db.cancelNonExistingJob(ftsJob.operationID, ftsJob.ftsGUID)
+                        if not cancelRes["OK"]:
+                            log.error("Error canceling non existing job", cancelRes)
+                    continue
+
+                filesStatus[ftsJob.ftsGUID] = jobRes["Value"]
+                upDict[ftsJob.jobID] = {
+                    "status": ftsJob.status,
+                    "error": ftsJob.error,
+                    "completeness": ftsJob.completeness,
+                    "operationID": ftsJob.operationID,
+                    "lastMonitor": True,
+                }
+                monitoredJobs.append(ftsJob)
+
+        if upDict:
+            # Each file is only updated if it still belongs to the job it was monitored with
+            res = self.fts3db.updateJobsFileStatusBulk(filesStatus)
+            if not res["OK"]:
+                log.error("Error updating file fts status", res)
+            else:
+                res = self.fts3db.updateJobStatus(upDict)
+                if not res["OK"]:
+                    log.error("Error updating job status", res)
+                else:
+                    for ftsJob in monitoredJobs:
+                        if ftsJob.status in ftsJob.FINAL_STATES:
+                            self.__sendAccounting(ftsJob)
+
+        return [
+            self.jobsThreadPool.apply_async(self._monitorJob, (ftsJob,), callback=self._monitorJobCallback)
+            for ftsJob in fallbackJobs
+        ]
+
     @staticmethod
     def _monitorJobCallback(returnedValue):
         """Callback when a job has been monitored
@@ -292,7 +390,7 @@ class FTS3Agent(AgentModule):
 
     def monitorJobsLoop(self):
         """* fetch the active FTSJobs from the DB
-        * spawn a thread to monitor each of them
+        * spawn a thread to monitor each of them, or monitor them in bulk (see BulkMonitoring)
 
         :return: S_OK()/S_ERROR()
         """
@@ -330,17 +428,21 @@ class FTS3Agent(AgentModule):
 
             log.info("Jobs queued for monitoring", len(activeJobs))
 
-            # We store here the AsyncResult object on which we are going to wait
-            applyAsyncResults = []
-
-            # Starting the monitoring threads
-            for ftsJob in activeJobs:
-                log.debug(f"Queuing executing of ftsJob {ftsJob.jobID}")
-                # queue the execution of self._monitorJob( ftsJob ) in the thread pool
-                # The returned value is passed to _monitorJobCallback
-                applyAsyncResults.append(
-                    self.jobsThreadPool.apply_async(self._monitorJob, (ftsJob,), callback=self._monitorJobCallback)
-                )
+            if self.bulkMonitoring:
+                # We only wait for the jobs that could not be monitored in bulk
+                applyAsyncResults = self._monitorJobsBulk(activeJobs)
+            else:
+                # We store here the AsyncResult object on which we are going to wait
+                applyAsyncResults = []
+
+                # Starting the monitoring threads
+                for ftsJob in activeJobs:
+                    log.debug(f"Queuing executing of ftsJob {ftsJob.jobID}")
+                    # queue the execution of self._monitorJob( ftsJob ) in the thread pool
+                    # The returned value is passed to _monitorJobCallback
+                    applyAsyncResults.append(
+                        self.jobsThreadPool.apply_async(self._monitorJob, (ftsJob,), callback=self._monitorJobCallback)
+                    )
 
             log.debug("All execution queued")
 
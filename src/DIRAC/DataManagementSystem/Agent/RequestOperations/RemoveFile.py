@@ -160,6 +160,83 @@ class RemoveFile(DMSRequestOperationsBase):
             return S_OK(f"{','.join(sorted(bannedTargets))} targets are banned for removal")
         return S_OK()
 
+    def executeBatch(self, operations):
+        """remove the files of several operations with one catalog lookup and one bulk removal
+
+        When some of the SEs holding the files are banned for removal, what to do depends on each
+        operation, so they are then executed one by one.
+
+        :param list operations: RemoveFile operations with the same catalogs
+        """
+        allLFNs = {opFile.LFN for operation in operations for opFile in operation if opFile.Status == "Waiting"}
+        res = FileCatalog(operations[0].catalogList).getReplicas(list(allLFNs))
+        if not res["OK"]:
+            self.log.error("Failed to get the replicas of the batch", res["Message"])
+            return super().executeBatch(operations)
+        replicas = res["Value"]["Successful"]
+        for targetSE in {se for lfn in replicas for se in replicas[lfn]}:
+            seStatus = self.rssSEStatus(targetSE, "RemoveAccess", retries=5)
+            if not seStatus["OK"] or not seStatus["Value"]:
+                self.log.info("Not all SEs can be removed from, executing the operations one by one", targetSE)
+                return super().executeBatch(operations)
+
+        if self.rmsMonitoring:
+            self.rmsMonitoringReporter = MonitoringReporter(monitoringType="RMSMonitoring")
+
+        # # several requests may remove the same file
+        toRemoveDict = {}
+        for operation in operations:
+            self.setOperation(operation)
+            waitingFiles = self.getWaitingFilesList()
+            for opFile in waitingFiles:
+                toRemoveDict.setdefault(opFile.LFN, []).append(opFile)
+            if self.rmsMonitoring and waitingFiles:
+                self.rmsMonitoringReporter.addRecord(self.createRMSRecord("Attempted", len(waitingFiles)))
+
+        if toRemoveDict:
+            self.log.info(f"bulk removal of {len(toRemoveDict)} files for {len(operations)} operations")
+            bulkRemoval = self.dm.removeFile(list(toRemoveDict), force=True)
+            for lfn, opFiles in toRemoveDict.items():
+                if not bulkRemoval["OK"]:
+                    error = bulkRemoval["Message"]
+                elif lfn in bulkRemoval["Value"]["Successful"]:
+                    error = None
+                else:
+                    error = bulkRemoval["Value"]["Failed"].get(lfn, "Not removed")
+                    if isinstance(error, dict):
+                        error = ";".join([f"{k}-{v}" for k, v in error.items()])
+                for opFile in opFiles:
+                    if error is None or self.reNotExisting.search(error):
+                        opFile.Status = "Done"
+                    if error is not None:
+                        opFile.Error = error
+
+        # # same as for a single operation, with the proxy of the file owner if allowed
+        for operation in operations:
+            self.setOperation(operation)
+            for opFile in operation:
+                if opFile.Status == "Waiting" and opFile.LFN in toRemoveDict:
+                    singleRemoval = self.singleRemoval(opFile)
+                    if not singleRemoval["OK"]:
+                        self.log.error("Error removing single file", singleRemoval["Message"])
+            failedFiles = [
+                opFile for opFile in operation if opFile.LFN in toRemoveDict and opFile.Status in ("Failed", "Waiting")
+            ]
+            if failedFiles:
+                operation.Error = f"failed to remove {len(failedFiles)} files"
+            if self.rmsMonitoring:
+                removedFiles = [
+                    opFile for opFile in operation if opFile.LFN in toRemoveDict and opFile.Status == "Done"
+                ]
+                if removedFiles:
+                    self.rmsMonitoringReporter.addRecord(self.createRMSRecord("Successful", len(removedFiles)))
+                if failedFiles:
+                    self.rmsMonitoringReporter.addRecord(self.createRMSRecord("Failed", len(failedFiles)))
+
+        if self.rmsMonitoring:
+            self.rmsMonitoringReporter.commit()
+        return S_OK()
+
     def bulkRemoval(self, toRemoveDict):
         """bulk removal using request owner DN
 
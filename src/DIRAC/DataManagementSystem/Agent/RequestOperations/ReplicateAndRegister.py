@@ -176,6 +176,9 @@ class ReplicateAndRegister(DMSRequestOperationsBase):
         # Clients
         self.fc = FileCatalog()
 
+        # # set by executeBatch, when the replicas of the operation were already checked
+        self.__replicasChecked = False
+
     def __call__(self):
         """call me maybe"""
 
@@ -214,9 +217,10 @@ class ReplicateAndRegister(DMSRequestOperationsBase):
             return S_OK(self.operation.Error)
 
         # # check replicas first
-        checkReplicas = self.__checkReplicas()
-        if not checkReplicas["OK"]:
-            self.log.error("Failed to check replicas", checkReplicas["Message"])
+        if not self.__replicasChecked:
+            checkReplicas = self.__checkReplicas()
+            if not checkReplicas["OK"]:
+                self.log.error("Failed to check replicas", checkReplicas["Message"])
         if hasattr(self, "FTSMode") and getattr(self, "FTSMode"):
             bannedGroups = getattr(self, "FTSBannedGroups") if hasattr(self, "FTSBannedGroups") else ()
             if self.request.OwnerGroup in bannedGroups:
@@ -227,9 +231,40 @@ class ReplicateAndRegister(DMSRequestOperationsBase):
 
         return self.dmTransfer()
 
-    def __checkReplicas(self):
-        """check done replicas and update file states"""
-        waitingFiles = {opFile.LFN: opFile for opFile in self.operation if opFile.Status in ("Waiting", "Scheduled")}
+    def executeBatch(self, operations):
+        """check the replicas of the files of several operations in one catalog call,
+        then execute the operations that still have files to replicate
+
+        :param list operations: ReplicateAndRegister operations with the same SEs
+        """
+        if self.rmsMonitoring:
+            self.rmsMonitoringReporter = MonitoringReporter(monitoringType="RMSMonitoring")
+        self.setOperation(operations[0])
+        checkReplicas = self.__checkReplicas(operations)
+        if self.rmsMonitoring:
+            self.rmsMonitoringReporter.commit()
+        if not checkReplicas["OK"]:
+            self.log.error("Failed to check replicas", checkReplicas["Message"])
+            return super().executeBatch(operations)
+
+        self.__replicasChecked = True
+        try:
+            return super().executeBatch(
+                [operation for operation in operations if operation.Status not in ("Done", "Failed")]
+            )
+        finally:
+            self.__replicasChecked = False
+
+    def __checkReplicas(self, operations=None):
+        """check done replicas and update file states
+
+        :param list operations: operations with the same targets to check at once, default is the current one
+        """
+        waitingFiles = {}
+        for operation in operations or [self.operation]:
+            for opFile in operation:
+                if opFile.Status in ("Waiting", "Scheduled"):
+                    waitingFiles.setdefault(opFile.LFN, []).append(opFile)
         targetSESet = set(self.operation.targetSEList)
 
         replicas = self.fc.getReplicas(list(waitingFiles))
@@ -239,17 +274,22 @@ class ReplicateAndRegister(DMSRequestOperationsBase):
 
         reMissing = re.compile(r".*such file.*")
         for failedLFN, errStr in replicas["Value"]["Failed"].items():
-            waitingFiles[failedLFN].Error = errStr
-            if reMissing.search(errStr.lower()):
-                self.log.error("File does not exists", failedLFN)
-                if self.rmsMonitoring:
-                    self.rmsMonitoringReporter.addRecord(self.createRMSRecord("Failed", 1))
-                waitingFiles[failedLFN].Status = "Failed"
+            for opFile in waitingFiles[failedLFN]:
+                opFile.Error = errStr
+                if reMissing.search(errStr.lower()):
+                    # # the record is for the operation of the file
+                    if opFile._parent is not self.operation:  # pylint: disable=protected-access
+                        self.setOperation(opFile._parent)  # pylint: disable=protected-access
+                    self.log.error("File does not exists", failedLFN)
+                    if self.rmsMonitoring:
+                        self.rmsMonitoringReporter.addRecord(self.createRMSRecord("Failed", 1))
+                    opFile.Status = "Failed"
 
         for successfulLFN, reps in replicas["Value"]["Successful"].items():
             if targetSESet.issubset(set(reps)):
                 self.log.info("file replicated to all targets", successfulLFN)
-                waitingFiles[successfulLFN].Status = "Done"
+                for opFile in waitingFiles[successfulLFN]:
+                    opFile.Status = "Done"
 
         return S_OK()
 
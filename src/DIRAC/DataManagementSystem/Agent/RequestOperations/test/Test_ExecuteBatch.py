@@ -0,0 +1,139 @@
+""" Test the execution in one go of the operations of several requests:
+one bulk call for all the files, and the results set in the files of each request
+"""
+# pylint: disable=protected-access
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.Agent.RequestOperations import RemoveFile as RemoveFileModule
+from DIRAC.DataManagementSystem.Agent.RequestOperations import ReplicateAndRegister as ReplicateAndRegisterModule
+from DIRAC.DataManagementSystem.Agent.RequestOperations.RemoveFile import RemoveFile
+from DIRAC.DataManagementSystem.Agent.RequestOperations.ReplicateAndRegister import ReplicateAndRegister
+from DIRAC.RequestManagementSystem.Client.File import File
+from DIRAC.RequestManagementSystem.Client.Operation import Operation
+from DIRAC.RequestManagementSystem.Client.Request import Request
+
+# The second and third requests remove the same file
+requestLFNs = [["/vo/file1", "/vo/file2"], ["/vo/file3"], ["/vo/file3", "/vo/missing"]]
+
+
+def _makeOperations(opType, **opAttrs):
+    """One request per list of LFNs, with a single operation"""
+    operations = []
+    for i, lfns in enumerate(requestLFNs):
+        request = Request({"RequestName": f"batch{i}"})
+        operation = Operation(dict(Type=opType, **opAttrs))
+        for lfn in lfns:
+            operation.addFile(File({"LFN": lfn}))
+        request.addOperation(operation)
+        operations.append(operation)
+    return operations
+
+
+def _getReplicas(lfns):
+    return S_OK({"Successful": {lfn: {"Disk1": lfn} for lfn in lfns}, "Failed": {}})
+
+
+@pytest.fixture
+def removeFile(monkeypatch):
+    fcMock = MagicMock()
+    fcMock.return_value.getReplicas.side_effect = _getReplicas
+    monkeypatch.setattr(RemoveFileModule, "FileCatalog", fcMock)
+    handler = RemoveFile()
+    handler.shifter = []
+    handler.rssSEStatus = MagicMock(return_value=S_OK(True))
+    handler.dm = MagicMock()
+    handler.dm.removeFile.return_value = S_OK(
+        {
+            "Successful": {"/vo/file1": True, "/vo/file3": True},
+            "Failed": {"/vo/file2": "Permission denied", "/vo/missing": "No such file or directory"},
+        }
+    )
+    return handler
+
+
+def test_removeFileBatch(removeFile):
+    operations = _makeOperations("RemoveFile")
+    assert removeFile.executeBatch(operations)["OK"]
+
+    # One catalog call and one removal for all the files
+    removeFile.dm.removeFile.assert_called_once()
+    assert sorted(removeFile.dm.removeFile.call_args[0][0]) == ["/vo/file1", "/vo/file2", "/vo/file3", "/vo/missing"]
+
+    # The results are in the files of each request
+    assert [opFile.Status for opFile in operations[0]] == ["Done", "Waiting"]
+    assert operations[0].Error == "failed to remove 1 files"
+    assert operations[0].Status != "Done"
+    assert [opFile.Status for opFile in operations[1]] == ["Done"]
+    assert operations[1].Status == "Done"
+    assert [opFile.Status for opFile in operations[2]] == ["Done", "Done"]
+    assert operations[2]._parent.Status == "Done"
+
+
+def test_removeFileBatchBannedSE(removeFile):
+    """With a banned SE, each operation is executed on its own"""
+    removeFile.rssSEStatus.return_value = S_OK(False)
+    calls = []
+    removeFile.__class__ = type(
+        "RemoveFileSpy", (RemoveFile,), {"__call__": lambda self: calls.append(self.operation) or S_OK()}
+    )
+    operations = _makeOperations("RemoveFile")
+    assert removeFile.executeBatch(operations)["OK"]
+    assert calls == operations
+    removeFile.dm.removeFile.assert_not_called()
+
+
+def test_replicateAndRegisterBatch(monkeypatch):
+    reporter = MagicMock()
+    monkeypatch.setattr(ReplicateAndRegisterModule, "MonitoringReporter", MagicMock(return_value=reporter))
+    handler = ReplicateAndRegister()
+    handler.rmsMonitoring = True
+    handler.fc = MagicMock()
+    # /vo/file3 is already at the target, /vo/missing does not exist
+    handler.fc.getReplicas.return_value = S_OK(
+        {
+            "Successful": {
+                "/vo/file1": {"Disk1": "/vo/file1"},
+                "/vo/file2": {"Disk1": "/vo/file2"},
+                "/vo/file3": {"Disk1": "/vo/file3", "Disk2": "/vo/file3"},
+            },
+            "Failed": {"/vo/missing": "No such file or directory"},
+        }
+    )
+    executed = []
+    handler.__class__ = type(
+        "ReplicateAndRegisterSpy",
+        (ReplicateAndRegister,),
+        {"__call__": lambda self: executed.append(self.operation) or S_OK()},
+    )
+    operations = _makeOperations("ReplicateAndRegister", TargetSE="Disk2")
+    for operationID, operation in enumerate(operations, start=1):
+        operation.OperationID = operationID
+    assert handler.executeBatch(operations)["OK"]
+
+    # One catalog call for all the files
+    handler.fc.getReplicas.assert_called_once()
+    assert [opFile.Status for opFile in operations[1]] == ["Done"]
+    assert [opFile.Status for opFile in operations[2]] == ["Done", "Failed"]
+    # The missing file is accounted in its own operation
+    assert [call[0][0]["parentID"] for call in reporter.addRecord.call_args_list] == [3]
+    # Only the first request still has files to replicate
+    assert executed == operations[:1]
+
+
+def test_replicateAndRegisterBatchError():
+    """If the replicas cannot be checked, each operation is executed on its own"""
+    handler = ReplicateAndRegister()
+    handler.fc = MagicMock()
+    handler.fc.getReplicas.return_value = S_ERROR("Catalog down")
+    executed = []
+    handler.__class__ = type(
+        "ReplicateAndRegisterSpy",
+        (ReplicateAndRegister,),
+        {"__call__": lambda self: executed.append(self.operation) or S_OK()},
+    )
+    operations = _makeOperations("ReplicateAndRegister", TargetSE="Disk2")
+    assert handler.executeBatch(operations)["OK"]
+    assert executed == operations
@@ -0,0 +1,215 @@
+""" Test the bulk monitoring of the FTS3Agent against a local mock FTS3 server,
+which answers the multi-job queries like the FTS3 REST API does
+"""
+# pylint: disable=protected-access,redefined-outer-name
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.pool import ThreadPool
+from unittest.mock import MagicMock
+from urllib import parse
+
+import fts3.rest.client.easy as fts3
+import pytest
+from fts3.rest.client.request import Request as ftsSSLRequest
+
+from DIRAC import S_OK, gLogger
+from DIRAC.DataManagementSystem.Agent.FTS3Agent import FTS3Agent
+from DIRAC.DataManagementSystem.Client.FTS3Job import FTS3Job
+
+gLogger.setLevel("DEBUG")
+
+
+def _jobStatus(ftsGUID, jobState, fileStates):
+    """Job status as returned by the server, with one file per fileID"""
+    return {
+        "job_id": ftsGUID,
+        "job_state": jobState,
+        "reason": "",
+        "job_metadata": {"sourceSE": "Source", "targetSE": "Target"},
+        "http_status": "200 Ok",
+        "files": [
+            {
+                "file_state": fileState,
+                "reason": "Error" if fileState == "FAILED" else "",
+                "file_metadata": {"fileID": fileID},
+                "filesize": 10,
+                "tx_duration": 1.0,
+            }
+            for fileID, fileState in fileStates.items()
+        ],
+    }
+
+
+class MockFTS3Handler(BaseHTTPRequestHandler):
+    """Answer the endpoint information and the job status queries (see the FTS3 REST API documentation)"""
+
+    def do_GET(self):
+        url = parse.urlparse(self.path)
+        path = url.path.strip("/")
+        self.server.queries.append(path)
+        if not path:
+            self._reply(200, {"api": {"major": 3, "minor": 12, "patch": 0}})
+            return
+        # /jobs/<id>/files and /jobs/<id>/dm, for the job per job monitoring
+        _jobs, ftsGUIDs, *details = path.split("/")
+        ftsGUIDs = ftsGUIDs.split(",")
+        if details:
+            job = self.server.jobs[ftsGUIDs[0]]
+            self._reply(200, job["files"] if details == ["files"] else [])
+            return
+        # Jobs silently left out of the answer
+        ftsGUIDs = [ftsGUID for ftsGUID in ftsGUIDs if ftsGUID not in self.server.forgotten]
+        jobs = [self.server.jobs[ftsGUID] for ftsGUID in ftsGUIDs if ftsGUID in self.server.jobs]
+        if not jobs:
+            self._reply(404, {"message": f"No job with the id {ftsGUIDs[0]} has been found"})
+        elif len(jobs) < len(ftsGUIDs):
+            # Like the real server: multi-status with an error for each missing job
+            self._reply(
+                207,
+                jobs
+                + [
+                    {"job_id": ftsGUID, "http_status": "404 Not Found", "http_message": f"No job with the id {ftsGUID}"}
+                    for ftsGUID in ftsGUIDs
+                    if ftsGUID not in self.server.jobs
+                ],
+            )
+        else:
+            self._reply(200, jobs if len(jobs) > 1 else jobs[0])
+
+    def _reply(self, code, body):
+        body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ftsServer():
+    """Local mock FTS3 server, with its jobs and the list of queries it got"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockFTS3Handler)
+    server.jobs = {
+        "guid1": _jobStatus("guid1", "ACTIVE", {1: "FINISHED", 2: "ACTIVE"}),
+        "guid2": _jobStatus("guid2", "FAILED", {3: "FINISHED", 4: "FAILED"}),
+        "guid3": _jobStatus("guid3", "SUBMITTED", {5: "SUBMITTED"}),
+    }
+    server.queries = []
+    server.forgotten = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def ftsContext(ftsServer):
+    server_url = f"http://127.0.0.1:{ftsServer.server_port}"
+    # A token, such that no certificate is needed
+    context = fts3.Context(endpoint=server_url, fts_access_token="token", request_class=ftsSSLRequest, verify=False)
+    ftsServer.queries.clear()
+    return context
+
+
+def _makeJob(jobID, ftsGUID, ftsServer="https://fts.server:8446", username="user"):
+    ftsJob = FTS3Job()
+    ftsJob.jobID = jobID
+    ftsJob.operationID = jobID
+    ftsJob.ftsGUID = ftsGUID
+    ftsJob.ftsServer = ftsServer
+    ftsJob.username = username
+    ftsJob.userGroup = "group"
+    ftsJob.status = "Submitted"
+    return ftsJob
+
+
+def test_monitorBulk(ftsServer, ftsContext):
+    """All the jobs are monitored with a single query"""
+    ftsJobs = [_makeJob(1, "guid1"), _makeJob(2, "guid2")]
+    res = FTS3Job.monitorBulk(ftsContext, ftsJobs)
+    assert res["OK"]
+    assert len(ftsServer.queries) == 1
+
+    assert res["Value"]["guid1"] == S_OK(
+        {1: {"status": "Finished", "error": "", "ftsGUID": None}, 2: {"status": "Active", "error": ""}}
+    )
+    assert res["Value"]["guid2"]["OK"]
+    assert [ftsJob.status for ftsJob in ftsJobs] == ["Active", "Failed"]
+    assert [ftsJob.completeness for ftsJob in ftsJobs] == [50, 100]
+    assert ftsJobs[1].accountingDict["TransferOK"] == 1
+
+    # The same as job per job monitoring
+    ftsJob = _makeJob(1, "guid1")
+    assert ftsJob.monitor(context=ftsContext) == res["Value"]["guid1"]
+
+
+def test_monitorBulkMissingJob(ftsContext):
+    """The server refuses the query if a job does not exist"""
+    res = FTS3Job.monitorBulk(ftsContext, [_makeJob(1, "guid1"), _makeJob(4, "guid4")])
+    assert not res["OK"]
+
+
+@pytest.fixture
+def fts3Agent(mocker, ftsContext):
+    mocker.patch("DIRAC.DataManagementSystem.Agent.FTS3Agent.AgentModule.__init__", return_value=None)
+    agent = FTS3Agent("Test", "Test1")
+    agent.jobsThreadPool = ThreadPool(2)
+    agent.fts3db = MagicMock()
+    agent.fts3db.updateJobsFileStatusBulk.return_value = S_OK(3)
+    agent.fts3db.updateJobStatus.return_value = S_OK()
+    agent.dataOpSender = MagicMock()
+    agent.getFTS3Context = MagicMock(return_value=S_OK(ftsContext))
+    agent._monitorJob = MagicMock(side_effect=lambda ftsJob: (ftsJob, S_OK()))
+    yield agent
+    agent.jobsThreadPool.close()
+
+
+def test_monitorJobsBulk(fts3Agent, ftsServer):
+    """One query per server and credentials, and a single DB pass"""
+    ftsJobs = [_makeJob(1, "guid1"), _makeJob(2, "guid2"), _makeJob(3, "guid3", username="other")]
+    assert fts3Agent._monitorJobsBulk(ftsJobs) == []
+
+    assert len(ftsServer.queries) == 2
+    assert fts3Agent.getFTS3Context.call_count == 2
+    fts3Agent._monitorJob.assert_not_called()
+
+    fts3Agent.fts3db.updateJobsFileStatusBulk.assert_called_once()
+    assert sorted(fts3Agent.fts3db.updateJobsFileStatusBulk.call_args[0][0]) == ["guid1", "guid2", "guid3"]
+    fts3Agent.fts3db.updateJobStatus.assert_called_once()
+    upDict = fts3Agent.fts3db.updateJobStatus.call_args[0][0]
+    assert {jobID: jobDict["status"] for jobID, jobDict in upDict.items()} == {
+        1: "Active",
+        2: "Failed",
+        3: "Submitted",
+    }
+    # Only the job in a final state is accounted
+    fts3Agent.dataOpSender.sendData.assert_called_once()
+
+
+def test_monitorJobsBulkFallback(fts3Agent, ftsServer):
+    """The jobs whose bulk query fails are monitored one by one"""
+    ftsJobs = [_makeJob(1, "guid1"), _makeJob(4, "guid4"), _makeJob(3, "guid3", username="other")]
+    asyncResults = fts3Agent._monitorJobsBulk(ftsJobs)
+    for asyncResult in asyncResults:
+        asyncResult.wait()
+
+    assert sorted(ftsJob.jobID for ftsJob, _res in (r.get() for r in asyncResults)) == [1, 4]
+    upDict = fts3Agent.fts3db.updateJobStatus.call_args[0][0]
+    assert list(upDict) == [3]
+
+
+def test_monitorJobsBulkMissingJob(fts3Agent, ftsServer):
+    """A job missing from the answer is canceled, and the other jobs of its group are still updated"""
+    ftsServer.forgotten.add("guid1")
+    fts3Agent.fts3db.cancelNonExistingJob.return_value = S_OK()
+    ftsJobs = [_makeJob(1, "guid1"), _makeJob(2, "guid2"), _makeJob(3, "guid3")]
+    assert fts3Agent._monitorJobsBulk(ftsJobs) == []
+
+    fts3Agent.fts3db.cancelNonExistingJob.assert_called_once_with(1, "guid1")
+    assert sorted(fts3Agent.fts3db.updateJobsFileStatusBulk.call_args[0][0]) == ["guid2", "guid3"]
+    assert sorted(fts3Agent.fts3db.updateJobStatus.call_args[0][0]) == [2, 3]
@@ -2,6 +2,7 @@
 
 import datetime
 import errno
+import json
 from packaging.version import Version
 
 
@@ -35,6 +36,10 @@ from DIRAC.DataManagementSystem.Client.FTS3File import FTS3File
 # 3 days in seconds
 BRING_ONLINE_TIMEOUT = 259200
 
+# Attributes of the files returned by the multi-job monitoring query:
+# the ones needed to monitor the job and to fill the accounting
+BULK_MONITORING_FILE_FIELDS = "file_state,reason,file_metadata,filesize,tx_duration"
+
 
 class FTS3Job(JSerializable):
     """Abstract class to represent a job to be executed by FTS. It belongs
@@ -159,6 +164,59 @@ class FTS3Job(JSerializable):
         except FTS3ClientException as e:
             return S_ERROR(f"Error getting the job status {e}")
 
+        return self._parseJobStatus(jobStatusDict)
+
+    @staticmethod
+    def monitorBulk(context, ftsJobs):
+        """Queries the fts server to monitor several jobs with a single multi-job request
+        (see https://fts3-docs.web.cern.ch/fts3-docs/fts-rest/docs/api.html#get-jobsjobidlist).
+        The internal state of each job is updated like in :py:meth:`monitor`.
+
+        All the jobs must belong to the server and the credentials of the context.
+        Note that the server refuses the whole query if one of the jobs does not exist:
+        the jobs should then be monitored one by one.
+
+        :param context: fts3 context
+        :param ftsJobs: list of FTS3Job, with their ftsGUID set
+
+        :returns: S_OK( { ftsGUID : S_OK( {FileID: { status, error } } )/S_ERROR } ), see :py:meth:`monitor`
+        """
+
+        ftsGUIDs = [ftsJob.ftsGUID for ftsJob in ftsJobs]
+        if not all(ftsGUIDs):
+            return S_ERROR("FTSGUID not set, FTS job not submitted?")
+
+        try:
+            jobStatusList = json.loads(context.get(f"/jobs/{','.join(ftsGUIDs)}?files={BULK_MONITORING_FILE_FIELDS}"))
+        except FTS3ClientException as e:
+            return S_ERROR(f"Error getting the jobs status {e}")
+
+        # With a single job, the server does not return a list
+        if isinstance(jobStatusList, dict):
+            jobStatusList = [jobStatusList]
+        jobStatusDicts = {jobStatusDict["job_id"]: jobStatusDict for jobStatusDict in jobStatusList}
+
+        jobsResult = {}
+        for ftsJob in ftsJobs:
+            jobStatusDict = jobStatusDicts.get(ftsJob.ftsGUID)
+            if not jobStatusDict:
+                ftsJob.status = "Failed"
+                jobsResult[ftsJob.ftsGUID] = S_ERROR(
+                    errno.ESRCH, f"FTSGUID {ftsJob.ftsGUID} not found on {ftsJob.ftsServer}"
+                )
+            else:
+                jobsResult[ftsJob.ftsGUID] = ftsJob._parseJobStatus(jobStatusDict)
+
+        return S_OK(jobsResult)
+
+    def _parseJobStatus(self, jobStatusDict):
+        """Update the internal state of the job from the status returned by the fts server
+
+        :param jobStatusDict: job status, with the list of its files, as returned by the fts server
+
+        :returns: {FileID: { status, error } }, see :py:meth:`monitor`
+        """
+
         now = datetime.datetime.utcnow().replace(microsecond=0)
         self.lastMonitor = now
 
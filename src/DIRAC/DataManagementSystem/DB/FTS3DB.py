@@ -20,6 +20,7 @@ from sqlalchemy import (
     SmallInteger,
     String,
     Table,
+    case,
     create_engine,
     func,
     text,
@@ -33,6 +34,7 @@ from sqlalchemy.sql.expression import and_
 # # from DIRAC
 from DIRAC import S_ERROR, S_OK, gLogger
 from DIRAC.ConfigurationSystem.Client.Utilities import getDBParameters
+from DIRAC.Core.Utilities.List import breakListIntoChunks
 from DIRAC.DataManagementSystem.Client.FTS3File import FTS3File
 from DIRAC.DataManagementSystem.Client.FTS3Job import FTS3Job
 from DIRAC.DataManagementSystem.Client.FTS3Operation import FTS3Operation, FTS3StagingOperation, FTS3TransferOperation
@@ -40,6 +42,9 @@ from DIRAC.DataManagementSystem.Client.FTS3Operation import FTS3Operation, FTS3S
 metadata = MetaData()
 mapper_registry = registry()
 
+# Number of files updated in one transaction by updateFileStatusBulk
+FILE_STATUS_BATCH_SIZE = 100
+
 # Define the default utc_timestampfunction.
 # We overwrite it in the case of sqlite in the tests
 # because sqlite does not know UTC_TIMESTAMP
@@ -357,7 +362,7 @@ class FTS3DB:
 
 
 
-         TODO: maybe it should query first the status and filter the rows I want to update !
+         updateFileStatusBulk only updates the files whose values change, in a few transactions.
 
         :param fileStatusDict: { fileID : { status , error, ftsGUID } }
         :param ftsGUID: If specified, only update the rows where the ftsGUID matches this value.
@@ -422,6 +427,109 @@ class FTS3DB:
 
         return S_OK()
 
+    def updateFileStatusBulk(self, fileStatusDict, ftsGUID=None, batchSize=FILE_STATUS_BATCH_SIZE):
+        """Same as updateFileStatus, but only the files whose status, error or ftsGUID change are updated,
+        with one statement per new status and one commit for every batchSize files.
+
+        The current values are read first. The update keeps the conditions on the final states and on the ftsGUID,
+        as the files may have changed in between.
+
+        :param fileStatusDict: { fileID : { status , error, ftsGUID } }
+        :param ftsGUID: If specified, only update the rows where the ftsGUID matches this value.
+        :param int batchSize: maximum number of files updated in a transaction,
+                              to keep the locks short (see the comment in updateFileStatus)
+
+        :returns: S_OK(number of files updated)
+        """
+        return self.updateJobsFileStatusBulk({ftsGUID: fileStatusDict}, batchSize=batchSize)
+
+    def updateJobsFileStatusBulk(self, jobsFileStatusDict, batchSize=FILE_STATUS_BATCH_SIZE):
+        """Same as updateFileStatusBulk, for the files of several FTS jobs at once.
+        A file is only updated if it still belongs to its job,
+        and there is one statement per job and new status.
+
+        :param jobsFileStatusDict: { ftsGUID : { fileID : { status , error, ftsGUID } } }
+                                   If the ftsGUID is None, the files are updated whatever their job
+        :param int batchSize: maximum number of files updated in a transaction
+
+        :returns: S_OK(number of files updated)
+        """
+        # { (ftsGUID, fileID) : { column: new value } }
+        # A file resubmitted in a newer job can be reported by both jobs,
+        # and only the job it currently belongs to should update it
+        newValues = {}
+        for ftsGUID, fileStatusDict in jobsFileStatusDict.items():
+            for fileID, valueDict in fileStatusDict.items():
+                newValue = newValues[(ftsGUID, int(fileID))] = {"status": valueDict["status"]}
+                # We only update error and ftsGUID if they are specified, replacing empty string with None
+                for attr in ("error", "ftsGUID"):
+                    if attr in valueDict:
+                        newValue[attr] = valueDict[attr] or None
+
+        nbUpdated = 0
+        for jobFileKeys in breakListIntoChunks(list(newValues), batchSize):
+            session = self.dbSession()
+            try:
+                # { fileID : current values }
+                currentValues = {
+                    fileID: {"status": status, "error": error, "ftsGUID": fileFtsGUID}
+                    for fileID, status, error, fileFtsGUID in session.execute(
+                        select(FTS3File.fileID, FTS3File.status, FTS3File.error, FTS3File.ftsGUID).where(
+                            and_(
+                                FTS3File.fileID.in_({fileID for _ftsGUID, fileID in jobFileKeys}),
+                                ~FTS3File.status.in_(FTS3File.FINAL_STATES),
+                            )
+                        )
+                    )
+                }
+
+                # Only keep the files that are updatable, and that would change
+                # { (ftsGUID, new status) : [fileIDs] }
+                changedFiles = {}
+                for ftsGUID, fileID in jobFileKeys:
+                    current = currentValues.get(fileID)
+                    if not current or (ftsGUID and current["ftsGUID"] != ftsGUID):
+                        continue
+                    newValue = newValues[(ftsGUID, fileID)]
+                    if any(current[attr] != value for attr, value in newValue.items()):
+                        changedFiles.setdefault((ftsGUID, newValue["status"]), []).append(fileID)
+
+                for (ftsGUID, status), changedIDs in changedFiles.items():
+                    updateDict = {FTS3File.status: status}
+                    for attr in ("error", "ftsGUID"):
+                        whens = {
+                            fileID: newValues[(ftsGUID, fileID)][attr]
+                            for fileID in changedIDs
+                            if attr in newValues[(ftsGUID, fileID)]
+                        }
+                        if whens:
+                            column = getattr(FTS3File, attr)
+                            updateDict[column] = case(whens, value=FTS3File.fileID, else_=column)
+
+                    # The files may have changed since we read them
+                    whereConditions = [FTS3File.fileID.in_(changedIDs), ~FTS3File.status.in_(FTS3File.FINAL_STATES)]
+                    if ftsGUID:
+                        whereConditions.append(FTS3File.ftsGUID == ftsGUID)
+
+                    updateQuery = (
+                        update(FTS3File)
+                        .where(and_(*whereConditions))
+                        .values(updateDict)
+                        .execution_options(synchronize_session=False)
+                    )  # see comment about synchronize_session
+                    nbUpdated += session.execute(updateQuery).rowcount
+
+                session.commit()
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                self.log.exception("updateJobsFileStatusBulk: unexpected exception", lException=e)
+                return S_ERROR(f"updateJobsFileStatusBulk: unexpected exception {e}")
+            finally:
+                session.close()
+
+        return S_OK(nbUpdated)
+
     def updateJobStatus(self, jobStatusDict):
         """Update the job Status and error
          The update is only done if the job is not in a final state
@@ -14,6 +14,33 @@ from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities.List import intListToString, stringListToString
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryTreeBase import DirectoryTreeBase
 
+# Triggers adding the changes of FC_DirectoryUsage to FC_DirectoryTreeUsage, in the same transaction. The rows
+# deleted by the ON DELETE CASCADE of a removed directory do not fire them, but its usage is empty.
+# Each change updates the rows of all the parent directories, which serialises the writers of a subtree,
+# so they are only installed with the DirectoryTreeUsage option
+TREE_USAGE_TRIGGERS = {
+    "trg_after_insert_directory_usage": """AFTER INSERT ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  call ps_update_directory_tree_usage(new.DirID, new.SEID, new.SESize, new.SEFiles);
+END""",
+    "trg_after_update_directory_usage": """AFTER UPDATE ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  IF new.DirID = old.DirID AND new.SEID = old.SEID THEN
+    call ps_update_directory_tree_usage(new.DirID, new.SEID, new.SESize - old.SESize, new.SEFiles - old.SEFiles);
+  ELSE
+    call ps_update_directory_tree_usage(old.DirID, old.SEID, -old.SESize, -old.SEFiles);
+    call ps_update_directory_tree_usage(new.DirID, new.SEID, new.SESize, new.SEFiles);
+  END IF;
+END""",
+    "trg_after_delete_directory_usage": """AFTER DELETE ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  call ps_update_directory_tree_usage(old.DirID, old.SEID, -old.SESize, -old.SEFiles);
+END""",
+}
+
 
 class DirectoryClosure(DirectoryTreeBase):
     """Class managing Directory Tree with a closure table
@@ -27,6 +54,7 @@ class DirectoryClosure(DirectoryTreeBase):
         DirectoryTreeBase.__init__(self, database)
         self.directoryTable = "FC_DirectoryList"
         self.closureTable = "FC_DirectoryClosure"
+        self.treeTable = self.directoryTable
 
     def findDir(self, path, connection=False):
         """Find directory ID for the given path
@@ -37,6 +65,12 @@ class DirectoryClosure(DirectoryTreeBase):
         """
 
         dpath = os.path.normpath(path)
+        dirDict, generation = self._getCachedDirIDs([dpath])
+        if dirDict:
+            res = S_OK(dirDict[dpath])
+            res["Level"] = dpath.count("/") if dpath != "/" else 0
+            return res
+
         result = self.db.executeStoredProcedure("ps_find_dir", (dpath, "ret1", "ret2"), outputIds=[1, 2])
         if not result["OK"]:
             return result
@@ -44,6 +78,7 @@ class DirectoryClosure(DirectoryTreeBase):
         if not result["Value"]:
             return S_OK(0)
 
+        self._cacheDirIDs({dpath: result["Value"][0]}, generation)
         res = S_OK(result["Value"][0])
         res["Level"] = result["Value"][1]
         return res
@@ -56,15 +91,20 @@ class DirectoryClosure(DirectoryTreeBase):
         :returns: S_OK( { path : ID} )
         """
 
-        dirDict = {}
-        if not paths:
+        paths = [os.path.normpath(path) for path in paths]
+        dirDict, generation = self._getCachedDirIDs(paths)
+        missingPaths = [path for path in paths if path not in dirDict]
+        if not missingPaths:
             return S_OK(dirDict)
-        dpaths = stringListToString([os.path.normpath(path) for path in paths])
+        dpaths = stringListToString(missingPaths)
         result = self.db.executeStoredProcedureWithCursor("ps_find_dirs", (dpaths,))
         if not result["OK"]:
             return result
+        foundDirs = {}
         for dirName, dirID in result["Value"]:
-            dirDict[dirName] = dirID
+            foundDirs[dirName] = dirID
+        self._cacheDirIDs(foundDirs, generation)
+        dirDict.update(foundDirs)
 
         return S_OK(dirDict)
 
@@ -91,6 +131,7 @@ class DirectoryClosure(DirectoryTreeBase):
 
         dirId = result["Value"]
         result = self.db.executeStoredProcedure("ps_remove_dir", (dirId,), outputIds=[])
+        self._invalidateDirIDs(paths=[path], dirIDs=[dirId])
         if not result["OK"]:
             return result
 
@@ -123,6 +164,11 @@ class DirectoryClosure(DirectoryTreeBase):
 
         """
 
+        dirID = int(dirID)
+        pathDict, generation = self._getCachedDirPaths([dirID])
+        if pathDict:
+            return S_OK(pathDict[dirID])
+
         result = self.db.executeStoredProcedure("ps_get_dirName_from_id", (dirID, "out"), outputIds=[1])
         if not result["OK"]:
             return result
@@ -130,8 +176,9 @@ class DirectoryClosure(DirectoryTreeBase):
         dirName = result["Value"][0]
 
         if not dirName:
-            return S_ERROR("Directory with id %d not found" % int(dirID))
+            return S_ERROR("Directory with id %d not found" % dirID)
 
+        self._cacheDirIDs({dirName: dirID}, generation)
         return S_OK(dirName)
 
     def getDirectoryPaths(self, dirIDList):
@@ -145,16 +192,22 @@ class DirectoryClosure(DirectoryTreeBase):
         if not isinstance(dirIDList, list):
             dirs = [dirIDList]
 
-        dirDict = {}
+        dirDict, generation = self._getCachedDirPaths(dirs)
+        missingDirs = [dirId for dirId in dirs if dirId not in dirDict]
+        if not missingDirs:
+            return S_OK(dirDict)
 
         # Format the list
-        dIds = intListToString(dirs)
+        dIds = intListToString(missingDirs)
         result = self.db.executeStoredProcedureWithCursor("ps_get_dirNames_from_ids", (dIds,))
         if not result["OK"]:
             return result
 
+        foundDirs = {}
         for dirId, dirName in result["Value"]:
             dirDict[dirId] = dirName
+            foundDirs[dirName] = dirId
+        self._cacheDirIDs(foundDirs, generation)
 
         return S_OK(dirDict)
 
@@ -464,6 +517,17 @@ class DirectoryClosure(DirectoryTreeBase):
 
         return S_OK(rowDict)
 
+    def _getDirectoryParametersByID(self, dirIDs):
+        """Get the owner, group and mode of directories given by their IDs, with a single query
+
+        :returns: S_OK({dirID: (UID, GID, Mode)})
+        """
+        req = "SELECT DirID,UID,GID,Mode FROM FC_DirectoryList WHERE DirID IN (%s)" % intListToString(dirIDs)
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        return S_OK({row[0]: tuple(int(value) for value in row[1:]) for row in result["Value"]})
+
     def _setDirectoryParameter(self, path, pname, pvalue, recursive=False):
         """Set a numerical directory parameter
 
@@ -581,7 +645,8 @@ class DirectoryClosure(DirectoryTreeBase):
 
     def _getDirectoryLogicalSizeFromUsage(self, lfns, recursiveSum=True, connection=None):
         """Get the total "logical" size of the requested directories"""
-        return self.__getLogicalSize(lfns, "ps_get_dir_logical_size", recursiveSum=recursiveSum, connection=connection)
+        psName = "ps_get_dir_tree_logical_size" if self.db.directoryTreeUsage else "ps_get_dir_logical_size"
+        return self.__getLogicalSize(lfns, psName, recursiveSum=recursiveSum, connection=connection)
 
     def _getDirectoryLogicalSize(self, lfns, recursiveSum=True, connection=None):
         """Get the total "logical" size of the requested directories"""
@@ -628,9 +693,8 @@ class DirectoryClosure(DirectoryTreeBase):
 
     def _getDirectoryPhysicalSizeFromUsage(self, lfns, recursiveSum=True, connection=None):
         """Get the total size of the requested directories"""
-        return self.__getPhysicalSize(
-            lfns, "ps_get_dir_physical_size", recursiveSum=recursiveSum, connection=connection
-        )
+        psName = "ps_get_dir_tree_physical_size" if self.db.directoryTreeUsage else "ps_get_dir_physical_size"
+        return self.__getPhysicalSize(lfns, psName, recursiveSum=recursiveSum, connection=connection)
 
     def _getDirectoryPhysicalSize(self, lfns, recursiveSum=True, connection=None):
         """Get the total size of the requested directories"""
@@ -638,6 +702,72 @@ class DirectoryClosure(DirectoryTreeBase):
             lfns, "ps_calculate_dir_physical_size", recursiveSum=recursiveSum, connection=None
         )
 
+    def _getChildrenRequest(self, dirIDString):
+        """Get the SQL request of the ParentID and ChildID of the subdirectories of the given directories"""
+        return "SELECT ParentID, ChildID FROM FC_DirectoryClosure WHERE ParentID IN (%s) AND Depth=1" % dirIDString
+
+    def _repairDirectoryUsageChunk(self, dirIDs):
+        """Repair the usage of the given directories. FC_DirectoryUsage holds the usage of the files of
+        each directory itself, the logical usage being stored with the FakeSE, and its changes are added
+        by triggers to FC_DirectoryTreeUsage, which includes the usage of the subdirectories.
+        The former is repaired first, and the triggers propagate its corrections. Without the
+        DirectoryTreeUsage option, there are no triggers and only the former is repaired.
+
+        :returns: S_OK(number of usage entries corrected)
+        """
+        dirIDString = intListToString(dirIDs)
+        result = self._getConfirmedUsageResidues(
+            "FC_DirectoryUsage", dirIDString, self._getOwnUsageRequests(dirIDString, 1), recursive=False
+        )
+        if not result["OK"]:
+            return result
+        ownResidues = result["Value"]
+        result = self._addDirectoryUsage(
+            "FC_DirectoryUsage",
+            {key: (-size, -files) for key, (size, files) in ownResidues.items()},
+            propagate=False,
+        )
+        if not result["OK"]:
+            return result
+        if not self.db.directoryTreeUsage:
+            return S_OK(len(ownResidues))
+
+        ownUsageRequest = "SELECT DirID, SEID, SESize, SEFiles FROM FC_DirectoryUsage WHERE DirID IN (%s)"
+        result = self._getConfirmedUsageResidues("FC_DirectoryTreeUsage", dirIDString, [ownUsageRequest % dirIDString])
+        if not result["OK"]:
+            return result
+        treeResidues = result["Value"]
+        result = self._addDirectoryUsage(
+            "FC_DirectoryTreeUsage", {key: (-size, -files) for key, (size, files) in treeResidues.items()}
+        )
+        if not result["OK"]:
+            return result
+        return S_OK(len(ownResidues) + len(treeResidues))
+
+    def checkDirectoryTreeUsage(self):
+        """Install the triggers maintaining FC_DirectoryTreeUsage if the DirectoryTreeUsage option is set,
+        and remove them otherwise. The triggers already in the right state are left untouched, such that
+        no change of the usage is missed while other instances of the service are running
+
+        :return: S_OK/S_ERROR
+        """
+        req = "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS "
+        req += "WHERE TRIGGER_SCHEMA=DATABASE() AND EVENT_OBJECT_TABLE='FC_DirectoryUsage'"
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        installed = {row[0] for row in result["Value"]}
+        for triggerName, triggerDefinition in TREE_USAGE_TRIGGERS.items():
+            if self.db.directoryTreeUsage and triggerName not in installed:
+                result = self.db._update(f"CREATE TRIGGER {triggerName} {triggerDefinition}")
+            elif not self.db.directoryTreeUsage and triggerName in installed:
+                result = self.db._update(f"DROP TRIGGER IF EXISTS {triggerName}")
+            else:
+                continue
+            if not result["OK"]:
+                return result
+        return S_OK()
+
     def _changeDirectoryParameter(self, paths, directoryFunction, _fileFunction, recursive=False):
         """Bulk setting of the directory parameter with recursion for all the subdirectories and files
 
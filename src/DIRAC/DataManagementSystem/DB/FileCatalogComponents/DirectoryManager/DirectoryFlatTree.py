@@ -89,11 +89,17 @@ class DirectoryFlatTree(DirectoryTreeBase):
         return S_OK({"Successful": successful, "Failed": res["Value"]["Failed"]})
 
     def findDir(self, path):
+        path = os.path.normpath(path)
+        dirDict, generation = self._getCachedDirIDs([path])
+        if dirDict:
+            return S_OK(dirDict[path])
+
         res = self.__findDirs([path])
         if not res["OK"]:
             return res
         if not res["Value"]:
             return S_OK(0)
+        self._cacheDirIDs({path: list(res["Value"])[0]}, generation)
         return S_OK(list(res["Value"])[0])
 
     def removeDir(self, path):
@@ -105,7 +111,9 @@ class DirectoryFlatTree(DirectoryTreeBase):
             return S_OK()
         dirID = res["Value"]
         req = "DELETE FROM DirectoryInfo WHERE DirID=%d" % dirID
-        return self.db._update(req)
+        result = self.db._update(req)
+        self._invalidateDirIDs(paths=[path], dirIDs=[dirID])
+        return result
 
     def makeDirectory(self, path, credDict, status=0):
         """Create a new directory.
@@ -24,7 +24,14 @@ class DirectoryLevelTree(DirectoryTreeBase):
     def findDir(self, path, connection=False):
         """Find directory ID for the given path"""
 
-        dpath = self.db._escapeString(os.path.normpath(path))
+        path = os.path.normpath(path)
+        dirDict, generation = self._getCachedDirIDs([path])
+        if dirDict:
+            res = S_OK(dirDict[path])
+            res["Level"] = path.count("/") if path != "/" else 0
+            return res
+
+        dpath = self.db._escapeString(path)
         if not dpath["OK"]:
             return dpath
         dpath = dpath["Value"]
@@ -36,15 +43,22 @@ class DirectoryLevelTree(DirectoryTreeBase):
         if not result["Value"]:
             return S_OK("")
 
+        self._cacheDirIDs({path: result["Value"][0][0]}, generation)
         res = S_OK(result["Value"][0][0])
         res["Level"] = result["Value"][0][1]
         return res
 
     def findDirs(self, paths, connection=False):
         """Find DirIDs for the given path list"""
+        paths = [os.path.normpath(path) for path in paths]
+        dirDict, generation = self._getCachedDirIDs(paths)
+        missingPaths = [path for path in paths if path not in dirDict]
+        if not missingPaths:
+            return S_OK(dirDict)
+
         dpathList = []
-        for path in paths:
-            dpath = self.db._escapeString(os.path.normpath(path))
+        for path in missingPaths:
+            dpath = self.db._escapeString(path)
             if not dpath["OK"]:
                 return dpath
             dpathList.append(dpath["Value"])
@@ -53,9 +67,11 @@ class DirectoryLevelTree(DirectoryTreeBase):
         result = self.db._query(req, conn=connection)
         if not result["OK"]:
             return result
-        dirDict = {}
+        foundDirs = {}
         for dirName, dirID in result["Value"]:
-            dirDict[dirName] = dirID
+            foundDirs[dirName] = dirID
+        self._cacheDirIDs(foundDirs, generation)
+        dirDict.update(foundDirs)
 
         return S_OK(dirDict)
 
@@ -73,6 +89,7 @@ class DirectoryLevelTree(DirectoryTreeBase):
         dirID = result["Value"]
         req = "DELETE FROM FC_DirectoryLevelTree WHERE DirID=%d" % dirID
         result = self.db._update(req)
+        self._invalidateDirIDs(paths=[path], dirIDs=[dirID])
         result["DirID"] = dirID
         return result
 
@@ -224,13 +241,19 @@ class DirectoryLevelTree(DirectoryTreeBase):
 
     def getDirectoryPath(self, dirID):
         """Get directory name by directory ID"""
-        req = "SELECT DirName FROM FC_DirectoryLevelTree WHERE DirID=%d" % int(dirID)
+        dirID = int(dirID)
+        pathDict, generation = self._getCachedDirPaths([dirID])
+        if pathDict:
+            return S_OK(pathDict[dirID])
+
+        req = "SELECT DirName FROM FC_DirectoryLevelTree WHERE DirID=%d" % dirID
         result = self.db._query(req)
         if not result["OK"]:
             return result
         if not result["Value"]:
-            return S_ERROR("Directory with id %d not found" % int(dirID))
+            return S_ERROR("Directory with id %d not found" % dirID)
 
+        self._cacheDirIDs({result["Value"][0][0]: dirID}, generation)
         return S_OK(result["Value"][0][0])
 
     def getDirectoryPaths(self, dirIDList):
@@ -242,17 +265,25 @@ class DirectoryLevelTree(DirectoryTreeBase):
         if not dirs:
             return S_OK({})
 
-        dirListString = ",".join([str(d) for d in dirs])
+        dirs = [int(d) for d in dirs]
+        resultDict, generation = self._getCachedDirPaths(dirs)
+        missingDirs = [d for d in dirs if d not in resultDict]
+        if not missingDirs:
+            return S_OK(resultDict)
+
+        dirListString = ",".join([str(d) for d in missingDirs])
         req = f"SELECT DirID,DirName FROM FC_DirectoryLevelTree WHERE DirID in ( {dirListString} )"
         result = self.db._query(req)
         if not result["OK"]:
             return result
-        if not result["Value"]:
+        if not result["Value"] and not resultDict:
             return S_ERROR(f"Directories not found: {dirListString}")
 
-        resultDict = {}
+        foundDirs = {}
         for row in result["Value"]:
             resultDict[int(row[0])] = row[1]
+            foundDirs[row[1]] = int(row[0])
+        self._cacheDirIDs(foundDirs, generation)
 
         return S_OK(resultDict)
 
@@ -278,15 +309,22 @@ class DirectoryLevelTree(DirectoryTreeBase):
             pelements.append(dPath)
         pelements.append("/")
 
+        dirDict, generation = self._getCachedDirIDs(pelements)
+        if len(dirDict) == len(set(pelements)):
+            return S_OK(sorted(dirDict.values()))
+
         pathString = ["'" + p + "'" for p in pelements]
-        req = f"SELECT DirID FROM FC_DirectoryLevelTree WHERE DirName in ({','.join(pathString)}) ORDER BY DirID"
+        req = (
+            f"SELECT DirName,DirID FROM FC_DirectoryLevelTree WHERE DirName in ({','.join(pathString)}) ORDER BY DirID"
+        )
         result = self.db._query(req)
         if not result["OK"]:
             return result
         if not result["Value"]:
             return S_ERROR(f"Directory {path} not found")
 
-        return S_OK([x[0] for x in result["Value"]])
+        self._cacheDirIDs(dict(result["Value"]), generation)
+        return S_OK([x[1] for x in result["Value"]])
 
     def getPathIDsByID_old(self, dirID):
         """Get IDs of all the directories in the parent hierarchy for a directory
@@ -479,6 +517,7 @@ class DirectoryLevelTree(DirectoryTreeBase):
                 # We have created a new directory but let's keep the old ID
                 req = f"UPDATE FC_DirectoryLevelTree SET DirID={oldParentID} WHERE DirID={parentID}"
                 result = self.db._update(req)
+                self._invalidateDirIDs(paths=[parentPath], dirIDs=[parentID])
                 if not result["OK"]:
                     continue
                 req = f"UPDATE FC_DirectoryInfo SET DirID={oldParentID} WHERE DirID={parentID}"
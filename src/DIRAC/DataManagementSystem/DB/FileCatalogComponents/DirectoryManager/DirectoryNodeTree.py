@@ -17,6 +17,11 @@ class DirectoryNodeTree(DirectoryTreeBase):
 
     def findDir(self, path):
         """Find the identifier of a directory specified by its path"""
+        path = os.path.normpath(path)
+        dirDict, generation = self._getCachedDirIDs([path])
+        if dirDict:
+            return S_OK(dirDict[path])
+
         dpath = path
         if path[0] == "/":
             dpath = path[1:]
@@ -43,6 +48,7 @@ class DirectoryNodeTree(DirectoryTreeBase):
         if not result["Value"]:
             return S_OK(0)
 
+        self._cacheDirIDs({path: result["Value"][0][0]}, generation)
         return S_OK(result["Value"][0][0])
 
     def makeDir(self, path):
@@ -16,6 +16,11 @@ class DirectorySimpleTree(DirectoryTreeBase):
         self.treeTable = "FC_DirectoryTree"
 
     def findDir(self, path):
+        path = os.path.normpath(path)
+        dirDict, generation = self._getCachedDirIDs([path])
+        if dirDict:
+            return S_OK(dirDict[path])
+
         req = f"SELECT DirID from FC_DirectoryTree WHERE DirName='{path}'"
         result = self.db._query(req)
         if not result["OK"]:
@@ -24,6 +29,7 @@ class DirectorySimpleTree(DirectoryTreeBase):
         if not result["Value"]:
             return S_OK("")
 
+        self._cacheDirIDs({path: result["Value"][0][0]}, generation)
         return S_OK(result["Value"][0][0])
 
     def removeDir(self, path):
@@ -38,6 +44,7 @@ class DirectorySimpleTree(DirectoryTreeBase):
         dirID = result["Value"]
         req = "DELETE FROM FC_DirectoryTree WHERE DirID=%d" % dirID
         result = self.db._update(req)
+        self._invalidateDirIDs(paths=[path], dirIDs=[dirID])
         return result
 
     def makeDir(self, path):
@@ -5,11 +5,40 @@ import threading
 import os
 import stat
 
+import cachetools
+
 from DIRAC import S_OK, S_ERROR, gLogger
+from DIRAC.Core.Utilities.List import intListToString
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getIDSelectString
 
 DEBUG = 0
 
+# Default number of directories kept in the path <-> DirID cache: disabled, since the cache is only
+# invalidated in the process removing the directories, which is only safe with a single service instance
+DIRID_CACHE_SIZE = 0
+# Default maximum number of files in a page of the paged directory listings
+MAX_PAGE_SIZE = 10000
+
+
+def _encodeCursor(dirID, lastFileID):
+    """Cursor of the paged directory listings: where the next page starts"""
+    return "%d:%d" % (dirID, lastFileID)
+
+
+def _decodeCursor(cursor):
+    """Decode a cursor of the paged directory listings
+
+    :returns: S_OK((dirID, lastFileID)), (0, 0) for the None cursor of the first page
+    """
+    if cursor is None:
+        return S_OK((0, 0))
+    try:
+        dirID, lastFileID = (int(value) for value in cursor.split(":"))
+    except (AttributeError, ValueError):
+        return S_ERROR(errno.EINVAL, f"Invalid cursor {cursor!r}")
+    return S_OK((dirID, lastFileID))
+
+
 #############################################################################
 
 
@@ -19,6 +48,18 @@ class DirectoryTreeBase:
         self.lock = threading.Lock()
         self.treeTable = ""
 
+        # Cache of the IDs of the existing directories, in both directions. Only the directories found
+        # in the DB are cached, so creating a directory never makes the cache stale, and the entries
+        # are invalidated when a directory is removed or its ID changes.
+        cacheSize = getattr(database, "dirIDCacheSize", DIRID_CACHE_SIZE)
+        self.__dirIDCacheLock = threading.Lock()
+        self.__pathToID = cachetools.LRUCache(cacheSize) if cacheSize else None
+        self.__idToPath = cachetools.LRUCache(cacheSize) if cacheSize else None
+        # Incremented at each invalidation, so that the result of a lookup started before it is not cached
+        self.__dirIDCacheGeneration = 0
+        self.__dirIDCacheHits = 0
+        self.__dirIDCacheMisses = 0
+
     ############################################################################
     #
     # THE FOLLOWING METHODS NEED TO ME IMPLEMENTED IN THE DERIVED CLASS
@@ -71,6 +112,98 @@ class DirectoryTreeBase:
     def setDatabase(self, database):
         self.db = database
 
+    #####################################################################
+    #
+    # Directory ID cache, to be used by the derived classes
+    #
+
+    def _getCachedDirIDs(self, paths):
+        """Look up normalised directory paths in the directory ID cache
+
+        :param paths: list of normalised paths
+        :returns: ({path: dirID} of the paths in the cache, generation to give to _cacheDirIDs)
+        """
+        dirDict = {}
+        with self.__dirIDCacheLock:
+            if self.__pathToID is not None:
+                for path in paths:
+                    dirID = self.__pathToID.get(path)
+                    if dirID:
+                        dirDict[path] = dirID
+            self.__dirIDCacheHits += len(dirDict)
+            self.__dirIDCacheMisses += len(set(paths)) - len(dirDict)
+            return dirDict, self.__dirIDCacheGeneration
+
+    def _getCachedDirPaths(self, dirIDs):
+        """Look up directory IDs in the directory ID cache
+
+        :param dirIDs: list of directory IDs
+        :returns: ({dirID: path} of the IDs in the cache, generation to give to _cacheDirIDs)
+        """
+        pathDict = {}
+        with self.__dirIDCacheLock:
+            if self.__idToPath is not None:
+                for dirID in dirIDs:
+                    path = self.__idToPath.get(dirID)
+                    if path:
+                        pathDict[dirID] = path
+            self.__dirIDCacheHits += len(pathDict)
+            self.__dirIDCacheMisses += len(set(dirIDs)) - len(pathDict)
+            return pathDict, self.__dirIDCacheGeneration
+
+    def _cacheDirIDs(self, dirDict, generation):
+        """Add existing directories found in the DB to the directory ID cache
+
+        :param dirDict: {normalised path: dirID}
+        :param generation: generation returned by the cache lookup done before querying the DB.
+                           Nothing is cached if there were invalidations since, as the DB may have
+                           been queried before the change that caused them.
+        """
+        with self.__dirIDCacheLock:
+            if self.__pathToID is None or generation != self.__dirIDCacheGeneration:
+                return
+            for path, dirID in dirDict.items():
+                if dirID:
+                    self.__pathToID[path] = dirID
+                    self.__idToPath[dirID] = path
+
+    def _invalidateDirIDs(self, paths=(), dirIDs=()):
+        """Remove directories from the directory ID cache, by path and/or by ID"""
+        with self.__dirIDCacheLock:
+            self.__dirIDCacheGeneration += 1
+            if self.__pathToID is None:
+                return
+            dirIDs = set(dirIDs)
+            for path in paths:
+                dirIDs.add(self.__pathToID.pop(os.path.normpath(path), None))
+            for dirID in dirIDs:
+                path = self.__idToPath.pop(dirID, None)
+                if path is not None:
+                    self.__pathToID.pop(path, None)
+
+    def _clearDirIDCache(self):
+        """Empty the directory ID cache, for the operations that may change the ID of many directories"""
+        with self.__dirIDCacheLock:
+            self.__dirIDCacheGeneration += 1
+            if self.__pathToID is not None:
+                self.__pathToID.clear()
+                self.__idToPath.clear()
+
+    def getDirIDCacheCounters(self):
+        """Get the size and the hit rate of the directory ID cache"""
+        with self.__dirIDCacheLock:
+            lookups = self.__dirIDCacheHits + self.__dirIDCacheMisses
+            return S_OK(
+                {
+                    "Cached Directory IDs": len(self.__pathToID) if self.__pathToID is not None else 0,
+                    "Directory ID Cache Hits": self.__dirIDCacheHits,
+                    "Directory ID Cache Misses": self.__dirIDCacheMisses,
+                    "Directory ID Cache Hit Rate (%)": round(100.0 * self.__dirIDCacheHits / lookups, 1)
+                    if lookups
+                    else 0.0,
+                }
+            )
+
     def makeDirectory(self, path, credDict, status=0):
         """Create a new directory. The return value is the dictionary
         containing all the parameters of the newly created directory
@@ -136,7 +269,7 @@ class DirectoryTreeBase:
             return S_OK(result["DirID"])
 
         if path == "/":
-            result = self.makeDirectory(path, credDict)
+            result = self.__makeIndexedDirectory(path, credDict)
             return result
 
         parentDir = os.path.dirname(path)
@@ -145,15 +278,78 @@ class DirectoryTreeBase:
             return result
         result = result["Value"]
         if result["Exists"]:
-            result = self.makeDirectory(path, credDict)
+            result = self.__makeIndexedDirectory(path, credDict)
         else:
             result = self.makeDirectories(parentDir, credDict)
             if not result["OK"]:
                 return result
-            result = self.makeDirectory(path, credDict)
+            result = self.__makeIndexedDirectory(path, credDict)
+
+        return result
 
+    def __makeIndexedDirectory(self, path, credDict):
+        """Create a directory, and add it to the metadata index if it is used"""
+        result = self.makeDirectory(path, credDict)
+        if result["OK"] and getattr(self.db, "metadataIndex", False):
+            res = self.db.dmeta.addDirectoryToMetadataIndex(result["Value"], path)
+            if not res["OK"]:
+                return res
         return result
 
+    def makeDirectoriesBulk(self, paths, credDict):
+        """Make all the directories recursively in several paths: the directories already there are
+        looked up all at once, and only the missing ones are created, the parents first
+
+        :param paths: absolute directory paths
+        :param dict credDict: credential of the owner of the new directories
+
+        :returns: S_OK with Successful {path: DirID} and Failed {path: error}
+        """
+        successful = {}
+        failed = {}
+        toMake = {}
+        for path in paths:
+            if not path or path[0] != "/":
+                failed[path] = "Not an absolute path"
+            else:
+                toMake[path] = os.path.normpath(path)
+
+        allDirs = set()
+        for dirPath in toMake.values():
+            while dirPath not in allDirs:
+                allDirs.add(dirPath)
+                dirPath = os.path.dirname(dirPath)
+        result = self.findDirs(list(allDirs))
+        if not result["OK"]:
+            # The trees not able to look up several directories at once make them one by one
+            for path in toMake:
+                result = self.makeDirectories(path, credDict)
+                if result["OK"]:
+                    successful[path] = result["Value"]
+                else:
+                    failed[path] = result["Message"]
+            return S_OK({"Successful": successful, "Failed": failed})
+        dirIDs = {dirPath: dirID for dirPath, dirID in result["Value"].items() if dirID}
+
+        errors = {}
+        for dirPath in sorted(allDirs - set(dirIDs)):
+            parentDir = os.path.dirname(dirPath)
+            if parentDir in errors:
+                errors[dirPath] = errors[parentDir]
+                continue
+            result = self.__makeIndexedDirectory(dirPath, credDict)
+            if result["OK"]:
+                dirIDs[dirPath] = result["Value"]
+            else:
+                errors[dirPath] = result["Message"]
+
+        for path, dirPath in toMake.items():
+            if dirPath in dirIDs:
+                successful[path] = dirIDs[dirPath]
+            else:
+                failed[path] = errors.get(dirPath, f"Failed to create directory {dirPath}")
+        return S_OK({"Successful": successful, "Failed": failed})
+
     #####################################################################
     def exists(self, lfns):
         successful = {}
@@ -322,6 +518,101 @@ class DirectoryTreeBase:
 
         return S_OK(dirDict)
 
+    def __findDirIDs(self, paths):
+        """Find the IDs of several directories, with findDirs if the tree implements it,
+        else with findDir for each of them
+
+        :param paths: normalised directory paths
+        :returns: S_OK({path: dirID}), the dirID being empty for the directories not found
+        """
+        if type(self).findDirs is not DirectoryTreeBase.findDirs:
+            return self.findDirs(paths)
+        dirIDs = {}
+        for path in paths:
+            result = self.findDir(path)
+            if not result["OK"]:
+                return result
+            dirIDs[path] = result["Value"]
+        return S_OK(dirIDs)
+
+    def _getDirectoryParametersByID(self, dirIDs):
+        """Get the owner, group and mode of directories given by their IDs, with a single query
+
+        :returns: S_OK({dirID: (UID, GID, Mode)})
+        """
+        req = "SELECT DirID,UID,GID,Mode FROM FC_DirectoryInfo WHERE DirID IN (%s)" % intListToString(dirIDs)
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        return S_OK({row[0]: tuple(int(value) for value in row[1:]) for row in result["Value"]})
+
+    def getDirectoryParametersBulk(self, paths, recursive=False):
+        """Get the owner, group and mode of directories, looking up the IDs of the distinct directories
+        and then their parameters all at once
+
+        :param paths: directory paths
+        :param bool recursive: for the directories that do not exist, get the ones of the nearest existing parent
+
+        :returns: S_OK with Successful {path: dict with "DirID", "UID", "Owner", "GID", "OwnerGroup" and "Mode"}
+                  and Failed {path: error} for the directories not found
+        """
+        toFind = {}
+        for path in paths:
+            toFind.setdefault(os.path.normpath(path), []).append(path)
+        foundDirs = {}
+        notFound = set()
+        dirIDs = {}
+        badPaths = set()
+        while toFind:
+            missingPaths = [dirPath for dirPath in toFind if dirPath not in foundDirs and dirPath not in notFound]
+            if missingPaths:
+                result = self.__findDirIDs(missingPaths)
+                if not result["OK"]:
+                    return result
+                foundDirs.update(result["Value"])
+                notFound.update(dirPath for dirPath in missingPaths if not foundDirs.get(dirPath))
+            parentDirs = {}
+            for dirPath, dirPaths in toFind.items():
+                if foundDirs.get(dirPath):
+                    dirIDs.update(dict.fromkeys(dirPaths, foundDirs[dirPath]))
+                elif recursive and os.path.dirname(dirPath) != dirPath:
+                    parentDirs.setdefault(os.path.dirname(dirPath), []).extend(dirPaths)
+                elif recursive and dirPath != "/":
+                    # The parents end up with something else than /, there is probably a "//" in the path
+                    badPaths.update(dirPaths)
+            toFind = parentDirs
+
+        parameters = {}
+        if dirIDs:
+            result = self._getDirectoryParametersByID(set(dirIDs.values()))
+            if not result["OK"]:
+                return result
+            userNames = {}
+            groupNames = {}
+            for dirID, (uid, gid, mode) in result["Value"].items():
+                if uid not in userNames:
+                    result = self.db.ugManager.getUserName(uid)
+                    userNames[uid] = result["Value"] if result["OK"] else "unknown"
+                if gid not in groupNames:
+                    result = self.db.ugManager.getGroupName(gid)
+                    groupNames[gid] = result["Value"] if result["OK"] else "unknown"
+                parameters[dirID] = {
+                    "DirID": dirID,
+                    "UID": uid,
+                    "Owner": userNames[uid],
+                    "GID": gid,
+                    "OwnerGroup": groupNames[gid],
+                    "Mode": mode,
+                }
+
+        successful = {path: parameters[dirID] for path, dirID in dirIDs.items() if dirID in parameters}
+        failed = {
+            path: "Bad Path (double /?)" if path in badPaths else "Directory not found"
+            for path in paths
+            if path not in successful
+        }
+        return S_OK({"Successful": successful, "Failed": failed})
+
     #####################################################################
     def _setDirectoryParameter(self, path, pname, pvalue):
         """Set a numerical directory parameter
@@ -628,8 +919,23 @@ class DirectoryTreeBase:
         if not result["OK"]:
             return result
         directoryID = result["Value"]
+        result = self._getSubdirectoriesAndDatasets(path, directoryID, details=details)
+        if not result["OK"]:
+            return result
+        pathDict = result["Value"]
+        result = self.db.fileManager.getFilesInDirectory(directoryID, verbose=details)
+        if not result["OK"]:
+            return result
+        pathDict["Files"] = result["Value"]
+
+        return S_OK(pathDict)
+
+    def _getSubdirectoriesAndDatasets(self, path, directoryID, details=False):
+        """Get the contents of a given directory which are not files
+
+        :returns: S_OK(dict) indexed "SubDirs", "Links" and "Datasets"
+        """
         directories = {}
-        files = {}
         links = {}
         result = self.getChildren(path)
         if not result["OK"]:
@@ -650,17 +956,12 @@ class DirectoryTreeBase:
                     directories[dirName] = result["Value"]
             else:
                 directories[dirName] = True
-        result = self.db.fileManager.getFilesInDirectory(directoryID, verbose=details)
-        if not result["OK"]:
-            return result
-        files = result["Value"]
         result = self.db.datasetManager.getDatasetsInDirectory(directoryID, verbose=details)
         if not result["OK"]:
             return result
         datasets = result["Value"]
-        pathDict = {"Files": files, "SubDirs": directories, "Links": links, "Datasets": datasets}
 
-        return S_OK(pathDict)
+        return S_OK({"SubDirs": directories, "Links": links, "Datasets": datasets})
 
     def listDirectory(self, lfns, verbose=False):
         """Get the directory listing"""
@@ -779,6 +1080,165 @@ class DirectoryTreeBase:
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    ############################################################################
+    #
+    # Paged listing of the directories
+    #
+    # The pages are given in FileID order, and the cursor returned with a page gives
+    # where the next one starts, so that the pages of a directory are got with bounded
+    # memory and each one with an index range scan, whatever the size of the directory.
+    #
+
+    def __findPagedDir(self, path, cursor):
+        """Get the ID of a directory and where its page starts
+
+        :returns: S_OK((dirID, cursorDirID, lastFileID))
+        """
+        result = self.findDir(path)
+        if not result["OK"]:
+            return result
+        dirID = result["Value"]
+        if not dirID:
+            return S_ERROR(errno.ENOENT, f"{path} does not exist")
+        result = _decodeCursor(cursor)
+        if not result["OK"]:
+            return result
+        cursorDirID, lastFileID = result["Value"]
+        return S_OK((dirID, cursorDirID, lastFileID))
+
+    def listDirectoryPage(self, path, cursor, pageSize, verbose=False):
+        """Get a page of the listing of a directory
+
+        :param str path: directory to list
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files in the page
+        :param bool verbose: as for listDirectory
+
+        :returns: S_OK(dict) indexed "Files", "SubDirs", "Links" and "Datasets" as the listDirectory values,
+                  and "Cursor", to be given for the next page, None if it is the last one.
+                  Only the first page contains the subdirectories, links and datasets
+        """
+        result = self.__findPagedDir(path, cursor)
+        if not result["OK"]:
+            return result
+        dirID, cursorDirID, lastFileID = result["Value"]
+        if cursor is None:
+            result = self._getSubdirectoriesAndDatasets(path, dirID, details=verbose)
+            if not result["OK"]:
+                return result
+            pathDict = result["Value"]
+        elif cursorDirID != dirID:
+            return S_ERROR(errno.EINVAL, f"Invalid cursor for {path}")
+        else:
+            pathDict = {"SubDirs": {}, "Links": {}, "Datasets": {}}
+        result = self.db.fileManager.getFilesInDirectoryPage(dirID, lastFileID, pageSize, verbose=verbose)
+        if not result["OK"]:
+            return result
+        pathDict["Files"], nextFileID = result["Value"]
+        pathDict["Cursor"] = None if nextFileID is None else _encodeCursor(dirID, nextFileID)
+        return S_OK(pathDict)
+
+    def getDirectoryReplicasPage(self, path, cursor, pageSize, allStatus=False):
+        """Get the replicas of a page of the files of a directory
+
+        :param str path: directory
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files in the page
+        :param bool allStatus: as for getDirectoryReplicas
+
+        :returns: S_OK(dict) indexed "Replicas", the replicas per file name as the getDirectoryReplicas values,
+                  and "Cursor", to be given for the next page, None if it is the last one
+        """
+        result = self.__findPagedDir(path, cursor)
+        if not result["OK"]:
+            return result
+        dirID, cursorDirID, lastFileID = result["Value"]
+        if cursor is not None and cursorDirID != dirID:
+            return S_ERROR(errno.EINVAL, f"Invalid cursor for {path}")
+        result = self.db.fileManager.getDirectoryReplicasPage(dirID, lastFileID, pageSize, allStatus=allStatus)
+        if not result["OK"]:
+            return result
+        replicas, nextFileID = result["Value"]
+        return S_OK({"Replicas": replicas, "Cursor": None if nextFileID is None else _encodeCursor(dirID, nextFileID)})
+
+    def _getSubtreeDirIDsPage(self, dirID, startDirID, pageSize):
+        """Get a page of the IDs of a directory and of all its subdirectories, in DirID order
+
+        :param int dirID: top directory of the subtree
+        :param int startDirID: first DirID of the page
+        :param int pageSize: maximum number of directories in the page
+
+        :returns: S_OK(list of DirIDs)
+        """
+        result = self.getSubdirectoriesByID(dirID, requestString=True, includeParent=True)
+        if not result["OK"]:
+            return result
+        req = "SELECT DirID FROM %s WHERE DirID IN (%s) AND DirID>=%d ORDER BY DirID LIMIT %d" % (
+            self.getTreeTable(),
+            result["Value"],
+            startDirID,
+            pageSize,
+        )
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        return S_OK([row[0] for row in result["Value"]])
+
+    def getDirectoryDumpPage(self, path, cursor, pageSize):
+        """Get a page of the recursive dump of a directory. The subdirectories are dumped in DirID order,
+        and the files of each of them in FileID order
+
+        :param str path: directory to dump
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files, and of subdirectories, in the page
+
+        :returns: S_OK(dict) indexed "Files" and "SubDirs" as the getDirectoryDump values,
+                  and "Cursor", to be given for the next page, None if it is the last one
+        """
+        result = self.__findPagedDir(path, cursor)
+        if not result["OK"]:
+            return result
+        dirID, cursorDirID, lastFileID = result["Value"]
+        result = self._getSubtreeDirIDsPage(dirID, cursorDirID, pageSize)
+        if not result["OK"]:
+            return result
+        dirIDs = result["Value"]
+        result = self.getDirectoryPaths(dirIDs)
+        if not result["OK"]:
+            return result
+        dirPaths = result["Value"]
+
+        files = {}
+        subDirs = []
+        nextCursor = None
+        remaining = pageSize
+        for curDirID in dirIDs:
+            startFileID = lastFileID if curDirID == cursorDirID else 0
+            if not startFileID and curDirID != dirID:
+                subDirs.append(dirPaths[curDirID])
+            result = self.db.fileManager.getFilesInDirectoryPage(curDirID, startFileID, remaining)
+            if not result["OK"]:
+                return result
+            filesInDir, nextFileID = result["Value"]
+            files.update(
+                {
+                    os.path.join(dirPaths[curDirID], fileName): {
+                        "Size": fileMetadata["MetaData"]["Size"],
+                        "CreationDate": fileMetadata["MetaData"]["CreationDate"],
+                    }
+                    for fileName, fileMetadata in filesInDir.items()
+                }
+            )
+            remaining -= len(filesInDir)
+            if nextFileID is not None:
+                nextCursor = _encodeCursor(curDirID, nextFileID)
+                break
+        else:
+            if len(dirIDs) == pageSize:
+                nextCursor = _encodeCursor(dirIDs[-1] + 1, 0)
+
+        return S_OK({"Files": files, "SubDirs": subDirs, "Cursor": nextCursor})
+
     def getDirectorySize(self, lfns, longOutput=False, rawFileTables=False, recursiveSum=True):
         """
         Get the total size of the requested directories. If longOutput flag
@@ -1234,6 +1694,157 @@ class DirectoryTreeBase:
 
         return S_OK(resultDict)
 
+    #
+    # The directory usage is updated incrementally with the files and replicas, it never needs
+    # a full rebuild. If it drifts anyway, it is repaired online, a few directories at a time.
+    # The residue of a directory is what its stored usage has in excess of the usage of its own
+    # files plus the stored usage of its subdirectories. Subtracting it from the directory and
+    # from all its parents makes the directory consistent without changing the residues of the
+    # others, and since the corrections are additions, they commute with the concurrent updates.
+    #
+
+    def _getChildrenRequest(self, dirIDString):
+        """Get the SQL request of the ParentID and ChildID of the subdirectories of the given directories"""
+        return "SELECT Parent AS ParentID, DirID AS ChildID FROM %s WHERE Parent IN (%s)" % (
+            self.getTreeTable(),
+            dirIDString,
+        )
+
+    def _getOwnUsageRequests(self, dirIDString, logicalSEID):
+        """Get the SQL requests of the DirID, SEID, SESize and SEFiles of the usage of the files
+        of the given directories themselves, the logical usage being given with the logicalSEID
+        """
+        return [
+            "SELECT DirID, %d AS SEID, SUM(Size) AS SESize, COUNT(*) AS SEFiles FROM FC_Files "
+            "WHERE DirID IN (%s) GROUP BY DirID" % (logicalSEID, dirIDString),
+            "SELECT F.DirID, R.SEID, SUM(F.Size) AS SESize, COUNT(*) AS SEFiles FROM FC_Files AS F "
+            "JOIN FC_Replicas AS R ON R.FileID=F.FileID WHERE F.DirID IN (%s) GROUP BY F.DirID, R.SEID" % dirIDString,
+        ]
+
+    def _getUsageResidues(self, usageTable, dirIDString, ownUsageRequests, recursive=True):
+        """Get the residues of the usage of directories, each read by a single statement so that
+        it comes from a consistent snapshot of the tables
+
+        :param str usageTable: table of the stored usage
+        :param str dirIDString: IDs of the directories
+        :param list ownUsageRequests: SQL requests of the usage of the directories themselves
+        :param bool recursive: if True, the stored usage includes the one of the subdirectories
+
+        :returns: S_OK(dict) of {(dirID, seID): (size, files)}, only with the non zero residues
+        """
+        selects = ["SELECT DirID, SEID, SESize, SEFiles FROM %s WHERE DirID IN (%s)" % (usageTable, dirIDString)]
+        for i, req in enumerate(ownUsageRequests):
+            selects.append("SELECT DirID, SEID, -SESize, -SEFiles FROM (%s) AS Own%d" % (req, i))
+        if recursive:
+            selects.append(
+                "SELECT C.ParentID, U.SEID, -U.SESize, -U.SEFiles FROM %s AS U JOIN (%s) AS C ON C.ChildID=U.DirID"
+                % (usageTable, self._getChildrenRequest(dirIDString))
+            )
+        req = "SELECT DirID, SEID, SUM(SESize), SUM(SEFiles) FROM (%s) AS Usages " % " UNION ALL ".join(selects)
+        req += "GROUP BY DirID, SEID HAVING SUM(SESize)<>0 OR SUM(SEFiles)<>0"
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        return S_OK({(dirID, seID): (int(size), int(files)) for dirID, seID, size, files in result["Value"]})
+
+    def _getConfirmedUsageResidues(self, *args, **kwargs):
+        """Get the residues of the usage of directories found identical by two successive reads, not to
+        correct a usage caught between the update of a file and the one of its usage
+        """
+        result = self._getUsageResidues(*args, **kwargs)
+        if not result["OK"] or not result["Value"]:
+            return result
+        residues = result["Value"]
+        result = self._getUsageResidues(*args, **kwargs)
+        if not result["OK"]:
+            return result
+        return S_OK({key: value for key, value in result["Value"].items() if residues.get(key) == value})
+
+    def checkDirectoryTreeUsage(self):
+        """Set up what the DirectoryTreeUsage option needs in the DB. Only the DirectoryClosure has a
+        separate table for the usage of the directory trees, the other trees have nothing to do
+
+        :return: S_OK/S_ERROR
+        """
+        return S_OK()
+
+    def _addDirectoryUsage(self, usageTable, usageDict, propagate=True):
+        """Add to the stored usage of directories
+
+        :param str usageTable: table of the stored usage
+        :param dict usageDict: {(dirID, seID): (size, files)} to add
+        :param bool propagate: if True, add it as well to all the parent directories
+        """
+        changes = {}
+        for (dirID, seID), (size, files) in usageDict.items():
+            dirIDs = [dirID]
+            if propagate:
+                result = self.getPathIDsByID(dirID)
+                if not result["OK"]:
+                    return result
+                dirIDs = result["Value"]
+            for curDirID in dirIDs:
+                curSize, curFiles = changes.get((curDirID, seID), (0, 0))
+                changes[(curDirID, seID)] = (curSize + size, curFiles + files)
+        if not changes:
+            return S_OK()
+        values = ",".join(
+            "(%d,%d,%d,%d,UTC_TIMESTAMP())" % (dirID, seID, size, files)
+            for (dirID, seID), (size, files) in changes.items()
+        )
+        req = "INSERT INTO %s (DirID,SEID,SESize,SEFiles,LastUpdate) VALUES %s " % (usageTable, values)
+        req += "ON DUPLICATE KEY UPDATE SESize=SESize+VALUES(SESize), SEFiles=SEFiles+VALUES(SEFiles), "
+        req += "LastUpdate=UTC_TIMESTAMP()"
+        return self.db._update(req)
+
+    def _repairDirectoryUsageChunk(self, dirIDs):
+        """Repair the usage of the given directories, the usage of each directory including the one of
+        its subdirectories and the logical usage being stored with SEID 0
+
+        :returns: S_OK(number of usage entries corrected)
+        """
+        dirIDString = intListToString(dirIDs)
+        result = self._getConfirmedUsageResidues(
+            "FC_DirectoryUsage", dirIDString, self._getOwnUsageRequests(dirIDString, 0)
+        )
+        if not result["OK"]:
+            return result
+        residues = result["Value"]
+        result = self._addDirectoryUsage(
+            "FC_DirectoryUsage", {key: (-size, -files) for key, (size, files) in residues.items()}
+        )
+        if not result["OK"]:
+            return result
+        return S_OK(len(residues))
+
+    def repairDirectoryUsage(self, path, cursor, chunkSize):
+        """Repair the usage of a chunk of the directories of a subtree, in DirID order
+
+        :param str path: top directory of the subtree
+        :param cursor: cursor returned with the previous chunk, None for the first chunk
+        :param int chunkSize: maximum number of directories in the chunk
+
+        :returns: S_OK(dict) indexed "Directories", the number of directories checked, "Repaired",
+                  the number of usage entries corrected, and "Cursor", to be given for the next chunk,
+                  None if it is the last one
+        """
+        result = self.__findPagedDir(path, cursor)
+        if not result["OK"]:
+            return result
+        dirID, cursorDirID, _lastFileID = result["Value"]
+        result = self._getSubtreeDirIDsPage(dirID, cursorDirID, chunkSize)
+        if not result["OK"]:
+            return result
+        dirIDs = result["Value"]
+        repaired = 0
+        if dirIDs:
+            result = self._repairDirectoryUsageChunk(dirIDs)
+            if not result["OK"]:
+                return result
+            repaired = result["Value"]
+        nextCursor = _encodeCursor(dirIDs[-1] + 1, 0) if len(dirIDs) == chunkSize else None
+        return S_OK({"Directories": len(dirIDs), "Repaired": repaired, "Cursor": nextCursor})
+
     def getDirectoryCounters(self, connection=False):
         """Get the total number of directories"""
         conn = self._getConnection(connection)
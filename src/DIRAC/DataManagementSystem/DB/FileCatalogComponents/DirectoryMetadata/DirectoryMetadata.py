@@ -4,9 +4,43 @@
 import os
 from DIRAC.ConfigurationSystem.Client.Helpers import Registry
 from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
-from DIRAC import S_OK, S_ERROR
+from DIRAC import S_OK, S_ERROR, gLogger
+from DIRAC.Core.Utilities.List import intListToString
 from DIRAC.Core.Utilities.TimeUtilities import queryTime
 
+# Table of the optional denormalised index: one row per directory, one column per metadata field
+# holding the value the directory defines or inherits from its parents
+METADATA_INDEX_TABLE = "FC_MetaIndex"
+# Marker of a complete metadata index: its row is only inserted once the index is fully built, and it is deleted
+# when an update of the index cannot be done. The index is not used and is rebuilt when the marker is missing
+METADATA_INDEX_STATUS_TABLE = "FC_MetaIndexStatus"
+# Each column of the index has its own index, and InnoDB allows at most 64 of them per table:
+# with more metadata fields, the index is not built and the queries do not use it
+MAX_INDEXED_FIELDS = 50
+
+
+def _getMetaValueType(pType):
+    """Type of the SQL column holding the values of a metadata field
+
+    :param str pType: metadata type, as given to addMetadataField
+    """
+    if pType.lower()[:3] == "int":
+        return "INT"
+    if pType.lower() == "string":
+        return "VARCHAR(128)"
+    if pType.lower() == "float":
+        return "FLOAT"
+    if pType.lower() == "date":
+        return "DATETIME"
+    if pType == "MetaSet":
+        return "VARCHAR(64)"
+    return pType
+
+
+def _getIndexColumn(metaName):
+    """Column of a metadata field in the metadata index"""
+    return f"`Meta_{metaName}`"
+
 
 class DirectoryMetadata:
     def __init__(self, database=None):
@@ -15,6 +49,49 @@ class DirectoryMetadata:
     def setDatabase(self, database):
         self.db = database
 
+    def _useMetadataIndex(self):
+        """Whether the denormalised metadata index is maintained and used for the queries"""
+        return getattr(self.db, "metadataIndex", False)
+
+    def _isMetadataIndexComplete(self):
+        """Whether the metadata index is fully built and up to date, i.e. whether it can be used"""
+        if not self._useMetadataIndex():
+            return False
+        result = self.db._query(f"SELECT COUNT(*) FROM {METADATA_INDEX_STATUS_TABLE}")
+        return result["OK"] and result["Value"][0][0] > 0
+
+    def __invalidateMetadataIndex(self, reason):
+        """Mark the metadata index as incomplete, such that it is not used anymore until it is rebuilt
+
+        :param str reason: why the index can not be kept up to date
+        """
+        gLogger.warn("The metadata index is not up to date anymore, it will be rebuilt", reason)
+        return self.db._update(f"DELETE FROM {METADATA_INDEX_STATUS_TABLE}")
+
+    def __updateInTransaction(self, update, *args):
+        """Do an update of the metadata tables and of the metadata index in a single transaction
+
+        :param update: method doing the update, with the connection to use as conn keyword argument
+        :param args: arguments of the method
+
+        :return: S_OK/S_ERROR, the result of the update
+        """
+        result = self.db._getConnection()
+        if not result["OK"]:
+            return result
+        conn = result["Value"]
+        result = self.db._query("START TRANSACTION;", conn=conn)
+        if not result["OK"]:
+            return result
+        result = update(*args, conn=conn)
+        if not result["OK"]:
+            self.db._query("ROLLBACK;", conn=conn)
+            return result
+        res = self.db._query("COMMIT;", conn=conn)
+        if not res["OK"]:
+            return res
+        return result
+
     ##############################################################################
     #
     #  Manage Metadata fields
@@ -43,17 +120,7 @@ class DirectoryMetadata:
                 return S_OK("Already exists")
             return S_ERROR(f"Attempt to add an existing metadata with different type: {pType}/{result['Value'][pName]}")
 
-        valueType = pType
-        if pType.lower()[:3] == "int":
-            valueType = "INT"
-        elif pType.lower() == "string":
-            valueType = "VARCHAR(128)"
-        elif pType.lower() == "float":
-            valueType = "FLOAT"
-        elif pType.lower() == "date":
-            valueType = "DATETIME"
-        elif pType == "MetaSet":
-            valueType = "VARCHAR(64)"
+        valueType = _getMetaValueType(pType)
 
         req = "CREATE TABLE FC_Meta_{} ( DirID INTEGER NOT NULL, Value {}, PRIMARY KEY (DirID), INDEX (Value) )".format(
             pName,
@@ -72,6 +139,19 @@ class DirectoryMetadata:
         if not result["OK"]:
             return result
 
+        if self._isMetadataIndexComplete():
+            result = self.db._query("SELECT COUNT(*) FROM FC_MetaFields")
+            if not result["OK"]:
+                return result
+            if result["Value"][0][0] > MAX_INDEXED_FIELDS:
+                result = self.__invalidateMetadataIndex(f"more than {MAX_INDEXED_FIELDS} metadata fields")
+            else:
+                result = self.__addMetadataIndexField(pName, valueType)
+                if not result["OK"]:
+                    result = self.__invalidateMetadataIndex(result["Message"])
+            if not result["OK"]:
+                return result
+
         return S_OK("Added new metadata: %d" % metadataID)
 
     def deleteMetadataField(self, pName, credDict):
@@ -93,6 +173,11 @@ class DirectoryMetadata:
         if not result["OK"]:
             if error:
                 result["Message"] = error + "; " + result["Message"]
+            return result
+        if self._isMetadataIndexComplete():
+            result = self.db._update(f"ALTER TABLE {METADATA_INDEX_TABLE} DROP COLUMN {_getIndexColumn(pName)}")
+            if not result["OK"]:
+                result = self.__invalidateMetadataIndex(result["Message"])
         return result
 
     def getMetadataFields(self, credDict):
@@ -224,6 +309,7 @@ class DirectoryMetadata:
         if not dirmeta["OK"]:
             return dirmeta
 
+        useIndex = self._isMetadataIndexComplete()
         voName = Registry.getGroupOption(credDict["group"], "VO")
         forceIndex = Operations(vo=voName).getValue("DataManagement/ForceIndexedMetadata", False)
         for metaName, metaValue in metaDict.items():
@@ -237,18 +323,37 @@ class DirectoryMetadata:
             # Check that the metadata is not defined for the parent directories
             if metaName in dirmeta["Value"]:
                 return S_ERROR(f"Metadata conflict detected for {metaName} for directory {dPath}")
-            result = self.db.insertFields(f"FC_Meta_{metaName}", ["DirID", "Value"], [dirID, metaValue])
+            if useIndex:
+                result = self.__updateInTransaction(self.__setMetadataValue, metaName, dirID, metaValue, useIndex)
+            else:
+                result = self.__setMetadataValue(metaName, dirID, metaValue, useIndex)
             if not result["OK"]:
-                if result["Message"].find("Duplicate") != -1:
-                    req = "UPDATE FC_Meta_%s SET Value='%s' WHERE DirID=%d" % (metaName, metaValue, dirID)
-                    result = self.db._update(req)
-                    if not result["OK"]:
-                        return result
-                else:
-                    return result
+                return result
 
         return S_OK()
 
+    def __setMetadataValue(self, metaName, dirID, metaValue, useIndex, conn=None):
+        """Set the value of a metadata field for a directory, and in the metadata index if it is used
+
+        :param str metaName: metadata name
+        :param int dirID: directory ID
+        :param metaValue: value of the metadata
+        :param bool useIndex: whether to update the metadata index
+        :param conn: connection to use
+        """
+        result = self.db.insertFields(f"FC_Meta_{metaName}", ["DirID", "Value"], [dirID, metaValue], conn=conn)
+        if not result["OK"]:
+            if result["Message"].find("Duplicate") != -1:
+                req = "UPDATE FC_Meta_%s SET Value='%s' WHERE DirID=%d" % (metaName, metaValue, dirID)
+                result = self.db._update(req, conn=conn)
+                if not result["OK"]:
+                    return result
+            else:
+                return result
+        if useIndex:
+            return self.__setMetadataIndexValue(metaName, dirID, metaValue, conn=conn)
+        return S_OK()
+
     def removeMetadata(self, dPath, metaData, credDict):
         """Remove the specified metadata for the given directory
 
@@ -271,9 +376,15 @@ class DirectoryMetadata:
         dirID = result["Value"]
 
         failedMeta = {}
+        useIndex = self._isMetadataIndexComplete()
         for meta in metaData:
             if meta in metaFields:
                 # Indexed meta case
+                if useIndex:
+                    result = self.__updateInTransaction(self.__removeMetadataIndexValue, meta, dPath, dirID)
+                    if not result["OK"]:
+                        failedMeta[meta] = result["Message"]
+                    continue
                 req = "DELETE FROM FC_Meta_%s WHERE DirID=%d" % (meta, dirID)
                 result = self.db._update(req)
                 if not result["OK"]:
@@ -289,8 +400,8 @@ class DirectoryMetadata:
             metaExample = list(failedMeta)[0]
             result = S_ERROR(f"Failed to remove {len(failedMeta)} metadata, e.g. {failedMeta[metaExample]}")
             result["FailedMetadata"] = failedMeta
-        else:
-            return S_OK()
+            return result
+        return S_OK()
 
     def setMetaParameter(self, dPath, metaName, metaValue, credDict):
         """Set an meta parameter - metadata which is not used in the the data
@@ -468,11 +579,12 @@ class DirectoryMetadata:
     # Find directories corresponding to the metadata
     #
 
-    def __createMetaSelection(self, value, table=""):
+    def __createMetaSelection(self, value, table="", column="Value"):
         """Create an SQL selection element for the given meta value
 
         :param dict value: dictionary with selection instructions suitable for the database search
         :param str table: table name
+        :param str column: column of the values
 
         :return: selection string
         """
@@ -484,32 +596,32 @@ class DirectoryMetadata:
                     if isinstance(operand, list):
                         return S_ERROR("Illegal query: list of values for comparison operation")
                     if isinstance(operand, int):
-                        selectList.append("%sValue%s%d" % (table, operation, operand))
+                        selectList.append("%s%s%s%d" % (table, column, operation, operand))
                     elif isinstance(operand, float):
-                        selectList.append(f"{table}Value{operation}{operand:f}")
+                        selectList.append(f"{table}{column}{operation}{operand:f}")
                     else:
-                        selectList.append(f"{table}Value{operation}'{operand}'")
+                        selectList.append(f"{table}{column}{operation}'{operand}'")
                 elif operation == "in" or operation == "=":
                     if isinstance(operand, list):
                         vString = ",".join(["'" + str(x) + "'" for x in operand])
-                        selectList.append(f"{table}Value IN ({vString})")
+                        selectList.append(f"{table}{column} IN ({vString})")
                     else:
-                        selectList.append(f"{table}Value='{operand}'")
+                        selectList.append(f"{table}{column}='{operand}'")
                 elif operation == "nin" or operation == "!=":
                     if isinstance(operand, list):
                         vString = ",".join(["'" + str(x) + "'" for x in operand])
-                        selectList.append(f"{table}Value NOT IN ({vString})")
+                        selectList.append(f"{table}{column} NOT IN ({vString})")
                     else:
-                        selectList.append(f"{table}Value!='{operand}'")
+                        selectList.append(f"{table}{column}!='{operand}'")
                 selectString = " AND ".join(selectList)
         elif isinstance(value, list):
             vString = ",".join(["'" + str(x) + "'" for x in value])
-            selectString = f"{table}Value in ({vString})"
+            selectString = f"{table}{column} in ({vString})"
         else:
             if value == "Any":
                 selectString = ""
             else:
-                selectString = f"{table}Value='{value}' "
+                selectString = f"{table}{column}='{value}' "
 
         return S_OK(selectString)
 
@@ -688,6 +800,9 @@ class DirectoryMetadata:
             return result
         metaDict = result["Value"]
 
+        if metaDict and self._isMetadataIndexComplete():
+            return self.__findDirIDsByMetadataIndex(metaDict, pathDirID)
+
         # Now check the meta data for the requested directory and its parents
         finalMetaDict = dict(metaDict)
         for meta in metaDict:
@@ -754,6 +869,41 @@ class DirectoryMetadata:
 
         return result
 
+    def __findDirIDsByMetadataIndex(self, metaDict, pathDirID):
+        """Find the directories satisfying all the metadata conditions with a single query of the metadata index
+
+        :param dict metaDict: expanded metadata query
+        :param int pathDirID: directory to which the search is restricted, with its subdirectories, 0 for all
+
+        :return: S_OK/S_ERROR, Value list of selected directory IDs
+        """
+        conditions = []
+        for meta, value in metaDict.items():
+            column = _getIndexColumn(meta)
+            if value == "Missing":
+                conditions.append(f"{column} IS NULL")
+            elif value == "Any":
+                conditions.append(f"{column} IS NOT NULL")
+            else:
+                result = self.__createMetaSelection(value, column=column)
+                if not result["OK"]:
+                    return result
+                conditions.append(result["Value"])
+        if pathDirID:
+            result = self.db.dtree.getSubdirectoriesByID(pathDirID, includeParent=True, requestString=True)
+            if not result["OK"]:
+                return result
+            conditions.append(f"DirID IN ({result['Value']})")
+
+        req = f"SELECT DirID FROM {METADATA_INDEX_TABLE} WHERE {' AND '.join(conditions)}"
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+
+        result = S_OK([row[0] for row in result["Value"]])
+        result["Selection"] = "Done" if result["Value"] else "None"
+        return result
+
     @queryTime
     def findDirectoriesByMetadata(self, queryDict, path, credDict):
         """Find Directory names satisfying the given metadata and being subdirectories of
@@ -1008,4 +1158,207 @@ class DirectoryMetadata:
             else:
                 successful[meta] = "OK"
 
+        if self._isMetadataIndexComplete():
+            req = f"DELETE FROM {METADATA_INDEX_TABLE} WHERE DirID in ( {dirListString} )"
+            result = self.db._update(req)
+            if not result["OK"]:
+                result = self.__invalidateMetadataIndex(result["Message"])
+                if not result["OK"]:
+                    failed[METADATA_INDEX_TABLE] = result["Message"]
+
         return S_OK({"Successful": successful, "Failed": failed})
+
+    ############################################################################################
+    #
+    # Denormalised index of the inherited metadata
+    #
+    # Each directory has a row in the index, with a column per metadata field holding the value
+    # that the directory defines or inherits from its parents. It is kept up to date when the
+    # metadata are set or removed and when directories are created or removed, so that a query
+    # on several metadata fields is a single query of the index. The index is only used and kept up
+    # to date while it is marked as complete in METADATA_INDEX_STATUS_TABLE: the queries otherwise
+    # use the metadata tables, until the index is rebuilt.
+    #
+
+    def checkMetadataIndex(self):
+        """Build the metadata index if it is not complete, i.e. if it does not exist yet, if its build
+        did not finish or if it could not be kept up to date
+
+        :return: S_OK/S_ERROR
+        """
+        if self._isMetadataIndexComplete():
+            return S_OK()
+        return self.rebuildMetadataIndex()
+
+    def rebuildMetadataIndex(self):
+        """Build the metadata index from scratch. This is needed if the metadata were modified while
+        the index was not maintained
+
+        :return: S_OK/S_ERROR
+        """
+        req = f"CREATE TABLE IF NOT EXISTS {METADATA_INDEX_STATUS_TABLE} ( Complete INTEGER NOT NULL )"
+        result = self.db._update(req)
+        if not result["OK"]:
+            return result
+        result = self.db._update(f"DELETE FROM {METADATA_INDEX_STATUS_TABLE}")
+        if not result["OK"]:
+            return result
+
+        # All the fields, whatever the VO
+        result = self.db._query("SELECT MetaName,MetaType FROM FC_MetaFields")
+        if not result["OK"]:
+            return result
+        metaFields = result["Value"]
+
+        result = self.db._update(f"DROP TABLE IF EXISTS {METADATA_INDEX_TABLE}")
+        if not result["OK"]:
+            return result
+        result = self.db._update(f"CREATE TABLE {METADATA_INDEX_TABLE} ( DirID INTEGER NOT NULL, PRIMARY KEY (DirID) )")
+        if not result["OK"]:
+            return result
+        req = f"INSERT INTO {METADATA_INDEX_TABLE} (DirID) SELECT DirID FROM {self.db.dtree.getTreeTable()}"
+        result = self.db._update(req)
+        if not result["OK"]:
+            return result
+
+        if len(metaFields) > MAX_INDEXED_FIELDS:
+            gLogger.warn(
+                "The metadata index is not used", f"{len(metaFields)} metadata fields, at most {MAX_INDEXED_FIELDS}"
+            )
+            return S_OK()
+        for metaName, metaType in metaFields:
+            result = self.__addMetadataIndexField(metaName, _getMetaValueType(metaType))
+            if not result["OK"]:
+                return result
+        return self.db._update(f"INSERT INTO {METADATA_INDEX_STATUS_TABLE} (Complete) VALUES (1)")
+
+    def addDirectoryToMetadataIndex(self, dirID, path):
+        """Add a new directory to the metadata index, with the metadata inherited from its parent
+
+        :param int dirID: ID of the new directory
+        :param str path: path of the new directory
+
+        :return: S_OK/S_ERROR
+        """
+        if not self._isMetadataIndexComplete():
+            return S_OK()
+
+        parentID = 0
+        if path != "/":
+            result = self.db.dtree.findDir(os.path.dirname(os.path.normpath(path)))
+            if not result["OK"]:
+                return result
+            parentID = result["Value"] or 0
+
+        result = self.db._query("SELECT MetaName FROM FC_MetaFields")
+        if not result["OK"]:
+            return result
+        columns = "".join(f", {_getIndexColumn(row[0])}" for row in result["Value"])
+
+        req = "INSERT INTO %s (DirID%s) SELECT %d%s FROM %s WHERE DirID=%d" % (
+            METADATA_INDEX_TABLE,
+            columns,
+            dirID,
+            columns,
+            METADATA_INDEX_TABLE,
+            parentID,
+        )
+        result = self.db._update(req)
+        if result["OK"] and not result["Value"]:
+            # No parent in the index, i.e. the root directory
+            result = self.db._update("INSERT INTO %s (DirID) VALUES (%d)" % (METADATA_INDEX_TABLE, dirID))
+        if not result["OK"]:
+            if "Duplicate" in result["Message"]:
+                # Already indexed
+                return S_OK()
+            return self.__invalidateMetadataIndex(result["Message"])
+        return result
+
+    def __addMetadataIndexField(self, metaName, valueType):
+        """Add the column of a metadata field to the index, and fill it with the values of the directories
+
+        :param str metaName: metadata name
+        :param str valueType: SQL type of the values
+        """
+        column = _getIndexColumn(metaName)
+        result = self.db._update(f"ALTER TABLE {METADATA_INDEX_TABLE} ADD COLUMN {column} {valueType}")
+        if not result["OK"]:
+            return result
+        result = self.db._update(f"CREATE INDEX {column} ON {METADATA_INDEX_TABLE} ({column})")
+        if not result["OK"]:
+            return result
+
+        result = self.db._query(f"SELECT DirID,Value FROM FC_Meta_{metaName}")
+        if not result["OK"]:
+            return result
+        for dirID, value in result["Value"]:
+            result = self.__setMetadataIndexValue(metaName, dirID, value)
+            if not result["OK"]:
+                return result
+        return S_OK()
+
+    def __setMetadataIndexValue(self, metaName, dirID, value, conn=None):
+        """Set the value of a metadata field in the index for a directory and the subdirectories inheriting it
+
+        :param str metaName: metadata name
+        :param int dirID: directory defining the value
+        :param value: value of the metadata, None if neither the directory nor its parents define it
+        :param conn: connection to use
+        """
+        result = self.db.dtree.getSubdirectoriesByID(dirID, requestString=True, includeParent=True)
+        if not result["OK"]:
+            return result
+        subdirSelection = result["Value"]
+
+        # The subdirectories defining their own value keep it, and so do their subdirectories
+        req = "SELECT DirID FROM FC_Meta_%s WHERE DirID IN (%s) AND DirID!=%d" % (metaName, subdirSelection, dirID)
+        result = self.db._query(req, conn=conn)
+        if not result["OK"]:
+            return result
+        ownValueDirs = [row[0] for row in result["Value"]]
+        if ownValueDirs:
+            result = self.db.dtree.getAllSubdirectoriesByID(ownValueDirs)
+            if not result["OK"]:
+                return result
+            ownValueDirs += result["Value"]
+
+        if value is None:
+            valueString = "NULL"
+        else:
+            result = self.db._escapeString(str(value))
+            if not result["OK"]:
+                return result
+            valueString = result["Value"]
+        req = f"UPDATE {METADATA_INDEX_TABLE} SET {_getIndexColumn(metaName)}={valueString}"
+        req += f" WHERE DirID IN ({subdirSelection})"
+        if ownValueDirs:
+            req += f" AND DirID NOT IN ({intListToString(ownValueDirs)})"
+        return self.db._update(req, conn=conn)
+
+    def __removeMetadataIndexValue(self, metaName, dPath, dirID, conn=None):
+        """Remove the value of a metadata field for a directory, and update the index: the directory
+        and its subdirectories inherit it again from the parents, if any
+
+        :param str metaName: metadata name
+        :param str dPath: directory path
+        :param int dirID: directory ID
+        :param conn: connection to use
+        """
+        req = "DELETE FROM FC_Meta_%s WHERE DirID=%d" % (metaName, dirID)
+        result = self.db._update(req, conn=conn)
+        if not result["OK"]:
+            return result
+
+        value = None
+        result = self.db.dtree.getPathIDs(dPath)
+        if not result["OK"]:
+            return result
+        parentIDs = result["Value"][:-1]
+        if parentIDs:
+            req = f"SELECT Value FROM FC_Meta_{metaName} WHERE DirID IN ({intListToString(parentIDs)})"
+            result = self.db._query(req, conn=conn)
+            if not result["OK"]:
+                return result
+            if result["Value"]:
+                value = result["Value"][0][0]
+        return self.__setMetadataIndexValue(metaName, dirID, value, conn=conn)
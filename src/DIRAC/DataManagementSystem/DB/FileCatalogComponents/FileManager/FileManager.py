@@ -35,28 +35,24 @@ class FileManager(FileManagerBase):
                     fname = fname.replace("//", "/")
                     failed[fname] = "No such file or directory"
 
+        # The files of all the directories are looked up together
+        dirFiles = {}
+        for dirPath, dirID in directoryIDs.items():
+            dirFiles.setdefault(dirID, []).extend(dirDict[dirPath])
+        res = self._getFilesInDirectories(dirFiles, metadata, allStatus=allStatus, connection=connection)
+        error = res.get("Message", "No such file or directory")
+        dirFilesDicts = res.get("Value", {})
+
         successful = {}
-        for dirPath in directoryIDs:
-            fileNames = dirDict[dirPath]
-            res = self._getDirectoryFiles(
-                directoryIDs[dirPath], fileNames, metadata, allStatus=allStatus, connection=connection
-            )
-            if (not res["OK"]) or (not res["Value"]):
-                error = res.get("Message", "No such file or directory")
-                for fileName in fileNames:
-                    fname = f"{dirPath}/{fileName}"
-                    fname = fname.replace("//", "/")
+        for dirPath, dirID in directoryIDs.items():
+            filesDict = dirFilesDicts.get(dirID, {})
+            for fileName in dirDict[dirPath]:
+                fname = f"{dirPath}/{fileName}"
+                fname = fname.replace("//", "/")
+                if fileName in filesDict:
+                    successful[fname] = filesDict[fileName]
+                else:
                     failed[fname] = error
-            else:
-                for fileName, fileDict in res["Value"].items():
-                    fname = f"{dirPath}/{fileName}"
-                    fname = fname.replace("//", "/")
-                    successful[fname] = fileDict
-            for fileName in fileNames:
-                if fileName not in res["Value"]:
-                    fname = f"{dirPath}/{fileName}"
-                    fname = fname.replace("//", "/")
-                    failed[fname] = "No such file or directory"
         return S_OK({"Successful": successful, "Failed": failed})
 
     def _findFileIDs(self, lfns, connection=False):
@@ -104,12 +100,23 @@ class FileManager(FileManagerBase):
 
     def _getDirectoryFiles(self, dirID, fileNames, metadata_input, allStatus=False, connection=False):
         """Get the metadata for files in the same directory"""
+        result = self._getFilesInDirectories({dirID: fileNames}, metadata_input, allStatus, connection)
+        if not result["OK"]:
+            return result
+        return S_OK(result["Value"].get(dirID, {}))
+
+    def _getFilesInDirectories(self, dirFiles, metadata_input, allStatus=False, connection=False):
+        """Get the metadata for files in several directories, with one query per batch of files
+
+        :param dict dirFiles: { dirID : list of file names }. An empty list means all the files of the directory
+        :param metadata_input: list of metadata, any of ['FileID','Size','UID','GID','Status','Checksum',
+                               'ChecksumType','Type','CreationDate','ModificationDate','Mode']
+        :return: S_OK({ dirID : { fileName : metadata dict } }), directories without files are not included
+        """
         metadata = list(metadata_input)
 
         connection = self._getConnection(connection)
-        # metadata can be any of ['FileID','Size','UID','GID','Status','Checksum','ChecksumType',
-        # 'Type','CreationDate','ModificationDate','Mode']
-        req = "SELECT FileName,DirID,FileID,Size,UID,GID,Status FROM FC_Files WHERE DirID=%d" % (dirID)
+        statusCondition = ""
         if not allStatus:
             statusIDs = []
             for status in self.db.visibleFileStatus:
@@ -117,34 +124,33 @@ class FileManager(FileManagerBase):
                 if res["OK"]:
                     statusIDs.append(res["Value"])
             if statusIDs:
-                req = f"{req} AND Status IN ({intListToString(statusIDs)})"
-        if fileNames:
-            req = f"{req} AND FileName IN ({stringListToString(fileNames)})"
-        res = self.db._query(req, conn=connection)
-        if not res["OK"]:
-            return res
-        fileNameIDs = res["Value"]
-        if not fileNameIDs:
-            return S_OK({})
-        filesDict = {}
+                statusCondition = f" AND Status IN ({intListToString(statusIDs)})"
+        fileNameIDs = []
+        for filesCondition in self._getDirectoryFilesConditions(dirFiles):
+            req = f"SELECT FileName,DirID,FileID,Size,UID,GID,Status FROM FC_Files WHERE ({filesCondition}){statusCondition}"
+            res = self.db._query(req, conn=connection)
+            if not res["OK"]:
+                return res
+            fileNameIDs.extend(res["Value"])
+        dirFilesDicts = {}
         # If we only requested the FileIDs then there is no need to do anything else
         if metadata == ["FileID"]:
             for fileName, dirID, fileID, size, uid, gid, status in fileNameIDs:
-                filesDict[fileName] = {"FileID": fileID}
-            return S_OK(filesDict)
+                dirFilesDicts.setdefault(dirID, {})[fileName] = {"FileID": fileID}
+            return S_OK(dirFilesDicts)
         # Otherwise get the additionally requested metadata from the FC_FileInfo table
-        files = {}
+        filesDict = {}
         userDict = {}
         groupDict = {}
         for fileName, dirID, fileID, size, uid, gid, status in fileNameIDs:
-            filesDict[fileID] = fileName
-            files[fileName] = {}
+            fileDict = dirFilesDicts.setdefault(dirID, {}).setdefault(fileName, {})
+            filesDict[fileID] = fileDict
             if "Size" in metadata:
-                files[fileName]["Size"] = size
+                fileDict["Size"] = size
             if "DirID" in metadata:
-                files[fileName]["DirID"] = dirID
+                fileDict["DirID"] = dirID
             if "UID" in metadata:
-                files[fileName]["UID"] = uid
+                fileDict["UID"] = uid
                 if uid in userDict:
                     owner = userDict[uid]
                 else:
@@ -153,9 +159,9 @@ class FileManager(FileManagerBase):
                     if result["OK"]:
                         owner = result["Value"]
                     userDict[uid] = owner
-                files[fileName]["Owner"] = owner
+                fileDict["Owner"] = owner
             if "GID" in metadata:
-                files[fileName]["GID"] = gid
+                fileDict["GID"] = gid
                 if gid in groupDict:
                     group = groupDict[gid]
                 else:
@@ -164,26 +170,27 @@ class FileManager(FileManagerBase):
                     if result["OK"]:
                         group = result["Value"]
                     groupDict[gid] = group
-                files[fileName]["OwnerGroup"] = group
+                fileDict["OwnerGroup"] = group
             if "Status" in metadata:
-                files[fileName]["Status"] = self._getIntStatus(status).get("Value", status)
+                fileDict["Status"] = self._getIntStatus(status).get("Value", status)
         for element in ["FileID", "Size", "DirID", "UID", "GID", "Status"]:
             if element in metadata:
                 metadata.remove(element)
         metadata.append("FileID")
         metadata.reverse()
-        req = "SELECT {} FROM FC_FileInfo WHERE FileID IN ({})".format(
-            intListToString(metadata),
-            intListToString(filesDict.keys()),
-        )
-        res = self.db._query(req, conn=connection)
-        if not res["OK"]:
-            return res
-        for tuple_ in res["Value"]:
-            fileID = tuple_[0]
-            rowDict = dict(zip(metadata, tuple_))
-            files[filesDict[fileID]].update(rowDict)
-        return S_OK(files)
+        for fileIDs in breakListIntoChunks(list(filesDict), self.findFilesBatchSize):
+            req = "SELECT {} FROM FC_FileInfo WHERE FileID IN ({})".format(
+                intListToString(metadata),
+                intListToString(fileIDs),
+            )
+            res = self.db._query(req, conn=connection)
+            if not res["OK"]:
+                return res
+            for tuple_ in res["Value"]:
+                fileID = tuple_[0]
+                rowDict = dict(zip(metadata, tuple_))
+                filesDict[fileID].update(rowDict)
+        return S_OK(dirFilesDicts)
 
     def _getDirectoryFileIDs(self, dirID, requestString=False):
         """Get a list of IDs for all the files stored in given directories or their
@@ -237,7 +244,7 @@ class FileManager(FileManagerBase):
     # _addFiles related methods
     #
 
-    def _insertFiles(self, lfns, uid, gid, connection=False):
+    def _insertFiles(self, lfns, uid, gid, connection=False, updateUsage=True):
         connection = self._getConnection(connection)
         # Add the files
         failed = {}
@@ -248,6 +255,7 @@ class FileManager(FileManagerBase):
             statusID = res["Value"]
 
         directorySESizeDict = {}
+        ownerIDs = {}
         for lfn in lfns.keys():
             dirID = lfns[lfn]["DirID"]
             fileName = os.path.basename(lfn)
@@ -256,9 +264,11 @@ class FileManager(FileManagerBase):
             s_uid = uid
             s_gid = gid
             if ownerDict:
-                result = self.db.ugManager.getUserAndGroupID(ownerDict)
-                if result["OK"]:
-                    s_uid, s_gid = result["Value"]
+                owner = (ownerDict.get("username"), ownerDict.get("group"))
+                if owner not in ownerIDs:
+                    result = self.db.ugManager.getUserAndGroupID(ownerDict)
+                    ownerIDs[owner] = result["Value"] if result["OK"] else (uid, gid)
+                s_uid, s_gid = ownerIDs[owner]
             insertTuples.append("(%d,%d,%d,%d,%d,'%s')" % (dirID, size, s_uid, s_gid, statusID, fileName))
             directorySESizeDict.setdefault(dirID, {})
             directorySESizeDict[dirID].setdefault(0, {"Files": 0, "Size": 0})
@@ -304,7 +314,7 @@ class FileManager(FileManagerBase):
                 for lfn in list(lfns):
                     failed[lfn] = res["Message"]
                     lfns.pop(lfn)
-            else:
+            elif updateUsage:
                 # Update the directory usage
                 result = self._updateDirectoryUsage(directorySESizeDict, "+", connection=connection)
                 if not result["OK"]:
@@ -410,7 +420,7 @@ class FileManager(FileManagerBase):
     # _addReplicas related methods
     #
 
-    def _insertReplicas(self, lfns, master=False, connection=False):
+    def _insertReplicas(self, lfns, master=False, connection=False, updateUsage=True):
         connection = self._getConnection(connection)
         # Add the files
         failed = {}
@@ -495,7 +505,8 @@ class FileManager(FileManagerBase):
                 self.__deleteReplicas(toDelete, connection=connection)
             else:
                 # Update the directory usage
-                self._updateDirectoryUsage(directorySESizeDict, "+", connection=connection)
+                if updateUsage:
+                    self._updateDirectoryUsage(directorySESizeDict, "+", connection=connection)
                 for lfn in lfns.keys():
                     successful[lfn] = True
         return S_OK({"Successful": successful, "Failed": failed})
@@ -6,13 +6,16 @@ import os
 import stat
 
 from DIRAC import S_OK, S_ERROR, gLogger
-from DIRAC.Core.Utilities.List import intListToString
+from DIRAC.Core.Utilities.List import breakListIntoChunks, intListToString, stringListToString
 from DIRAC.Core.Utilities.Pfn import pfnunparse
 
 
 class FileManagerBase:
     """Base class for all the specific File Managers"""
 
+    # Maximum number of files looked up by a single query when finding files in several directories
+    findFilesBatchSize = 1000
+
     def __init__(self, database=None):
         self.db = database
         self.statusDict = {}
@@ -90,7 +93,7 @@ class FileManagerBase:
     # File write methods
     #
 
-    def _insertFiles(self, lfns, uid, gid, connection=False):
+    def _insertFiles(self, lfns, uid, gid, connection=False, updateUsage=True):
         """To be implemented on derived class"""
         return S_ERROR("To be implemented on derived class")
 
@@ -98,7 +101,7 @@ class FileManagerBase:
         """To be implemented on derived class"""
         return S_ERROR("To be implemented on derived class")
 
-    def _insertReplicas(self, lfns, master=False, connection=False):
+    def _insertReplicas(self, lfns, master=False, connection=False, updateUsage=True):
         """To be implemented on derived class"""
         return S_ERROR("To be implemented on derived class")
 
@@ -168,21 +171,21 @@ class FileManagerBase:
 
     def _getFileLFNs(self, fileIDs):
         """Get the file LFNs for a given list of file IDs"""
-        stringIDs = intListToString(fileIDs)
         treeTable = self.db.dtree.getTreeTable()
 
-        req = (
-            "SELECT F.FileID, CONCAT(D.DirName,'/',F.FileName) from FC_Files as F,\
-        %s as D WHERE F.FileID IN ( %s ) AND F.DirID=D.DirID"
-            % (treeTable, stringIDs)
-        )
-        result = self.db._query(req)
-        if not result["OK"]:
-            return result
-
         fileNameDict = {}
-        for row in result["Value"]:
-            fileNameDict[row[0]] = row[1]
+        for chunk in breakListIntoChunks(fileIDs, 1000):
+            req = (
+                "SELECT F.FileID, CONCAT(D.DirName,'/',F.FileName) from FC_Files as F,\
+            %s as D WHERE F.FileID IN ( %s ) AND F.DirID=D.DirID"
+                % (treeTable, intListToString(chunk))
+            )
+            result = self.db._query(req)
+            if not result["OK"]:
+                return result
+
+            for row in result["Value"]:
+                fileNameDict[row[0]] = row[1]
 
         failed = {}
         successful = fileNameDict
@@ -259,35 +262,27 @@ class FileManagerBase:
 
         # If we have files left to register
         if masterLfns:
-            # Create the directories for the supplied files and store their IDs
+            # Create all the missing directories for the supplied files at once and store their IDs
             directories = self._getFileDirectories(list(masterLfns))
+            res = self.db.dtree.makeDirectoriesBulk(list(directories), credDict)
+            if not res["OK"]:
+                return res
+            dirIDs = res["Value"]["Successful"]
             for directory, fileNames in directories.items():
-                res = self.db.dtree.makeDirectories(directory, credDict)
-                if not res["OK"]:
-                    for fileName in fileNames:
-                        lfn = os.path.join(directory, fileName)
-                        failed[lfn] = res["Message"]
-                        masterLfns.pop(lfn)
-                    continue
                 for fileName in fileNames:
+                    lfn = os.path.join(directory, fileName)
                     if not fileName:
-                        failed[directory] = "Is no a valid file"
-                        masterLfns.pop(directory)
-                        continue
-
-                    lfn = f"{directory}/{fileName}"
-                    lfn = lfn.replace("//", "/")
-
-                    # This condition should never be true, we would not be here otherwise...
-                    if not res["OK"]:
-                        failed[lfn] = "Failed to create directory for file"
+                        failed[lfn] = "Is no a valid file"
+                        masterLfns.pop(lfn)
+                    elif directory not in dirIDs:
+                        failed[lfn] = res["Value"]["Failed"][directory]
                         masterLfns.pop(lfn)
                     else:
-                        masterLfns[lfn]["DirID"] = res["Value"]
+                        masterLfns[lfn]["DirID"] = dirIDs[directory]
 
         # If we still have files left to register
         if masterLfns:
-            res = self._insertFiles(masterLfns, uid, gid, connection=connection)
+            res = self._insertFiles(masterLfns, uid, gid, connection=connection, updateUsage=False)
             if not res["OK"]:
                 for lfn in list(masterLfns):  # pylint: disable=consider-iterating-dictionary
                     failed[lfn] = res["Message"]
@@ -303,20 +298,21 @@ class FileManagerBase:
             res = self._populateFileAncestors(masterLfns, connection=connection)
             toPurge = []
             if not res["OK"]:
-                for lfn in masterLfns.keys():
+                for lfn in list(masterLfns):
                     failed[lfn] = "Failed while registering ancestors"
-                    toPurge.append(masterLfns[lfn]["FileID"])
+                    toPurge.append(masterLfns.pop(lfn)["FileID"])
             else:
                 failed.update(res["Value"]["Failed"])
                 for lfn, error in res["Value"]["Failed"].items():
-                    toPurge.append(masterLfns[lfn]["FileID"])
+                    toPurge.append(masterLfns.pop(lfn)["FileID"])
             if toPurge:
                 self._deleteFiles(toPurge, connection=connection)
 
         # Register the replicas
         newlyRegistered = {}
+        usageLfns = {}
         if masterLfns:
-            res = self._insertReplicas(masterLfns, master=True, connection=connection)
+            res = self._insertReplicas(masterLfns, master=True, connection=connection, updateUsage=False)
             toPurge = []
             if not res["OK"]:
                 for lfn in masterLfns.keys():
@@ -328,6 +324,9 @@ class FileManagerBase:
                 failed.update(res["Value"]["Failed"])
                 for lfn, error in res["Value"]["Failed"].items():
                     toPurge.append(masterLfns[lfn]["FileID"])
+                for lfn in newlyRegistered:
+                    usageLfns[lfn] = {"DirID": masterLfns[lfn]["DirID"], "Size": masterLfns[lfn]["Size"]}
+                    usageLfns[lfn]["SE"] = [0, masterLfns[lfn]["SE"]]
             if toPurge:
                 self._deleteFiles(toPurge, connection=connection)
 
@@ -363,88 +362,182 @@ class FileManagerBase:
                     successful.update(newlyRegistered)
                     failed.update(res["Value"]["Failed"])
 
+        # Update the directory usage for all the new files and their master replicas at once
+        if usageLfns:
+            res = self._updateDirectoryUsage(self._getDirectoryUsageDeltas(usageLfns), "+", connection=connection)
+            if not res["OK"]:
+                gLogger.warn("Failed to update FC_DirectoryUsage", res["Message"])
+
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def _getDirectoryUsageDeltas(self, lfns):
+        """Fold the sizes of files into the changes of the usage of their directories
+
+        :param dict lfns: {lfn: dict with "DirID", "Size" and "SE" the list of SE names or IDs, 0 being
+                          the logical usage}
+
+        :returns: {dirID: {seID: {"Files": number of files, "Size": total size}}}
+        """
+        directorySESizeDict = {}
+        for lfn, fileDict in lfns.items():
+            dirDict = directorySESizeDict.setdefault(fileDict["DirID"], {})
+            for seName in fileDict["SE"]:
+                res = self.db.seManager.findSE(seName)
+                if not res["OK"]:
+                    gLogger.warn("Failed to get the SE usage of file", f"{lfn}: {res['Message']}")
+                    continue
+                seDict = dirDict.setdefault(res["Value"], {"Files": 0, "Size": 0})
+                seDict["Files"] += 1
+                seDict["Size"] += fileDict["Size"]
+        return directorySESizeDict
+
     def _updateDirectoryUsage(self, directorySEDict, change, connection=False):
+        """Apply changes of usage to directories and all their parents: the changes are first summed
+        per (directory, SE), then written with a single statement
+
+        :param dict directorySEDict: {dirID: {seID: {"Files": number of files, "Size": total size}}}
+        :param str change: "+" or "-"
+        """
         connection = self._getConnection(connection)
-        for directoryID in directorySEDict.keys():
+        usageDict = {}
+        for directoryID, dirDict in directorySEDict.items():
             result = self.db.dtree.getPathIDsByID(directoryID)
             if not result["OK"]:
                 return result
-            parentIDs = result["Value"]
-            dirDict = directorySEDict[directoryID]
-            for seID in dirDict.keys():
-                seDict = dirDict[seID]
-                files = seDict["Files"]
-                size = seDict["Size"]
-                insertTuples = []
-                for dirID in parentIDs:
-                    insertTuples.append("(%d,%d,%d,%d,UTC_TIMESTAMP())" % (dirID, seID, size, files))
-
-                req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) "
-                req += f"VALUES {','.join(insertTuples)}"
-                req += (
-                    " ON DUPLICATE KEY UPDATE SESize=SESize%s%d, SEFiles=SEFiles%s%d, LastUpdate=UTC_TIMESTAMP() "
-                    % (change, size, change, files)
-                )
-                res = self.db._update(req)
-                if not res["OK"]:
-                    gLogger.warn("Failed to update FC_DirectoryUsage", res["Message"])
+            for dirID in result["Value"]:
+                for seID, seDict in dirDict.items():
+                    usage = usageDict.setdefault((dirID, seID), [0, 0])
+                    usage[0] += seDict["Size"]
+                    usage[1] += seDict["Files"]
+        if not usageDict:
+            return S_OK()
+
+        insertTuples = [
+            "(%d,%d,%d,%d,UTC_TIMESTAMP())" % (dirID, seID, size, files)
+            for (dirID, seID), (size, files) in sorted(usageDict.items())
+        ]
+        req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) "
+        req += f"VALUES {','.join(insertTuples)}"
+        req += (
+            " ON DUPLICATE KEY UPDATE SESize=SESize%sVALUES(SESize), SEFiles=SEFiles%sVALUES(SEFiles),"
+            " LastUpdate=UTC_TIMESTAMP() " % (change, change)
+        )
+        res = self.db._update(req, conn=connection)
+        if not res["OK"]:
+            gLogger.warn("Failed to update FC_DirectoryUsage", res["Message"])
         return S_OK()
 
     def _populateFileAncestors(self, lfns, connection=False):
+        """Store the ancestors of files together with all the ancestors of their ancestors. FC_FileAncestors
+        is a closure table: it holds every (file, ancestor) pair with the depth of the shortest path between
+        them, so that the relatives of files at any depth are got with a single query. The descendants of
+        the files, if any, get the new ancestors as well
+
+        :param dict lfns: {lfn: dict with "FileID", "Ancestors" the list of ancestor LFNs, and optionally
+                          "AncestorDepth" the depth of these ancestors, 1 by default}
+        """
         connection = self._getConnection(connection)
         successful = {}
         failed = {}
+        fileAncestors = {}
         for lfn, lfnDict in lfns.items():
-            originalFileID = lfnDict["FileID"]
-            originalDepth = lfnDict.get("AncestorDepth", 1)
             ancestors = lfnDict.get("Ancestors", [])
             if isinstance(ancestors, str):
                 ancestors = [ancestors]
-            if lfn in ancestors:
-                ancestors.remove(lfn)
-            if not ancestors:
+            ancestors = [ancestor for ancestor in ancestors if ancestor != lfn]
+            if ancestors:
+                fileAncestors[lfn] = ancestors
+            else:
                 successful[lfn] = True
-                continue
-            res = self._findFiles(ancestors, connection=connection)
-            if res["Value"]["Failed"]:
+        if not fileAncestors:
+            return S_OK({"Successful": successful, "Failed": failed})
+
+        # The ancestors of all the files, and their own ancestors, are got at once
+        allAncestors = {ancestor for ancestors in fileAncestors.values() for ancestor in ancestors}
+        res = self._findFiles(list(allAncestors), connection=connection)
+        if not res["OK"]:
+            return res
+        ancestorIDs = {ancestor: fileDict["FileID"] for ancestor, fileDict in res["Value"]["Successful"].items()}
+        res = self._getFileAncestors(list(set(ancestorIDs.values())), connection=connection)
+        if not res["OK"]:
+            return res
+        ancestorAncestors = res["Value"]
+
+        fileClosures = {}
+        for lfn, ancestors in fileAncestors.items():
+            if any(ancestor not in ancestorIDs for ancestor in ancestors):
                 failed[lfn] = "Failed to resolve ancestor files"
                 continue
-            ancestorIDs = res["Value"]["Successful"]
-            fileIDLFNs = {}
+            fileID = lfns[lfn]["FileID"]
+            originalDepth = lfns[lfn].get("AncestorDepth", 1)
             toInsert = {}
-            for ancestor in ancestorIDs.keys():
-                fileIDLFNs[ancestorIDs[ancestor]["FileID"]] = ancestor
-                toInsert[ancestorIDs[ancestor]["FileID"]] = originalDepth
-            res = self._getFileAncestors(list(fileIDLFNs))
-            if not res["OK"]:
-                failed[lfn] = "Failed to obtain all ancestors"
-                continue
-            fileIDAncestorDict = res["Value"]
-            for fileIDDict in fileIDAncestorDict.values():
-                for ancestorID, relativeDepth in fileIDDict.items():
-                    toInsert[ancestorID] = relativeDepth + originalDepth
-            res = self._insertFileAncestors(originalFileID, toInsert, connection=connection)
-            if not res["OK"]:
-                if "Duplicate" in res["Message"]:
-                    failed[lfn] = "Failed to insert ancestor files: duplicate entry"
+            for ancestor in ancestors:
+                ancestorID = ancestorIDs[ancestor]
+                relatives = dict(ancestorAncestors.get(ancestorID, {}))
+                relatives[ancestorID] = 0
+                for relativeID, relativeDepth in relatives.items():
+                    if relativeID != fileID:
+                        depth = relativeDepth + originalDepth
+                        toInsert[relativeID] = min(depth, toInsert.get(relativeID, depth))
+            fileClosures[lfn] = toInsert
+
+        # All the files are inserted with a single statement, one by one only to tell which ones fail
+        res = self._insertFileAncestorTuples(
+            [
+                (lfns[lfn]["FileID"], ancestorID, depth)
+                for lfn, toInsert in fileClosures.items()
+                for ancestorID, depth in toInsert.items()
+            ],
+            connection=connection,
+        )
+        if res["OK"]:
+            successful.update(dict.fromkeys(fileClosures, True))
+        else:
+            for lfn, toInsert in fileClosures.items():
+                res = self._insertFileAncestors(lfns[lfn]["FileID"], toInsert, connection=connection)
+                if not res["OK"]:
+                    if "Duplicate" in res["Message"]:
+                        failed[lfn] = "Failed to insert ancestor files: duplicate entry"
+                    else:
+                        failed[lfn] = "Failed to insert ancestor files"
                 else:
-                    failed[lfn] = "Failed to insert ancestor files"
-            else:
-                successful[lfn] = True
+                    successful[lfn] = True
+
+        # Complete the closure of the descendants of the files
+        fileIDLFNs = {lfns[lfn]["FileID"]: lfn for lfn in fileClosures if lfn in successful}
+        res = self._getFileDescendents(list(fileIDLFNs), [], connection=connection) if fileIDLFNs else S_OK({})
+        if not res["OK"]:
+            return res
+        descendentTuples = []
+        for fileID, descendents in res["Value"].items():
+            for descendentID, descendentDepth in descendents.items():
+                for ancestorID, depth in fileClosures[fileIDLFNs[fileID]].items():
+                    if ancestorID != descendentID:
+                        descendentTuples.append((descendentID, ancestorID, depth + descendentDepth))
+        if descendentTuples:
+            res = self._insertFileAncestorTuples(descendentTuples, keepShortest=True, connection=connection)
+            if not res["OK"]:
+                return res
         return S_OK({"Successful": successful, "Failed": failed})
 
     def _insertFileAncestors(self, fileID, ancestorDict, connection=False):
+        return self._insertFileAncestorTuples(
+            [(fileID, ancestorID, depth) for ancestorID, depth in ancestorDict.items()], connection=connection
+        )
+
+    def _insertFileAncestorTuples(self, ancestorTuples, keepShortest=False, connection=False):
+        """Insert (FileID, AncestorID, AncestorDepth) tuples into FC_FileAncestors with a single statement
+
+        :param bool keepShortest: for the pairs already there, keep the shortest depth instead of failing
+        """
         connection = self._getConnection(connection)
-        ancestorTuples = []
-        for ancestorID, depth in ancestorDict.items():
-            ancestorTuples.append("(%d,%d,%d)" % (fileID, ancestorID, depth))
         if not ancestorTuples:
             return S_OK()
-        req = "INSERT INTO FC_FileAncestors (FileID, AncestorID, AncestorDepth) VALUES %s" % intListToString(
-            ancestorTuples
+        req = "INSERT INTO FC_FileAncestors (FileID, AncestorID, AncestorDepth) VALUES %s" % ",".join(
+            "(%d,%d,%d)" % ancestorTuple for ancestorTuple in ancestorTuples
         )
+        if keepShortest:
+            req += " ON DUPLICATE KEY UPDATE AncestorDepth=LEAST(AncestorDepth, VALUES(AncestorDepth))"
         return self.db._update(req, conn=connection)
 
     def _getFileAncestors(self, fileIDs, depths=[], connection=False):
@@ -534,24 +627,22 @@ class FileManagerBase:
         if not result["OK"]:
             return result
 
-        failed = {}
-        successful = {}
         relDict = result["Value"]
+        # The LFNs of the relatives of all the files are got at once
+        relativeIDs = {relativeID for relatives in relDict.values() for relativeID in relatives}
+        result = self._getFileLFNs(list(relativeIDs)) if relativeIDs else S_OK({"Successful": {}, "Failed": {}})
+        if not result["OK"]:
+            return result
+        relativeLFNs = result["Value"]["Successful"]
         for id_ in inputIDs:
-            if id_ in relDict:
-                result = self._getFileLFNs(list(relDict[id_]))
-                if not result["OK"]:
-                    failed[inputIDDict[id]] = f"Failed to find {relation}"
+            resDict = {}
+            for aID, depth in relDict.get(id_, {}).items():
+                if aID in relativeLFNs:
+                    resDict[relativeLFNs[aID]] = depth
                 else:
-                    if result["Value"]["Successful"]:
-                        resDict = {}
-                        for aID in result["Value"]["Successful"]:
-                            resDict[result["Value"]["Successful"][aID]] = relDict[id_][aID]
-                        successful[inputIDDict[id_]] = resDict
-                    for aID in result["Value"]["Failed"]:
-                        failed[inputIDDict[id_]] = "Failed to get the ancestor LFN"
-            else:
-                successful[inputIDDict[id_]] = {}
+                    failed[inputIDDict[id_]] = f"Failed to get the {relation} LFN"
+            if inputIDDict[id_] not in failed:
+                successful[inputIDDict[id_]] = resDict
 
         return S_OK({"Successful": successful, "Failed": failed})
 
@@ -614,7 +705,11 @@ class FileManagerBase:
         guidLFNs = {}
         failed = {}
         for lfn, fileDict in lfns.items():
-            guidLFNs[fileDict["GUID"]] = lfn
+            # Only the first of the files of the request with the same GUID can be registered
+            if fileDict["GUID"] in guidLFNs:
+                failed[lfn] = f"GUID already used by another file of the request {guidLFNs[fileDict['GUID']]}"
+            else:
+                guidLFNs[fileDict["GUID"]] = lfn
         res = self._getFileIDFromGUID(list(guidLFNs), connection=connection)
         if not res["OK"]:
             return dict.fromkeys(lfns, res["Message"])
@@ -1094,12 +1189,14 @@ class FileManagerBase:
         """
         return self._getDirectoryFileIDs(dirID, requestString=requestString)
 
-    def getFilesInDirectory(self, dirID, verbose=False, connection=False):
+    def getFilesInDirectory(self, dirID, verbose=False, connection=False, fileNames=None):
+        """Get the metadata, and the replicas if verbose, of the files of a directory,
+        or only of the given fileNames"""
         connection = self._getConnection(connection)
         files = {}
         res = self._getDirectoryFiles(
             dirID,
-            [],
+            fileNames or [],
             [
                 "FileID",
                 "Size",
@@ -1172,6 +1269,89 @@ class FileManagerBase:
 
         return S_OK(resultDict)
 
+    def _getDirectoryFileNamesPage(self, dirID, lastFileID, pageSize, connection=False):
+        """Get the next files of a directory in FileID order, whatever their status
+
+        :param int dirID: ID of the directory
+        :param int lastFileID: the files with a FileID up to this one are skipped
+        :param int pageSize: maximum number of files
+
+        :returns: S_OK(list of (FileID, FileName))
+        """
+        connection = self._getConnection(connection)
+        req = "SELECT FileID,FileName FROM FC_Files WHERE DirID=%d AND FileID>%d ORDER BY FileID LIMIT %d" % (
+            dirID,
+            lastFileID,
+            pageSize,
+        )
+        result = self.db._query(req, conn=connection)
+        if not result["OK"]:
+            return result
+        return S_OK(list(result["Value"]))
+
+    def getFilesInDirectoryPage(self, dirID, lastFileID, pageSize, verbose=False, connection=False):
+        """Get a page of the files of a directory, as getFilesInDirectory, the files being in FileID order.
+        Pages can be shorter than pageSize when some files are not visible
+
+        :param int dirID: ID of the directory
+        :param int lastFileID: FileID of the last file of the previous page, 0 for the first page
+        :param int pageSize: maximum number of files in the page
+        :param bool verbose: if True, get also the replicas of the files
+
+        :returns: S_OK((files, lastFileID)), lastFileID being None if it is the last page
+        """
+        connection = self._getConnection(connection)
+        result = self._getDirectoryFileNamesPage(dirID, lastFileID, pageSize, connection=connection)
+        if not result["OK"]:
+            return result
+        page = result["Value"]
+        if not page:
+            return S_OK(({}, None))
+        nextFileID = page[-1][0] if len(page) == pageSize else None
+        result = self.getFilesInDirectory(
+            dirID, verbose=verbose, connection=connection, fileNames=[fileName for _fileID, fileName in page]
+        )
+        if not result["OK"]:
+            return result
+        return S_OK((result["Value"], nextFileID))
+
+    def getDirectoryReplicasPage(self, dirID, lastFileID, pageSize, allStatus=False, connection=False):
+        """Get the replicas of a page of the files of a directory, the files being in FileID order.
+        Pages can be shorter than pageSize when some files are not visible or have no replica
+
+        :param int dirID: ID of the directory
+        :param int lastFileID: FileID of the last file of the previous page, 0 for the first page
+        :param int pageSize: maximum number of files in the page
+        :param bool allStatus: whether all replicas and file status are considered
+
+        :returns: S_OK(({fileName: {SE: PFN}}, lastFileID)), lastFileID being None if it is the last page
+        """
+        connection = self._getConnection(connection)
+        result = self._getDirectoryFileNamesPage(dirID, lastFileID, pageSize, connection=connection)
+        if not result["OK"]:
+            return result
+        page = result["Value"]
+        if not page:
+            return S_OK(({}, None))
+        nextFileID = page[-1][0] if len(page) == pageSize else None
+        result = self._getDirectoryFiles(
+            dirID, [fileName for _fileID, fileName in page], ["FileID"], allStatus=allStatus, connection=connection
+        )
+        if not result["OK"]:
+            return result
+        fileIDNames = {fileDict["FileID"]: fileName for fileName, fileDict in result["Value"].items()}
+        if not fileIDNames:
+            return S_OK(({}, nextFileID))
+        result = self._getFileReplicas(list(fileIDNames), ["PFN"], allStatus=allStatus, connection=connection)
+        if not result["OK"]:
+            return result
+        replicas = {
+            fileIDNames[fileID]: {se: replicaDict.get("PFN", "") for se, replicaDict in seDict.items()}
+            for fileID, seDict in result["Value"].items()
+            if seDict
+        }
+        return S_OK((replicas, nextFileID))
+
     def _getFileDirectories(self, lfns):
         """For a list of lfn, returns a dictionary with key the directory, and value
         the files in that directory. It does not make any query, just splits the names
@@ -1187,6 +1367,34 @@ class FileManagerBase:
             dirDict[lfnDir].append(lfnFile)
         return dirDict
 
+    def _getDirectoryFilesConditions(self, dirFiles):
+        """Build the SQL conditions selecting files of several directories in FC_Files,
+        so that they are looked up with a few queries instead of one per directory
+
+        :param dict dirFiles: { dirID : list of file names }. An empty list selects all the files of the directory
+        :return: generator of conditions on DirID and FileName, each selecting at most findFilesBatchSize
+                 of the given files (a whole directory counts as one file)
+        """
+        conditions = []
+        nFiles = 0
+        for dirID, fileNames in dirFiles.items():
+            if fileNames:
+                chunks = [
+                    ("(DirID=%d AND FileName IN (%s))" % (dirID, stringListToString(chunk)), len(chunk))
+                    for chunk in breakListIntoChunks(fileNames, self.findFilesBatchSize)
+                ]
+            else:
+                chunks = [("DirID=%d" % dirID, 1)]
+            for condition, nChunkFiles in chunks:
+                if conditions and nFiles + nChunkFiles > self.findFilesBatchSize:
+                    yield " OR ".join(conditions)
+                    conditions = []
+                    nFiles = 0
+                conditions.append(condition)
+                nFiles += nChunkFiles
+        if conditions:
+            yield " OR ".join(conditions)
+
     def _checkInfo(self, info, requiredKeys):
         if not info:
             return S_ERROR("Missing parameters")
@@ -1340,3 +1548,15 @@ class FileManagerBase:
         :returns: S_OK with list of tuples (SEName, lfn, checksum, size)
         """
         return S_ERROR("To be implemented on derived class")
+
+    def getSEDumpChunks(self, seNames, offset=0):
+        """
+         Return all the files at the given SEs, together with checksum and size, by chunks read
+         progressively from the DB
+
+        :param seNames: list of StorageElement names
+        :param int offset: number of replicas to skip, to resume an interrupted dump
+
+        :returns: S_OK with a generator of lists of tuples (SEName, lfn, checksum, size)
+        """
+        return S_ERROR("To be implemented on derived class")
@@ -66,7 +66,7 @@ class FileManagerFlat(FileManagerBase):
     # _addFiles related methods
     #
 
-    def _insertFiles(self, lfns, uid, gid, connection=False):
+    def _insertFiles(self, lfns, uid, gid, connection=False, updateUsage=True):
         connection = self._getConnection(connection)
         # Add the files
         failed = {}
@@ -158,7 +158,7 @@ class FileManagerFlat(FileManagerBase):
     # _addReplicas related methods
     #
 
-    def _insertReplicas(self, lfns, master=False, connection=False):
+    def _insertReplicas(self, lfns, master=False, connection=False, updateUsage=True):
         connection = self._getConnection(connection)
         res = self._getStatusInt("AprioriGood", connection=connection)
         statusID = 0
@@ -214,7 +214,8 @@ class FileManagerFlat(FileManagerBase):
                     failed[lfn] = res["Message"]
             else:
                 # Update the directory usage
-                self._updateDirectoryUsage(directorySESizeDict, "+", connection=connection)
+                if updateUsage:
+                    self._updateDirectoryUsage(directorySESizeDict, "+", connection=connection)
                 for lfn in insertTuples.keys():
                     successful[lfn] = True
         return S_OK({"Successful": successful, "Failed": failed})
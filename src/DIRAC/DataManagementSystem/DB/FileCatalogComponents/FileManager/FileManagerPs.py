@@ -3,9 +3,10 @@
 import os
 import datetime
 
-from DIRAC import S_OK, S_ERROR
+from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManagerBase import FileManagerBase
 from DIRAC.Core.Utilities.List import stringListToString, intListToString, breakListIntoChunks
+from DIRAC.Core.Utilities.ReturnValues import returnValueOrRaise
 
 # The logic of some methods is basically a copy/paste from the FileManager class,
 # so I could have inherited from it. However, I did not want to depend on it
@@ -14,6 +15,8 @@ from DIRAC.Core.Utilities.List import stringListToString, intListToString, break
 class FileManagerPs(FileManagerBase):
     def __init__(self, database=None):
         super().__init__(database)
+        # Set to False if the DB does not have the ps_get_all_info_for_files_in_dirs procedure yet
+        self._hasFilesInDirsProcedure = True
 
     ######################################################
     #
@@ -39,17 +42,22 @@ class FileManagerPs(FileManagerBase):
 
         directoryIDs = result["Value"]
 
+        # The files of all the directories are looked up together
+        dirFiles = {}
+        for dirPath, dirID in directoryIDs.items():
+            dirFiles.setdefault(dirID, []).extend(dirDict[dirPath])
+        res = self._getFilesInDirectories(dirFiles, metadata, allStatus=allStatus, connection=connection)
+        if not res["OK"]:
+            return res
+        dirFilesDicts = res["Value"]
+
         failed = {}
         successful = {}
-        for dirPath in directoryIDs:
-            fileNames = dirDict[dirPath]
-            res = self._getDirectoryFiles(
-                directoryIDs[dirPath], fileNames, metadata, allStatus=allStatus, connection=connection
-            )
-
-            for fileName, fileDict in res.get("Value", {}).items():
-                fname = os.path.join(dirPath, fileName)
-                successful[fname] = fileDict
+        for dirPath, dirID in directoryIDs.items():
+            filesDict = dirFilesDicts.get(dirID, {})
+            for fileName in dirDict[dirPath]:
+                if fileName in filesDict:
+                    successful[os.path.join(dirPath, fileName)] = filesDict[fileName]
 
         # The lfns that are not in successful nor failed don't exist
         for failedLfn in set(lfns) - set(successful):
@@ -124,6 +132,21 @@ class FileManagerPs(FileManagerBase):
 
         :returns: S_OK(files), where files is a dictionary indexed on filename, and values are dictionary of metadata
         """
+        result = self._getFilesInDirectories({dirID: fileNames}, metadata_input, allStatus, connection)
+        if not result["OK"]:
+            return result
+        return S_OK(result["Value"].get(dirID, {}))
+
+    def _getFilesInDirectories(self, dirFiles, metadata_input, allStatus=False, connection=False):
+        """For several directories, and eventually given files, returns all the desired metadata.
+        The files are looked up by batches of findFilesBatchSize, not directory by directory
+
+        :param dict dirFiles: { dirID : list of filenames, or [] for all the files of the directory }
+        :param metadata_input: list of desired metadata, as for _getDirectoryFiles
+        :param bool allStatus: if False, only displays the files whose status is in db.visibleFileStatus
+
+        :returns: S_OK({ dirID : files }), files being as returned by _getDirectoryFiles
+        """
 
         connection = self._getConnection(connection)
 
@@ -135,18 +158,9 @@ class FileManagerPs(FileManagerBase):
         if "FileID" not in metadata:
             metadata.append("FileID")
 
-        # Format the filenames and status to be used in a IN clause in the sotred procedure
-        formatedFileNames = stringListToString(fileNames)
+        # Format the status to be used in a IN clause in the stored procedure
         fStatus = stringListToString(self.db.visibleFileStatus)
 
-        specificFiles = True if len(fileNames) else False
-        result = self.db.executeStoredProcedureWithCursor(
-            "ps_get_all_info_for_files_in_dir", (dirID, specificFiles, formatedFileNames, allStatus, fStatus)
-        )
-
-        if not result["OK"]:
-            return result
-
         fieldNames = [
             "FileName",
             "DirID",
@@ -166,16 +180,60 @@ class FileManagerPs(FileManagerBase):
             "Mode",
         ]
 
-        rows = result["Value"]
-        files = {}
+        result = self.__getFilesInfoRows(dirFiles, allStatus, fStatus)
+        if not result["OK"]:
+            return result
 
-        for row in rows:
+        dirFilesDicts = {}
+        for row in result["Value"]:
             rowDict = dict(zip(fieldNames, row))
-            fileName = rowDict["FileName"]
             # Returns only the required metadata
-            files[fileName] = {key: rowDict.get(key, "Unknown metadata field") for key in metadata}
+            dirFilesDicts.setdefault(rowDict["DirID"], {})[rowDict["FileName"]] = {
+                key: rowDict.get(key, "Unknown metadata field") for key in metadata
+            }
+
+        return S_OK(dirFilesDicts)
+
+    def __getFilesInfoRows(self, dirFiles, allStatus, fStatus):
+        """Get the rows of ps_get_all_info_for_files_in_dirs for the files of several directories.
+        On a DB that does not have this procedure yet, the directories are looked up one by one
+        with ps_get_all_info_for_files_in_dir
+
+        :param dict dirFiles: { dirID : list of filenames, or [] for all the files of the directory }
+        :param bool allStatus: if False, only the files whose status is in fStatus
+        :param str fStatus: visible statuses, formatted for an IN clause
+
+        :returns: S_OK(list of rows)
+        """
+        if self._hasFilesInDirsProcedure:
+            rows = []
+            for filesCondition in self._getDirectoryFilesConditions(dirFiles):
+                result = self.db.executeStoredProcedureWithCursor(
+                    "ps_get_all_info_for_files_in_dirs", (filesCondition, allStatus, fStatus)
+                )
+                if not result["OK"]:
+                    if "ps_get_all_info_for_files_in_dirs does not exist" not in result["Message"]:
+                        return result
+                    gLogger.warn(
+                        "ps_get_all_info_for_files_in_dirs is missing, the DB schema should be updated",
+                        "looking up the files directory by directory",
+                    )
+                    self._hasFilesInDirsProcedure = False
+                    break
+                rows.extend(result["Value"])
+            else:
+                return S_OK(rows)
 
-        return S_OK(files)
+        rows = []
+        for dirID, fileNames in dirFiles.items():
+            result = self.db.executeStoredProcedureWithCursor(
+                "ps_get_all_info_for_files_in_dir",
+                (dirID, bool(fileNames), stringListToString(fileNames), allStatus, fStatus),
+            )
+            if not result["OK"]:
+                return result
+            rows.extend(result["Value"])
+        return S_OK(rows)
 
     def _getFileMetadataByID(self, fileIDs, connection=False):
         """Get standard file metadata for a list of files specified by FileID
@@ -240,7 +298,7 @@ class FileManagerPs(FileManagerBase):
         for i in range(0, len(l), n):
             yield l[i : i + n]
 
-    def _insertFiles(self, lfns, uid, gid, connection=False):
+    def _insertFiles(self, lfns, uid, gid, connection=False, updateUsage=True):
         """Insert new files. lfns is a dictionary indexed on lfn, the values are
         mandatory: DirID, Size, Checksum, GUID
         optional : Owner (dict with username and group), ChecksumType (Adler32 by default), Mode (db.umask by default)
@@ -472,7 +530,7 @@ class FileManagerPs(FileManagerBase):
 
         return result
 
-    def _insertReplicas(self, lfns, master=False, connection=False):
+    def _insertReplicas(self, lfns, master=False, connection=False, updateUsage=True):
         """Insert new replicas. lfns is a dictionary with one entry for each file. The keys are lfns, and values are dict
         with mandatory attributes : FileID, SE (the name), PFN
 
@@ -931,3 +989,45 @@ class FileManagerPs(FileManagerBase):
         formatedSEIds = intListToString(seIDs)
 
         return self.db.executeStoredProcedureWithCursor("ps_get_se_dump", (formatedSEIds,))
+
+    def getSEDumpChunks(self, seNames, offset=0):
+        """
+         Return all the files at the given SEs, together with checksum and size, by chunks read
+         progressively from the DB. The SEs are dumped one after the other, each in a stable order.
+
+        :param seNames: list of StorageElement names
+        :param int offset: number of replicas to skip, to resume an interrupted dump
+
+        :returns: S_OK with a generator of lists of tuples (SEName, lfn, checksum, size)
+        """
+
+        seIDs = []
+
+        for seName in seNames:
+            res = self.db.seManager.findSE(seName)
+            if not res["OK"]:
+                return res
+            seIDs.append(res["Value"])
+
+        # Skip the SEs that were already entirely dumped
+        seOffsets = []
+        for seID in seIDs:
+            if offset:
+                res = self.db.executeStoredProcedure("ps_count_se_replicas", (seID, "ret1"), outputIds=[1])
+                if not res["OK"]:
+                    return res
+                nbReplicas = res["Value"][0]
+                if nbReplicas <= offset:
+                    offset -= nbReplicas
+                    continue
+            seOffsets.append((seID, offset))
+            offset = 0
+
+        return S_OK(self.__getSEDumpChunks(seOffsets))
+
+    def __getSEDumpChunks(self, seOffsets):
+        """Generator of the chunks of the SE dumps, the query of an SE is only run once the previous one is read"""
+        for seID, offset in seOffsets:
+            yield from returnValueOrRaise(
+                self.db.executeStoredProcedureWithStreamingCursor("ps_get_se_dump_from_offset", (seID, offset))
+            )
@@ -3,7 +3,10 @@
 import os
 
 from DIRAC import S_OK
-from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.SecurityManagerBase import SecurityManagerBase
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.SecurityManagerBase import (
+    SecurityManagerBase,
+    _getDirectoryPermissions,
+)
 
 
 class FullSecurityManager(SecurityManagerBase):
@@ -20,37 +23,19 @@ class FullSecurityManager(SecurityManagerBase):
             for resolvedPath in toGet[path]:
                 permissions[resolvedPath] = mode
             toGet.pop(path)
-        # Copying items because toGet is changed in the cycle
-        for path, resolvedPaths in list(toGet.items()):
-            if path == "/":
-                for resolvedPath in resolvedPaths:
-                    permissions[path] = {"Read": True, "Write": True, "Execute": True}
-            if os.path.dirname(path) not in toGet:
-                toGet[os.path.dirname(path)] = []
-            toGet[os.path.dirname(path)] += resolvedPaths
-            toGet.pop(path)
-        while toGet:
-            res = self.db.dtree.getPathPermissions(list(toGet), credDict)
-            if not res["OK"]:
-                return res
-            for path, mode in res["Value"]["Successful"].items():
-                for resolvedPath in toGet[path]:
-                    permissions[resolvedPath] = mode
-                toGet.pop(path)
-            for path, error in res["Value"]["Failed"].items():
-                if error != "No such file or directory":
-                    for resolvedPath in toGet[path]:
-                        failed[resolvedPath] = error
-                    toGet.pop(path)
-            # Copying items because toGet is changed in the cycle
-            for path, resolvedPaths in list(toGet.items()):
-                if path == "/":
-                    for resolvedPath in resolvedPaths:
-                        permissions[path] = {"Read": True, "Write": True, "Execute": True}
-                if os.path.dirname(path) not in toGet:
-                    toGet[os.path.dirname(path)] = []
-                toGet[os.path.dirname(path)] += resolvedPaths
-                toGet.pop(path)
+        # The other paths get the permissions of their nearest existing parent directory
+        parentDirs = {}
+        for path in toGet:
+            parentDirs.setdefault(os.path.dirname(path), []).append(path)
+        res = _getDirectoryPermissions(self.db, list(parentDirs), credDict)
+        if not res["OK"]:
+            return res
+        for parentDir, mode in res["Value"]["Successful"].items():
+            for path in parentDirs[parentDir]:
+                permissions[path] = mode
+        for parentDir, error in res["Value"]["Failed"].items():
+            for path in parentDirs[parentDir]:
+                failed[path] = error
 
         if self.db.globalReadAccess:
             for path in permissions:
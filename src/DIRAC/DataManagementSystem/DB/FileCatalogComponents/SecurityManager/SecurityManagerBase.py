@@ -1,5 +1,8 @@
 """ DIRAC FileCatalog Security Manager base class
 """
+import os
+import stat
+
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Security.Properties import FC_MANAGEMENT
 
@@ -40,6 +43,73 @@ _writeMethods = [
 ]
 
 
+def _getModePermissions(isOwner, isGroup, mode):
+    """Get the POSIX permissions given by a mode to the owner, the members of the group or the others"""
+    permissions = {}
+    for permission, userBit, groupBit, otherBit in [
+        ("Read", stat.S_IRUSR, stat.S_IRGRP, stat.S_IROTH),
+        ("Write", stat.S_IWUSR, stat.S_IWGRP, stat.S_IWOTH),
+        ("Execute", stat.S_IXUSR, stat.S_IXGRP, stat.S_IXOTH),
+    ]:
+        permissions[permission] = bool((isOwner and mode & userBit) or (isGroup and mode & groupBit) or mode & otherBit)
+    return permissions
+
+
+def _getDirectoryPermissions(db, paths, credDict, recursive=True, isOwnerGroup=None):
+    """Get the permissions of a user on directories in bulk: the parameters of all the distinct
+    directories are got at once, and the decision is taken once per directory
+
+    :param db: FileCatalogDB
+    :param paths: directory paths
+    :param dict credDict: credential of the user
+    :param bool recursive: for the directories that do not exist, use the nearest existing parent
+    :param isOwnerGroup: function telling whether the group of the user acts as the owner group
+                         of a directory, by default if they are the same
+
+    :returns: S_OK with Successful {path: {"Read": bool, "Write": bool, "Execute": bool}} and Failed {path: error},
+              the directories not found being in Failed if not recursive
+    """
+    successful = {}
+    failed = {}
+    dirPaths = []
+    for path in paths:
+        if path.startswith("/"):
+            dirPaths.append(path)
+        else:
+            failed[path] = "Illegal Path"
+    result = db.dtree.getDirectoryParametersBulk(dirPaths, recursive=recursive)
+    if not result["OK"]:
+        return result
+
+    userName = credDict.get("username", "anon")
+    group = credDict.get("group", "anon")
+    decisions = {}
+    for path, parameters in result["Value"]["Successful"].items():
+        dirID = parameters["DirID"]
+        if dirID not in decisions:
+            isOwner = userName == parameters["Owner"]
+            if isOwnerGroup:
+                isGroup = isOwnerGroup(group, parameters["OwnerGroup"])
+            else:
+                isGroup = group == parameters["OwnerGroup"]
+            decisions[dirID] = _getModePermissions(isOwner, isGroup, parameters["Mode"])
+            if db.globalReadAccess:
+                decisions[dirID]["Read"] = True
+        successful[path] = dict(decisions[dirID])
+
+    for path, error in result["Value"]["Failed"].items():
+        # If not even / exists, we are starting from scratch, as long as the parents of the path end up with /
+        topDir = os.path.normpath(path)
+        while recursive and os.path.dirname(topDir) != topDir:
+            topDir = os.path.dirname(topDir)
+        if topDir == "/":
+            successful[path] = {"Read": True, "Write": True, "Execute": True}
+        else:
+            failed[path] = error
+
+    return S_OK({"Successful": successful, "Failed": failed})
+
+
 class SecurityManagerBase:
     def __init__(self, database=None):
         self.db = database
@@ -7,6 +7,7 @@ from DIRAC import S_OK, S_ERROR
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getAllGroups, getGroupOption
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.SecurityManagerBase import (
     SecurityManagerBase,
+    _getDirectoryPermissions,
     _readMethods,
     _writeMethods,
 )
@@ -76,6 +77,12 @@ class VOMSSecurityManager(SecurityManagerBase):
         # The voms group cannot be None
         return vomsGrp and vomsOtherGrp and (vomsGrp == vomsOtherGrp)
 
+    def __isOwnerGroup(self, grpName, ownerGrpName):
+        """Returns True if the DIRAC group acts as the owner group: if it is the owner group,
+        or shares its VOMS role
+        """
+        return grpName == ownerGrpName or bool(self.__shareVomsRole(grpName, ownerGrpName))
+
     def __isNotExistError(self, errorMsg):
         """Returns true if the errorMsg means that the file/directory does not exist"""
 
@@ -149,12 +156,35 @@ class VOMSSecurityManager(SecurityManagerBase):
         successful = {}
         failed = {}
 
-        for filename in paths:
-            res = self.__getFilePermission(filename, credDict, noExistStrategy=noExistStrategy)
-            if not res["OK"]:
-                failed[filename] = res["Message"]
+        # The metadata of all the files are got at once, and the files are then grouped by the
+        # credential with which their permissions are checked, that is with their owner group
+        # if it shares the VOMS role of the user
+        res = self.db.fileManager.getFileMetadata(list(paths))
+        if not res["OK"]:
+            return res
+
+        for filename, error in res["Value"]["Failed"].items():
+            if noExistStrategy is None or not self.__isNotExistError(error):
+                failed[filename] = error
             else:
-                successful[filename] = res["Value"].get(permission, False)
+                successful[filename] = noExistStrategy
+
+        group = credDict.get("group", "anon")
+        filesPerGroup = {}
+        for filename, metadata in res["Value"]["Successful"].items():
+            origGrp = metadata.get("OwnerGroup", "unknown")
+            filesPerGroup.setdefault(origGrp if self.__shareVomsRole(group, origGrp) else group, []).append(filename)
+
+        for checkedGroup, filenames in filesPerGroup.items():
+            checkedCredDict = credDict
+            if checkedGroup != group:
+                checkedCredDict = {"username": credDict.get("username", "anon"), "group": checkedGroup}
+            res = self.db.fileManager.getPathPermissions(filenames, checkedCredDict)
+            if not res["OK"]:
+                return res
+            failed.update(res["Value"]["Failed"])
+            for filename, permissions in res["Value"]["Successful"].items():
+                successful[filename] = permissions.get(permission, False)
 
         return S_OK({"Successful": successful, "Failed": failed})
 
@@ -237,12 +267,19 @@ class VOMSSecurityManager(SecurityManagerBase):
         successful = {}
         failed = {}
 
-        for dirName in paths:
-            res = self.__getDirectoryPermission(dirName, credDict, recursive=recursive, noExistStrategy=noExistStrategy)
-            if not res["OK"]:
-                failed[dirName] = res["Message"]
+        res = _getDirectoryPermissions(
+            self.db, list(paths), credDict, recursive=recursive, isOwnerGroup=self.__isOwnerGroup
+        )
+        if not res["OK"]:
+            return res
+
+        for dirName, permissions in res["Value"]["Successful"].items():
+            successful[dirName] = permissions.get(permission, False)
+        for dirName, error in res["Value"]["Failed"].items():
+            if noExistStrategy is None or not self.__isNotExistError(error):
+                failed[dirName] = error
             else:
-                successful[dirName] = res["Value"].get(permission, False)
+                successful[dirName] = noExistStrategy
 
         return S_OK({"Successful": successful, "Failed": failed})
 
@@ -2,6 +2,7 @@
 """
 # pylint: disable=protected-access,missing-docstring,invalid-name,too-many-lines,no-value-for-parameter
 
+import os
 import unittest
 import stat
 
@@ -99,7 +100,7 @@ class mock_DirectoryManager:
     """
 
     def __init__(self):
-        pass
+        self.bulkCalls = 0
 
     def exists(self, lfns):
         return S_OK({"Successful": {lfn: lfn in directoryTree for lfn in lfns}, "Failed": {}})
@@ -107,6 +108,26 @@ class mock_DirectoryManager:
     def getDirectoryParameters(self, path):
         return S_OK(directoryTree[path]) if path in directoryTree else S_ERROR("Directory not found")
 
+    def getDirectoryParametersBulk(self, paths, recursive=False):
+        self.bulkCalls += 1
+        successful = {}
+        failed = {}
+        for path in paths:
+            dirPath = path
+            while recursive and dirPath not in directoryTree and os.path.dirname(dirPath) != dirPath:
+                dirPath = os.path.dirname(dirPath)
+            if dirPath in directoryTree:
+                node = directoryTree[dirPath]
+                successful[path] = {
+                    "DirID": dirPath,
+                    "Owner": node["owner"],
+                    "OwnerGroup": node["OwnerGroup"],
+                    "Mode": node["mode"],
+                }
+            else:
+                failed[path] = "Directory not found"
+        return S_OK({"Successful": successful, "Failed": failed})
+
     def getDirectoryPermissions(self, path, credDict):
         if path not in directoryTree:
             return S_ERROR("Directory not found")
@@ -1591,6 +1612,48 @@ class TestUserGrpUsr1User(BaseCaseMixin, unittest.TestCase):
         super().test_addReplica()
 
 
+class TestBulkChecks(unittest.TestCase):
+    """The permissions of many paths are checked at once, with the same result as one by one"""
+
+    @mock.patch(
+        "DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.VOMSSecurityManager.getGroupOption",
+        side_effect=mock_getGroupOption,
+    )
+    @mock.patch(
+        "DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.VOMSSecurityManager.getAllGroups",
+        side_effect=mock_getAllGroups,
+    )
+    def setUp(self, _a, _b):
+        setupTree()
+        self.securityManager = (
+            DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.VOMSSecurityManager.VOMSSecurityManager()
+        )
+        self.credDict = {"username": "mc1", "group": "grp_data"}
+
+    def test_addFile(self):
+        dirs = list(directoryTree) + nonExistingDirectories
+        lfns = [os.path.join(dirs[i % len(dirs)], f"file{i}.txt") for i in range(1000)]
+
+        dtree = self.securityManager.db.dtree
+        res = self.securityManager.hasAccess("addFile", lfns, self.credDict)
+        self.assertTrue(res["OK"], res)
+        self.assertEqual(dtree.bulkCalls, 1)
+
+        for lfn in lfns[: len(dirs)]:
+            single = self.securityManager.hasAccess("addFile", [lfn], self.credDict)
+            self.assertEqual(single["Value"]["Successful"][lfn], res["Value"]["Successful"][lfn], lfn)
+        # Some of the files can be added, others not
+        self.assertEqual(set(res["Value"]["Successful"].values()), {True, False})
+
+    def test_addReplica(self):
+        lfns = list(fileTree) + nonExistingFiles
+        res = self.securityManager.hasAccess("addReplica", lfns, self.credDict)
+        self.assertTrue(res["OK"], res)
+        for lfn in lfns:
+            single = self.securityManager.hasAccess("addReplica", [lfn], self.credDict)
+            self.assertEqual(single["Value"]["Successful"][lfn], res["Value"]["Successful"][lfn], lfn)
+
+
 if __name__ == "__main__":
     suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestNonExistingUser)
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestAdminGrpAnonUser))
@@ -1598,5 +1661,6 @@ if __name__ == "__main__":
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestDataGrpDmUser))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestDataGrpUsr1User))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestUserGrpUsr1User))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestBulkChecks))
 
     unittest.TextTestRunner(verbosity=2).run(suite)
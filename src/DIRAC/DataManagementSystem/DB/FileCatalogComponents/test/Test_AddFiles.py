@@ -0,0 +1,168 @@
+""" Test the registration of files in bulk, with the DirectoryLevelTree and the FileManager on a SQLite version
+of their tables: the missing directories are created once, and the usage is updated with one statement.
+The ancestors of the files are kept as a closure table, queried at any depth with a constant number of queries
+"""
+# pylint: disable=protected-access
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManager import FileManager
+
+credDict = {"username": "user1", "group": "group1"}
+seNames = ["SE1", "SE2", "SE3"]
+
+
+class FakeTree(DirectoryLevelTree):
+    """The DirectoryLevelTree, with the directories made without the MySQL session variables"""
+
+    def makeDir(self, path):
+        result = self.findDir(path)
+        if result["Value"]:
+            result["NewDirectory"] = False
+            return result
+        dirID = self.db.addDirectory(path)
+        self.db.madeDirs.append(path)
+        result = S_OK(dirID)
+        result["NewDirectory"] = True
+        return result
+
+
+@pytest.fixture
+def db(sqliteDB):
+    db = sqliteDB(
+        "FC_DirectoryLevelTree",
+        "FC_DirectoryInfo",
+        "FC_Statuses",
+        "FC_Files",
+        "FC_FileInfo",
+        "FC_Replicas",
+        "FC_ReplicaInfo",
+        "FC_DirectoryUsage",
+        "FC_FileAncestors",
+    )
+    db.conn.execute("CREATE UNIQUE INDEX FileName ON FC_Files (DirID, FileName)")
+    db.madeDirs = []
+    db.dtree = FakeTree(db)
+    db.fileManager = FileManager(db)
+    return db
+
+
+def _getLfns(nFiles, prefix="/vo/data"):
+    """Files spread over a few directories, with one to three replicas"""
+    lfns = {}
+    for i in range(nFiles):
+        lfns[f"{prefix}/run{i % 4}/sub{i % 3}/file{i}"] = {
+            "PFN": f"pfn{i}",
+            "SE": seNames[: i % 3 + 1],
+            "Size": i,
+            "Checksum": "abcdef",
+            "GUID": f"GUID-{prefix}-{i}",
+        }
+    return lfns
+
+
+def _usageUpdates(db):
+    return [req for req in db.updates if "FC_DirectoryUsage" in req]
+
+
+def test_addFile(db):
+    lfns = _getLfns(200)
+    result = db.fileManager.addFile(lfns, credDict)
+    assert result["OK"], result["Message"]
+    assert sorted(result["Value"]["Successful"]) == sorted(lfns)
+    assert not result["Value"]["Failed"]
+
+    # Each directory is created once, the parents first
+    assert db.madeDirs[:3] == ["/", "/vo", "/vo/data"]
+    assert len(db.madeDirs) == len(set(db.madeDirs)) == 3 + 4 + 12
+    # The usage of the files and of their master replicas, then of the other replicas
+    assert len(_usageUpdates(db)) == 2
+    assert db.getUsage() == db.computeUsage()
+
+    # Registering the same files again does nothing
+    db.updates = []
+    db.madeDirs = []
+    result = db.fileManager.addFile(_getLfns(200), credDict)
+    assert result["OK"], result["Message"]
+    assert sorted(result["Value"]["Successful"]) == sorted(lfns)
+    assert not db.madeDirs
+    assert not _usageUpdates(db)
+
+    # New files in the existing directories
+    result = db.fileManager.addFile(_getLfns(50, prefix="/vo/data/run1"), credDict)
+    assert result["OK"], result["Message"]
+    assert len(result["Value"]["Successful"]) == 50
+    assert db.getUsage() == db.computeUsage()
+
+
+def test_uniqueGUID(db):
+    lfns = _getLfns(10)
+    lfns["/vo/data/copy"] = dict(lfns["/vo/data/run0/sub0/file0"])
+    result = db.fileManager.addFile(lfns, credDict)
+    assert result["OK"], result["Message"]
+    assert list(result["Value"]["Failed"]) == ["/vo/data/copy"]
+
+    lfns = {"/vo/other": dict(_getLfns(1)["/vo/data/run0/sub0/file0"])}
+    result = db.fileManager.addFile(lfns, credDict)
+    assert result["OK"], result["Message"]
+    assert "GUID already registered" in result["Value"]["Failed"]["/vo/other"]
+    assert db.getUsage() == db.computeUsage()
+
+
+def test_makeDirectoriesBulk(db):
+    paths = ["/vo/a/b", "/vo/a", "/vo/a/b/", "/vo/c", "relative"]
+    result = db.dtree.makeDirectoriesBulk(paths, credDict)
+    assert result["OK"], result["Message"]
+    assert list(result["Value"]["Failed"]) == ["relative"]
+    dirIDs = result["Value"]["Successful"]
+    assert dirIDs["/vo/a/b"] == dirIDs["/vo/a/b/"] == db.dtree.findDir("/vo/a/b")["Value"]
+    assert db.madeDirs == ["/", "/vo", "/vo/a", "/vo/a/b", "/vo/c"]
+
+
+def test_fileAncestors(db):
+    """A lineage RAW -> RECO -> DST -> USER, the USER having the RECO as direct ancestor as well"""
+    fileDict = _getLfns(1)["/vo/data/run0/sub0/file0"]
+    lfns = {f"/vo/{name}": dict(fileDict, GUID=name) for name in ["raw1", "raw2", "raw3"]}
+    assert not db.fileManager.addFile(lfns, credDict)["Value"]["Failed"]
+    lfns = {
+        "/vo/reco": dict(fileDict, GUID="reco", Ancestors=["/vo/raw1", "/vo/raw2"]),
+        "/vo/dst": dict(fileDict, GUID="dst", Ancestors="/vo/reco"),
+        "/vo/user": dict(fileDict, GUID="user"),
+        "/vo/bad": dict(fileDict, GUID="bad", Ancestors="/vo/missing"),
+    }
+    result = db.fileManager.addFile(lfns, credDict)
+    assert result["OK"], result["Message"]
+    assert list(result["Value"]["Failed"]) == ["/vo/bad"]
+    assert "/vo/bad" not in result["Value"]["Successful"]
+    result = db.fileManager.addFileAncestors({"/vo/user": {"Ancestors": ["/vo/dst", "/vo/reco"]}})
+    assert result["OK"], result["Message"]
+    # The files already descending from the DST get its new ancestor as well
+    result = db.fileManager.addFileAncestors({"/vo/dst": {"Ancestors": ["/vo/raw3"]}})
+    assert result["OK"], result["Message"]
+
+    db.queries = []
+    result = db.fileManager.getFileAncestors(dict.fromkeys(["/vo/user", "/vo/dst", "/vo/raw1", "/vo/missing"]), [])
+    assert result["OK"], result["Message"]
+    assert len(db.queries) <= 5
+    assert result["Value"]["Failed"] == {"/vo/missing": "No such file or directory"}
+    ancestors = result["Value"]["Successful"]
+    # Only the shortest depth is kept for the ancestors reached by several paths
+    assert ancestors["/vo/user"] == {"/vo/dst": 1, "/vo/reco": 1, "/vo/raw1": 2, "/vo/raw2": 2, "/vo/raw3": 2}
+    assert ancestors["/vo/dst"] == {"/vo/reco": 1, "/vo/raw1": 2, "/vo/raw2": 2, "/vo/raw3": 1}
+    assert ancestors["/vo/raw1"] == {}
+
+    result = db.fileManager.getFileAncestors({"/vo/user": None}, [1])
+    assert result["Value"]["Successful"]["/vo/user"] == {"/vo/dst": 1, "/vo/reco": 1}
+
+    result = db.fileManager.getFileDescendents(dict.fromkeys(["/vo/raw1", "/vo/raw3"]), [])
+    assert result["OK"], result["Message"]
+    descendents = result["Value"]["Successful"]
+    assert descendents["/vo/raw1"] == {"/vo/reco": 1, "/vo/dst": 2, "/vo/user": 2}
+    assert descendents["/vo/raw3"] == {"/vo/dst": 1, "/vo/user": 2}
+
+    # An ancestor added twice is reported
+    result = db.fileManager.addFileAncestors({"/vo/dst": {"Ancestors": ["/vo/raw1"]}})
+    assert "duplicate" in result["Value"]["Failed"]["/vo/dst"]
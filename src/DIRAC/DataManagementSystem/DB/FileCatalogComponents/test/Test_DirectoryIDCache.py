@@ -0,0 +1,105 @@
+""" Test the directory ID cache of the directory trees, with the DirectoryLevelTree on a SQLite version of its table
+"""
+# pylint: disable=protected-access
+import pytest
+
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+
+dirPaths = ["/", "/vo", "/vo/data", "/vo/data/run1", "/vo/data/run2", "/vo/user"]
+
+
+@pytest.fixture
+def db(sqliteDB):
+    db = sqliteDB("FC_DirectoryLevelTree")
+    for dirPath in dirPaths:
+        db.addDirectory(dirPath)
+    return db
+
+
+@pytest.fixture
+def dtree(db):
+    db.dirIDCacheSize = 4
+    return DirectoryLevelTree(db)
+
+
+def _counters(dtree):
+    return dtree.getDirIDCacheCounters()["Value"]
+
+
+def test_findDir(dtree):
+    """Existing directories are looked up in the DB only once, the missing ones every time"""
+    for _ in range(3):
+        result = dtree.findDir("/vo/data/")
+        assert result["OK"], result["Message"]
+        assert result["Value"] == 3
+        assert result["Level"] == 2
+        assert dtree.findDir("/vo/missing")["Value"] == ""
+    assert len(dtree.db.queries) == 4
+
+    counters = _counters(dtree)
+    assert counters["Cached Directory IDs"] == 1
+    assert counters["Directory ID Cache Hits"] == 2
+    assert counters["Directory ID Cache Misses"] == 4
+    assert counters["Directory ID Cache Hit Rate (%)"] == 33.3
+
+
+def test_findDirs(dtree):
+    """Only the directories that are not in the cache are looked up, and the cache is bounded"""
+    result = dtree.findDirs(["/vo/data", "/vo/user"])
+    assert result["OK"], result["Message"]
+    assert result["Value"] == {"/vo/data": 3, "/vo/user": 6}
+
+    result = dtree.findDirs(["/vo/data", "/vo", "/vo/missing/"])
+    assert result["OK"], result["Message"]
+    assert result["Value"] == {"/vo/data": 3, "/vo": 2}
+    assert "'/vo/data'" not in dtree.db.queries[-1]
+
+    # All the paths are in the cache
+    nQueries = len(dtree.db.queries)
+    assert dtree.findDirs(["/vo/user/", "/vo"])["Value"] == {"/vo/user": 6, "/vo": 2}
+    assert dtree.getPathIDs("/vo/data/run1")["Value"] == [1, 2, 3, 4]
+    assert dtree.getDirectoryPaths([2, 3, 4])["Value"] == {2: "/vo", 3: "/vo/data", 4: "/vo/data/run1"}
+    assert dtree.getDirectoryPath(1)["Value"] == "/"
+    assert len(dtree.db.queries) == nQueries + 1
+
+    # Only the last directories used are kept
+    assert _counters(dtree)["Cached Directory IDs"] == dtree.db.dirIDCacheSize
+    dtree.findDirs(["/vo/data/run2"])
+    assert len(dtree.db.queries) == nQueries + 2
+
+
+def test_removeDir(dtree):
+    """A removed directory is not found anymore, and a directory is not cached if removed while looked up"""
+    assert dtree.findDir("/vo/user")["Value"] == 6
+    assert dtree.getDirectoryPath(4)["Value"] == "/vo/data/run1"
+
+    result = dtree.removeDir("/vo/user/")
+    assert result["OK"], result["Message"]
+    assert result["DirID"] == 6
+    assert dtree.findDir("/vo/user")["Value"] == ""
+    assert dtree.findDirs(["/vo/user"])["Value"] == {}
+
+    # Removed by ID
+    dtree.db.conn.execute("DELETE FROM FC_DirectoryLevelTree WHERE DirID=4")
+    dtree._invalidateDirIDs(dirIDs=[4])
+    assert dtree.findDir("/vo/data/run1")["Value"] == ""
+    assert not dtree.getDirectoryPath(4)["OK"]
+
+    # An invalidation between the lookup and the DB query discards the result of the query
+    dirDict, generation = dtree._getCachedDirIDs(["/vo/data/run2"])
+    assert not dirDict
+    dtree._invalidateDirIDs(paths=["/vo/data/run2"])
+    dtree._cacheDirIDs({"/vo/data/run2": 5}, generation)
+    assert not dtree._getCachedDirIDs(["/vo/data/run2"])[0]
+
+
+def test_disabledCache(db):
+    """With a size of 0, the DB is always queried"""
+    dtree = DirectoryLevelTree(db)
+    for _ in range(3):
+        assert dtree.findDirs(["/vo", "/vo/data"])["Value"] == {"/vo": 2, "/vo/data": 3}
+    assert len(db.queries) == 3
+    assert _counters(dtree)["Cached Directory IDs"] == 0
+    assert _counters(dtree)["Directory ID Cache Hit Rate (%)"] == 0.0
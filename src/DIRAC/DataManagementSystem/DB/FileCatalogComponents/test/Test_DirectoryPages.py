@@ -0,0 +1,169 @@
+""" Test the paged listing of directories, with the DirectoryLevelTree and the FileManager on a SQLite version
+of their tables: the pages put together have to give the same as the full listing
+"""
+# pylint: disable=protected-access
+import pytest
+
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManager import FileManager
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+dirPaths = ["/", "/vo", "/vo/data", "/vo/data/run1", "/vo/data/run1/sub", "/vo/data/run2", "/vo/data/empty"]
+nFiles = 100
+
+
+@pytest.fixture
+def dtree(sqliteDB):
+    db = sqliteDB("FC_DirectoryLevelTree", "FC_Statuses", "FC_Files", "FC_FileInfo", "FC_Replicas", "FC_ReplicaInfo")
+    db.dtree = DirectoryLevelTree(db)
+    db.fileManager = FileManager(db)
+    for dirPath in dirPaths:
+        db.addDirectory(dirPath)
+    # The files of the directories are interleaved, some are trashed and some have no replica
+    dataDirs = dirPaths[2:-1]
+    for i in range(nFiles):
+        dirID = db.dtree.findDir(dataDirs[i % len(dataDirs)])["Value"]
+        status = 2 if i % 7 == 3 else 1
+        fileID = db.conn.execute(
+            "INSERT INTO FC_Files (DirID, Size, UID, GID, Status, FileName) VALUES (?, ?, 1, 2, ?, ?)",
+            (dirID, i, status, f"file{i}"),
+        ).lastrowid
+        db.conn.execute(
+            "INSERT INTO FC_FileInfo VALUES (?, ?, 'abcdef', 'Adler32', 'File', ?, '', 509)",
+            (fileID, f"GUID-{i}", f"date{i}"),
+        )
+        for seID in range(1, i % 3 + 1):
+            repID = db.conn.execute(
+                "INSERT INTO FC_Replicas (FileID, SEID, Status) VALUES (?, ?, ?)",
+                (fileID, seID, 2 if i % 5 == 1 and seID == 2 else 1),
+            ).lastrowid
+            db.conn.execute(
+                "INSERT INTO FC_ReplicaInfo (RepID, RepType, PFN) VALUES (?, 'Master', ?)", (repID, f"pfn{i}-{seID}")
+            )
+    return db.dtree
+
+
+def _getPages(method, path, *args):
+    """Get all the pages of a directory, following the cursors"""
+    pages = []
+    cursor = None
+    while True:
+        result = method(path, cursor, *args)
+        assert result["OK"], result["Message"]
+        pages.append(result["Value"])
+        cursor = result["Value"].pop("Cursor")
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("pageSize", [1, 2, 5, 100])
+def test_listDirectoryPage(dtree, pageSize):
+    for path in dirPaths:
+        result = dtree.listDirectory([path])
+        assert result["OK"], result["Message"]
+        expected = result["Value"]["Successful"][path]
+
+        pages = _getPages(dtree.listDirectoryPage, path, pageSize)
+        assert pages[0]["SubDirs"] == expected["SubDirs"]
+        assert all(not page["SubDirs"] for page in pages[1:])
+        files = {}
+        for page in pages:
+            assert len(page["Files"]) <= pageSize
+            files.update(page["Files"])
+        assert files == expected["Files"]
+        fileIDs = [fileDict["MetaData"]["FileID"] for page in pages for fileDict in page["Files"].values()]
+        assert fileIDs == sorted(fileIDs)
+
+
+@pytest.mark.parametrize("pageSize", [1, 3, 100])
+def test_getDirectoryReplicasPage(dtree, pageSize):
+    for allStatus in (False, True):
+        for path in dirPaths:
+            result = dtree.getDirectoryReplicas([path], allStatus=allStatus)
+            assert result["OK"], result["Message"]
+            expected = result["Value"]["Successful"][path]
+
+            replicas = {}
+            for page in _getPages(dtree.getDirectoryReplicasPage, path, pageSize, allStatus):
+                assert len(page["Replicas"]) <= pageSize
+                replicas.update(page["Replicas"])
+            assert replicas == expected
+
+
+@pytest.mark.parametrize("pageSize", [1, 2, 4, 100])
+def test_getDirectoryDumpPage(dtree, pageSize):
+    for path in ["/", "/vo/data", "/vo/data/run1", "/vo/data/empty"]:
+        result = dtree.getDirectoryDump([path])
+        assert result["OK"], result["Message"]
+        expected = result["Value"]["Successful"][path]
+
+        files = {}
+        subDirs = []
+        for page in _getPages(dtree.getDirectoryDumpPage, path, pageSize):
+            assert len(page["Files"]) <= pageSize
+            assert len(page["SubDirs"]) <= pageSize
+            files.update(page["Files"])
+            subDirs.extend(page["SubDirs"])
+        assert files == expected["Files"]
+        assert sorted(subDirs) == sorted(expected["SubDirs"])
+
+
+def test_invalidCursor(dtree):
+    assert not dtree.listDirectoryPage("/vo/missing", None, 10)["OK"]
+    assert not dtree.listDirectoryPage("/vo/data", "nonsense", 10)["OK"]
+    # The cursor of another directory
+    cursor = dtree.listDirectoryPage("/vo/data/run1", None, 1)["Value"]["Cursor"]
+    assert not dtree.listDirectoryPage("/vo/data/run2", cursor, 10)["OK"]
+    assert not dtree.getDirectoryReplicasPage("/vo/data/run2", cursor, 10)["OK"]
+
+
+class FakeRPC:
+    """The paged methods of the service, on the directory tree"""
+
+    def __init__(self, dtree):
+        self.dtree = dtree
+        self.calls = 0
+
+    def listDirectoryPage(self, path, cursor, pageSize, verbose):
+        self.calls += 1
+        return self.dtree.listDirectoryPage(path, cursor, pageSize, verbose=verbose)
+
+    def getDirectoryReplicasPage(self, path, cursor, pageSize, allStatus):
+        self.calls += 1
+        return self.dtree.getDirectoryReplicasPage(path, cursor, pageSize, allStatus=allStatus)
+
+    def getDirectoryDumpPage(self, path, cursor, pageSize):
+        self.calls += 1
+        return self.dtree.getDirectoryDumpPage(path, cursor, pageSize)
+
+
+def test_clientPages(dtree, monkeypatch):
+    """The client generators give the pages with LFNs, until the last one or an error"""
+    rpc = FakeRPC(dtree)
+    monkeypatch.setattr(FileCatalogClient, "_getRPC", lambda self, timeout=120: rpc)
+    fc = FileCatalogClient.__new__(FileCatalogClient)
+    path = "/vo/data/run1"
+
+    pages = list(fc.listDirectoryPages(path, pageSize=4))
+    assert all(result["OK"] for result in pages)
+    assert rpc.calls == len(pages) > 1
+    assert list(pages[0]["Value"]["SubDirs"]) == ["/vo/data/run1/sub"]
+    files = [lfn for result in pages for lfn in result["Value"]["Files"]]
+    expected = dtree.listDirectory([path])["Value"]["Successful"][path]["Files"]
+    assert sorted(files) == sorted(f"{path}/{fileName}" for fileName in expected)
+
+    replicas = {}
+    for result in fc.getDirectoryReplicasPages(path, pageSize=4):
+        assert result["OK"], result["Message"]
+        replicas.update(result["Value"])
+    assert replicas[f"{path}/file5"] == {"SE1": "pfn5-1", "SE2": "pfn5-2"}
+
+    dump = [result["Value"] for result in fc.getDirectoryDumpPages("/vo", pageSize=100)]
+    assert len(dump) == 1
+    assert "Cursor" not in dump[0]
+
+    results = list(fc.listDirectoryPages("/vo/missing"))
+    assert len(results) == 1
+    assert not results[0]["OK"]
@@ -0,0 +1,73 @@
+""" Test the bulk lookup of the directory parameters and the DirectorySecurityManager on real directory trees,
+on a SQLite version of their tables
+"""
+# pylint: disable=protected-access
+import pytest
+
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectorySimpleTree import (
+    DirectorySimpleTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.DirectorySecurityManager import (
+    DirectorySecurityManager,
+)
+
+# path, owner uid, group gid, mode
+directories = [("/", 1, 1, 0o755), ("/vo", 1, 1, 0o755), ("/vo/user", 2, 2, 0o700)]
+
+
+@pytest.fixture(params=[DirectorySimpleTree, DirectoryLevelTree])
+def db(request, sqliteDB):
+    db = sqliteDB("FC_DirectoryTree", "FC_DirectoryLevelTree", "FC_DirectoryInfo")
+    for dirPath, uid, gid, mode in directories:
+        dirID = db.addDirectory(dirPath)
+        db.conn.execute("INSERT INTO FC_DirectoryTree (DirID, DirName) VALUES (?, ?)", (dirID, dirPath))
+        db.conn.execute(
+            "INSERT INTO FC_DirectoryInfo (DirID, UID, GID, Mode) VALUES (?, ?, ?, ?)", (dirID, uid, gid, mode)
+        )
+    db.dtree = request.param(db)
+    return db
+
+
+def test_getDirectoryParametersBulk(db):
+    """The trees without findDirs look up the directories one by one"""
+    result = db.dtree.getDirectoryParametersBulk(["/vo/user", "/vo/user/data", "/missing"], recursive=True)
+    assert result["OK"], result["Message"]
+    successful = result["Value"]["Successful"]
+    assert successful["/vo/user"]["Owner"] == "user2"
+    assert successful["/vo/user/data"]["DirID"] == successful["/vo/user"]["DirID"]
+    assert successful["/missing"]["Mode"] == 0o755
+    assert not result["Value"]["Failed"]
+
+    result = db.dtree.getDirectoryParametersBulk(["/vo", "/vo/missing"])
+    assert result["OK"], result["Message"]
+    assert list(result["Value"]["Successful"]) == ["/vo"]
+    assert list(result["Value"]["Failed"]) == ["/vo/missing"]
+
+
+def test_directorySecurityManager(db):
+    """The permissions are those of the mode of the nearest existing directory"""
+    securityManager = DirectorySecurityManager(db)
+    result = securityManager.getPathPermissions(
+        ["/vo/user/file", "/vo/file"], {"username": "user1", "group": "group1", "properties": []}
+    )
+    assert result["OK"], result["Message"]
+    assert result["Value"]["Successful"]["/vo/user/file"] == {"Read": False, "Write": False, "Execute": False}
+    assert result["Value"]["Successful"]["/vo/file"] == {"Read": True, "Write": True, "Execute": True}
+
+
+def test_doubleSlash(db):
+    """A path whose parents do not end up with / is refused, and gets no permission"""
+    result = db.dtree.getDirectoryParametersBulk(["//vo/user/file"], recursive=True)
+    assert result["OK"], result["Message"]
+    assert result["Value"]["Failed"] == {"//vo/user/file": "Bad Path (double /?)"}
+
+    securityManager = DirectorySecurityManager(db)
+    credDict = {"username": "user1", "group": "group1", "properties": []}
+    result = securityManager.getPathPermissions(["//vo/user/file", "/vo/user/file"], credDict)
+    assert result["OK"], result["Message"]
+    assert "//vo/user/file" not in result["Value"]["Successful"]
+    assert result["Value"]["Failed"]["//vo/user/file"] == "Bad Path (double /?)"
+    assert result["Value"]["Successful"]["/vo/user/file"] == {"Read": False, "Write": False, "Execute": False}
@@ -0,0 +1,126 @@
+""" Test the online repair of the directory usage, with the DirectoryLevelTree and the FileManager on a SQLite
+version of their tables: whatever the chunks, the repaired usage has to be the one computed from the files
+"""
+# pylint: disable=protected-access
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryClosure import (
+    TREE_USAGE_TRIGGERS,
+    DirectoryClosure,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManager import FileManager
+
+dirPaths = ["/", "/vo", "/vo/data", "/vo/data/run1", "/vo/data/run1/sub", "/vo/data/run2", "/vo/data/empty", "/vo/user"]
+nFiles = 60
+
+
+def _addFile(db, dirPath, size, seIDs):
+    """Insert a file and its replicas, without updating the usage"""
+    dirID = db.dtree.findDir(dirPath)["Value"]
+    fileID = db.conn.execute("INSERT INTO FC_Files (DirID, Size) VALUES (?, ?)", (dirID, size)).lastrowid
+    for seID in seIDs:
+        db.conn.execute("INSERT INTO FC_Replicas (FileID, SEID) VALUES (?, ?)", (fileID, seID))
+    return dirID
+
+
+@pytest.fixture
+def db(sqliteDB):
+    db = sqliteDB("FC_DirectoryLevelTree", "FC_Files", "FC_Replicas", "FC_DirectoryUsage")
+    db.dtree = DirectoryLevelTree(db)
+    db.fileManager = FileManager(db)
+    for dirPath in dirPaths:
+        db.addDirectory(dirPath)
+    dataDirs = dirPaths[2:]
+    for i in range(nFiles):
+        _addFile(db, dataDirs[i % len(dataDirs)], i, range(1, i % 3 + 1))
+    return db
+
+
+def _repair(dtree, path, chunkSize):
+    """Repair the usage of a subtree chunk by chunk, following the cursors"""
+    cursor = None
+    directories = 0
+    repaired = 0
+    while True:
+        result = dtree.repairDirectoryUsage(path, cursor, chunkSize)
+        assert result["OK"], result["Message"]
+        assert result["Value"]["Directories"] <= chunkSize
+        directories += result["Value"]["Directories"]
+        repaired += result["Value"]["Repaired"]
+        cursor = result["Value"]["Cursor"]
+        if cursor is None:
+            return directories, repaired
+
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 3, 100])
+def test_repairFromScratch(db, chunkSize):
+    """The empty usage is filled, whatever the chunks"""
+    directories, repaired = _repair(db.dtree, "/", chunkSize)
+    assert directories == len(dirPaths)
+    assert repaired > 0
+    assert db.getUsage() == db.computeUsage()
+    # Nothing to repair anymore
+    assert _repair(db.dtree, "/", chunkSize) == (len(dirPaths), 0)
+
+
+@pytest.mark.parametrize("chunkSize", [1, 4, 100])
+def test_repairDrift(db, chunkSize):
+    _repair(db.dtree, "/", chunkSize)
+
+    # Entries corrupted anywhere are repaired by the repair of the whole tree
+    run1ID = db.dtree.findDir("/vo/data/run1")["Value"]
+    db.conn.execute(f"UPDATE FC_DirectoryUsage SET SESize=SESize+5 WHERE DirID={run1ID} AND SEID=1")
+    db.conn.execute("DELETE FROM FC_DirectoryUsage WHERE SEID=2 AND DirID IN (SELECT MAX(DirID) FROM FC_Files)")
+    db.conn.execute(f"INSERT INTO FC_DirectoryUsage VALUES ({run1ID}, 7, 10, 1, '')")
+    assert db.getUsage() != db.computeUsage()
+    _repair(db.dtree, "/", chunkSize)
+    assert db.getUsage() == db.computeUsage()
+
+    # A file whose usage was not updated is repaired by the repair of its own subtree
+    _addFile(db, "/vo/data/run1/sub", 1000, [1, 3])
+    _directories, repaired = _repair(db.dtree, "/vo/data/run1/sub", chunkSize)
+    assert repaired == 3
+    assert db.getUsage() == db.computeUsage()
+
+
+def test_incrementalUpdates(db):
+    """The usage updated by the FileManager stays consistent with the files"""
+    _repair(db.dtree, "/", 100)
+    dirID = _addFile(db, "/vo/user", 42, [2])
+    result = db.fileManager._updateDirectoryUsage(
+        {dirID: {0: {"Files": 1, "Size": 42}, 2: {"Files": 1, "Size": 42}}}, "+"
+    )
+    assert result["OK"], result["Message"]
+    assert db.getUsage() == db.computeUsage()
+    assert _repair(db.dtree, "/", 100) == (len(dirPaths), 0)
+
+
+def test_invalidPath(db):
+    assert not db.dtree.repairDirectoryUsage("/vo/missing", None, 10)["OK"]
+    assert not db.dtree.repairDirectoryUsage("/vo", "nonsense", 10)["OK"]
+
+
+@pytest.mark.parametrize("directoryTreeUsage", [True, False])
+def test_treeUsageTriggers(directoryTreeUsage):
+    """The triggers maintaining the usage of the directory trees are only there with the DirectoryTreeUsage option"""
+    closureDB = MagicMock()
+    closureDB.dirIDCacheSize = 0
+    closureDB.directoryTreeUsage = directoryTreeUsage
+    closureDB._update.return_value = S_OK(0)
+    # One of the triggers is already there
+    closureDB._query.return_value = S_OK((("trg_after_insert_directory_usage",),))
+    assert DirectoryClosure(closureDB).checkDirectoryTreeUsage()["OK"]
+
+    requests = [call[0][0] for call in closureDB._update.call_args_list]
+    if directoryTreeUsage:
+        assert [req.split()[:3] for req in requests] == [
+            ["CREATE", "TRIGGER", triggerName] for triggerName in list(TREE_USAGE_TRIGGERS)[1:]
+        ]
+    else:
+        assert requests == ["DROP TRIGGER IF EXISTS trg_after_insert_directory_usage"]
@@ -0,0 +1,153 @@
+""" Test the lookup of files in several directories of the FileManager, on a SQLite version of its tables
+"""
+# pylint: disable=protected-access
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_ERROR, S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManager import FileManager
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManagerPs import FileManagerPs
+
+nDirs = 50
+nFilesPerDir = 20
+
+
+def _findDirs(paths):
+    """The directories are /vo/dir1, /vo/dir2... without a directory tree"""
+    return S_OK({path: int(path.split("dir")[-1]) for path in paths if int(path.split("dir")[-1]) <= nDirs})
+
+
+@pytest.fixture
+def fileManager(sqliteDB):
+    db = sqliteDB("FC_Statuses", "FC_Files", "FC_FileInfo")
+    for dirID in range(1, nDirs + 1):
+        for i in range(nFilesPerDir):
+            # The last file of each directory is trashed
+            status = 2 if i == nFilesPerDir - 1 else 1
+            fileID = db.conn.execute(
+                "INSERT INTO FC_Files (DirID, Size, UID, GID, Status, FileName) VALUES (?, ?, 1, 2, ?, ?)",
+                (dirID, dirID * 1000 + i, status, f"file{i}"),
+            ).lastrowid
+            db.conn.execute(
+                "INSERT INTO FC_FileInfo VALUES (?, ?, 'abcdef', 'Adler32', 'File', '', '', 509)",
+                (fileID, f"GUID-{dirID}-{i}"),
+            )
+    db.dtree = db
+    db.findDirs = _findDirs
+    fileManager = FileManager(db)
+    fileManager.findFilesBatchSize = 100
+    return fileManager
+
+
+def _queriesOn(fileManager, table):
+    return [req for req in fileManager.db.queries if f"FROM {table} " in req]
+
+
+def test_findFiles(fileManager):
+    """All the files are found with one query per batch of files"""
+    lfns = [f"/vo/dir{dirID}/file{i}" for dirID in range(1, nDirs + 1) for i in range(nFilesPerDir)]
+    lfns += ["/vo/dir1/missing", f"/vo/dir{nDirs + 1}/file0"]
+    result = fileManager._findFiles(lfns, ["FileID", "Size", "UID", "GID", "GUID", "Status"])
+    assert result["OK"], result["Message"]
+    successful = result["Value"]["Successful"]
+    failed = result["Value"]["Failed"]
+
+    # The trashed files, and the files or directories that don't exist, are not found
+    assert len(successful) == nDirs * (nFilesPerDir - 1)
+    assert set(failed) == set(lfns) - set(successful)
+    assert all(error == "No such file or directory" for error in failed.values())
+    assert successful["/vo/dir3/file5"] == {
+        "FileID": 2 * nFilesPerDir + 6,
+        "Size": 3005,
+        "UID": 1,
+        "Owner": "user1",
+        "GID": 2,
+        "OwnerGroup": "group2",
+        "GUID": "GUID-3-5",
+        "Status": "AprioriGood",
+    }
+
+    # Batches of 100 files instead of one query per directory: 1001 files are looked up in the
+    # existing directories, and the metadata of the 950 found is queried
+    assert len(_queriesOn(fileManager, "FC_Files")) == 11
+    assert len(_queriesOn(fileManager, "FC_FileInfo")) == 10
+
+
+def test_findFilesAllStatus(fileManager):
+    """Files with any status are found with allStatus, and with only the FileID nothing else is queried"""
+    lfns = [f"/vo/dir{dirID}/file{nFilesPerDir - 1}" for dirID in range(1, nDirs + 1)]
+    assert not fileManager._findFiles(lfns)["Value"]["Successful"]
+
+    result = fileManager._findFiles(lfns, allStatus=True)
+    assert result["OK"], result["Message"]
+    assert set(result["Value"]["Successful"]) == set(lfns)
+    assert result["Value"]["Successful"][lfns[0]] == {"FileID": nFilesPerDir}
+    assert not _queriesOn(fileManager, "FC_FileInfo")
+
+
+def test_getDirectoryFiles(fileManager):
+    """Whole directories count as one file in the batches"""
+    result = fileManager._getDirectoryFiles(2, [], ["FileID"])
+    assert result["OK"], result["Message"]
+    assert sorted(result["Value"]) == sorted(f"file{i}" for i in range(nFilesPerDir - 1))
+
+    result = fileManager._getFilesInDirectories({dirID: [] for dirID in range(1, nDirs + 1)}, ["Size"], True)
+    assert result["OK"], result["Message"]
+    assert len(result["Value"]) == nDirs
+    assert result["Value"][7]["file3"]["Size"] == 7003
+    assert len(_queriesOn(fileManager, "FC_Files")) == 2
+
+
+def test_filesConditions(fileManager):
+    """Directories with more files than the batch size are split"""
+    fileManager.findFilesBatchSize = 3
+    conditions = list(fileManager._getDirectoryFilesConditions({1: ["a", "b", "c", "d"], 2: [], 3: ["e", "f"]}))
+    assert conditions == [
+        "(DirID=1 AND FileName IN ('a','b','c'))",
+        "(DirID=1 AND FileName IN ('d')) OR DirID=2",
+        "(DirID=3 AND FileName IN ('e','f'))",
+    ]
+
+
+def _psRow(dirID, fileName):
+    """Row of the ps_get_all_info_for_files_in_dir(s) procedures"""
+    return (fileName, dirID, dirID * 100, 10, 1, "user", 2, "group", "AprioriGood") + ("",) * 5 + ("", 509)
+
+
+@pytest.fixture
+def fileManagerPs():
+    db = MagicMock()
+    db.visibleFileStatus = ["AprioriGood"]
+    db.dtree.findDirs.side_effect = lambda paths: S_OK({path: int(path.split("dir")[-1]) for path in paths})
+    return FileManagerPs(db)
+
+
+def test_findFilesPsOldSchema(fileManagerPs):
+    """Without the new procedure, the files are looked up directory by directory"""
+
+    def executeStoredProcedureWithCursor(procedure, args):
+        if procedure == "ps_get_all_info_for_files_in_dirs":
+            return S_ERROR(
+                "Execution failed.: ( 1305: PROCEDURE FileCatalogDB.ps_get_all_info_for_files_in_dirs does not exist )"
+            )
+        return S_OK([_psRow(args[0], "file1")])
+
+    fileManagerPs.db.executeStoredProcedureWithCursor.side_effect = executeStoredProcedureWithCursor
+    for _ in range(2):
+        result = fileManagerPs._findFiles(["/vo/dir1/file1", "/vo/dir2/file1", "/vo/dir2/file2"])
+        assert result["OK"], result["Message"]
+        assert sorted(result["Value"]["Successful"]) == ["/vo/dir1/file1", "/vo/dir2/file1"]
+        assert list(result["Value"]["Failed"]) == ["/vo/dir2/file2"]
+
+    # The new procedure is only tried once
+    procedures = [call.args[0] for call in fileManagerPs.db.executeStoredProcedureWithCursor.call_args_list]
+    assert procedures.count("ps_get_all_info_for_files_in_dirs") == 1
+    assert procedures.count("ps_get_all_info_for_files_in_dir") == 4
+
+
+def test_findFilesPsError(fileManagerPs):
+    """A DB error is not hidden as missing files"""
+    fileManagerPs.db.executeStoredProcedureWithCursor.return_value = S_ERROR("Connection lost")
+    result = fileManagerPs._findFiles(["/vo/dir1/file1"])
+    assert not result["OK"]
@@ -0,0 +1,252 @@
+""" Test the denormalised metadata index of the DirectoryMetadata, on a SQLite version of the tables:
+the directories found with the index have to be the same as without it
+"""
+# pylint: disable=protected-access
+import re
+
+import pytest
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import (
+    DirectoryLevelTree,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryMetadata import DirectoryMetadata as dmetaModule
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryMetadata.DirectoryMetadata import (
+    METADATA_INDEX_STATUS_TABLE,
+    METADATA_INDEX_TABLE,
+    DirectoryMetadata,
+)
+
+credDict = {"username": "user", "group": "group"}
+
+dirPaths = [
+    "/",
+    "/vo",
+    "/vo/prod",
+    "/vo/prod/a",
+    "/vo/prod/a/x",
+    "/vo/prod/b",
+    "/vo/prod/b/y",
+    "/vo/other",
+    "/vo/other/z",
+]
+
+queries = [
+    ({"Year": 2023}, "/"),
+    ({"Type": "sim"}, "/"),
+    ({"Year": {">": 2022}, "Type": "sim"}, "/"),
+    ({"Year": {">=": 2023, "<": 2024}, "Type": ["sim", "data"]}, "/"),
+    ({"Type": {"!=": "sim"}}, "/"),
+    ({"Type": "Missing"}, "/"),
+    ({"Year": "Any", "Type": {"in": ["data"]}}, "/"),
+    ({"Year": 2023}, "/vo/prod/a"),
+    ({"Type": "sim"}, "/vo/prod"),
+    ({"Year": 2024, "Type": "sim"}, "/vo/prod"),
+    ({"Energy": {">": 1.5}, "Year": 2023}, "/"),
+]
+
+
+class FakeOperations:
+    def __init__(self, vo=None):
+        pass
+
+    def getValue(self, option, default=None):
+        return default
+
+
+@pytest.fixture
+def db(monkeypatch, sqliteDB):
+    monkeypatch.setattr(dmetaModule.Registry, "getGroupOption", lambda group, option: "vo")
+    monkeypatch.setattr(dmetaModule, "Operations", FakeOperations)
+    db = sqliteDB("FC_DirectoryLevelTree", "FC_MetaFields", "FC_DirMeta")
+    db.metadataIndex = False
+    db.dtree = DirectoryLevelTree(db)
+    db.dmeta = dmeta = DirectoryMetadata(db)
+    db.fmeta = db
+    db.getFileMetadataFields = lambda credDict: S_OK({})
+    for dirPath in dirPaths:
+        db.addDirectory(dirPath)
+    for metaName, metaType in [("Year", "INT"), ("Type", "String"), ("Energy", "Float")]:
+        assert dmeta.addMetadataField(metaName, metaType, credDict)["OK"]
+    for dirPath, metaDict in [
+        ("/vo/prod", {"Year": 2023}),
+        ("/vo/prod/a", {"Type": "sim"}),
+        ("/vo/prod/b", {"Type": "data"}),
+        ("/vo/other", {"Year": 2024, "Type": "sim"}),
+    ]:
+        result = dmeta.setMetadata(dirPath, metaDict, credDict)
+        assert result["OK"], result["Message"]
+    return db
+
+
+def _findDirs(db, metaDict, path, useIndex):
+    db.metadataIndex = useIndex
+    result = db.dmeta.findDirIDsByMetadata(metaDict, path, credDict)
+    assert result["OK"], result["Message"]
+    db.metadataIndex = True
+    return sorted(result["Value"]), result["Selection"]
+
+
+def _checkQueries(db):
+    """All the queries give the same directories with and without the index"""
+    for metaDict, path in queries:
+        assert _findDirs(db, metaDict, path, True) == _findDirs(db, metaDict, path, False), (metaDict, path)
+
+
+def _indexedValues(db, dirPath):
+    dirID = db.dtree.findDir(dirPath)["Value"]
+    req = f"SELECT Meta_Year, Meta_Type, Meta_Energy FROM {METADATA_INDEX_TABLE} WHERE DirID={dirID}"
+    return db._query(req)["Value"][0]
+
+
+def test_buildIndex(db):
+    """The index is built from the existing metadata, with the inherited values"""
+    db.metadataIndex = True
+    result = db.dmeta.checkMetadataIndex()
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo") == (None, None, None)
+    assert _indexedValues(db, "/vo/prod/a/x") == (2023, "sim", None)
+    assert _indexedValues(db, "/vo/other/z") == (2024, "sim", None)
+    _checkQueries(db)
+
+    # Nothing is done if the index exists
+    db._update(f"UPDATE {METADATA_INDEX_TABLE} SET Meta_Year=NULL")
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert _indexedValues(db, "/vo/prod/a/x") == (None, "sim", None)
+    assert db.dmeta.rebuildMetadataIndex()["OK"]
+    assert _indexedValues(db, "/vo/prod/a/x") == (2023, "sim", None)
+
+    assert _findDirs(db, {"Year": 2023, "Type": "sim"}, "/", True) == ([4, 5], "Done")
+    assert _findDirs(db, {"Year": 2024, "Type": "data"}, "/", True) == ([], "None")
+
+
+def test_incrementalIndex(db):
+    """The index follows the changes of the metadata and of the directories"""
+    db.metadataIndex = True
+    assert db.dmeta.checkMetadataIndex()["OK"]
+
+    # New directories inherit the metadata of their parent
+    for dirPath in ["/vo/prod/a/x/new", "/vo/new"]:
+        dirID = db.addDirectory(dirPath)
+        result = db.dmeta.addDirectoryToMetadataIndex(dirID, dirPath)
+        assert result["OK"], result["Message"]
+    assert db.dmeta.addDirectoryToMetadataIndex(dirID, dirPath)["OK"]
+    assert _indexedValues(db, "/vo/prod/a/x/new") == (2023, "sim", None)
+    assert _indexedValues(db, "/vo/new") == (None, None, None)
+    _checkQueries(db)
+
+    # New value, with a subdirectory already defining its own
+    result = db.dmeta.setMetadata("/vo/prod/a/x/new", {"Energy": 1.0}, credDict)
+    assert result["OK"], result["Message"]
+    result = db.dmeta.setMetadata("/vo/prod/a", {"Energy": 2.0}, credDict)
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo/prod/a/x") == (2023, "sim", 2.0)
+    assert _indexedValues(db, "/vo/prod/a/x/new") == (2023, "sim", 1.0)
+
+    # Removed value, inherited again from the parents
+    result = db.dmeta.removeMetadata("/vo/prod/a/x/new", {"Energy": None}, credDict)
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo/prod/a/x/new") == (2023, "sim", 2.0)
+
+    # Modified and removed values
+    result = db.dmeta.setMetadata("/vo/prod/a", {"Energy": 3.0}, credDict)
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo/prod/a/x/new") == (2023, "sim", 3.0)
+    result = db.dmeta.removeMetadata("/vo/prod/a", {"Type": None}, credDict)
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo/prod/a/x") == (2023, None, 3.0)
+    _checkQueries(db)
+
+    # A new field is added to the index
+    result = db.dmeta.addMetadataField("Run", "INT", credDict)
+    assert result["OK"], result["Message"]
+    result = db.dmeta.setMetadata("/vo/prod", {"Run": 42}, credDict)
+    assert result["OK"], result["Message"]
+    assert _findDirs(db, {"Run": 42, "Type": "data"}, "/", True) == ([6, 7], "Done")
+
+    # Removed directories are removed from the index
+    newID = db.dtree.findDir("/vo/new")["Value"]
+    result = db.dmeta.removeMetadataForDirectory([newID], credDict)
+    assert result["OK"], result["Message"]
+    assert not result["Value"]["Failed"]
+    assert not db._query(f"SELECT * FROM {METADATA_INDEX_TABLE} WHERE DirID={newID}")["Value"]
+
+
+def _isComplete(db):
+    return db._query(f"SELECT COUNT(*) FROM {METADATA_INDEX_STATUS_TABLE}")["Value"][0][0] > 0
+
+
+def _failIndexUpdates(dbUpdate, statement):
+    """Make the given statement fail on the index table"""
+
+    def _update(req, conn=None):
+        if re.match(f"{statement}( INTO)? {METADATA_INDEX_TABLE} ", req):
+            return S_ERROR("Execution failed.")
+        return dbUpdate(req, conn=conn)
+
+    return _update
+
+
+def test_incompleteIndex(db):
+    """The index is not used and is rebuilt until its build is complete"""
+    db.metadataIndex = True
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert _isComplete(db)
+
+    # The build did not finish
+    db._update(f"DELETE FROM {METADATA_INDEX_STATUS_TABLE}")
+    db._update(f"UPDATE {METADATA_INDEX_TABLE} SET Meta_Year=NULL")
+    _checkQueries(db)
+    # The incomplete index is not updated
+    result = db.dmeta.setMetadata("/vo/prod/a", {"Energy": 2.0}, credDict)
+    assert result["OK"], result["Message"]
+    assert _indexedValues(db, "/vo/prod/a/x") == (None, "sim", None)
+    _checkQueries(db)
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert _isComplete(db)
+    assert _indexedValues(db, "/vo/prod/a/x") == (2023, "sim", 2.0)
+
+    # A failed update of the index invalidates it
+    dirID = db.addDirectory("/vo/prod/a/x/new")
+    dbUpdate = db._update
+    db._update = _failIndexUpdates(dbUpdate, "INSERT")
+    assert db.dmeta.addDirectoryToMetadataIndex(dirID, "/vo/prod/a/x/new")["OK"]
+    db._update = dbUpdate
+    assert not _isComplete(db)
+    _checkQueries(db)
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert _indexedValues(db, "/vo/prod/a/x/new") == (2023, "sim", 2.0)
+
+
+def test_transaction(db):
+    """The metadata are not changed if the index can not be updated"""
+    db.metadataIndex = True
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    dbUpdate = db._update
+    db._update = _failIndexUpdates(dbUpdate, "UPDATE")
+    assert not db.dmeta.setMetadata("/vo/prod/a", {"Energy": 2.0}, credDict)["OK"]
+    assert not db.dmeta.removeMetadata("/vo/prod/a", {"Type": None}, credDict)["OK"]
+    db._update = dbUpdate
+    assert not db._query("SELECT * FROM FC_Meta_Energy")["Value"]
+    assert db.dmeta.getDirectoryMetadata("/vo/prod/a", credDict)["Value"]["Type"] == "sim"
+    assert _isComplete(db)
+    _checkQueries(db)
+
+
+def test_tooManyFields(db, monkeypatch):
+    """Beyond the maximum number of fields, the index is not built and the metadata tables are queried"""
+    monkeypatch.setattr(dmetaModule, "MAX_INDEXED_FIELDS", 3)
+    db.metadataIndex = True
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert _isComplete(db)
+
+    result = db.dmeta.addMetadataField("Run", "INT", credDict)
+    assert result["OK"], result["Message"]
+    assert not _isComplete(db)
+    result = db.dmeta.setMetadata("/vo/prod", {"Run": 42}, credDict)
+    assert result["OK"], result["Message"]
+    assert _findDirs(db, {"Run": 42, "Type": "data"}, "/", True) == ([6, 7], "Done")
+
+    assert db.dmeta.checkMetadataIndex()["OK"]
+    assert not _isComplete(db)
+    _checkQueries(db)
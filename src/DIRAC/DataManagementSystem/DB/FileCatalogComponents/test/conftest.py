@@ -0,0 +1,193 @@
+""" SQLite version of the FileCatalogDB, shared by the tests of its components: each test creates the tables
+it needs, and sets the components it tests
+"""
+import datetime
+import re
+import sqlite3
+
+import pytest
+
+from DIRAC import S_ERROR, S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import MAX_LEVELS
+
+_lpaths = ", ".join(f"LPATH{i} INT NOT NULL DEFAULT 0" for i in range(1, MAX_LEVELS + 1))
+
+# SQLite version of the tables of the FileCatalogDB, only with the columns used by the tests
+SCHEMA = {
+    "FC_DirectoryTree": "CREATE TABLE FC_DirectoryTree (DirID INTEGER PRIMARY KEY, DirName TEXT UNIQUE);",
+    "FC_DirectoryLevelTree": f"""
+        CREATE TABLE FC_DirectoryLevelTree (DirID INTEGER PRIMARY KEY, DirName TEXT UNIQUE, Parent INT, Level INT,
+                                            {_lpaths});
+    """,
+    "FC_DirectoryInfo": """
+        CREATE TABLE FC_DirectoryInfo (DirID INTEGER PRIMARY KEY, UID INT, GID INT, CreationDate TEXT,
+                                       ModificationDate TEXT, Mode INT, Status INT);
+    """,
+    "FC_Statuses": """
+        CREATE TABLE FC_Statuses (StatusID INTEGER PRIMARY KEY, Status TEXT);
+        INSERT INTO FC_Statuses VALUES (1, 'AprioriGood'), (2, 'Trash');
+    """,
+    "FC_Files": """
+        CREATE TABLE FC_Files (FileID INTEGER PRIMARY KEY, DirID INT, Size INT, UID INT, GID INT, Status INT,
+                               FileName TEXT);
+    """,
+    "FC_FileInfo": """
+        CREATE TABLE FC_FileInfo (FileID INTEGER PRIMARY KEY, GUID TEXT, Checksum TEXT, ChecksumType TEXT,
+                                  Type TEXT, CreationDate TEXT, ModificationDate TEXT, Mode INT);
+    """,
+    "FC_Replicas": """
+        CREATE TABLE FC_Replicas (RepID INTEGER PRIMARY KEY, FileID INT, SEID INT, Status INT, UNIQUE (FileID, SEID));
+    """,
+    "FC_ReplicaInfo": """
+        CREATE TABLE FC_ReplicaInfo (RepID INTEGER PRIMARY KEY, RepType TEXT, CreationDate TEXT,
+                                     ModificationDate TEXT, PFN TEXT);
+    """,
+    "FC_DirectoryUsage": """
+        CREATE TABLE FC_DirectoryUsage (DirID INT, SEID INT, SESize INT, SEFiles INT, LastUpdate TEXT,
+                                        PRIMARY KEY (DirID, SEID));
+    """,
+    "FC_FileAncestors": """
+        CREATE TABLE FC_FileAncestors (FileID INT, AncestorID INT, AncestorDepth INT, UNIQUE (FileID, AncestorID));
+    """,
+    "FC_MetaFields": "CREATE TABLE FC_MetaFields (MetaID INTEGER PRIMARY KEY, MetaName TEXT, MetaType TEXT);",
+    "FC_DirMeta": "CREATE TABLE FC_DirMeta (DirID INT, MetaKey TEXT, MetaValue TEXT);",
+}
+
+# Unique keys of the tables updated with "ON DUPLICATE KEY UPDATE", which SQLite needs to be given
+UPSERT_KEYS = {"FC_DirectoryUsage": "DirID, SEID", "FC_FileAncestors": "FileID, AncestorID"}
+
+
+class SQLiteFileCatalogDB:
+    """Just what the components need from the FileCatalogDB, with a SQLite database.
+    The MySQL statements they use are translated into SQLite ones, and the queries and updates are recorded.
+    """
+
+    dirIDCacheSize = 0
+    globalReadAccess = False
+    lfnPfnConvention = "Weak"
+    umask = 0o775
+    uniqueGUID = True
+    visibleFileStatus = ["AprioriGood"]
+    visibleReplicaStatus = ["AprioriGood"]
+
+    def __init__(self, *tableNames):
+        # The transactions are explicit, like with MySQL
+        self.conn = sqlite3.connect(":memory:", isolation_level=None)
+        self.conn.create_function("UTC_TIMESTAMP", 0, lambda: str(datetime.datetime.utcnow()))
+        self.conn.create_function("CONCAT", -1, lambda *args: "".join(args))
+        self.conn.executescript("".join(SCHEMA[tableName] for tableName in tableNames))
+        self.queries = []
+        self.updates = []
+        self.ugManager = self
+        self.seManager = self
+        self.datasetManager = self
+
+    def addDirectory(self, dirPath):
+        """Insert a directory in the FC_DirectoryLevelTree, the LPATH columns being the IDs of the directories
+        in the path
+
+        :returns: the DirID of the directory
+        """
+        parentPaths = []
+        if dirPath != "/":
+            parentPaths = ["/"] + [dirPath[:i] for i in range(1, len(dirPath)) if dirPath[i] == "/"]
+        parentIDs = [
+            self.conn.execute("SELECT DirID FROM FC_DirectoryLevelTree WHERE DirName=?", (path,)).fetchone()[0]
+            for path in parentPaths
+        ]
+        level = len(parentIDs)
+        names = ["DirName", "Parent", "Level"] + [f"LPATH{i}" for i in range(1, level)]
+        values = [dirPath, parentIDs[-1] if parentIDs else 0, level] + parentIDs[1:]
+        dirID = self.conn.execute(
+            f"INSERT INTO FC_DirectoryLevelTree ({','.join(names)}) VALUES ({','.join('?' * len(values))})", values
+        ).lastrowid
+        if level:
+            self.conn.execute(f"UPDATE FC_DirectoryLevelTree SET LPATH{level}={dirID} WHERE DirID={dirID}")
+        return dirID
+
+    def _getConnection(self):
+        return S_OK(self.conn)
+
+    def _escapeString(self, myString):
+        return S_OK("'%s'" % myString.replace("'", "''"))
+
+    def _query(self, req, conn=None):
+        self.queries.append(req)
+        # SQLite does not know the indices in the CREATE TABLE statements
+        req = re.sub(r", INDEX \(\w+\)", "", req)
+        req = req.replace("START TRANSACTION", "BEGIN")
+        try:
+            return S_OK(tuple(self.conn.execute(req).fetchall()))
+        except sqlite3.Error as e:
+            return S_ERROR(repr(e))
+
+    def _update(self, req, conn=None):
+        self.updates.append(req)
+        table = re.match(r"\s*INSERT INTO (\w+)", req)
+        if table and table.group(1) in UPSERT_KEYS:
+            req = req.replace("ON DUPLICATE KEY UPDATE", f"ON CONFLICT ({UPSERT_KEYS[table.group(1)]}) DO UPDATE SET")
+            req = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", req)
+        req = req.replace("LEAST(", "MIN(")
+        try:
+            cursor = self.conn.execute(req)
+        except sqlite3.IntegrityError as e:
+            return S_ERROR(f"Duplicate entry: {e!r}")
+        except sqlite3.Error as e:
+            return S_ERROR(repr(e))
+        result = S_OK(cursor.rowcount)
+        result["lastRowId"] = cursor.lastrowid
+        return result
+
+    def insertFields(self, tableName, inFields, inValues, conn=None):
+        req = f"INSERT INTO {tableName} ({','.join(inFields)}) VALUES ({','.join('?' * len(inValues))})"
+        try:
+            result = S_OK()
+            result["lastRowId"] = self.conn.execute(req, inValues).lastrowid
+            return result
+        except sqlite3.IntegrityError as e:
+            return S_ERROR(f"Duplicate entry: {e!r}")
+
+    def getUserAndGroupID(self, credDict):
+        return S_OK((1, 1))
+
+    def getUserName(self, uid):
+        return S_OK(f"user{uid}")
+
+    def getGroupName(self, gid):
+        return S_OK(f"group{gid}")
+
+    def findSE(self, seName):
+        """The SEs are named after their SEID: SE1, SE2..."""
+        if isinstance(seName, int):
+            return S_OK(seName)
+        return S_OK(int(seName[2:]))
+
+    def getSEName(self, seID):
+        return S_OK(f"SE{seID}")
+
+    def getDatasetsInDirectory(self, dirID, verbose=False):
+        return S_OK({})
+
+    def getUsage(self):
+        """The stored usage, without the empty entries"""
+        rows = self.conn.execute("SELECT DirID, SEID, SESize, SEFiles FROM FC_DirectoryUsage")
+        return {(dirID, seID): (size, files) for dirID, seID, size, files in rows if size or files}
+
+    def computeUsage(self):
+        """The usage computed from the files, recursively, the logical one with SEID 0"""
+        rows = self.conn.execute("SELECT DirID, 0, Size FROM FC_Files").fetchall()
+        rows += self.conn.execute(
+            "SELECT F.DirID, R.SEID, F.Size FROM FC_Files AS F JOIN FC_Replicas AS R ON R.FileID=F.FileID"
+        ).fetchall()
+        usage = {}
+        for fileDirID, seID, size in rows:
+            for dirID in self.dtree.getPathIDsByID(fileDirID)["Value"]:
+                curSize, curFiles = usage.get((dirID, seID), (0, 0))
+                usage[(dirID, seID)] = (curSize + size, curFiles + 1)
+        return usage
+
+
+@pytest.fixture
+def sqliteDB():
+    """Factory of SQLite versions of the FileCatalogDB, given the names of their tables"""
+    return SQLiteFileCatalogDB
@@ -5,6 +5,10 @@ from DIRAC import gLogger, S_OK, S_ERROR
 from DIRAC.Core.Base.DB import DB
 from DIRAC.Resources.Catalog.Utilities import checkArgumentFormat
 from DIRAC.Core.Utilities.ObjectLoader import ObjectLoader
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryTreeBase import (
+    DIRID_CACHE_SIZE,
+    MAX_PAGE_SIZE,
+)
 
 #############################################################################
 
@@ -50,6 +54,14 @@ class FileCatalogDB(DB):
         self.validReplicaStatus = databaseConfig["ValidReplicaStatus"]
         self.visibleFileStatus = databaseConfig["VisibleFileStatus"]
         self.visibleReplicaStatus = databaseConfig["VisibleReplicaStatus"]
+        # Number of directories in the path <-> DirID cache of the directory tree, 0 to disable it
+        self.dirIDCacheSize = databaseConfig.get("DirectoryIDCacheSize", DIRID_CACHE_SIZE)
+        # Maintain and use the denormalised index of the inherited directory metadata
+        self.metadataIndex = databaseConfig.get("MetadataIndex", False)
+        # Maximum number of files in a page of the paged directory listings
+        self.maxPageSize = databaseConfig.get("MaxPageSize", MAX_PAGE_SIZE)
+        # Read the recursive directory sizes from FC_DirectoryTreeUsage, with the DirectoryClosure
+        self.directoryTreeUsage = databaseConfig.get("DirectoryTreeUsage", False)
 
         # Load the configured components
         for compAttribute, componentType in [
@@ -67,6 +79,15 @@ class FileCatalogDB(DB):
                 return result
             self.__setattr__(compAttribute, result["Value"])
 
+        if self.metadataIndex:
+            result = self.dmeta.checkMetadataIndex()
+            if not result["OK"]:
+                return result
+
+        result = self.dtree.checkDirectoryTreeUsage()
+        if not result["OK"]:
+            return result
+
         return S_OK()
 
     def __loadCatalogComponent(self, componentType, componentName):
@@ -939,6 +960,71 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def __checkPagedPath(self, operation, path, pageSize, credDict):
+        """Check the access to the directory of a paged listing
+
+        :returns: S_OK(pageSize), limited to maxPageSize
+        """
+        res = self._checkPathPermissions(operation, path, credDict)
+        if not res["OK"]:
+            return res
+        if path in res["Value"]["Failed"]:
+            return S_ERROR(errno.EACCES, f"{path}: {res['Value']['Failed'][path]}")
+        return S_OK(max(1, min(pageSize, self.maxPageSize)))
+
+    def listDirectoryPage(self, path, cursor, pageSize, credDict, verbose=False):
+        """
+        List a directory by pages of files, in FileID order
+
+        :param str path: directory
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files in the page, limited by the MaxPageSize option
+        :param creDict: credential
+
+        :return: S_OK(dict) indexed "Files", "SubDirs", "Links" and "Datasets" as the listDirectory values,
+           and "Cursor", for the next page, None after the last page.
+           Only the first page contains "SubDirs", "Links" and "Datasets"
+        """
+        res = self.__checkPagedPath("listDirectory", path, pageSize, credDict)
+        if not res["OK"]:
+            return res
+        return self.dtree.listDirectoryPage(path, cursor, res["Value"], verbose=verbose)
+
+    def getDirectoryReplicasPage(self, path, cursor, pageSize, allStatus, credDict):
+        """
+        Get the replicas of the files of a directory by pages of files, in FileID order
+
+        :param str path: directory
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files in the page, limited by the MaxPageSize option
+        :param bool allStatus: if False, only the visible files and replicas
+        :param creDict: credential
+
+        :return: S_OK(dict) indexed "Replicas", the getDirectoryReplicas value,
+           and "Cursor", for the next page, None after the last page
+        """
+        res = self.__checkPagedPath("getDirectoryReplicas", path, pageSize, credDict)
+        if not res["OK"]:
+            return res
+        return self.dtree.getDirectoryReplicasPage(path, cursor, res["Value"], allStatus=allStatus)
+
+    def getDirectoryDumpPage(self, path, cursor, pageSize, credDict):
+        """
+        Get a dump of a directory by pages of files and subdirectories
+
+        :param str path: directory
+        :param cursor: cursor returned with the previous page, None for the first page
+        :param int pageSize: maximum number of files in the page, limited by the MaxPageSize option
+        :param creDict: credential
+
+        :return: S_OK(dict) indexed "Files" and "SubDirs" as the getDirectoryDump values,
+           and "Cursor", for the next page, None after the last page
+        """
+        res = self.__checkPagedPath("getDirectoryDump", path, pageSize, credDict)
+        if not res["OK"]:
+            return res
+        return self.dtree.getDirectoryDumpPage(path, cursor, res["Value"])
+
     def isDirectory(self, lfns, credDict):
         """
         Checks whether a list of LFNS are directories or not
@@ -1046,6 +1132,24 @@ class FileCatalogDB(DB):
         result = self.dtree._rebuildDirectoryUsage()
         return result
 
+    def repairDirectoryUsage(self, path, cursor, chunkSize, credDict):
+        """Repair the usage of a chunk of the directories of a subtree, online
+
+        :param str path: top directory of the subtree
+        :param cursor: cursor returned with the previous chunk, None for the first chunk
+        :param int chunkSize: maximum number of directories in the chunk, limited by the MaxPageSize option
+        :param creDict: credential
+
+        :return: S_OK(dict) indexed "Directories", "Repaired", the number of usage entries corrected,
+           and "Cursor", for the next chunk, None after the last chunk
+        """
+        result = self._checkAdminPermission(credDict)
+        if not result["OK"]:
+            return result
+        if not result["Value"]:
+            return S_ERROR(errno.EACCES, "Not authorized to repair the directory usage")
+        return self.dtree.repairDirectoryUsage(path, cursor, max(1, min(chunkSize, self.maxPageSize)))
+
     def repairCatalog(self, credDict={}):
         """Repair catalog inconsistencies"""
 
@@ -1164,6 +1268,10 @@ class FileCatalogDB(DB):
         if not res["OK"]:
             return res
         counterDict.update(res["Value"])
+        res = self.dtree.getDirIDCacheCounters()
+        if not res["OK"]:
+            return res
+        counterDict.update(res["Value"])
         return S_OK(counterDict)
 
     ########################################################################
@@ -1205,3 +1313,15 @@ class FileCatalogDB(DB):
         :returns: S_OK with list of tuples (SEName, lfn, checksum, size)
         """
         return self.fileManager.getSEDump(seNames)
+
+    def getSEDumpChunks(self, seNames, offset=0):
+        """
+         Return all the files at given SEs, together with checksum and size,
+         by chunks read progressively from the DB
+
+        :param seNames: list of StorageElement names
+        :param int offset: number of replicas to skip, to resume an interrupted dump
+
+        :returns: S_OK with a generator of lists of tuples (SEName, lfn, checksum, size)
+        """
+        return self.fileManager.getSEDumpChunks(seNames, offset=offset)
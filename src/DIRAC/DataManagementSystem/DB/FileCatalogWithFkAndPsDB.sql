@@ -169,6 +169,8 @@ CREATE TABLE FC_Files(
     UNIQUE (DirID, FileName),
     UNIQUE(GUID),
 
+    -- For the paged listing of the directories, in FileID order
+    INDEX (DirID, FileID),
     INDEX (UID,GID),
     INDEX (Status),
     INDEX (FileName)
@@ -220,6 +222,24 @@ CREATE TABLE FC_DirectoryUsage(
 
 -- ------------------------------------------------------------------------------
 
+-- Usage of the directories including their subdirectories, maintained by the triggers on FC_DirectoryUsage
+-- installed with the DirectoryTreeUsage option
+
+CREATE TABLE FC_DirectoryTreeUsage(
+   DirID INTEGER NOT NULL,
+   SEID INTEGER NOT NULL,
+   SESize BIGINT NOT NULL,
+   SEFiles BIGINT NOT NULL,
+   LastUpdate TIMESTAMP,
+
+   PRIMARY KEY (DirID,SEID),
+   FOREIGN KEY (SEID) REFERENCES FC_StorageElements(SEID) ON DELETE CASCADE,
+   FOREIGN KEY (DirID) REFERENCES FC_DirectoryList(DirID) ON DELETE CASCADE
+
+) ENGINE = INNODB;
+
+-- ------------------------------------------------------------------------------
+
 
 CREATE TABLE FC_DirMeta (
     DirID INTEGER NOT NULL,
@@ -597,6 +617,35 @@ END //
 DELIMITER ;
 
 
+-- ps_update_directory_tree_usage : add a change of the usage of a directory to the recursive usage
+--                                  of the directory and of all its parents, in FC_DirectoryTreeUsage
+--
+-- dir_id : the id of the dir which usage changed
+-- se_id : the id of the SE
+-- size_diff : the modification to bring to the size
+-- file_diff : the modification to bring to the number of files
+
+DROP PROCEDURE IF EXISTS ps_update_directory_tree_usage;
+DELIMITER //
+CREATE PROCEDURE ps_update_directory_tree_usage
+(IN dir_id INT, IN se_id INT, IN size_diff BIGINT, IN file_diff BIGINT)
+BEGIN
+
+  IF size_diff <> 0 OR file_diff <> 0 THEN
+    INSERT INTO FC_DirectoryTreeUsage (DirID, SEID, SESize, SEFiles)
+      SELECT ParentID, se_id, size_diff, file_diff FROM FC_DirectoryClosure WHERE ChildID = dir_id
+    ON DUPLICATE KEY UPDATE SESize = SESize + size_diff, SEFiles = SEFiles + file_diff;
+  END IF;
+
+END //
+DELIMITER ;
+
+
+-- The triggers on FC_DirectoryUsage calling ps_update_directory_tree_usage are not created here: as each change
+-- of the usage of a directory updates the rows of all its parents, they are only installed by the service when
+-- the DirectoryTreeUsage option is set (see DirectoryClosure.checkDirectoryTreeUsage).
+
+
 DROP TRIGGER IF EXISTS trg_after_update_replica_move_size;
 DELIMITER //
 CREATE TRIGGER trg_after_update_replica_move_size AFTER UPDATE ON FC_Replicas
@@ -742,6 +791,40 @@ DELIMITER ;
 
 
 
+-- ps_get_all_info_for_files_in_dirs : get all the info about files in several directories
+-- file_desc : files to consider, formated like "(DirID = x AND FileName IN (y, z)) OR DirID = u"
+-- allStatus : if False, consider the visibleFileStatus
+-- visibleFileStatus : list of status we are interested in
+-- output : FileName, DirID, f.FileID, Size, f.uid, UserName, f.gid, GroupName, s.Status,
+--                     GUID, Checksum, ChecksumType, Type, CreationDate,ModificationDate, Mode
+
+drop procedure if exists ps_get_all_info_for_files_in_dirs;
+DELIMITER //
+CREATE PROCEDURE ps_get_all_info_for_files_in_dirs
+(IN file_desc LONGTEXT, IN allStatus BOOLEAN, IN visibleFileStatus VARCHAR(255))
+BEGIN
+
+  set @sql = CONCAT('SELECT SQL_NO_CACHE FileName, DirID, f.FileID, Size, f.uid, UserName, f.gid, GroupName, s.Status,
+                     GUID, Checksum, ChecksumType, Type, CreationDate,ModificationDate, Mode
+                    FROM FC_Files f
+                    JOIN FC_Users u ON f.UID = u.UID
+                    JOIN FC_Groups g ON f.GID = g.GID
+                    JOIN FC_Statuses s ON f.Status = s.StatusID
+                    WHERE (', file_desc, ') ' );
+
+  IF not allStatus THEN
+    SET @sql = CONCAT(@sql,' and s.Status  in (',visibleFileStatus,') ');
+  END IF;
+
+  PREPARE stmt FROM @sql;
+  EXECUTE stmt;
+  DEALLOCATE PREPARE stmt;
+
+END //
+DELIMITER ;
+
+
+
 -- ps_get_all_info_for_file_ids : get all the info for given file ids
 -- file_ids : list of file ids
 -- output : FileID, Size, UID, GID, s.Status, GUID, CreationDate
@@ -1776,6 +1859,82 @@ DELIMITER ;
 
 
 
+-- ps_get_dir_tree_logical_size : as ps_get_dir_logical_size, but the recursive size is read
+--                                from the single row of the directory in FC_DirectoryTreeUsage
+--
+-- dir_id : id of the directory
+-- recursiveSum: take subdirectories into account
+--
+-- output : File Size, number of files
+
+DROP PROCEDURE IF EXISTS ps_get_dir_tree_logical_size;
+DELIMITER //
+CREATE PROCEDURE ps_get_dir_tree_logical_size
+(IN dir_id INT, IN recursiveSum BOOLEAN)
+BEGIN
+    DECLARE log_size, log_files BIGINT DEFAULT 0;
+
+    IF recursiveSum THEN
+
+      SELECT SQL_NO_CACHE SESize, SEFiles INTO log_size, log_files FROM FC_DirectoryTreeUsage u
+      JOIN FC_StorageElements s ON s.SEID = u.SEID
+      WHERE s.SEName = 'FakeSE'
+      AND u.DirID = dir_id;
+
+    ELSE
+
+      SELECT SQL_NO_CACHE SESize, SEFiles INTO log_size, log_files FROM FC_DirectoryUsage u
+      JOIN FC_StorageElements s ON s.SEID = u.SEID
+      WHERE s.SEName = 'FakeSE'
+      AND u.DirID = dir_id;
+
+    END IF;
+
+    SELECT COALESCE(log_size, 0), COALESCE(log_files,0);
+
+END //
+DELIMITER ;
+
+
+
+-- ps_get_dir_tree_physical_size : as ps_get_dir_physical_size, but the recursive size is read
+--                                 from the rows of the directory in FC_DirectoryTreeUsage
+--
+-- dir_id : id of the directory
+-- recursiveSum: take subdirectories into account
+--
+-- output : SEName, File Size, number of files
+
+DROP PROCEDURE IF EXISTS ps_get_dir_tree_physical_size;
+DELIMITER //
+CREATE PROCEDURE ps_get_dir_tree_physical_size
+(IN dir_id INT, IN recursiveSum BOOLEAN)
+BEGIN
+
+  IF recursiveSum THEN
+    SELECT SQL_NO_CACHE SEName, SESize, SEFiles
+    FROM FC_DirectoryTreeUsage u
+    JOIN FC_StorageElements se ON se.SEID = u.SEID
+    WHERE u.DirID = dir_id
+    AND SEName != 'FakeSE'
+    AND (SESize != 0 OR SEFiles != 0);
+
+  ELSE
+
+    SELECT SQL_NO_CACHE SEName, SESize, SEFiles
+    FROM FC_DirectoryUsage u
+    JOIN FC_StorageElements se ON se.SEID = u.SEID
+    WHERE u.DirID = dir_id
+    AND SEName != 'FakeSE'
+    AND (SESize != 0 OR SEFiles != 0);
+
+  END IF;
+
+END //
+DELIMITER ;
+
+
+
 -- ps_calculate_dir_physical_size : calculate the physical size of a directory on each SE,
 --                           It should be equal to ps_get_dir_physical_size
 --
@@ -1939,6 +2098,47 @@ END //
 DELIMITER ;
 
 
+-- ps_count_se_replicas : counts how many replicas are in a given SE
+-- se_id : storageElement ID
+-- countReplicas (out value): amount of replicas
+
+DROP PROCEDURE IF EXISTS ps_count_se_replicas;
+DELIMITER //
+CREATE PROCEDURE ps_count_se_replicas
+(IN se_id INT, OUT countReplicas BIGINT )
+BEGIN
+
+  SELECT SQL_NO_CACHE count(RepID) INTO countReplicas FROM FC_Replicas WHERE SEID = se_id;
+
+END //
+DELIMITER ;
+
+
+-- ps_get_se_dump_from_offset : dump the lfns in an SE, with checksum and size, ordered by replica ID
+--                              so that an interrupted dump can be resumed
+-- se_id : storageElement ID
+-- start_offset : number of replicas to skip
+-- output : SEName, LFN, Checksum, Size
+
+DROP PROCEDURE IF EXISTS ps_get_se_dump_from_offset;
+DELIMITER //
+CREATE PROCEDURE ps_get_se_dump_from_offset
+(IN se_id INT, IN start_offset BIGINT)
+BEGIN
+
+  SELECT SQL_NO_CACHE SEName, CONCAT(d.Name, "/", f.FileName), f.Checksum, f.Size
+        FROM FC_Replicas r
+        JOIN FC_Files f on f.FileID = r.FileID
+        JOIN FC_DirectoryList d on d.DirID = f.DirID
+        JOIN FC_StorageElements s on r.SEID = s.SEID
+        WHERE r.SEID = se_id
+        ORDER BY r.RepID
+        LIMIT start_offset, 18446744073709551615;
+
+END //
+DELIMITER ;
+
+
 -- ps_get_directory_dump : recursively dump all the lfns and subdir in a directory
 -- dir_id : directory ID
 -- output :
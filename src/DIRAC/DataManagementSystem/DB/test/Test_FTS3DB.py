@@ -195,3 +195,146 @@ def test_raceCondition(fts3db):
 def test_all_common_tests(fts3db, baseTest):
     """Run all the tests in the FTS3TestUtils."""
     baseTest(fts3db, fts3db)
+
+
+@pytest.mark.parametrize("baseTest", baseTestModule.allBaseTests)
+def test_all_common_tests_bulkFileStatus(fts3db, baseTest, monkeypatch):
+    """Run all the tests in the FTS3TestUtils, updating the file status in bulk, in very small batches."""
+    monkeypatch.setattr(
+        fts3db, "updateFileStatus", lambda *args, **kwargs: fts3db.updateFileStatusBulk(*args, **kwargs, batchSize=3)
+    )
+    baseTest(fts3db, fts3db)
+
+
+def test_updateFileStatusBulk(fts3db):
+    """Only the files that change are updated"""
+    op = FTS3TransferOperation()
+    for i in range(10):
+        ftsFile = FTS3File()
+        ftsFile.lfn = f"/vo/file{i}"
+        ftsFile.targetSE = "Target"
+        op.ftsFiles.append(ftsFile)
+    res = fts3db.persistOperation(op)
+    assert res["OK"]
+    opID = res["Value"]
+    fileIDs = [ftsFile.fileID for ftsFile in fts3db.getOperation(opID)["Value"].ftsFiles]
+
+    # Put all the files in a job
+    res = fts3db.updateFileStatusBulk({fileID: {"status": "Submitted", "ftsGUID": "guid1"} for fileID in fileIDs})
+    assert res["OK"]
+    assert res["Value"] == len(fileIDs)
+
+    # Same values: nothing to update
+    res = fts3db.updateFileStatusBulk(
+        {fileID: {"status": "Submitted", "error": ""} for fileID in fileIDs}, ftsGUID="guid1"
+    )
+    assert res["OK"]
+    assert res["Value"] == 0
+
+    # Another job does not touch the files
+    res = fts3db.updateFileStatusBulk({fileID: {"status": "Active"} for fileID in fileIDs}, ftsGUID="guid2")
+    assert res["OK"]
+    assert res["Value"] == 0
+
+    # Mix of changes, with one error per file, in batches
+    fileStatusDict = {fileID: {"status": "Submitted"} for fileID in fileIDs}
+    fileStatusDict[fileIDs[0]] = {"status": "Finished", "error": "", "ftsGUID": None}
+    fileStatusDict[fileIDs[1]] = {"status": "Failed", "error": "Error 1", "ftsGUID": None}
+    fileStatusDict[fileIDs[2]] = {"status": "Failed", "error": "Error 2", "ftsGUID": None}
+    fileStatusDict[fileIDs[3]] = {"status": "Active"}
+    res = fts3db.updateFileStatusBulk(fileStatusDict, ftsGUID="guid1", batchSize=3)
+    assert res["OK"]
+    assert res["Value"] == 4
+
+    ftsFiles = {ftsFile.fileID: ftsFile for ftsFile in fts3db.getOperation(opID)["Value"].ftsFiles}
+    assert [ftsFiles[fileID].status for fileID in fileIDs[:5]] == [
+        "Finished",
+        "Failed",
+        "Failed",
+        "Active",
+        "Submitted",
+    ]
+    assert [ftsFiles[fileID].error for fileID in fileIDs[:4]] == [None, "Error 1", "Error 2", None]
+    assert [ftsFiles[fileID].ftsGUID for fileID in fileIDs[:5]] == [None, None, None, "guid1", "guid1"]
+
+    # Files in a final state are not brought back to life
+    res = fts3db.updateFileStatusBulk({fileIDs[0]: {"status": "Active"}, str(fileIDs[4]): {"status": "Active"}})
+    assert res["OK"]
+    assert res["Value"] == 1
+
+
+def test_updateJobsFileStatusBulk(fts3db):
+    """The files of several jobs are updated at once, each only if it still belongs to its job"""
+    op = FTS3TransferOperation()
+    for i in range(6):
+        ftsFile = FTS3File()
+        ftsFile.lfn = f"/vo/file{i}"
+        ftsFile.targetSE = "Target"
+        op.ftsFiles.append(ftsFile)
+    res = fts3db.persistOperation(op)
+    assert res["OK"]
+    opID = res["Value"]
+    fileIDs = [ftsFile.fileID for ftsFile in fts3db.getOperation(opID)["Value"].ftsFiles]
+
+    # Two files per job
+    for i, ftsGUID in enumerate(("guid1", "guid2", "guid3")):
+        res = fts3db.updateFileStatusBulk(
+            {fileID: {"status": "Submitted", "ftsGUID": ftsGUID} for fileID in fileIDs[2 * i : 2 * i + 2]}
+        )
+        assert res["OK"]
+
+    # The last file went to another job in between
+    res = fts3db.updateJobsFileStatusBulk(
+        {
+            "guid1": {fileIDs[0]: {"status": "Finished", "ftsGUID": None}, fileIDs[1]: {"status": "Active"}},
+            "guid2": {
+                fileIDs[2]: {"status": "Failed", "error": "Error", "ftsGUID": None},
+                fileIDs[3]: {"status": "Submitted"},
+            },
+            "guid4": {fileIDs[5]: {"status": "Active"}},
+        },
+        batchSize=4,
+    )
+    assert res["OK"]
+    assert res["Value"] == 3
+
+    ftsFiles = {ftsFile.fileID: ftsFile for ftsFile in fts3db.getOperation(opID)["Value"].ftsFiles}
+    assert [ftsFiles[fileID].status for fileID in fileIDs] == [
+        "Finished",
+        "Active",
+        "Failed",
+        "Submitted",
+        "Submitted",
+        "Submitted",
+    ]
+    assert [ftsFiles[fileID].ftsGUID for fileID in fileIDs] == [None, "guid1", None, "guid2", "guid3", "guid3"]
+    assert ftsFiles[fileIDs[2]].error == "Error"
+
+
+def test_updateJobsFileStatusBulkResubmittedFile(fts3db):
+    """A file reported by its old job and by the newer job it was resubmitted in
+    is only updated by the newer one, whatever the order of the jobs"""
+    op = FTS3TransferOperation()
+    ftsFile = FTS3File()
+    ftsFile.lfn = "/vo/file"
+    ftsFile.targetSE = "Target"
+    op.ftsFiles.append(ftsFile)
+    res = fts3db.persistOperation(op)
+    assert res["OK"]
+    opID = res["Value"]
+    fileID = fts3db.getOperation(opID)["Value"].ftsFiles[0].fileID
+
+    res = fts3db.updateFileStatusBulk({fileID: {"status": "Submitted", "ftsGUID": "newGUID"}})
+    assert res["OK"]
+
+    res = fts3db.updateJobsFileStatusBulk(
+        {
+            "newGUID": {fileID: {"status": "Active"}},
+            "oldGUID": {fileID: {"status": "Failed", "error": "Old error", "ftsGUID": None}},
+        }
+    )
+    assert res["OK"]
+    assert res["Value"] == 1
+
+    ftsFile = fts3db.getOperation(opID)["Value"].ftsFiles[0]
+    assert (ftsFile.status, ftsFile.error, ftsFile.ftsGUID) == ("Active", None, "newGUID")
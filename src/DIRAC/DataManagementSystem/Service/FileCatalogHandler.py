@@ -6,11 +6,16 @@ in the DIRAC framework
 import csv
 import json
 import os
+import zlib
 from io import StringIO
 
 from DIRAC.Core.DISET.RequestHandler import RequestHandler, getServiceOption
 from DIRAC import S_OK, S_ERROR
 from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryTreeBase import (
+    DIRID_CACHE_SIZE,
+    MAX_PAGE_SIZE,
+)
 
 
 class FileCatalogHandlerMixin:
@@ -56,6 +61,10 @@ class FileCatalogHandlerMixin:
             "ValidReplicaStatus": ["AprioriGood", "Trash", "Removing", "Probing"],
             "VisibleFileStatus": ["AprioriGood"],
             "VisibleReplicaStatus": ["AprioriGood"],
+            "DirectoryIDCacheSize": DIRID_CACHE_SIZE,
+            "MetadataIndex": False,
+            "MaxPageSize": MAX_PAGE_SIZE,
+            "DirectoryTreeUsage": False,
         }
         for configKey in sorted(defaultConfig.keys()):
             defaultValue = defaultConfig[configKey]
@@ -357,6 +366,28 @@ class FileCatalogHandlerMixin:
         """Recursively list the contents of supplied directories"""
         return self.fileCatalogDB.getDirectoryDump(lfns, self.getRemoteCredentials())
 
+    types_listDirectoryPage = [str, [str, type(None)], int, bool]
+
+    def export_listDirectoryPage(self, path, cursor, pageSize, verbose):
+        """List a page of the files of a directory, given by the cursor of the previous page"""
+        return self.fileCatalogDB.listDirectoryPage(
+            path, cursor, pageSize, self.getRemoteCredentials(), verbose=verbose
+        )
+
+    types_getDirectoryReplicasPage = [str, [str, type(None)], int, bool]
+
+    def export_getDirectoryReplicasPage(self, path, cursor, pageSize, allStatus):
+        """Get the replicas of a page of the files of a directory, given by the cursor of the previous page"""
+        return self.fileCatalogDB.getDirectoryReplicasPage(
+            path, cursor, pageSize, allStatus, self.getRemoteCredentials()
+        )
+
+    types_getDirectoryDumpPage = [str, [str, type(None)], int]
+
+    def export_getDirectoryDumpPage(self, path, cursor, pageSize):
+        """Recursively list a page of the contents of a directory, given by the cursor of the previous page"""
+        return self.fileCatalogDB.getDirectoryDumpPage(path, cursor, pageSize, self.getRemoteCredentials())
+
     ########################################################################
     #
     # Administrative database operations
@@ -374,6 +405,12 @@ class FileCatalogHandlerMixin:
         """Rebuild DirectoryUsage table from scratch"""
         return self.fileCatalogDB.rebuildDirectoryUsage()
 
+    types_repairDirectoryUsage = [str, [str, type(None)], int]
+
+    def export_repairDirectoryUsage(self, path, cursor, chunkSize):
+        """Repair the usage of a chunk of the directories of a subtree, given by the cursor of the previous chunk"""
+        return self.fileCatalogDB.repairDirectoryUsage(path, cursor, chunkSize, self.getRemoteCredentials())
+
     types_repairCatalog = []
 
     def export_repairCatalog(self):
@@ -638,43 +675,68 @@ class FileCatalogHandlerMixin:
         """
         return self.fileCatalogDB.getSEDump(seNames)
 
+    def getSEDumpCSVChunks(self, jsonSEDumpArgs):
+        """
+         Return the dump of SEs formated as CSV with '|' separation, by chunks read progressively from the DB,
+         so that it is sent without holding the whole dump in memory
+
+        :param jsonSEDumpArgs: json formated list of SE names, or dictionary with the keys
+                               SENames, Offset (number of lines to skip, to resume a dump) and
+                               Compress (if True, the CSV is gzip compressed)
+
+        :returns: S_OK with a generator of bytes
+        """
+        seDumpArgs = json.loads(jsonSEDumpArgs)
+        if isinstance(seDumpArgs, list):
+            seDumpArgs = {"SENames": seDumpArgs}
+        res = self.fileCatalogDB.getSEDumpChunks(seDumpArgs["SENames"], offset=seDumpArgs.get("Offset", 0))
+        if not res["OK"]:
+            return res
+        return S_OK(self.__csvChunks(res["Value"], seDumpArgs.get("Compress", False)))
+
+    @staticmethod
+    def __csvChunks(rowChunks, compress):
+        """Format chunks of rows as CSV, in a single gzip stream if compress is set.
+        Each compressed chunk is flushed, so that the client can decompress the data as it arrives.
+        """
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+        csvOutput = StringIO()
+        writer = csv.writer(csvOutput, delimiter="|")
+        for rows in rowChunks:
+            writer.writerows(rows)
+            chunk = csvOutput.getvalue().encode(errors="surrogateescape")
+            csvOutput.seek(0)
+            csvOutput.truncate()
+            if compressor:
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield chunk
+        if compressor:
+            yield compressor.flush()
+
 
 class FileCatalogHandler(FileCatalogHandlerMixin, RequestHandler):
-    def transfer_toClient(self, jsonSENames, token, fileHelper):
+    def transfer_toClient(self, jsonSEDumpArgs, token, fileHelper):
         """This method used to transfer the SEDump to the client,
         formated as CSV with '|' separation
 
-        :param seName: name of the se to dump
+        :param jsonSEDumpArgs: json formated names of the SEs to dump, or dictionary of
+                               options (see :py:meth:`getSEDumpCSVChunks`)
 
         :returns: the result of the FileHelper
 
 
         """
 
-        seNames = json.loads(jsonSENames)
-        csvOutput = None
-        res = self.getSEDump(seNames)
+        res = self.getSEDumpCSVChunks(jsonSEDumpArgs)
 
         try:
             if not res["OK"]:
                 ret = fileHelper.stringToNetwork(json.dumps(res))
                 return ret
 
-            retVal = res["Value"]
-
-            csvOutput = StringIO()
-            writer = csv.writer(csvOutput, delimiter="|")
-            for lfn in retVal:
-                writer.writerow(lfn)
-
-            csvOutput.seek(0)
-
-            ret = fileHelper.DataSourceToNetwork(csvOutput)
-            return ret
+            # The chunks are read from the DB as they are sent
+            return fileHelper.iterableToNetwork(res["Value"])
 
         except Exception as e:
             self.log.exception("Exception while sending seDump", repr(e))
             return S_ERROR(f"Exception while sending seDump: {repr(e)}")
-        finally:
-            if csvOutput is not None:
-                csvOutput.close()
@@ -10,15 +10,7 @@
 
 """
 # imports
-import json
-import csv
-
-from io import StringIO
-
-# from DIRAC
-
 from DIRAC import S_ERROR
-from DIRAC.Core.Utilities.ReturnValues import returnValueOrRaise
 from DIRAC.DataManagementSystem.Service.FileCatalogHandler import FileCatalogHandlerMixin
 
 from DIRAC.Core.Tornado.Server.TornadoService import TornadoService
@@ -31,32 +23,22 @@ class TornadoFileCatalogHandler(FileCatalogHandlerMixin, TornadoService):
     A simple Replica and Metadata Catalog service.
     """
 
-    def export_streamToClient(self, jsonSENames):
+    def export_streamToClient(self, jsonSEDumpArgs):
         """This method is used to transfer the SEDump to the client,
         formated as CSV with '|' separation
 
-        :param jsonSENames: json formated names of the SEs to dump
+        :param jsonSEDumpArgs: json formated names of the SEs to dump, or dictionary of
+                               options (see :py:meth:`getSEDumpCSVChunks`)
 
-        :returns: the result of the FileHelper
+        :returns: generator of the chunks of the dump, streamed to the client as they are read from the DB
 
 
         """
-        seNames = json.loads(jsonSENames)
-        csvOutput = None
-
         try:
-            retVal = returnValueOrRaise(self.getSEDump(seNames))
-
-            csvOutput = StringIO()
-            writer = csv.writer(csvOutput, delimiter="|")
-            writer.writerows(retVal)
-
-            ret = csvOutput.getvalue()
-            return ret
-
+            res = self.getSEDumpCSVChunks(jsonSEDumpArgs)
+            if not res["OK"]:
+                return res
+            return res["Value"]
         except Exception as e:
             self.log.exception("Exception while sending seDump", repr(e))
             return S_ERROR(f"Exception while sendind seDump: {repr(e)}")
-        finally:
-            if csvOutput is not None:
-                csvOutput.close()
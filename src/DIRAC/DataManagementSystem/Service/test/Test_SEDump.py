@@ -0,0 +1,119 @@
+""" Test the streaming of the SE dump, from the chunks of the FileManagerPs to the file written by the client
+"""
+# pylint: disable=protected-access
+import json
+
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManagerPs import FileManagerPs
+from DIRAC.DataManagementSystem.Service.FileCatalogHandler import FileCatalogHandlerMixin
+from DIRAC.Resources.Catalog.FileCatalogClient import _GzipDecompressingWriter, _truncateToCompleteLines
+
+seReplicas = {
+    "SE1": [("SE1", f"/vo/file{i}", f"{i:08x}", i) for i in range(5)],
+    "SE2": [("SE2", "/vo/fïle", "ad001", 12), ("SE2", "/vo/file|pipe", "ad002", 13)],
+}
+seIDs = {"SE1": 1, "SE2": 2}
+
+
+class FakeSEManager:
+    def findSE(self, seName):
+        return S_OK(seIDs[seName])
+
+
+class FakeDB:
+    """Just what the FileManagerPs needs from the FileCatalogDB to dump SEs"""
+
+    seManager = FakeSEManager()
+
+    def __init__(self):
+        self.streamedQueries = []
+
+    def executeStoredProcedure(self, packageName, parameters, outputIds):
+        assert packageName == "ps_count_se_replicas"
+        seName = {v: k for k, v in seIDs.items()}[parameters[0]]
+        return S_OK([len(seReplicas[seName])])
+
+    def executeStoredProcedureWithStreamingCursor(self, packageName, parameters, chunkSize=2):
+        assert packageName == "ps_get_se_dump_from_offset"
+        seID, offset = parameters
+        self.streamedQueries.append(parameters)
+        seName = {v: k for k, v in seIDs.items()}[seID]
+        rows = seReplicas[seName][offset:]
+        return S_OK(rows[i : i + chunkSize] for i in range(0, len(rows), chunkSize))
+
+
+class FakeHandler(FileCatalogHandlerMixin):
+    def __init__(self):
+        self.fileCatalogDB = FileManagerPs(FakeDB())
+
+
+def _dump(seDumpArgs):
+    res = FakeHandler().getSEDumpCSVChunks(json.dumps(seDumpArgs))
+    assert res["OK"], res["Message"]
+    return list(res["Value"])
+
+
+@pytest.mark.parametrize(
+    "offset, expectedQueries",
+    [(0, [(1, 0), (2, 0)]), (3, [(1, 3), (2, 0)]), (5, [(2, 0)]), (6, [(2, 1)]), (7, [])],
+)
+def test_getSEDumpChunks(offset, expectedQueries):
+    """The dumped SEs are skipped, and the queries only run when their rows are read"""
+    fileManager = FileManagerPs(FakeDB())
+    res = fileManager.getSEDumpChunks(["SE1", "SE2"], offset=offset)
+    assert res["OK"], res["Message"]
+    assert not fileManager.db.streamedQueries
+
+    rows = [row for chunk in res["Value"] for row in chunk]
+    assert rows == (seReplicas["SE1"] + seReplicas["SE2"])[offset:]
+    assert fileManager.db.streamedQueries == expectedQueries
+
+
+def test_csvChunks():
+    """The legacy list of SE names gives the same CSV as before, one chunk per chunk of rows"""
+    chunks = _dump(["SE1", "SE2"])
+    assert len(chunks) == 4
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "SE1|/vo/file0|00000000|0"
+    assert lines[-2:] == ["SE2|/vo/fïle|ad001|12", 'SE2|"/vo/file|pipe"|ad002|13']
+
+    assert b"".join(_dump({"SENames": ["SE1", "SE2"], "Offset": 4})).decode().splitlines() == lines[4:]
+
+
+def test_compressedDump(tmp_path):
+    """The gzip stream is decompressed as it arrives, and an incomplete stream is detected"""
+    plainDump = b"".join(_dump(["SE1", "SE2"]))
+    chunks = _dump({"SENames": ["SE1", "SE2"], "Compress": True})
+
+    outputFilename = tmp_path / "dump.csv"
+    with open(outputFilename, "wb") as outputFile:
+        writer = _GzipDecompressingWriter(outputFile)
+        for chunk in chunks[:-1]:
+            writer.write(chunk)
+            outputFile.flush()
+            # Every chunk is decompressed entirely once received
+            assert plainDump.startswith(outputFilename.read_bytes())
+        assert outputFilename.read_bytes() == plainDump
+        assert not writer.complete
+        writer.write(chunks[-1])
+        assert writer.complete
+    assert outputFilename.read_bytes() == plainDump
+
+
+def test_resumeDump(tmp_path):
+    """An interrupted dump is truncated to its complete lines, and completed from there"""
+    plainDump = b"".join(_dump(["SE1", "SE2"]))
+    outputFilename = tmp_path / "dump.csv"
+    outputFilename.write_bytes(plainDump[: plainDump.index(b"\n", 50) + 5])
+
+    offset = _truncateToCompleteLines(outputFilename)
+    assert outputFilename.read_bytes().endswith(b"\n")
+    assert offset == outputFilename.read_bytes().count(b"\n")
+
+    with open(outputFilename, "ab") as outputFile:
+        outputFile.write(b"".join(_dump({"SENames": ["SE1", "SE2"], "Offset": offset})))
+    assert outputFilename.read_bytes() == plainDump
+
+    assert _truncateToCompleteLines(outputFilename) == len(seReplicas["SE1"]) + len(seReplicas["SE2"])
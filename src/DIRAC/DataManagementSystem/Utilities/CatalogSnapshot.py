@@ -0,0 +1,353 @@
+""" Columnar snapshot of the replicas of SEs in the File Catalog, and its comparison with dumps of the SEs
+
+The snapshot is built from the CSV dump of the catalog produced by
+:py:meth:`~DIRAC.Resources.Catalog.FileCatalogClient.FileCatalogClient.getSEDump`.
+Its replicas are sorted by SE and LFN, and each attribute is stored in its own column, read through a memory map,
+so that only the pages which are used are loaded in memory.
+Comparing it with the dump of an SE is a merge join of the two sorted lists of files, so neither of them has to fit
+in memory: the SE dump is sorted beforehand with temporary files if needed.
+
+The snapshot file contains:
+
+  * the magic string ``DFCSNAP1`` and the length of the header, as a little endian 64 bits integer
+  * the header, in JSON: number of replicas, names of the SEs, byte order, and offset, length and type of the columns
+  * the columns, in the byte order of the machine which wrote them, each aligned on 8 bytes:
+
+    - SEIndex: index of the SE of the replica in the list of SE names (32 bits)
+    - Size: size of the file (64 bits)
+    - LFNOffsets, LFNs: the concatenated LFNs, and the offset of each of them (number of replicas + 1 offsets)
+    - ChecksumOffsets, Checksums: same for the checksums
+"""
+import csv
+import heapq
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from operator import itemgetter
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.Utilities.Adler import compareAdler
+
+SNAPSHOT_MAGIC = b"DFCSNAP1"
+# Maximum number of rows held in memory while sorting
+SORT_CHUNK_SIZE = 1000000
+# Number of rows kept in the column buffers before writing them
+WRITE_CHUNK_SIZE = 100000
+
+# (name, type code) of the columns, in the order of the file
+COLUMNS = (
+    ("SEIndex", "I"),
+    ("Size", "Q"),
+    ("LFNOffsets", "Q"),
+    ("LFNs", "B"),
+    ("ChecksumOffsets", "Q"),
+    ("Checksums", "B"),
+)
+
+# Differences between the catalog and an SE
+DARK = "Dark"
+LOST = "Lost"
+CHECKSUM_MISMATCH = "ChecksumMismatch"
+SIZE_MISMATCH = "SizeMismatch"
+
+# Sort key of the files read by readSEDump
+sortSEDumpKey = itemgetter(0)
+
+
+def externalSort(rows, chunkSize=SORT_CHUNK_SIZE, tmpDir=None, key=None):
+    """Sort rows which may not fit in memory: runs of chunkSize sorted rows are written in temporary files,
+    and merged while they are read back.
+
+    :param rows: iterable of tuples
+    :param int chunkSize: maximum number of rows held in memory
+    :param str tmpDir: directory of the temporary files
+    :param key: function giving the sort key of a row, the row itself by default
+
+    :returns: generator of the sorted rows
+    """
+    rows = iter(rows)
+    runs = []
+    try:
+        while True:
+            chunk = sorted(islice(rows, chunkSize), key=key)
+            if not chunk:
+                break
+            if not runs and len(chunk) < chunkSize:
+                # Everything fits in memory
+                yield from chunk
+                return
+            run = tempfile.TemporaryFile(dir=tmpDir)
+            runs.append(run)
+            for i in range(0, len(chunk), WRITE_CHUNK_SIZE):
+                pickle.dump(chunk[i : i + WRITE_CHUNK_SIZE], run, protocol=pickle.HIGHEST_PROTOCOL)
+            run.seek(0)
+            del chunk
+        yield from heapq.merge(*(_readRun(run) for run in runs), key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _readRun(run):
+    """Read back the rows written by externalSort"""
+    while True:
+        try:
+            rows = pickle.load(run)
+        except EOFError:
+            return
+        yield from rows
+
+
+def readCatalogDump(catalogDumpFilename):
+    """Read a dump of the catalog
+
+    :param str catalogDumpFilename: CSV file written by FileCatalogClient.getSEDump
+
+    :returns: generator of tuples (SE name, lfn as bytes, checksum, size)
+    """
+    with open(catalogDumpFilename, newline="", errors="surrogateescape") as catalogDump:
+        for seName, lfn, checksum, size in csv.reader(catalogDump, delimiter="|"):
+            yield seName, lfn.encode(errors="surrogateescape"), checksum, int(size or 0)
+
+
+def readSEDump(seDumpFilename, basePath=""):
+    """Read the dump of an SE, with one file per line. Each file can be followed by its checksum and its size,
+    separated with ';'
+
+    :param str seDumpFilename: dump of the SE
+    :param str basePath: path of the VO namespace on the SE, removed from the paths to get the LFNs
+
+    :returns: generator of tuples (lfn as bytes, checksum or None, size or None), to be sorted on the LFN only
+      with the key sortSEDumpKey, as the missing checksums and sizes cannot be compared
+    """
+    basePath = basePath.rstrip("/").encode()
+    with open(seDumpFilename, "rb") as seDump:
+        for line in seDump:
+            fields = line.rstrip(b"\r\n").split(b";")
+            path = fields[0]
+            if not path:
+                continue
+            if basePath and path.startswith(basePath + b"/"):
+                path = path[len(basePath) :]
+            checksum = fields[1].decode() if len(fields) > 1 and fields[1] else None
+            size = int(fields[2]) if len(fields) > 2 and fields[2] else None
+            yield path, checksum, size
+
+
+def writeCatalogSnapshot(catalogDumpFilename, snapshotFilename, chunkSize=SORT_CHUNK_SIZE):
+    """Build a snapshot from a dump of the catalog
+
+    :param str catalogDumpFilename: CSV file written by FileCatalogClient.getSEDump
+    :param str snapshotFilename: snapshot to write
+    :param int chunkSize: maximum number of replicas held in memory while sorting them
+
+    :returns: S_OK with the number of replicas in the snapshot
+    """
+    tmpDir = os.path.dirname(os.path.abspath(snapshotFilename))
+    columnFiles = {name: tempfile.TemporaryFile(dir=tmpDir) for name, _ in COLUMNS}
+    try:
+        seNames = []
+        nbReplicas = 0
+        lfnOffset = 0
+        checksumOffset = 0
+        buffers = _newColumnBuffers()
+        buffers["LFNOffsets"].append(0)
+        buffers["ChecksumOffsets"].append(0)
+        for seName, lfn, checksum, size in externalSort(readCatalogDump(catalogDumpFilename), chunkSize, tmpDir):
+            if not seNames or seNames[-1] != seName:
+                seNames.append(seName)
+            checksum = checksum.encode()
+            lfnOffset += len(lfn)
+            checksumOffset += len(checksum)
+            buffers["SEIndex"].append(len(seNames) - 1)
+            buffers["Size"].append(size)
+            buffers["LFNs"].extend(lfn)
+            buffers["LFNOffsets"].append(lfnOffset)
+            buffers["Checksums"].extend(checksum)
+            buffers["ChecksumOffsets"].append(checksumOffset)
+            nbReplicas += 1
+            if not nbReplicas % WRITE_CHUNK_SIZE:
+                _writeColumnBuffers(buffers, columnFiles)
+                buffers = _newColumnBuffers()
+        _writeColumnBuffers(buffers, columnFiles)
+
+        # The offsets of the columns are relative to the end of the header, as the header contains them
+        columns = {}
+        dataSize = 0
+        for name, typeCode in COLUMNS:
+            length = columnFiles[name].tell()
+            columns[name] = [dataSize, length, typeCode]
+            dataSize += _align(length)
+        header = json.dumps(
+            {"NbReplicas": nbReplicas, "SENames": seNames, "ByteOrder": sys.byteorder, "Columns": columns}
+        ).encode()
+
+        with open(snapshotFilename, "wb") as snapshot:
+            snapshot.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header)) + header)
+            snapshot.write(b"\0" * (_align(snapshot.tell()) - snapshot.tell()))
+            for name, _ in COLUMNS:
+                columnFile = columnFiles[name]
+                length = columnFile.tell()
+                columnFile.seek(0)
+                while data := columnFile.read(1 << 24):
+                    snapshot.write(data)
+                snapshot.write(b"\0" * (_align(length) - length))
+    except (OSError, ValueError) as e:
+        return S_ERROR(f"Failed to write the catalog snapshot: {e!r}")
+    finally:
+        for columnFile in columnFiles.values():
+            columnFile.close()
+    return S_OK(nbReplicas)
+
+
+def _newColumnBuffers():
+    return {name: array(typeCode) if typeCode != "B" else bytearray() for name, typeCode in COLUMNS}
+
+
+def _writeColumnBuffers(buffers, columnFiles):
+    for name, buffer in buffers.items():
+        columnFiles[name].write(buffer)
+
+
+def _align(position):
+    """Next multiple of 8"""
+    return (position + 7) & ~7
+
+
+class CatalogSnapshot:
+    """Read access to a snapshot written by :py:func:`writeCatalogSnapshot`. The replicas are read from the memory
+    mapped file, so the snapshot can be much bigger than the memory.
+    """
+
+    def __init__(self, snapshotFilename):
+        """:param str snapshotFilename: snapshot to read"""
+        with open(snapshotFilename, "rb") as snapshot:
+            magic, headerLength = struct.unpack("<8sQ", snapshot.read(16))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{snapshotFilename} is not a catalog snapshot")
+            header = json.loads(snapshot.read(headerLength))
+            if header["ByteOrder"] != sys.byteorder:
+                raise ValueError(f"{snapshotFilename} was written with the {header['ByteOrder']} endian byte order")
+            self.__mmap = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.seNames = header["SENames"]
+        self.__nbReplicas = header["NbReplicas"]
+        dataOffset = _align(16 + headerLength)
+        self.__buffer = memoryview(self.__mmap)
+        self.__columns = {}
+        for name, (offset, length, typeCode) in header["Columns"].items():
+            column = self.__buffer[dataOffset + offset : dataOffset + offset + length]
+            self.__columns[name] = column.cast(typeCode) if typeCode != "B" else column
+
+    def close(self):
+        """Release the memory map. The columns must not be used anymore"""
+        for column in self.__columns.values():
+            column.release()
+        self.__buffer.release()
+        self.__mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.__nbReplicas
+
+    def __lfn(self, index):
+        offsets = self.__columns["LFNOffsets"]
+        return self.__columns["LFNs"][offsets[index] : offsets[index + 1]].tobytes()
+
+    def __replica(self, index):
+        """Tuple (lfn as bytes, checksum, size) of a replica"""
+        offsets = self.__columns["ChecksumOffsets"]
+        checksum = self.__columns["Checksums"][offsets[index] : offsets[index + 1]].tobytes().decode()
+        return self.__lfn(index), checksum, self.__columns["Size"][index]
+
+    def getSERange(self, seName):
+        """Indices (start, end) of the replicas of an SE, (0, 0) if it is not in the snapshot"""
+        if seName not in self.seNames:
+            return 0, 0
+        seIndex = self.seNames.index(seName)
+        seIndices = self.__columns["SEIndex"]
+        return bisect_left(seIndices, seIndex), bisect_right(seIndices, seIndex)
+
+    def iterReplicas(self, seName):
+        """Generator of the replicas of an SE, as tuples (lfn as bytes, checksum, size) sorted by LFN"""
+        for index in range(*self.getSERange(seName)):
+            yield self.__replica(index)
+
+    def getReplica(self, seName, lfn):
+        """Find a replica with a binary search
+
+        :param str seName: SE of the replica
+        :param lfn: LFN, as str or bytes
+
+        :returns: tuple (checksum, size), or None if the replica is not in the snapshot
+        """
+        if isinstance(lfn, str):
+            lfn = lfn.encode(errors="surrogateescape")
+        start, end = self.getSERange(seName)
+        index = bisect_left(_LFNColumn(self.__lfn, end), lfn, start, end)
+        if index == end:
+            return None
+        replicaLFN, checksum, size = self.__replica(index)
+        return (checksum, size) if replicaLFN == lfn else None
+
+
+class _LFNColumn:
+    """Sequence of the LFNs, read only when they are needed by the binary search"""
+
+    def __init__(self, getLFN, length):
+        self.__getLFN = getLFN
+        self.__length = length
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, index):
+        return self.__getLFN(index)
+
+
+def compareWithSEDump(snapshot, seName, seFiles):
+    """Compare the replicas of an SE in a snapshot with the files found on the SE, with a merge join
+
+    :param snapshot: :py:class:`CatalogSnapshot`
+    :param str seName: SE to compare
+    :param seFiles: iterable of tuples (lfn as bytes, checksum or None, size or None) found on the SE, sorted by LFN,
+                    e.g. ``externalSort(readSEDump(seDumpFilename, basePath))``.
+                    The checksum and size are only compared if they are known on both sides.
+
+    :returns: generator of the differences, as tuples
+              (DARK|LOST|CHECKSUM_MISMATCH|SIZE_MISMATCH, lfn as bytes, catalog value, SE value)
+    """
+    replicas = snapshot.iterReplicas(seName)
+    replica = next(replicas, None)
+    previousLFN = None
+    for lfn, checksum, size in seFiles:
+        if lfn == previousLFN:
+            continue
+        previousLFN = lfn
+        while replica is not None and replica[0] < lfn:
+            yield LOST, replica[0], None, None
+            replica = next(replicas, None)
+        if replica is None or replica[0] != lfn:
+            yield DARK, lfn, None, None
+            continue
+        _, catalogChecksum, catalogSize = replica
+        if checksum and catalogChecksum and not compareAdler(checksum, catalogChecksum):
+            yield CHECKSUM_MISMATCH, lfn, catalogChecksum, checksum
+        if size is not None and size != catalogSize:
+            yield SIZE_MISMATCH, lfn, catalogSize, size
+        replica = next(replicas, None)
+    while replica is not None:
+        yield LOST, replica[0], None, None
+        replica = next(replicas, None)
@@ -0,0 +1,110 @@
+""" Test the catalog snapshot and its comparison with SE dumps
+"""
+# pylint: disable=redefined-outer-name
+import random
+
+import pytest
+
+from DIRAC.DataManagementSystem.Utilities import CatalogSnapshot as snapshotModule
+from DIRAC.DataManagementSystem.Utilities.CatalogSnapshot import (
+    CHECKSUM_MISMATCH,
+    DARK,
+    LOST,
+    SIZE_MISMATCH,
+    CatalogSnapshot,
+    compareWithSEDump,
+    externalSort,
+    readSEDump,
+    sortSEDumpKey,
+    writeCatalogSnapshot,
+)
+
+catalogReplicas = [("SE1", f"/vo/data/file{i:03}", f"{i:08x}", i) for i in range(200)]
+catalogReplicas += [("SE2", "/vo/data/fïle|1", "0000abcd", 10), ("SE2", "/vo/data/file0", "", 11)]
+catalogReplicas += [("SE0", f"/vo/data/file{i:03}", f"{i:08x}", i) for i in range(0, 200, 7)]
+
+
+@pytest.fixture
+def snapshotFile(tmp_path, monkeypatch):
+    """Snapshot written with several sorted runs and several column buffers"""
+    monkeypatch.setattr(snapshotModule, "WRITE_CHUNK_SIZE", 16)
+    catalogDump = tmp_path / "catalog.csv"
+    with open(catalogDump, "w") as fd:
+        for replica in random.Random(42).sample(catalogReplicas, len(catalogReplicas)):
+            fd.write('{}|"{}"|{}|{}\n'.format(*replica))
+    snapshotFile = tmp_path / "catalog.snapshot"
+    res = writeCatalogSnapshot(catalogDump, snapshotFile, chunkSize=50)
+    assert res["OK"], res["Message"]
+    assert res["Value"] == len(catalogReplicas)
+    return snapshotFile
+
+
+@pytest.mark.parametrize("chunkSize", [1, 7, 1000])
+def test_externalSort(chunkSize):
+    rows = [(random.random(), i) for i in range(100)]
+    assert list(externalSort(rows, chunkSize=chunkSize)) == sorted(rows)
+    assert not list(externalSort([], chunkSize=chunkSize))
+
+
+@pytest.mark.parametrize("chunkSize", [1, 1000])
+def test_externalSortSEDump(chunkSize, tmp_path):
+    """The same LFN can be listed several times, with or without its checksum and size"""
+    seDump = tmp_path / "se.dump"
+    seDump.write_bytes(b"/b;abc;3\n/a\n/a;abc;3\n/a;;4\n")
+    lfns = [row[0] for row in externalSort(readSEDump(seDump), chunkSize=chunkSize, key=sortSEDumpKey)]
+    assert lfns == [b"/a", b"/a", b"/a", b"/b"]
+
+
+def test_snapshot(snapshotFile):
+    with CatalogSnapshot(snapshotFile) as snapshot:
+        assert len(snapshot) == len(catalogReplicas)
+        assert snapshot.seNames == ["SE0", "SE1", "SE2"]
+        for seName in snapshot.seNames:
+            expected = sorted(
+                (lfn.encode(), checksum, size) for se, lfn, checksum, size in catalogReplicas if se == seName
+            )
+            assert list(snapshot.iterReplicas(seName)) == expected
+        assert not list(snapshot.iterReplicas("SE3"))
+
+        assert snapshot.getReplica("SE1", "/vo/data/file123") == ("0000007b", 123)
+        assert snapshot.getReplica("SE2", "/vo/data/fïle|1") == ("0000abcd", 10)
+        assert snapshot.getReplica("SE0", "/vo/data/file001") is None
+        assert snapshot.getReplica("SE0", "/vo/data/file999") is None
+        assert snapshot.getReplica("SE3", "/vo/data/file001") is None
+
+
+def test_invalidSnapshot(tmp_path):
+    notASnapshot = tmp_path / "notASnapshot"
+    notASnapshot.write_bytes(b"\0" * 100)
+    with pytest.raises(ValueError):
+        CatalogSnapshot(notASnapshot)
+
+
+def test_compareWithSEDump(snapshotFile, tmp_path):
+    seDump = tmp_path / "se.dump"
+    lines = [f"/base/vo/data/file{i:03};{i:08x};{i}" for i in range(5, 200)]
+    # Dark data, without checksum nor size
+    lines.append("/base/vo/data/dark")
+    # Size mismatch, the checksum only differs by its format
+    lines[10] = "/base/vo/data/file015;0xF;16"
+    # Duplicated entry
+    lines.append(lines[20])
+    seDump.write_text("\n".join(random.Random(1).sample(lines, len(lines))) + "\n")
+
+    with CatalogSnapshot(snapshotFile) as snapshot:
+        differences = list(
+            compareWithSEDump(
+                snapshot, "SE1", externalSort(readSEDump(seDump, "/base/"), chunkSize=30, key=sortSEDumpKey)
+            )
+        )
+    assert differences == [
+        (DARK, b"/vo/data/dark", None, None),
+    ] + [(LOST, f"/vo/data/file{i:03}".encode(), None, None) for i in range(5)] + [
+        (SIZE_MISMATCH, b"/vo/data/file015", 15, 16),
+    ]
+
+    # The checksum is only compared when it is known on both sides
+    seDump.write_text("/vo/data/file0;00000001;11\n/vo/data/fïle|1;abce\n")
+    with CatalogSnapshot(snapshotFile) as snapshot:
+        differences = list(compareWithSEDump(snapshot, "SE2", readSEDump(seDump)))
+    assert differences == [(CHECKSUM_MISMATCH, "/vo/data/fïle|1".encode(), "0000abcd", "abce")]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Compare the dump of a StorageElement with a snapshot of the File Catalog made by dirac-dms-create-catalog-snapshot.
+
+The SE dump contains one physical path per line, optionally followed by the checksum and the size separated by ';'.
+Neither the snapshot nor the dump are loaded in memory, so they can contain any number of files.
+
+The differences are written in CSV files named after the prefix (default: the SE name):
+  * <prefix>.dark.csv: files on the SE which are not in the catalog
+  * <prefix>.lost.csv: replicas in the catalog which are not on the SE
+  * <prefix>.mismatch.csv: files with a different checksum or size, with the catalog and SE values
+
+Beware that files created or removed between the dump of the SE and the snapshot are reported as differences.
+
+Example:
+  $ dirac-dms-compare-se-dump CERN-DST.snapshot CERN-DST-EOS CERN-DST-EOS.dump
+  Dark: 12
+  Lost: 3
+  ChecksumMismatch: 0
+  SizeMismatch: 1
+"""
+from DIRAC.Core.Base.Script import Script
+
+
+@Script()
+def main():
+    basePath = None
+    outputPrefix = None
+    Script.registerSwitch("b:", "BasePath=", "Path of the VO namespace in the SE dump (default from the SE config)")
+    Script.registerSwitch("p:", "Prefix=", "Prefix of the output files (default: the SE name)")
+    Script.registerArgument("Snapshot: catalog snapshot")
+    Script.registerArgument("SE:       StorageElement name")
+    Script.registerArgument("SEDump:   dump of the StorageElement")
+    Script.parseCommandLine(ignoreErrors=False)
+
+    for switch in Script.getUnprocessedSwitches():
+        if switch[0].lower() in ("b", "basepath"):
+            basePath = switch[1]
+        if switch[0].lower() in ("p", "prefix"):
+            outputPrefix = switch[1]
+    snapshotFilename, seName, seDumpFilename = Script.getPositionalArgs(group=True)
+
+    import csv
+    import os
+    import DIRAC
+    from DIRAC import gLogger
+    from DIRAC.DataManagementSystem.Utilities.CatalogSnapshot import (
+        CHECKSUM_MISMATCH,
+        DARK,
+        LOST,
+        SIZE_MISMATCH,
+        CatalogSnapshot,
+        compareWithSEDump,
+        externalSort,
+        readSEDump,
+        sortSEDumpKey,
+    )
+
+    if basePath is None:
+        from DIRAC.Resources.Storage.StorageElement import StorageElement
+
+        storages = list(StorageElement(seName).storages.values())
+        if not storages:
+            gLogger.error(f"No storage plugin for {seName}, the base path has to be given")
+            DIRAC.exit(2)
+        basePath = storages[0].basePath
+    if outputPrefix is None:
+        outputPrefix = seName
+
+    try:
+        snapshot = CatalogSnapshot(snapshotFilename)
+    except (OSError, ValueError) as e:
+        gLogger.error("Failed to open the snapshot", repr(e))
+        DIRAC.exit(1)
+    if seName not in snapshot.seNames:
+        gLogger.warn(f"{seName} has no replica in the snapshot")
+
+    counters = dict.fromkeys((DARK, LOST, CHECKSUM_MISMATCH, SIZE_MISMATCH), 0)
+    tmpDir = os.path.dirname(os.path.abspath(outputPrefix))
+    with snapshot, open(f"{outputPrefix}.dark.csv", "w") as darkFile, open(
+        f"{outputPrefix}.lost.csv", "w"
+    ) as lostFile, open(f"{outputPrefix}.mismatch.csv", "w") as mismatchFile:
+        writers = {DARK: csv.writer(darkFile), LOST: csv.writer(lostFile)}
+        writers[CHECKSUM_MISMATCH] = writers[SIZE_MISMATCH] = csv.writer(mismatchFile)
+        seFiles = externalSort(readSEDump(seDumpFilename, basePath), tmpDir=tmpDir, key=sortSEDumpKey)
+        for status, lfn, catalogValue, seValue in compareWithSEDump(snapshot, seName, seFiles):
+            counters[status] += 1
+            lfn = lfn.decode(errors="surrogateescape")
+            if status in (DARK, LOST):
+                writers[status].writerow([lfn])
+            else:
+                writers[status].writerow([status, lfn, catalogValue, seValue])
+
+    for status, count in counters.items():
+        gLogger.notice(f"{status}: {count}")
+    DIRAC.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Dump the replicas of StorageElements from the File Catalog into a snapshot, sorted by SE and LFN,
+which can then be compared with dumps of the StorageElements with dirac-dms-compare-se-dump
+
+Example:
+  $ dirac-dms-create-catalog-snapshot -o CERN-DST.snapshot CERN-DST-EOS CERN-MC-DST-EOS
+  Snapshot of 1234567 replicas written in CERN-DST.snapshot
+"""
+from DIRAC.Core.Base.Script import Script
+
+
+@Script()
+def main():
+    snapshotFilename = None
+    catalogDumpFilename = None
+    Script.registerSwitch("o:", "Output=", "Snapshot file to write (mandatory)")
+    Script.registerSwitch("d:", "CatalogDump=", "Use an existing dump of the catalog instead of getting it")
+    Script.registerArgument(["SE: StorageElement name"], mandatory=False)
+    Script.parseCommandLine(ignoreErrors=False)
+
+    for switch in Script.getUnprocessedSwitches():
+        if switch[0].lower() in ("o", "output"):
+            snapshotFilename = switch[1]
+        if switch[0].lower() in ("d", "catalogdump"):
+            catalogDumpFilename = switch[1]
+    seNames = Script.getPositionalArgs()
+
+    import os
+    import DIRAC
+    from DIRAC import gLogger
+    from DIRAC.DataManagementSystem.Utilities.CatalogSnapshot import writeCatalogSnapshot
+    from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+    if not snapshotFilename:
+        gLogger.error("The snapshot file has to be given")
+        DIRAC.exit(2)
+    if not seNames and not catalogDumpFilename:
+        gLogger.error("Either StorageElements or a catalog dump have to be given")
+        DIRAC.exit(2)
+
+    removeDump = False
+    if not catalogDumpFilename:
+        catalogDumpFilename = snapshotFilename + ".csv"
+        gLogger.notice(f"Getting the catalog dump of {','.join(seNames)}")
+        res = FileCatalogClient().getSEDump(seNames, catalogDumpFilename, compress=True)
+        if not res["OK"]:
+            gLogger.error("Failed to get the catalog dump", res["Message"])
+            DIRAC.exit(1)
+        removeDump = True
+
+    res = writeCatalogSnapshot(catalogDumpFilename, snapshotFilename)
+    if removeDump:
+        os.remove(catalogDumpFilename)
+    if not res["OK"]:
+        gLogger.error(res["Message"])
+        DIRAC.exit(1)
+    gLogger.notice(f"Snapshot of {res['Value']} replicas written in {snapshotFilename}")
+    DIRAC.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Repair the directory usage of the File Catalog for a subtree, online: the directories are
+checked and repaired a chunk at a time, pausing between the chunks
+
+Example:
+  $ dirac-dms-repair-directory-usage --ChunkSize=500 --Sleep=1 /lhcb/MC
+  Checked 123456 directories, repaired 12 usage entries
+"""
+from DIRAC.Core.Base.Script import Script
+
+
+@Script()
+def main():
+    chunkSize = 1000
+    sleepTime = 0.5
+    Script.registerSwitch("c:", "ChunkSize=", f"Number of directories repaired at a time [{chunkSize}]")
+    Script.registerSwitch("s:", "Sleep=", f"Seconds to wait between the chunks [{sleepTime}]")
+    Script.registerArgument("Path: top directory of the subtree")
+    Script.parseCommandLine(ignoreErrors=False)
+
+    for switch in Script.getUnprocessedSwitches():
+        if switch[0].lower() in ("c", "chunksize"):
+            chunkSize = int(switch[1])
+        if switch[0].lower() in ("s", "sleep"):
+            sleepTime = float(switch[1])
+    path = Script.getPositionalArgs(group=True)
+
+    import time
+    import DIRAC
+    from DIRAC import gLogger
+    from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+    fc = FileCatalogClient()
+    cursor = None
+    directories = 0
+    repaired = 0
+    while True:
+        res = fc.repairDirectoryUsage(path, cursor, chunkSize)
+        if not res["OK"]:
+            gLogger.error("Failed to repair the directory usage", res["Message"])
+            DIRAC.exit(1)
+        directories += res["Value"]["Directories"]
+        repaired += res["Value"]["Repaired"]
+        cursor = res["Value"]["Cursor"]
+        gLogger.verbose(f"Checked {directories} directories, repaired {repaired} usage entries")
+        if cursor is None:
+            break
+        time.sleep(sleepTime)
+
+    gLogger.notice(f"Checked {directories} directories, repaired {repaired} usage entries")
+    DIRAC.exit(0)
+
+
+if __name__ == "__main__":
+    main()
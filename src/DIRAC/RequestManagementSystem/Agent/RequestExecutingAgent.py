@@ -39,9 +39,11 @@ from DIRAC.Core.Base.AgentModule import AgentModule
 from DIRAC.Core.Utilities.ThreadScheduler import gThreadScheduler
 from DIRAC.Core.Utilities import Network, TimeUtilities
 from DIRAC.Core.Utilities.DErrno import cmpError
+from DIRAC.Core.Utilities.List import breakListIntoChunks
 from DIRAC.Core.Utilities.ProcessPool import ProcessPool
 from DIRAC.MonitoringSystem.Client.MonitoringReporter import MonitoringReporter
 from DIRAC.RequestManagementSystem.Client.ReqClient import ReqClient
+from DIRAC.RequestManagementSystem.private.RequestBatchTask import RequestBatchTask
 from DIRAC.RequestManagementSystem.private.RequestTask import RequestTask
 
 
@@ -63,6 +65,8 @@ OPERATIONTIMEOUT = 300
 POOLTIMEOUT = 900
 # # ProcessPool sleep time
 POOLSLEEP = 5
+# # maximal number of requests whose operations are executed in one go
+BATCHSIZE = 100
 
 
 class AgentConfigError(Exception):
@@ -109,6 +113,11 @@ class RequestExecutingAgent(AgentModule):
         self.__requestClient = None
         # Size of the bulk if use of getRequests. If 0, use getRequest
         self.__bulkRequest = 0
+        # If True, the workers keep their handlers and proxies across requests, and are fed without sleeping
+        self.__persistentWorkers = False
+        # Types of the operations executed in one go for several requests, and maximal number of requests per batch
+        self.__batchOperations = []
+        self.__batchSize = BATCHSIZE
         self.__rmsMonitoring = False
 
     def processPool(self):
@@ -216,6 +225,12 @@ class RequestExecutingAgent(AgentModule):
         self.log.info("ProcessPool sleep time = %d seconds" % self.__poolSleep)
         self.__bulkRequest = self.am_getOption("BulkRequest", self.__bulkRequest)
         self.log.info("Bulk request size = %d" % self.__bulkRequest)
+        self.__persistentWorkers = self.am_getOption("PersistentWorkers", self.__persistentWorkers)
+        self.log.info(f"Persistent workers = {self.__persistentWorkers}")
+        self.__batchOperations = self.am_getOption("BatchOperations", self.__batchOperations)
+        self.__batchSize = self.am_getOption("BatchSize", self.__batchSize)
+        if self.__batchOperations:
+            self.log.info(f"Operations executed in batches of {self.__batchSize} requests", self.__batchOperations)
         # Check if monitoring is enabled
         if "Monitoring" in Operations().getMonitoringBackends(monitoringType="RMSMonitoring"):
             # Enable RMS monitoring
@@ -314,9 +329,9 @@ class RequestExecutingAgent(AgentModule):
 
             self.log.info("execute: will execute requests ", f"{len(requestsToExecute)}")
 
-            for request in requestsToExecute:
-                # # set task id
-                taskID = request.RequestID
+            for requests in self.batchRequests(requestsToExecute):
+                # # set task id, a tuple for a batch of requests
+                taskID = requests[0].RequestID if len(requests) == 1 else tuple(req.RequestID for req in requests)
 
                 self.log.info(
                     "processPool status",
@@ -326,7 +341,8 @@ class RequestExecutingAgent(AgentModule):
 
                 looping = 0
                 while True:
-                    if not self.processPool().getFreeSlots():
+                    # persistent workers are fed through the bounded ProcessPool queue, enqueueing blocks when full
+                    if not self.__persistentWorkers and not self.processPool().getFreeSlots():
                         if not looping:
                             self.log.info(
                                 "No free slots available in processPool",
@@ -338,40 +354,62 @@ class RequestExecutingAgent(AgentModule):
                         if looping:
                             self.log.info("Free slot found", "after %d seconds" % looping * self.__poolSleep)
                         looping = 0
-                        # # save current request in cache
-                        res = self.cacheRequest(request)
-                        if not res["OK"]:
-                            if cmpError(res, errno.EALREADY):
-                                # The request is already in the cache, skip it. break out of the while loop to get next request
-                                break
-                            # There are too many requests in the cache, commit suicide
-                            self.log.error(
-                                "Too many requests in cache",
-                                "(%d requests): put back all requests and exit cycle. Error %s"
-                                % (len(self.__requestCache), res["Message"]),
-                            )
-                            self.putAllRequests()
-                            return res
+                        # # save current requests in cache
+                        cachedRequests = []
+                        for request in requests:
+                            res = self.cacheRequest(request)
+                            if not res["OK"]:
+                                if cmpError(res, errno.EALREADY):
+                                    # The request is already in the cache, skip it
+                                    continue
+                                # There are too many requests in the cache, commit suicide
+                                self.log.error(
+                                    "Too many requests in cache",
+                                    "(%d requests): put back all requests and exit cycle. Error %s"
+                                    % (len(self.__requestCache), res["Message"]),
+                                )
+                                self.putAllRequests()
+                                return res
+                            cachedRequests.append(request)
+                        if not cachedRequests:
+                            # break out of the while loop to get next requests
+                            break
+                        if len(cachedRequests) != len(requests):
+                            requests = cachedRequests
+                            taskID = tuple(req.RequestID for req in requests)
                         # # serialize to JSON
-                        result = request.toJSON()
-                        if not result["OK"]:
+                        requestJSONs = []
+                        for request in requests:
+                            result = request.toJSON()
+                            if not result["OK"]:
+                                break
+                            requestJSONs.append(result["Value"])
+                        if len(requestJSONs) != len(requests):
                             continue
-                        requestJSON = result["Value"]
-                        self.log.info("spawning task for request", f"'{request.RequestID}/{request.RequestName}'")
-                        timeOut = self.getTimeout(request)
+                        taskKwargs = {
+                            "handlersDict": self.handlersDict,
+                            "csPath": self.__configPath,
+                            "agentName": self.agentName,
+                            "rmsMonitoring": self.__rmsMonitoring,
+                            "persistent": self.__persistentWorkers,
+                        }
+                        if isinstance(taskID, tuple):
+                            self.log.info("spawning task for requests", f"{taskID}")
+                            taskClass = RequestBatchTask
+                            taskKwargs["requestJSONs"] = requestJSONs
+                        else:
+                            self.log.info("spawning task for request", f"'{request.RequestID}/{request.RequestName}'")
+                            taskClass = RequestTask
+                            taskKwargs["requestJSON"] = requestJSONs[0]
+                        timeOut = sum(self.getTimeout(request) for request in requests)
                         enqueue = self.processPool().createAndQueueTask(
-                            RequestTask,
-                            kwargs={
-                                "requestJSON": requestJSON,
-                                "handlersDict": self.handlersDict,
-                                "csPath": self.__configPath,
-                                "agentName": self.agentName,
-                                "rmsMonitoring": self.__rmsMonitoring,
-                            },
+                            taskClass,
+                            kwargs=taskKwargs,
                             taskID=taskID,
                             blocking=True,
                             usePoolCallbacks=True,
                             timeOut=timeOut,
+                            throttle=not self.__persistentWorkers,
                         )
                         if not enqueue["OK"]:
                             self.log.error("Could not enqueue task", enqueue["Message"])
@@ -379,21 +417,23 @@ class RequestExecutingAgent(AgentModule):
                             self.log.debug("successfully enqueued task", f"'{taskID}'")
                             # # update monitor
                             if self.__rmsMonitoring:
-                                self.rmsMonitoringReporter.addRecord(
-                                    {
-                                        "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
-                                        "host": Network.getFQDN(),
-                                        "objectType": "Request",
-                                        "status": "Attempted",
-                                        "objectID": request.RequestID,
-                                        "nbObject": 1,
-                                    }
-                                )
+                                for request in requests:
+                                    self.rmsMonitoringReporter.addRecord(
+                                        {
+                                            "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
+                                            "host": Network.getFQDN(),
+                                            "objectType": "Request",
+                                            "status": "Attempted",
+                                            "objectID": request.RequestID,
+                                            "nbObject": 1,
+                                        }
+                                    )
 
                             # # update request counter
-                            taskCounter += 1
+                            taskCounter += len(requests)
                             # # task created, a little time kick to proceed
-                            time.sleep(0.1)
+                            if not self.__persistentWorkers:
+                                time.sleep(0.1)
                             break
 
         self.log.info("Flushing callbacks", f"({len(self.__requestCache)} requests still in cache)")
@@ -408,6 +448,37 @@ class RequestExecutingAgent(AgentModule):
         # # clean return
         return S_OK()
 
+    def batchRequests(self, requests):
+        """group the requests whose next operations can be executed in one go
+
+        Operations can be executed together if they are of a type in BatchOperations, have the same SEs
+        and catalogs, and belong to requests of the same owner and group.
+
+        :param list requests: Request instances
+        :return: list of lists of requests, the requests that cannot be batched being alone in their list
+        """
+        batches = []
+        groups = {}
+        for request in requests:
+            operation = request.getWaiting().get("Value")
+            if not operation or operation.Type not in self.__batchOperations or operation.Status != "Waiting":
+                batches.append([request])
+                continue
+            key = (
+                operation.Type,
+                operation.SourceSE,
+                operation.TargetSE,
+                operation.Catalog,
+                request.Owner,
+                request.OwnerGroup,
+            )
+            groups.setdefault(key, []).append(request)
+        for group in groups.values():
+            batches.extend(breakListIntoChunks(group, max(1, self.__batchSize)))
+        if groups:
+            self.log.info("Requests batched", f"{len(requests)} requests in {len(batches)} tasks")
+        return batches
+
     def getTimeout(self, request):
         """get timeout for request"""
         timeout = 0
@@ -433,9 +504,16 @@ class RequestExecutingAgent(AgentModule):
     def resultCallback(self, taskID, taskResult):
         """definition of request callback function
 
-        :param str taskID: Request.RequestID
-        :param dict taskResult: task result S_OK(Request)/S_ERROR(Message)
+        :param taskID: Request.RequestID, or tuple of them for a batch
+        :param dict taskResult: task result S_OK(Request)/S_ERROR(Message), or S_OK({RequestID: result}) for a batch
         """
+        if isinstance(taskID, tuple):
+            for requestID in taskID:
+                if taskResult["OK"]:
+                    self.resultCallback(requestID, taskResult["Value"].get(requestID, S_ERROR("No result")))
+                else:
+                    self.resultCallback(requestID, taskResult)
+            return
         # # clean cache
         res = self.putRequest(taskID, taskResult)
         self.log.info(
@@ -453,11 +531,12 @@ class RequestExecutingAgent(AgentModule):
     def exceptionCallback(self, taskID, taskException):
         """definition of exception callback function
 
-        :param str taskID: Request.RequestID
+        :param taskID: Request.RequestID, or tuple of them for a batch
         :param Exception taskException: Exception instance
         """
         self.log.error("exceptionCallback:", f"{taskID} was hit by exception {taskException}")
-        self.putRequest(taskID)
+        for requestID in taskID if isinstance(taskID, tuple) else [taskID]:
+            self.putRequest(requestID)
 
     def __rmsMonitoringReporting(self):
         """This method is called by the ThreadScheduler as a periodic task in order to commit the collected data which
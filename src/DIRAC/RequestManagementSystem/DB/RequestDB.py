@@ -14,7 +14,6 @@
 """
 import datetime
 import errno
-import random
 
 from sqlalchemy import (
     TEXT,
@@ -333,10 +332,93 @@ class RequestDB:
     #     finally:
     #       session.close()
 
+    def __selectWaitingRequests(self, session, numberOfRequest, claim):
+        """Select the Waiting requests that have been waiting the longest
+
+        :param session: session in which the selection is done
+        :param int numberOfRequest: maximum number of requests
+        :param bool claim: if True, the selected requests are set Assigned in the same transaction,
+                           skipping the ones locked by concurrent claims, so that no request is claimed twice
+
+        :returns: list of RequestIDs
+        """
+        now = datetime.datetime.utcnow().replace(microsecond=0)
+        query = (
+            session.query(Request.RequestID)  # pylint: disable=no-member
+            .filter(Request._Status == "Waiting")  # pylint: disable=no-member
+            .filter(Request._NotBefore < now)  # pylint: disable=no-member
+            .order_by(Request._LastUpdate)  # pylint: disable=no-member
+            .limit(numberOfRequest)
+        )
+        if claim:
+            query = query.with_for_update(skip_locked=True)
+        requestIDs = [ridTuple[0] for ridTuple in query.all()]
+
+        if claim and requestIDs:
+            session.execute(
+                update(Request)
+                .where(Request.RequestID.in_(requestIDs))  # pylint: disable=no-member
+                .values(
+                    {
+                        Request._Status: "Assigned",  # pylint: disable=no-member
+                        Request._LastUpdate: datetime.datetime.utcnow(),  # pylint: disable=no-member
+                    }
+                )
+                .execution_options(synchronize_session=False)
+            )
+        # Release the locks as soon as possible
+        session.commit()
+        return requestIDs
+
+    def __releaseRequests(self, session, requestIDs):
+        """Set back to Waiting the requests claimed by __selectWaitingRequests, when they could not be loaded,
+        so that they are not left Assigned with nobody to process them
+
+        :param session: session in which the requests were claimed
+        :param list requestIDs: RequestIDs of the claimed requests
+        """
+        try:
+            session.execute(
+                update(Request)
+                .where(Request.RequestID.in_(requestIDs))  # pylint: disable=no-member
+                .where(Request._Status == "Assigned")  # pylint: disable=no-member
+                .values({Request._Status: "Waiting"})  # pylint: disable=no-member
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.log.exception("Could not release the claimed requests", f"{requestIDs}", lException=e)
+
+    def __loadRequests(self, session, requestIDs):
+        """Load requests with all their operations and files in a single query
+
+        :returns: a dictionary of Request objects indexed on the RequestID, detached from the session
+        """
+        # the joinedload is to force the non-lazy loading of all the attributes, especially _parent
+        requests = (
+            session.query(Request)
+            .options(joinedload(Request.__operations__).joinedload(Operation.__files__))  # pylint: disable=no-member
+            .filter(Request.RequestID.in_(requestIDs))  # pylint: disable=no-member
+            .all()
+        )
+        session.expunge_all()
+
+        for request in requests:
+            # FIXME: code for backward compatibility
+            if not request.Owner:
+                # We go under the assumption that in this case OwnerDN exists
+                res = getDNForUsername(request.OwnerDN)
+                if not res["OK"]:
+                    raise RuntimeError(res["Message"])
+                request.Owner = res["Value"][0]
+            # ##
+        return {request.RequestID: request for request in requests}
+
     def getRequest(self, reqID=0, assigned=True):
         """read request for execution
 
-        :param reqID: request's ID (default 0) If 0, take a pseudo random one
+        :param reqID: request's ID (default 0) If 0, take the Waiting request that has been waiting the longest
 
         """
 
@@ -344,12 +426,9 @@ class RequestDB:
         session = self.DBSession(expire_on_commit=False)
         log = self.log.getSubLogger("getRequest" if assigned else "peekRequest")
 
-        requestID = None
-
+        claimedIDs = []
         try:
             if reqID:
-                requestID = reqID
-
                 log.verbose(f"selecting request '{reqID}'{' (Assigned)' if assigned else ''}")
                 status = None
                 try:
@@ -364,52 +443,30 @@ class RequestDB:
                 if status and status == "Assigned" and assigned:
                     return S_ERROR(f"getRequest: status of request '{reqID}' is 'Assigned', request cannot be selected")
 
-            else:
-                now = datetime.datetime.utcnow().replace(microsecond=0)
-                reqIDs = set()
-                try:
-                    reqAscIDs = (
-                        session.query(Request.RequestID)  # pylint: disable=no-member
-                        .filter(Request._Status == "Waiting")  # pylint: disable=no-member
-                        .filter(Request._NotBefore < now)  # pylint: disable=no-member
-                        .order_by(Request._LastUpdate)  # pylint: disable=no-member
-                        .limit(100)
-                        .all()
-                    )
-
-                    reqIDs = {reqID[0] for reqID in reqAscIDs}
-
-                    reqDescIDs = (
-                        session.query(Request.RequestID)  # pylint: disable=no-member
-                        .filter(Request._Status == "Waiting")  # pylint: disable=no-member
-                        .filter(Request._NotBefore < now)  # pylint: disable=no-member
-                        .order_by(Request._LastUpdate.desc())  # pylint: disable=no-member
-                        .limit(50)
-                        .all()
+                if assigned:
+                    session.execute(
+                        update(Request)
+                        .where(Request.RequestID == reqID)  # pylint: disable=no-member
+                        .values(
+                            {
+                                Request._Status: "Assigned",  # pylint: disable=no-member
+                                Request._LastUpdate: datetime.datetime.utcnow(),  # pylint: disable=no-member
+                            }
+                        )
                     )
+                    session.commit()
+                requestIDs = [reqID]
 
-                    reqIDs |= {reqID[0] for reqID in reqDescIDs}
+            else:
+                requestIDs = self.__selectWaitingRequests(session, 1, claim=assigned)
                 # No Waiting requests
-                except NoResultFound:
-                    return S_OK()
-
-                if not reqIDs:
+                if not requestIDs:
                     return S_OK()
+                if assigned:
+                    claimedIDs = requestIDs
 
-                reqIDs = list(reqIDs)
-                random.shuffle(reqIDs)
-                requestID = reqIDs[0]
-
-            # If we are here, the request MUST exist, so no try catch
-            # the joinedload is to force the non-lazy loading of all the attributes, especially _parent
-            request = (
-                session.query(Request)
-                .options(
-                    joinedload(Request.__operations__).joinedload(Operation.__files__)  # pylint: disable=no-member
-                )
-                .filter(Request.RequestID == requestID)  # pylint: disable=no-member
-                .one()
-            )
+            # If we are here, the request MUST exist
+            request = self.__loadRequests(session, requestIDs)[requestIDs[0]]
 
             if not reqID:
                 log.verbose(
@@ -417,35 +474,13 @@ class RequestDB:
                     % (request.RequestID, request.RequestName, " (Assigned)" if assigned else "")
                 )
 
-            if assigned:
-                session.execute(
-                    update(Request)
-                    .where(Request.RequestID == requestID)  # pylint: disable=no-member
-                    .values(
-                        {
-                            Request._Status: "Assigned",  # pylint: disable=no-member
-                            Request._LastUpdate: datetime.datetime.utcnow(),  # pylint: disable=no-member
-                        }
-                    )
-                )
-                session.commit()
-
-            session.expunge_all()
-
-            # FIXME: code for backward compatibility
-            if not request.Owner:
-                # We go under the assumption that in this case OwnerDN exists
-                res = getDNForUsername(request.OwnerDN)
-                if not res["OK"]:
-                    return res
-                request.Owner = res["Value"][0]
-            # ##
-
             return S_OK(request)
 
         except Exception as e:
             session.rollback()
             log.exception("getRequest: unexpected exception", lException=e)
+            if claimedIDs:
+                self.__releaseRequests(session, claimedIDs)
             return S_ERROR(f"getRequest: unexpected exception : {e}")
         finally:
             session.close()
@@ -453,6 +488,10 @@ class RequestDB:
     def getBulkRequests(self, numberOfRequest=10, assigned=True):
         """read as many requests as requested for execution
 
+        The requests are claimed atomically: they are selected and set Assigned in one transaction, skipping
+        the ones locked by a concurrent claim, so that several agents never get the same request.
+        Only then are the claimed requests loaded, all together.
+
         :param int numberOfRequest: Number of Request we want (default 10)
         :param bool assigned: if True, the status of the selected requests are set to assign
 
@@ -466,56 +505,22 @@ class RequestDB:
 
         requestDict = {}
 
+        claimedIDs = []
         try:
-            # If we are here, the request MUST exist, so no try catch
-            # the joinedload is to force the non-lazy loading of all the attributes, especially _parent
-            try:
-                now = datetime.datetime.utcnow().replace(microsecond=0)
-                requestIDs = (
-                    session.query(Request.RequestID)  # pylint: disable=no-member
-                    .with_for_update()
-                    .filter(Request._Status == "Waiting")  # pylint: disable=no-member
-                    .filter(Request._NotBefore < now)  # pylint: disable=no-member
-                    .order_by(Request._LastUpdate)  # pylint: disable=no-member
-                    .limit(numberOfRequest)
-                    .all()
-                )
-
-                requestIDs = [ridTuple[0] for ridTuple in requestIDs]
-                log.debug(f"Got request ids {requestIDs}")
-
-                requests = (
-                    session.query(Request)
-                    .options(
-                        joinedload(Request.__operations__).joinedload(Operation.__files__)  # pylint: disable=no-member
-                    )
-                    .filter(Request.RequestID.in_(requestIDs))  # pylint: disable=no-member
-                    .all()
-                )
-                log.debug(f"Got {len(requests)} Request objects ")
-                requestDict = {req.RequestID: req for req in requests}
-            # No Waiting requests
-            except NoResultFound:
-                pass
-
-            if assigned and requestDict:
-                session.execute(
-                    update(Request)
-                    .where(Request.RequestID.in_(requestDict.keys()))  # pylint: disable=no-member
-                    .values(
-                        {
-                            Request._Status: "Assigned",  # pylint: disable=no-member
-                            Request._LastUpdate: datetime.datetime.utcnow(),  # pylint: disable=no-member
-                        }
-                    )
-                )
-            session.commit()
+            requestIDs = self.__selectWaitingRequests(session, numberOfRequest, claim=assigned)
+            log.debug(f"Got request ids {requestIDs}")
+            if assigned:
+                claimedIDs = requestIDs
 
-            session.expunge_all()
+            if requestIDs:
+                requestDict = self.__loadRequests(session, requestIDs)
+                log.debug(f"Got {len(requestDict)} Request objects ")
 
         except Exception as e:
             session.rollback()
             log.exception("unexpected exception", lException=e)
+            if claimedIDs:
+                self.__releaseRequests(session, claimedIDs)
             return S_ERROR(f"getBulkRequest: unexpected exception : {e}")
         finally:
             session.close()
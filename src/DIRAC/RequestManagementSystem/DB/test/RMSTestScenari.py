@@ -166,3 +166,47 @@ def test_dirty(reqDB):
 
     delete = reqDB.deleteRequest(reqID)
     assert delete["OK"], delete
+
+
+def test_claimRequests(reqDB):
+    """Successive claims never return the same request, and peeking does not claim"""
+
+    reqIDs = set()
+    for i in range(STRESS_REQUESTS):
+        request = Request({"RequestName": "claim-%d" % i})
+        op = Operation({"Type": "RemoveReplica", "TargetSE": "CERN-USER"})
+        op += File({"LFN": "/lhcb/user/c/cibak/foo"})
+        request += op
+        put = reqDB.putRequest(request)
+        assert put["OK"], put
+        reqIDs.add(put["Value"])
+
+    time.sleep(1)
+
+    peek = reqDB.getBulkRequests(STRESS_REQUESTS, False)
+    assert peek["OK"], peek
+    assert set(peek["Value"]) == reqIDs
+
+    claimed = []
+    while True:
+        get = reqDB.getBulkRequests(3, True)
+        assert get["OK"], get
+        if not get["Value"]:
+            break
+        assert len(get["Value"]) <= 3
+        for reqID, request in get["Value"].items():
+            # The whole request is loaded
+            assert len(request) == 1 and len(request[0]) == 1
+            claimed.append(reqID)
+
+    assert sorted(claimed) == sorted(reqIDs)
+    for reqID in reqIDs:
+        status = reqDB.getRequestStatus(reqID)
+        assert status["OK"], status
+        assert status["Value"] == "Assigned"
+
+    assert reqDB.getRequest()["Value"] is None
+
+    for reqID in reqIDs:
+        delete = reqDB.deleteRequest(reqID)
+        assert delete["OK"], delete
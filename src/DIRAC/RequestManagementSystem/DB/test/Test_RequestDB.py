@@ -3,17 +3,21 @@ it replaces the normal MySQL connection with an inmemory SQLite db
 """
 
 # pylint: disable=invalid-name,wrong-import-position
+import time
 from unittest.mock import patch
 from pytest import fixture
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from DIRAC import gLogger, S_OK
+from DIRAC import gLogger, S_ERROR, S_OK
 
+from DIRAC.RequestManagementSystem.Client.Operation import Operation
+from DIRAC.RequestManagementSystem.Client.Request import Request
 from DIRAC.RequestManagementSystem.DB import RequestDB
 
 from DIRAC.RequestManagementSystem.DB.test.RMSTestScenari import (  # pylint: disable=unused-import
+    test_claimRequests,
     test_dirty,
     test_scheduled,
     test_stress,
@@ -39,3 +43,25 @@ def reqDB(mocker, request):
         db.createTables()
 
         yield db
+
+
+def test_claimReleasedOnLoadFailure(reqDB, mocker):
+    """Requests claimed but that cannot be loaded are set back to Waiting"""
+    mocker.patch("DIRAC.RequestManagementSystem.DB.RequestDB.getDNForUsername", return_value=S_ERROR("No user"))
+
+    reqIDs = []
+    for i in range(2):
+        request = Request({"RequestName": f"release-{i}", "OwnerDN": "/unknown/DN"})
+        request += Operation({"Type": "RemoveReplica", "TargetSE": "CERN-USER"})
+        put = reqDB.putRequest(request)
+        assert put["OK"], put
+        reqIDs.append(put["Value"])
+
+    time.sleep(1)
+
+    assert not reqDB.getBulkRequests(10, True)["OK"]
+    assert not reqDB.getRequest()["OK"]
+    for reqID in reqIDs:
+        status = reqDB.getRequestStatus(reqID)
+        assert status["OK"], status
+        assert status["Value"] == "Waiting"
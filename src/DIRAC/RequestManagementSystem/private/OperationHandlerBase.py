@@ -18,6 +18,7 @@
     * self.rssClient() -- returns RSSClient
     * self.getProxyForLFN( LFN ) -- sets X509_USER_PROXY environment variable to LFN owner proxy
     * self.rssSEStatus( SE, status ) returns S_OK(True/False) depending of RSS :status:
+    * self.executeBatch( operations ) -- executes compatible operations of several requests in one go
 
     Properties:
 
@@ -27,7 +28,8 @@
     * self.log -- own sub logger
     * self.request, self.operation -- reference to Operation and Request itself
 
-    In all inherited class one should overwrite __call__ and initialize, when appropriate.
+    In all inherited class one should overwrite __call__ and initialize, when appropriate, and executeBatch
+    for the handlers that can issue a single bulk call for operations of several requests.
 
 """
 
@@ -268,6 +270,23 @@ class OperationHandlerBase(metaclass=DynamicProps):
         """
         raise NotImplementedError("Implement me please!")
 
+    def executeBatch(self, operations):
+        """execute operations of different requests with the same type, SEs and owner
+
+        This default implementation executes them one after the other. Handlers able to issue bulk
+        catalog or SE calls for all the files of the operations should overwrite it. In any case, the
+        results are set in the files of each operation, so they are put back with their own request.
+
+        :param list operations: Operation instances, all of them having Waiting files
+        :return: S_OK/S_ERROR
+        """
+        for operation in operations:
+            self.setOperation(operation)
+            exe = self()
+            if not exe["OK"]:
+                self.log.error("unable to process operation", f"{operation.Type}: {exe['Message']}")
+        return S_OK()
+
     def createRMSRecord(self, status, nbObject):
         """
         This method is used to create a record given some parameters for sending it to the ES backend.
@@ -0,0 +1,156 @@
+""" :mod: RequestBatchTask
+
+    ======================
+
+    .. module: RequestBatchTask
+
+    :synopsis: processing task for a batch of requests
+
+    processing task to be used inside ProcessTask created in RequestExecutingAgent
+
+    The requests of a batch have compatible next operations (same type, same SEs, same owner and group),
+    which are executed in one go by the executeBatch method of their handler. Each request then goes on
+    with its other operations as in a RequestTask.
+"""
+from DIRAC import S_ERROR, S_OK, gConfig, gLogger
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.Core.Utilities import Network, TimeUtilities
+from DIRAC.RequestManagementSystem.private.RequestTask import RequestTask
+
+
+class RequestBatchTask:
+    """
+    .. class:: RequestBatchTask
+
+    processing task for requests whose next operations are executed in one go
+    """
+
+    def __init__(
+        self,
+        requestJSONs,
+        handlersDict,
+        csPath,
+        agentName,
+        standalone=False,
+        requestClient=None,
+        rmsMonitoring=False,
+        persistent=False,
+    ):
+        """c'tor
+
+        :param self: self reference
+        :param list requestJSONs: requests serialized to JSON
+        :param dict handlersDict: operation handlers
+
+        The other parameters are the ones of :py:class:`~DIRAC.RequestManagementSystem.private.RequestTask.RequestTask`
+        """
+        self.tasks = [
+            RequestTask(
+                requestJSON,
+                handlersDict,
+                csPath,
+                agentName,
+                standalone=standalone,
+                requestClient=requestClient,
+                rmsMonitoring=rmsMonitoring,
+                persistent=persistent,
+            )
+            for requestJSON in requestJSONs
+        ]
+        # # the operations executed in one go, one per request
+        self.operations = []
+        self.standalone = standalone
+        self.rmsMonitoring = rmsMonitoring
+        self.log = gLogger.getSubLogger(f"RequestBatchTask/{self.tasks[0].request.RequestName}")
+
+    def __addOperationRecord(self, task, operation, status):
+        """add an ES record for the operation if the monitoring is enabled"""
+        if self.rmsMonitoring:
+            task.rmsMonitoringReporter.addRecord(
+                {
+                    "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
+                    "host": Network.getFQDN(),
+                    "objectType": "Operation",
+                    "operationType": task.getPluginName(task.handlersDict.get(operation.Type)),
+                    "objectID": getattr(operation, "OperationID", 0),
+                    "parentID": getattr(operation, "RequestID", 0),
+                    "status": status,
+                    "nbObject": 1,
+                }
+            )
+
+    def executeBatch(self):
+        """execute the next operation of all the requests with a single call to their handler
+
+        :return: S_OK/S_ERROR, the results being in the operations themselves
+        """
+        # # same owner and group for all of them
+        leader = self.tasks[0]
+        setupProxy = leader.setupProxy()
+        if not setupProxy["OK"]:
+            return setupProxy
+
+        operations = []
+        for task in self.tasks:
+            operation = task.request.getWaiting()
+            if not operation["OK"] or not operation["Value"]:
+                return S_ERROR(f"no waiting operation in request {task.request.RequestID}")
+            operations.append(operation["Value"])
+        self.operations = operations
+
+        handler = leader.getHandler(operations[0])
+        if not handler["OK"]:
+            return handler
+        handler = handler["Value"]
+        handler.shifter = setupProxy["Value"]["Shifter"]
+        handler.rmsMonitoring = self.rmsMonitoring
+        for task, operation in zip(self.tasks, operations):
+            self.__addOperationRecord(task, operation, "Attempted")
+
+        # Always use server certificates if executed within an agent
+        useServerCertificate = gConfig.useServerCertificate() if self.standalone else True
+        # Always use request owner proxy
+        if useServerCertificate:
+            gConfigurationData.setOptionInCFG("/DIRAC/Security/UseServerCertificate", "false")
+        try:
+            self.log.info("executing operations in one go", f"{len(operations)} {operations[0].Type}")
+            exe = handler.executeBatch(operations)
+        finally:
+            if useServerCertificate:
+                gConfigurationData.setOptionInCFG("/DIRAC/Security/UseServerCertificate", "true")
+
+        for task, operation in zip(self.tasks, operations):
+            if operation.Status in ("Done", "Failed"):
+                self.__addOperationRecord(task, operation, "Successful" if operation.Status == "Done" else "Failed")
+        return exe
+
+    def __call__(self):
+        """batch processing
+
+        :return: S_OK( { RequestID: S_OK(Request)/S_ERROR } )
+        """
+        try:
+            exe = self.executeBatch()
+        except Exception as e:
+            exe = S_ERROR(repr(e))
+            self.log.exception("hit by exception:", exe["Message"])
+        if not exe["OK"]:
+            # # the requests are then executed one by one
+            self.log.error("Unable to execute the operations in one go", exe["Message"])
+
+        results = {}
+        for task, operation in zip(self.tasks, self.operations if exe["OK"] else [None] * len(self.tasks)):
+            if operation and operation.Status == "Waiting":
+                # # the batched operation could not be completed: is the job of the request still there?
+                task.checkJobExists(operation)
+                if operation.Status == "Failed":
+                    self.__addOperationRecord(task, operation, "Failed")
+            if operation and operation.Status in ("Waiting", "Scheduled"):
+                # # no need to go further
+                if self.rmsMonitoring:
+                    task.rmsMonitoringReporter.commit()
+                results[task.request.RequestID] = S_OK(task.request)
+            else:
+                # # the request goes on with its other operations, and is put back if Done
+                results[task.request.RequestID] = task()
+        return S_OK(results)
@@ -27,6 +27,14 @@ from DIRAC.RequestManagementSystem.Client.Request import Request
 from DIRAC.RequestManagementSystem.private.OperationHandlerBase import OperationHandlerBase
 from DIRAC.WorkloadManagementSystem.Client.JobMonitoringClient import JobMonitoringClient
 
+# # time left a shifter proxy must have to be reused
+SHIFTER_PROXY_TIME_LEFT = 1200
+# # maximal time the shifter proxies are reused by a persistent worker, so that CS changes are picked up
+SHIFTER_PROXY_CACHE_TIME = 3600
+
+# # state kept by a persistent worker process across its tasks (see the persistent argument of RequestTask)
+_workerState = {"Handlers": {}, "Managers": {}, "ManagersExpiry": 0, "RequestClient": None}
+
 
 class RequestTask:
     """
@@ -36,13 +44,23 @@ class RequestTask:
     """
 
     def __init__(
-        self, requestJSON, handlersDict, csPath, agentName, standalone=False, requestClient=None, rmsMonitoring=False
+        self,
+        requestJSON,
+        handlersDict,
+        csPath,
+        agentName,
+        standalone=False,
+        requestClient=None,
+        rmsMonitoring=False,
+        persistent=False,
     ):
         """c'tor
 
         :param self: self reference
         :param str requestJSON: request serialized to JSON
         :param dict opHandlers: operation handlers
+        :param bool persistent: if True, the operation handlers, the shifter proxies and the request client
+                                are kept by the worker process for its next tasks
         """
         self.request = Request(requestJSON)
         # # csPath
@@ -55,13 +73,19 @@ class RequestTask:
         self.handlersDict = handlersDict
         # # handlers class def
         self.handlers = {}
+        # # persistent worker flag
+        self.persistent = persistent
+        if self.persistent:
+            self.handlers = _workerState["Handlers"]
         # # own sublogger
         self.log = gLogger.getSubLogger(f"pid_{os.getpid()}/{self.request.RequestName}")
         # # get shifters info
         self.__managersDict = {}
-        shifterProxies = self.__setupManagerProxies()
-        if not shifterProxies["OK"]:
-            self.log.error("Cannot setup shifter proxies", shifterProxies["Message"])
+        # # a persistent worker sets them up once in setupProxy
+        if not self.persistent:
+            shifterProxies = self.__setupManagerProxies()
+            if not shifterProxies["OK"]:
+                self.log.error("Cannot setup shifter proxies", shifterProxies["Message"])
 
         #  This flag which is set and sent from the RequestExecutingAgent and is False by default.
         self.rmsMonitoring = rmsMonitoring
@@ -69,13 +93,23 @@ class RequestTask:
         if self.rmsMonitoring:
             self.rmsMonitoringReporter = MonitoringReporter(monitoringType="RMSMonitoring")
 
-        if requestClient is None:
-            self.requestClient = ReqClient()
-        else:
+        if requestClient is not None:
             self.requestClient = requestClient
+        elif self.persistent:
+            if not _workerState["RequestClient"]:
+                _workerState["RequestClient"] = ReqClient()
+            self.requestClient = _workerState["RequestClient"]
+        else:
+            self.requestClient = ReqClient()
 
     def __setupManagerProxies(self):
-        """setup grid proxy for all defined managers"""
+        """setup grid proxy for all defined managers
+
+        A persistent worker reuses the proxies it got until the first of them is about to expire
+        """
+        if self.persistent and time.time() < _workerState["ManagersExpiry"]:
+            self.__managersDict = dict(_workerState["Managers"])
+            return S_OK()
         oHelper = Operations()
         shifters = oHelper.getSections("Shifter")
         if not shifters["OK"]:
@@ -98,12 +132,12 @@ class RequestTask:
             if vomsAttr:
                 self.log.debug(f"getting VOMS [{vomsAttr}] proxy for shifter {userName}@{userGroup} ({userDN})")
                 getProxy = gProxyManager.downloadVOMSProxyToFile(
-                    userDN, userGroup, requiredTimeLeft=1200, cacheTime=4 * 43200
+                    userDN, userGroup, requiredTimeLeft=SHIFTER_PROXY_TIME_LEFT, cacheTime=4 * 43200
                 )
             else:
                 self.log.debug(f"getting proxy for shifter {userName}@{userGroup} ({userDN})")
                 getProxy = gProxyManager.downloadProxyToFile(
-                    userDN, userGroup, requiredTimeLeft=1200, cacheTime=4 * 43200
+                    userDN, userGroup, requiredTimeLeft=SHIFTER_PROXY_TIME_LEFT, cacheTime=4 * 43200
                 )
             if not getProxy["OK"]:
                 return S_ERROR(f"unable to setup shifter proxy for {shifter}: {getProxy['Message']}")
@@ -117,6 +151,14 @@ class RequestTask:
                 "Chain": chain,
                 "ProxyFile": fileName,
             }
+        if self.persistent:
+            cacheTime = SHIFTER_PROXY_CACHE_TIME
+            for creds in self.__managersDict.values():
+                timeLeft = creds["Chain"].getRemainingSecs()
+                if timeLeft["OK"]:
+                    cacheTime = min(cacheTime, timeLeft["Value"] - SHIFTER_PROXY_TIME_LEFT)
+            _workerState["Managers"] = dict(self.__managersDict)
+            _workerState["ManagersExpiry"] = time.time() + cacheTime
         return S_OK()
 
     def setupProxy(self):
@@ -207,18 +249,22 @@ class RequestTask:
 
     def getHandler(self, operation):
         """return instance of a handler for a given operation type on demand
-            all created handlers are kept in self.handlers dict for further use
+            all created handlers are kept in self.handlers dict for further use,
+            which a persistent worker shares between its tasks.
+            The handlers are kept per VO of the request owner, since their DataManager
+            and FileCatalog are those of the VO of the proxy they were created with
 
         :param ~Operation.Operation operation: Operation instance
         """
         if operation.Type not in self.handlersDict:
             return S_ERROR(f"handler for operation '{operation.Type}' not set")
-        handler = self.handlers.get(operation.Type, None)
+        handlerKey = (operation.Type, Registry.getVOForGroup(self.request.OwnerGroup))
+        handler = self.handlers.get(handlerKey, None)
         if not handler:
             try:
                 handlerClass = self.loadHandler(self.handlersDict[operation.Type])
-                self.handlers[operation.Type] = handlerClass(csPath=f"{self.csPath}/OperationHandlers/{operation.Type}")
-                handler = self.handlers[operation.Type]
+                self.handlers[handlerKey] = handlerClass(csPath=f"{self.csPath}/OperationHandlers/{operation.Type}")
+                handler = self.handlers[handlerKey]
             except (ImportError, AttributeError, TypeError) as error:
                 self.log.exception("Error getting Handler", str(error))
                 return S_ERROR(str(error))
@@ -234,6 +280,28 @@ class RequestTask:
             self.log.error("Cannot updateRequest", updateRequest["Message"])
         return updateRequest
 
+    def checkJobExists(self, operation):
+        """fail the operation, and so the request, if the job of the request does not exist anymore
+
+        :param operation: operation that could not be completed
+        """
+        if not self.request.JobID:
+            return
+        monitorServer = JobMonitoringClient(useCertificates=True)
+        res = monitorServer.getJobSummary(int(self.request.JobID))
+        if not res["OK"]:
+            self.log.error("RequestTask: Failed to get job status", "%d" % self.request.JobID)
+        elif not res["Value"]:
+            self.log.warn(
+                "RequestTask: job does not exist (anymore): failed request",
+                "JobID: %d" % self.request.JobID,
+            )
+            for opFile in operation:
+                opFile.Status = "Failed"
+            if operation.Status != "Failed":
+                operation.Status = "Failed"
+            self.request.Error = "Job no longer exists"
+
     def __call__(self):
         """request processing"""
 
@@ -340,22 +408,7 @@ class RequestTask:
                             }
                         )
 
-                    if self.request.JobID:
-                        # Check if the job exists
-                        monitorServer = JobMonitoringClient(useCertificates=True)
-                        res = monitorServer.getJobSummary(int(self.request.JobID))
-                        if not res["OK"]:
-                            self.log.error("RequestTask: Failed to get job status", "%d" % self.request.JobID)
-                        elif not res["Value"]:
-                            self.log.warn(
-                                "RequestTask: job does not exist (anymore): failed request",
-                                "JobID: %d" % self.request.JobID,
-                            )
-                            for opFile in operation:
-                                opFile.Status = "Failed"
-                            if operation.Status != "Failed":
-                                operation.Status = "Failed"
-                            self.request.Error = "Job no longer exists"
+                    self.checkJobExists(operation)
             except Exception as e:
                 # We can't do except Exception as error
                 # because it masks the local variable
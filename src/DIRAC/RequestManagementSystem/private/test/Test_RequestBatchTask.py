@@ -0,0 +1,95 @@
+""" Test the RequestBatchTask: the operations of the requests are executed by a single handler call,
+and each request gets its own result
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.RequestManagementSystem.Client.File import File
+from DIRAC.RequestManagementSystem.Client.Operation import Operation
+from DIRAC.RequestManagementSystem.Client.Request import Request
+from DIRAC.RequestManagementSystem.private.RequestBatchTask import RequestBatchTask
+from DIRAC.RequestManagementSystem.private import RequestTask as RequestTaskModule
+from DIRAC.RequestManagementSystem.private.RequestTask import RequestTask
+
+
+def _requestJSON(requestID, lfns, jobID=0):
+    request = Request({"RequestName": f"batch{requestID}", "Owner": "owner", "OwnerGroup": "group", "JobID": jobID})
+    request.RequestID = requestID
+    for opType in ("RemoveFile", "ForwardDISET"):
+        operation = Operation({"Type": opType})
+        for lfn in lfns:
+            operation.addFile(File({"LFN": lfn}))
+        request.addOperation(operation)
+    return request.toJSON()["Value"]
+
+
+@pytest.fixture
+def batchTask(monkeypatch):
+    monkeypatch.setattr(RequestTask, "_RequestTask__setupManagerProxies", lambda self: S_OK())
+    monkeypatch.setattr(RequestTask, "setupProxy", lambda self: S_OK({"Shifter": [], "ProxyFile": None}))
+    handler = MagicMock()
+
+    def executeBatch(operations):
+        # The first request is done with its first operation, the second one has to retry
+        for opFile in operations[0]:
+            opFile.Status = "Done"
+        return S_OK()
+
+    handler.executeBatch.side_effect = executeBatch
+    monkeypatch.setattr(RequestTask, "getHandler", lambda self, operation: S_OK(handler))
+    executed = []
+    monkeypatch.setattr(RequestTask, "__call__", lambda self: executed.append(self.request.RequestID) or S_OK("Done"))
+
+    task = RequestBatchTask(
+        [_requestJSON(1, ["/vo/file1"]), _requestJSON(2, ["/vo/file2"], jobID=123)],
+        {"RemoveFile": "RemoveFile"},
+        "csPath",
+        "RequestManagement/RequestExecutingAgent",
+        requestClient=MagicMock(),
+    )
+    return task, handler, executed
+
+
+def test_batch(batchTask, monkeypatch):
+    task, handler, executed = batchTask
+    jobMonitoring = MagicMock()
+    jobMonitoring.return_value.getJobSummary.return_value = S_OK({123: {"Status": "Running"}})
+    monkeypatch.setattr(RequestTaskModule, "JobMonitoringClient", jobMonitoring)
+    result = task()
+    assert result["OK"]
+    handler.executeBatch.assert_called_once()
+    assert len(handler.executeBatch.call_args[0][0]) == 2
+
+    # The first request goes on with its next operation, the second one is given back as it is
+    assert executed == [1]
+    assert result["Value"][1] == S_OK("Done")
+    assert result["Value"][2]["OK"]
+    assert result["Value"][2]["Value"].RequestID == 2
+
+
+def test_batchFailure(batchTask):
+    """If the batch cannot be executed, the requests are executed one by one"""
+    task, handler, executed = batchTask
+    handler.executeBatch.side_effect = RuntimeError("boom")
+    result = task()
+    assert result["OK"]
+    assert executed == [1, 2]
+
+
+def test_batchJobGone(batchTask, monkeypatch):
+    """A request whose operation could not be completed fails if its job does not exist anymore"""
+    task, handler, executed = batchTask
+    jobMonitoring = MagicMock()
+    jobMonitoring.return_value.getJobSummary.return_value = S_OK({})
+    monkeypatch.setattr(RequestTaskModule, "JobMonitoringClient", jobMonitoring)
+    result = task()
+    assert result["OK"]
+    jobMonitoring.return_value.getJobSummary.assert_called_once_with(123)
+    request = task.tasks[1].request
+    assert request.Status == "Failed"
+    assert request.Error == "Job no longer exists"
+    assert [opFile.Status for opFile in request[0]] == ["Failed"]
+    # It is put back as a failed request
+    assert executed == [1, 2]
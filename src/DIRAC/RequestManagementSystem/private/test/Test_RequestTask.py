@@ -72,6 +72,65 @@ class RequestTaskTests(unittest.TestCase):
         ret = self.task.setupProxy()
         print(ret)
 
+    def testPersistent(self):
+        """persistent tasks share the handlers and the shifter proxies of their worker"""
+        rt = importlib.import_module("DIRAC.RequestManagementSystem.private.RequestTask")
+        rt.Operations = self.mockOps
+        rt.Registry = MagicMock()
+        rt.Registry.getDNForUsername.return_value = {"OK": True, "Value": ["/DN/fstagni"]}
+        rt.Registry.getVOMSAttributeForGroup.return_value = None
+        rt.Registry.getVOForGroup.return_value = "vo"
+        chain = MagicMock()
+        chain.getRemainingSecs.return_value = {"OK": True, "Value": 86400}
+        rt.gProxyManager = MagicMock()
+        rt.gProxyManager.downloadProxyToFile.return_value = {"OK": True, "Value": "/tmp/proxy", "chain": chain}
+        rt._workerState.update({"Handlers": {}, "Managers": {}, "ManagersExpiry": 0, "RequestClient": None})
+
+        tasks = []
+        for _ in range(2):
+            task = RequestTask(
+                self.req.toJSON()["Value"],
+                self.handlersDict,
+                "csPath",
+                "RequestManagement/RequestExecutingAgent",
+                requestClient=self.mockRC,
+                persistent=True,
+            )
+            task.loadHandler = Mock(return_value=Mock())
+            ret = task.setupProxy()
+            self.assertEqual(ret["OK"], True, "setupProxy failed")
+            self.assertEqual(ret["Value"]["Shifter"], ["DataProcessing", "DataManager"])
+            ret = task.getHandler(task.request[0])
+            self.assertEqual(ret["OK"], True, "getHandler failed")
+            tasks.append(task)
+
+        # # the shifter proxies were set up once, and the handler was created once
+        self.assertEqual(rt.gProxyManager.downloadProxyToFile.call_count, 2)
+        tasks[0].loadHandler.assert_called_once()
+        tasks[1].loadHandler.assert_not_called()
+        self.assertIs(tasks[0].handlers, tasks[1].handlers)
+
+        # # until the proxies are about to expire
+        rt._workerState["ManagersExpiry"] = 0
+        tasks[1].setupProxy()
+        self.assertEqual(rt.gProxyManager.downloadProxyToFile.call_count, 4)
+
+        # # a request of another VO gets its own handler
+        rt.Registry.getVOForGroup.return_value = "otherVO"
+        task = RequestTask(
+            self.req.toJSON()["Value"],
+            self.handlersDict,
+            "csPath",
+            "RequestManagement/RequestExecutingAgent",
+            requestClient=self.mockRC,
+            persistent=True,
+        )
+        task.loadHandler = Mock(return_value=Mock())
+        ret = task.getHandler(task.request[0])
+        self.assertEqual(ret["OK"], True, "getHandler failed")
+        task.loadHandler.assert_called_once()
+        self.assertEqual(len(rt._workerState["Handlers"]), 2)
+
 
 # # tests execution
 if __name__ == "__main__":
@@ -1,15 +1,23 @@
 """ The FileCatalogClient is a class representing the client of the DIRAC File Catalog
 """
+import io
 import json
 import os
+import zlib
 
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Tornado.Client.ClientSelector import TransferClientSelector as TransferClient
+from DIRAC.Core.Utilities.List import breakListIntoChunks
 
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getVOMSAttributeForGroup, getDNForUsername
 from DIRAC.Resources.Catalog.Utilities import checkCatalogArguments
 from DIRAC.Resources.Catalog.FileCatalogClientBase import FileCatalogClientBase
 
+# Number of files asked for in each page of the paged directory operations
+DEFAULT_PAGE_SIZE = 10000
+# Number of files whose relatives are asked for in each call of the chunked lineage operations
+DEFAULT_LINEAGE_CHUNK_SIZE = 1000
+
 
 class FileCatalogClient(FileCatalogClientBase):
     """Client code to the DIRAC File Catalogue"""
@@ -86,6 +94,7 @@ class FileCatalogClient(FileCatalogClientBase):
         "deleteGroup",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "repairDirectoryUsage",
     ]
 
     NO_LFN_METHODS = [
@@ -112,6 +121,7 @@ class FileCatalogClient(FileCatalogClientBase):
         "deleteGroup",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "repairDirectoryUsage",
     ]
 
     ADMIN_METHODS = [
@@ -124,6 +134,7 @@ class FileCatalogClient(FileCatalogClientBase):
         "getCatalogCounters",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "repairDirectoryUsage",
     ]
 
     def __init__(self, url=None, **kwargs):
@@ -533,6 +544,18 @@ class FileCatalogClient(FileCatalogClientBase):
         """Repair the catalog inconsistencies"""
         return self._getRPC(timeout=timeout).repairCatalog()
 
+    def repairDirectoryUsage(self, path, cursor=None, chunkSize=1000, timeout=120):
+        """Repair the usage of a chunk of the directories of a subtree, online
+
+        :param str path: top directory of the subtree
+        :param cursor: cursor returned with the previous chunk, None for the first chunk
+        :param int chunkSize: maximum number of directories in the chunk
+
+        :return: S_OK(dict) indexed "Directories", "Repaired", the number of usage entries corrected,
+                 and "Cursor", for the next chunk, None after the last chunk
+        """
+        return self._getRPC(timeout=timeout).repairDirectoryUsage(path, cursor, chunkSize)
+
     ########################################################################
     # Metadata Catalog Operations
     #
@@ -657,7 +680,7 @@ class FileCatalogClient(FileCatalogClientBase):
 
     #############################################################################
 
-    def getSEDump(self, seNames, outputFilename):
+    def getSEDump(self, seNames, outputFilename, compress=False, resume=False):
         """
         Dump the content of SEs in the given file.
         The file contains a list of [SEName, lfn,checksum,size] dumped as csv,
@@ -665,18 +688,174 @@ class FileCatalogClient(FileCatalogClientBase):
 
         :param seName: list of StorageElement names
         :param outputFilename: path to the file where to dump it
+        :param bool compress: compress the dump while it is transferred. The file is written uncompressed
+        :param bool resume: if the file exists, only get the lines that are not in it yet, e.g. to
+                            complete the dump after a transfer error. The dump has to be of the same SEs.
 
         :returns: result from the TransferClient
         """
         if isinstance(seNames, str):
             seNames = seNames.split(",")
 
-        seNames = json.dumps(seNames)
+        offset = 0
+        if resume and os.path.exists(outputFilename):
+            offset = _truncateToCompleteLines(outputFilename)
+
+        if compress or offset:
+            seDumpArgs = json.dumps({"SENames": seNames, "Offset": offset, "Compress": compress})
+        else:
+            # Understood by the services that do not have the options
+            seDumpArgs = json.dumps(seNames)
 
         dfc = TransferClient(self.serverURL, timeout=20000)
-        return dfc.receiveFile(outputFilename, seNames)
+        if not compress and not offset:
+            return dfc.receiveFile(outputFilename, seDumpArgs)
+        with open(outputFilename, "ab" if offset else "wb") as outputFile:
+            if not compress:
+                return dfc.receiveFile(outputFile, seDumpArgs)
+            decompressingWriter = _GzipDecompressingWriter(outputFile)
+            result = dfc.receiveFile(decompressingWriter, seDumpArgs)
+        if result["OK"] and not decompressingWriter.complete:
+            return S_ERROR("Incomplete SE dump, it can be completed with resume=True")
+        return result
 
     @checkCatalogArguments
     def getDirectoryDump(self, lfns, timeout=120):
         """Get the content of a directory recursively"""
         return self._getRPC(timeout=timeout).getDirectoryDump(lfns)
+
+    ########################################################################
+    #
+    # Paged directory operations, to get directories of any size with bounded memory.
+    # They are generators yielding S_OK(page) for each page, or a S_ERROR which ends the iteration.
+    #
+
+    def _getPages(self, methodName, path, pageSize, *args, timeout=120):
+        """Call a paged method of the service until the last page, yielding the result for each page"""
+        rpcClient = self._getRPC(timeout=timeout)
+        cursor = None
+        while True:
+            result = getattr(rpcClient, methodName)(path, cursor, pageSize, *args)
+            if not result["OK"]:
+                yield result
+                return
+            cursor = result["Value"].pop("Cursor")
+            yield result
+            if cursor is None:
+                return
+
+    def listDirectoryPages(self, path, verbose=False, pageSize=DEFAULT_PAGE_SIZE, timeout=120):
+        """List the contents of a directory page by page, the files being in the order of their registration
+
+        :param str path: directory
+        :param bool verbose: as for listDirectory
+        :param int pageSize: number of files per page, which can be limited by the service
+
+        :returns: generator of S_OK(dict) indexed "Files", "SubDirs", "Links" and "Datasets", as the values of
+                  listDirectory. Only the first page contains the subdirectories, links and datasets
+        """
+        for result in self._getPages("listDirectoryPage", path, pageSize, verbose, timeout=timeout):
+            if result["OK"]:
+                # Force returned directory entries to be LFNs
+                for entryType in ["Files", "SubDirs", "Links"]:
+                    entryDict = result["Value"][entryType]
+                    for fname in list(entryDict):
+                        entryDict[os.path.join(path, os.path.basename(fname))] = entryDict.pop(fname)
+            yield result
+
+    def getDirectoryReplicasPages(self, path, allStatus=False, pageSize=DEFAULT_PAGE_SIZE, timeout=120):
+        """Get the replicas of the files of a directory page by page
+
+        :param str path: directory
+        :param bool allStatus: as for getDirectoryReplicas
+        :param int pageSize: number of files per page, which can be limited by the service
+
+        :returns: generator of S_OK({lfn: {SE: PFN}}), as the values of getDirectoryReplicas
+        """
+        for result in self._getPages("getDirectoryReplicasPage", path, pageSize, allStatus, timeout=timeout):
+            if result["OK"]:
+                replicas = {}
+                for fname, detailsDict in result["Value"]["Replicas"].items():
+                    lfn = f"{path}/{os.path.basename(fname)}"
+                    # Add the LFN as value for each SE which does not have a PFN
+                    replicas[lfn] = {se: pfn or lfn for se, pfn in detailsDict.items()}
+                result = S_OK(replicas)
+            yield result
+
+    def getDirectoryDumpPages(self, path, pageSize=DEFAULT_PAGE_SIZE, timeout=120):
+        """Get the content of a directory recursively, page by page
+
+        :param str path: directory
+        :param int pageSize: number of files, and of subdirectories, per page, which can be limited by the service
+
+        :returns: generator of S_OK(dict) indexed "Files" and "SubDirs", as the values of getDirectoryDump
+        """
+        yield from self._getPages("getDirectoryDumpPage", path, pageSize, timeout=timeout)
+
+    ########################################################################
+    #
+    # Chunked lineage operations, to get the relatives of any number of files with bounded memory.
+    # They are generators yielding the result of the call for each chunk of files.
+    #
+
+    def getFileAncestorsChunks(self, lfns, depths, chunkSize=DEFAULT_LINEAGE_CHUNK_SIZE, timeout=120):
+        """Get the ancestors of many files, chunk by chunk of files
+
+        :param list lfns: files
+        :param depths: as for getFileAncestors
+        :param int chunkSize: number of files per call
+
+        :returns: generator of S_OK with Successful and Failed for the files of each chunk, as getFileAncestors
+        """
+        for lfnChunk in breakListIntoChunks(lfns, chunkSize):
+            yield self.getFileAncestors(lfnChunk, depths, timeout=timeout)
+
+    def getFileDescendentsChunks(self, lfns, depths, chunkSize=DEFAULT_LINEAGE_CHUNK_SIZE, timeout=120):
+        """Get the descendants of many files, chunk by chunk of files
+
+        :param list lfns: files
+        :param depths: as for getFileDescendents
+        :param int chunkSize: number of files per call
+
+        :returns: generator of S_OK with Successful and Failed for the files of each chunk, as getFileDescendents
+        """
+        for lfnChunk in breakListIntoChunks(lfns, chunkSize):
+            yield self.getFileDescendents(lfnChunk, depths, timeout=timeout)
+
+
+def _truncateToCompleteLines(filename):
+    """Remove the incomplete last line of a file, if any
+
+    :returns: the number of lines in the file
+    """
+    nbLines = 0
+    size = 0
+    with open(filename, "rb") as fd:
+        for line in fd:
+            if not line.endswith(b"\n"):
+                break
+            nbLines += 1
+            size += len(line)
+    os.truncate(filename, size)
+    return nbLines
+
+
+class _GzipDecompressingWriter(io.RawIOBase):
+    """Writable file object decompressing a gzip stream into another file object, as it is received"""
+
+    def __init__(self, outputFile):
+        super().__init__()
+        self.__outputFile = outputFile
+        self.__decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.__outputFile.write(self.__decompressor.decompress(data))
+        return len(data)
+
+    @property
+    def complete(self):
+        """Whether the end of the gzip stream was received"""
+        return self.__decompressor.eof
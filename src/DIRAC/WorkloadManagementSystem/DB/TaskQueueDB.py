@@ -1,7 +1,10 @@
 """ TaskQueueDB class is a front-end to the task queues db
 """
+import heapq
 import random
 import string
+import threading
+import time
 from collections import defaultdict
 from typing import Any
 
@@ -59,6 +62,7 @@ class TaskQueueDB(DB):
         self.__jobPriorityBoundaries = (0.001, 10)
         self.__groupShares = {}
         self.__deleteTQWithDelay = DictCache(self.__deleteTQIfEmpty)
+        self.__matchIndex = None
         self.__opsHelper = Operations()
         self.__sharesCorrector = SharesCorrector(self.__opsHelper)
         result = self.__initializeDB()
@@ -76,6 +80,57 @@ class TaskQueueDB(DB):
             return result
         return S_OK([row[0] for row in result["Value"]])
 
+    def enableMatchIndex(self, refreshPeriod=5):
+        """Keep an in-memory index of the task queues, used by matchAndGetJob to find the matching
+        task queues without querying the DB (see TaskQueueMatchIndex)
+
+        :param int refreshPeriod: seconds between the loads of the task queues created or deleted by other processes
+        """
+        self.__matchIndex = TaskQueueMatchIndex(refreshPeriod)
+        return self.__refreshMatchIndex()
+
+    def __refreshMatchIndex(self):
+        """Load the new task queues in the match index, and remove the deleted ones"""
+        index = self.__matchIndex
+        result = self._query("SELECT TQId, Owner, OwnerGroup, CPUTime, Priority, Enabled FROM `tq_TaskQueues`")
+        if not result["OK"]:
+            return result
+        tqRecords = result["Value"]
+        newTQIds = [str(record[0]) for record in tqRecords if record[0] not in index]
+        multiValues = defaultdict(dict)
+        if newTQIds:
+            for field in multiValueDefFields:
+                result = self._query(
+                    f"SELECT TQId, Value FROM `tq_TQTo{field}` WHERE TQId in ( {', '.join(newTQIds)} )"
+                )
+                if not result["OK"]:
+                    return result
+                for tqId, value in result["Value"]:
+                    multiValues[tqId].setdefault(field, []).append(value)
+        index.update(tqRecords, multiValues)
+        self.log.verbose("Refreshed the task queue match index", f"{len(index)} TQs, {len(newTQIds)} new")
+        return S_OK()
+
+    def __matchTaskQueuesInIndex(self, tqMatchDict, numQueuesToGet, negativeCond):
+        """Get the task queues matching a resource from the match index
+
+        :returns: S_OK( [ ( tqId, Owner, OwnerGroup ) ] ) / S_OK( None ) if the index can't be used / S_ERROR
+        """
+        index = self.__matchIndex
+        # Only one thread refreshes the index, the others use it as it is meanwhile
+        if index.isOutdated() and index.refreshLock.acquire(blocking=False):
+            try:
+                result = self.__refreshMatchIndex()
+            finally:
+                index.refreshLock.release()
+            if not result["OK"]:
+                self.log.warn("Could not refresh the task queue match index", result["Message"])
+                if not index.lastRefresh:
+                    return S_OK(None)
+        elif not index.lastRefresh:
+            return S_OK(None)
+        return index.match(tqMatchDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
+
     def isSharesCorrectionEnabled(self):
         return self.__getCSOption("EnableSharesCorrection", False)
 
@@ -115,7 +170,7 @@ class TaskQueueDB(DB):
                 "RealPriority": "FLOAT NOT NULL",
             },
             "PrimaryKey": "JobId",
-            "Indexes": {"TaskIndex": ["TQId"]},
+            "Indexes": {"TaskIndex": ["TQId"], "TaskPriorityIndex": ["TQId", "Priority"]},
             "ForeignKeys": {"TQId": "tq_TaskQueues.TQId"},
         }
 
@@ -320,6 +375,8 @@ class TaskQueueDB(DB):
         result = self._update(f"DELETE FROM `tq_TaskQueues` WHERE TQId in ( {','.join(orphanedTQs)} )", conn=connObj)
         if not result["OK"]:
             return result
+        if self.__matchIndex is not None:
+            self.__matchIndex.removeTaskQueues([int(tqId) for tqId in orphanedTQs])
         return S_OK()
 
     def __setTaskQueueEnabled(self, tqId, enabled=True, connObj=False):
@@ -513,24 +570,45 @@ ORDER BY COUNT( `tq_Jobs`.JobID ) ASC"
             return S_OK({"found": False})
         return S_OK({"found": True, "tqId": data[0][1], "enabled": data[0][2], "jobs": data[0][0]})
 
-    def matchAndGetJob(self, tqMatchDict, numJobsPerTry=50, numQueuesPerTry=10, negativeCond=None):
+    def matchAndGetJob(self, tqMatchDict, numJobsPerTry=50, numQueuesPerTry=10, negativeCond=None, atomicMatch=None):
         """Match a job based on requirements
 
         :param dict tqDefDict: dict for TQ definition
+        :param bool atomicMatch: claim the job with a locking read skipping the jobs locked by concurrent matches,
+                                 instead of picking among several candidates and retrying on collisions.
+                                 If None, taken from the JobScheduling/AtomicJobMatching option.
+                                 The job is always claimed this way when the match index is enabled
         :returns: S_OK() / S_ERROR
         """
         if negativeCond is None:
             negativeCond = {}
+        if atomicMatch is None:
+            atomicMatch = self.__getCSOption("AtomicJobMatching", False)
         # Make a copy to avoid modification of original if escaping needs to be done
         tqMatchDict = dict(tqMatchDict)
+        # The match index works on the values as they are
+        rawMatchDict = dict(tqMatchDict)
         retVal = self._checkMatchDefinition(tqMatchDict)
         if not retVal["OK"]:
             self.log.error("TQ match request check failed", retVal["Message"])
             return retVal
+        tqList = None
+        if self.__matchIndex is not None and "JobID" not in tqMatchDict:
+            retVal = self.__matchTaskQueuesInIndex(rawMatchDict, numQueuesPerTry, negativeCond)
+            if not retVal["OK"]:
+                return retVal
+            tqList = retVal["Value"]
+            if tqList == []:
+                self.log.info("No TQ matches requirements")
+                return S_OK({"matchFound": False, "tqMatch": tqMatchDict})
         retVal = self._getConnection()
         if not retVal["OK"]:
             return S_ERROR(f"Can't connect to DB: {retVal['Message']}")
         connObj = retVal["Value"]
+        if tqList:
+            return self.__claimJobFromTaskQueues(tqList, tqMatchDict, connObj)
+        if atomicMatch:
+            return self.__matchAndClaimJob(tqMatchDict, numQueuesPerTry, negativeCond, connObj)
         preJobSQL = "SELECT `tq_Jobs`.JobId, `tq_Jobs`.TQId \
 FROM `tq_Jobs` WHERE `tq_Jobs`.TQId = %s AND `tq_Jobs`.Priority = %s"
         prioSQL = "SELECT `tq_Jobs`.Priority FROM `tq_Jobs` \
@@ -593,6 +671,106 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
         self.log.info(f"Could not find a match after {self.__maxMatchRetry} match retries")
         return S_ERROR(f"Could not find a match after {self.__maxMatchRetry} match retries")
 
+    def __matchAndClaimJob(self, tqMatchDict, numQueuesPerTry, negativeCond, connObj):
+        """Match a job based on requirements, claiming it atomically
+
+        The matching task queues are selected as in matchAndGetJob, but the job is then
+        selected and removed from the task queue within a single transaction, using a locking
+        read that skips the jobs already locked by concurrent matches. Concurrent matches
+        therefore never collide on the same job and no retry is needed.
+
+        :param dict tqMatchDict: checked dict of the resource description
+        :param int numQueuesPerTry: number of matching task queues to consider
+        :param negativeCond: extra negative conditions for the task queues
+        :param connObj: DB connection
+        :returns: S_OK() / S_ERROR
+        """
+        if tqMatchDict.get("JobID"):
+            # A certain JobID is required by the resource, so all TQ are to be considered
+            retVal = self.matchAndGetTaskQueue(tqMatchDict, numQueuesToGet=0, skipMatchDictDef=True, connObj=connObj)
+        else:
+            retVal = self.matchAndGetTaskQueue(
+                tqMatchDict,
+                numQueuesToGet=numQueuesPerTry,
+                skipMatchDictDef=True,
+                negativeCond=negativeCond,
+                connObj=connObj,
+            )
+        if not retVal["OK"]:
+            return retVal
+        tqList = retVal["Value"]
+        if not tqList:
+            self.log.info("No TQ matches requirements")
+            return S_OK({"matchFound": False, "tqMatch": tqMatchDict})
+        return self.__claimJobFromTaskQueues(tqList, tqMatchDict, connObj)
+
+    def __claimJobFromTaskQueues(self, tqList, tqMatchDict, connObj):
+        """Claim a job from the first of the given task queues that has one
+
+        :param list tqList: ( tqId, Owner, OwnerGroup ) of the task queues, by order of preference
+        :param dict tqMatchDict: checked dict of the resource description
+        :param connObj: DB connection
+        :returns: S_OK() / S_ERROR
+        """
+        jobId = tqMatchDict.get("JobID")
+        prioSQL = "SELECT `tq_Jobs`.Priority FROM `tq_Jobs` \
+WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
+        for tqId, tqOwner, tqOwnerGroup in tqList:
+            retVal = self._query(prioSQL % tqId, conn=connObj)
+            if not retVal["OK"]:
+                return S_ERROR(f"Can't retrieve winning priority for matching job: {retVal['Message']}")
+            if not retVal["Value"]:
+                self.log.info("Task queue seems to be empty, triggering a cleaning of", tqId)
+                self.__deleteTQWithDelay.add(tqId, 300, (tqId, tqOwner, tqOwnerGroup))
+                continue
+            prio = retVal["Value"][0][0]
+            retVal = self.__claimJobFromTaskQueue(tqId, prio, jobId=jobId, connObj=connObj)
+            if not retVal["OK"]:
+                return retVal
+            if retVal["Value"]:
+                claimedJobId = retVal["Value"]
+                self.log.info("Claimed job with prio from TQ", f"({claimedJobId} : {prio} : {tqId})")
+                self.__deleteTQWithDelay.add(tqId, 300, (tqId, tqOwner, tqOwnerGroup))
+                return S_OK({"matchFound": True, "jobId": claimedJobId, "taskQueueId": tqId, "tqMatch": tqMatchDict})
+            self.log.verbose("All the jobs of the TQ are being matched concurrently", tqId)
+        return S_OK({"matchFound": False, "tqMatch": tqMatchDict})
+
+    def __claimJobFromTaskQueue(self, tqId, priority, jobId=None, connObj=False):
+        """Select and delete a job of a task queue within a single transaction
+
+        The jobs locked by other transactions are skipped (this requires MySQL >= 8.0),
+        so that concurrent claims on the same task queue get different jobs.
+
+        :param int tqId: task queue ID
+        :param int priority: priority of the job to claim
+        :param int jobId: if given, only this job can be claimed
+        :param connObj: DB connection
+        :returns: S_OK(jobId) / S_OK(None) if no job could be claimed / S_ERROR
+        """
+        jobCond = f"AND `tq_Jobs`.JobId = {int(jobId)}" if jobId else ""
+        claimSQL = f"SELECT `tq_Jobs`.JobId FROM `tq_Jobs` \
+WHERE `tq_Jobs`.TQId = {tqId} AND `tq_Jobs`.Priority = {priority} {jobCond} \
+ORDER BY `tq_Jobs`.JobId ASC LIMIT 1 FOR UPDATE SKIP LOCKED"
+
+        retVal = self._update("START TRANSACTION", conn=connObj)
+        if not retVal["OK"]:
+            return S_ERROR(f"Can't begin transaction for matching job: {retVal['Message']}")
+        retVal = self._query(claimSQL, conn=connObj)
+        if not retVal["OK"] or not retVal["Value"]:
+            self._update("ROLLBACK", conn=connObj)
+            if not retVal["OK"]:
+                return S_ERROR(f"Can't select job to claim from TQ {tqId}: {retVal['Message']}")
+            return S_OK(None)
+        claimedJobId = retVal["Value"][0][0]
+        retVal = self._update(f"DELETE FROM `tq_Jobs` WHERE JobId = {claimedJobId}", conn=connObj)
+        if not retVal["OK"]:
+            self._update("ROLLBACK", conn=connObj)
+            return S_ERROR(f"Could not take job {claimedJobId} out from the TQ {tqId}: {retVal['Message']}")
+        retVal = self._update("COMMIT", conn=connObj)
+        if not retVal["OK"]:
+            return S_ERROR(f"Could not commit the claim of job {claimedJobId}: {retVal['Message']}")
+        return S_OK(claimedJobId)
+
     def matchAndGetTaskQueue(
         self, tqMatchDict, numQueuesToGet=1, skipMatchDictDef=False, negativeCond=None, connObj=False
     ):
@@ -987,6 +1165,8 @@ WHERE j.JobId = %s AND t.TQId = j.TQId"
             retVal = self._update(f"DELETE FROM `tq_TaskQueues` WHERE TQId = {tqId}", conn=connObj)
             if not retVal["OK"]:
                 return retVal
+            if self.__matchIndex is not None:
+                self.__matchIndex.removeTaskQueues([int(tqId)])
             self.recalculateTQSharesForEntity(tqOwner, tqOwnerGroup, connObj=connObj)
             self.log.info("Deleted empty and enabled TQ", tqId)
             return S_OK()
@@ -1256,3 +1436,274 @@ def calculate_priority(
         result[tq_priority].append(tq_id)
 
     return result
+
+
+def _asList(value):
+    if isinstance(value, (list, tuple)):
+        return value
+    return [value]
+
+
+def _hasAny(values):
+    return any(_lowerAndRemovePunctuation(str(value)) == "any" for value in values)
+
+
+class TaskQueueMatchIndex:
+    """In-memory index of the task queues, used to find the task queues matching a resource
+    without querying the DB.
+
+    The requirements of a task queue do not change once it is created: they are loaded once, and the
+    task queues sharing the same requirements (CPU time segment, sites, platforms, tags...) are grouped
+    together, so that a resource is checked once per set of requirements. The matching follows the
+    SQL conditions of TaskQueueDB.__generateTQMatchSQL, except that the values are compared
+    case sensitively. The results are cached per resource description until the index changes,
+    so repeated requests from identical resources (and typically the ones that match nothing)
+    do not evaluate anything.
+
+    Only task queues that have been enabled at least once are added, as the multi value
+    requirements of a task queue are inserted after the task queue itself (disabled).
+    """
+
+    def __init__(self, refreshPeriod=5):
+        """c'tor
+
+        :param int refreshPeriod: seconds after which the index has to be refreshed from the DB
+        """
+        self.refreshPeriod = refreshPeriod
+        self.lastRefresh = 0
+        self.refreshLock = threading.Lock()
+        self.__updateLock = threading.Lock()
+        # ( { tqId : ( Owner, OwnerGroup, Priority, requirements ) },
+        #   { requirements : set of tqIds },
+        #   { frozen match request : tuple of matching tqIds } )
+        # The snapshot is replaced as a whole, so that concurrent matches can use it without locking
+        self.__snapshot = ({}, {}, {})
+        self.__maxCachedMatches = 1000
+        self.__matchFields = set(singleValueDefFields)
+        for field in multiValueMatchFields:
+            self.__matchFields.update((field, f"Banned{field}", f"Required{field}"))
+
+    def __contains__(self, tqId):
+        return tqId in self.__snapshot[0]
+
+    def __len__(self):
+        return len(self.__snapshot[0])
+
+    def isOutdated(self):
+        """Is it time to refresh the index from the DB"""
+        return time.time() - self.lastRefresh > self.refreshPeriod
+
+    @staticmethod
+    def __buildRequirements(cpuTime, multiValues):
+        """Requirements of a task queue, as a hashable tuple:
+        ( CPUTime, frozenset of values for each of multiValueDefFields )
+        """
+        return (int(cpuTime),) + tuple(frozenset(multiValues.get(field, ())) for field in multiValueDefFields)
+
+    def update(self, tqRecords, multiValues):
+        """Synchronize the index with the content of the DB
+
+        :param tqRecords: (TQId, Owner, OwnerGroup, CPUTime, Priority, Enabled) of all the task queues in the DB
+        :param dict multiValues: { tqId : { field : [ values ] } } for the task queues not yet in the index
+        """
+        with self.__updateLock:
+            taskQueues = {}
+            knownTaskQueues = self.__snapshot[0]
+            for tqId, owner, ownerGroup, cpuTime, priority, enabled in tqRecords:
+                if tqId in knownTaskQueues:
+                    requirements = knownTaskQueues[tqId][3]
+                elif enabled >= 1:
+                    requirements = self.__buildRequirements(cpuTime, multiValues.get(tqId, {}))
+                else:
+                    continue
+                taskQueues[tqId] = (owner, ownerGroup, priority, requirements)
+            self.__setTaskQueues(taskQueues)
+            self.lastRefresh = time.time()
+
+    def removeTaskQueues(self, tqIdList):
+        """Remove task queues from the index
+
+        :param list tqIdList: task queue IDs
+        """
+        with self.__updateLock:
+            if not any(tqId in self.__snapshot[0] for tqId in tqIdList):
+                return
+            taskQueues = dict(self.__snapshot[0])
+            for tqId in tqIdList:
+                taskQueues.pop(tqId, None)
+            self.__setTaskQueues(taskQueues)
+
+    def __setTaskQueues(self, taskQueues):
+        """Replace the content of the index. The matches in progress keep using the previous content"""
+        matchCache = self.__snapshot[2]
+        # If the same task queues are there, only the priorities may have changed,
+        # and the cached matches do not depend on them
+        if taskQueues.keys() != self.__snapshot[0].keys():
+            matchCache = {}
+        tqsByRequirements = defaultdict(set)
+        for tqId, tqData in taskQueues.items():
+            tqsByRequirements[tqData[3]].add(tqId)
+        self.__snapshot = (taskQueues, dict(tqsByRequirements), matchCache)
+
+    def getTaskQueueIds(self):
+        """Get the IDs of the task queues in the index"""
+        return list(self.__snapshot[0])
+
+    def match(self, tqMatchDict, numQueuesToGet=1, negativeCond=None):
+        """Get the task queues matching a resource, ordered randomly according to their priorities
+
+        :param dict tqMatchDict: resource description, not escaped
+        :param int numQueuesToGet: maximum number of task queues to return, 0 for all of them
+        :param negativeCond: extra negative conditions for the task queues, see TaskQueueDB.__generateNotSQL
+        :returns: S_OK( [ ( tqId, Owner, OwnerGroup ) ] ) / S_ERROR
+        """
+        taskQueues, tqsByRequirements, matchCache = self.__snapshot
+        # Only the fields used for matching, pilots send other ones (e.g. PilotReference)
+        matchFields = {field: value for field, value in tqMatchDict.items() if field in self.__matchFields}
+        cacheKey = (self.__freeze(matchFields), self.__freeze(negativeCond or {}))
+        tqIdList = matchCache.get(cacheKey)
+        if tqIdList is None:
+            result = self.__findMatchingTaskQueues(taskQueues, tqsByRequirements, tqMatchDict, negativeCond)
+            if not result["OK"]:
+                return result
+            tqIdList = result["Value"]
+            if len(matchCache) >= self.__maxCachedMatches:
+                matchCache.clear()
+            matchCache[cacheKey] = tqIdList
+
+        # Same as ORDER BY RAND() / Priority in the SQL
+        sortKeys = []
+        for tqId in tqIdList:
+            priority = taskQueues[tqId][2]
+            sortKeys.append((random.random() / priority if priority else 0, tqId))
+        if numQueuesToGet:
+            sortKeys = heapq.nsmallest(numQueuesToGet, sortKeys)
+        else:
+            sortKeys.sort()
+        return S_OK([(tqId, taskQueues[tqId][0], taskQueues[tqId][1]) for _, tqId in sortKeys])
+
+    @staticmethod
+    def __freeze(value):
+        """Turn match dicts and conditions into something hashable.
+        The order of the values in lists does not matter for matching
+        """
+        if isinstance(value, dict):
+            return tuple(sorted((key, TaskQueueMatchIndex.__freeze(val)) for key, val in value.items()))
+        if isinstance(value, (list, tuple)):
+            return frozenset(TaskQueueMatchIndex.__freeze(val) for val in value)
+        return value
+
+    def __findMatchingTaskQueues(self, taskQueues, tqsByRequirements, tqMatchDict, negativeCond):
+        """Evaluate the match conditions on the task queues
+
+        :returns: S_OK( tuple of tqIds ) / S_ERROR
+        """
+        # Tag and RequiredTag need some preparation, as in the SQL
+        tagList = None
+        if "Tag" in tqMatchDict:
+            tagList = _asList(tqMatchDict["Tag"])
+        elif "RequiredTag" not in tqMatchDict:
+            tagList = []
+        requiredTagList = _asList(tqMatchDict.get("RequiredTag", []))
+        if not requiredTagList or _hasAny(requiredTagList):
+            requiredTagList = []
+        elif not set(requiredTagList).issubset(set(tagList or [])):
+            return S_ERROR("Wrong conditions")
+
+        ownerCheck = self.__getOwnerCheck(tqMatchDict)
+        tqIdList = []
+        for requirements, tqIds in tqsByRequirements.items():
+            if not self.__matchRequirements(requirements, tqMatchDict, tagList, requiredTagList):
+                continue
+            for tqId in tqIds:
+                owner, ownerGroup = taskQueues[tqId][:2]
+                if not ownerCheck(owner, ownerGroup):
+                    continue
+                if negativeCond and not self.__matchNegativeCond(negativeCond, owner, ownerGroup, requirements):
+                    continue
+                tqIdList.append(tqId)
+        return S_OK(tuple(tqIdList))
+
+    @staticmethod
+    def __getOwnerCheck(tqMatchDict):
+        """Get a function checking the owner and group of a task queue"""
+        if "Owner" in tqMatchDict and "OwnerGroup" in tqMatchDict:
+            owner = tqMatchDict["Owner"]
+            # For each group, whether the jobs of all its users can be matched
+            groups = {
+                group: Properties.JOB_SHARING in Registry.getPropertiesForGroup(group)
+                for group in _asList(tqMatchDict["OwnerGroup"])
+            }
+            return lambda tqOwner, tqOwnerGroup: tqOwnerGroup in groups and (groups[tqOwnerGroup] or tqOwner == owner)
+        owners = _asList(tqMatchDict["Owner"]) if "Owner" in tqMatchDict else None
+        groups = _asList(tqMatchDict["OwnerGroup"]) if "OwnerGroup" in tqMatchDict else None
+        return lambda tqOwner, tqOwnerGroup: (owners is None or tqOwner in owners) and (
+            groups is None or tqOwnerGroup in groups
+        )
+
+    @staticmethod
+    def __getValues(requirements, field):
+        """Values of a multi value field (given by its match name, e.g. Site) of the requirements"""
+        return requirements[1 + multiValueDefFields.index(f"{field}s")]
+
+    def __matchRequirements(self, requirements, tqMatchDict, tagList, requiredTagList):
+        """Check the CPU time and the multi value fields of a set of requirements against a resource"""
+        if "CPUTime" in tqMatchDict:
+            if not any(requirements[0] <= int(cpuTime) for cpuTime in _asList(tqMatchDict["CPUTime"])):
+                return False
+
+        for field in multiValueMatchFields:
+            tqValues = self.__getValues(requirements, field)
+            if field == "Tag":
+                # All the tags of the task queue have to be provided by the resource
+                if tagList is not None and not _hasAny(tagList) and not tqValues.issubset(tagList):
+                    return False
+                continue
+            values = tqMatchDict.get(field)
+            if not values:
+                continue
+            values = _asList(values)
+            if _hasAny(values):
+                continue
+            # A task queue without values for the field accepts any resource
+            if tqValues and not any(value in tqValues for value in values):
+                return False
+            if field in bannedJobMatchFields:
+                bannedValues = self.__getValues(requirements, f"Banned{field}")
+                if all(value in bannedValues for value in values):
+                    return False
+
+        # The resource only accepts task queues requiring all these tags
+        if requiredTagList and not self.__getValues(requirements, "Tag").issuperset(requiredTagList):
+            return False
+
+        # The resource bans these values
+        for field in multiValueMatchFields:
+            bannedValues = tqMatchDict.get(f"Banned{field}")
+            if not bannedValues:
+                continue
+            bannedValues = _asList(bannedValues)
+            if _hasAny(bannedValues):
+                continue
+            tqValues = self.__getValues(requirements, field)
+            if all(value in tqValues for value in bannedValues):
+                return False
+        return True
+
+    def __matchNegativeCond(self, negativeCond, owner, ownerGroup, requirements):
+        """Check that a task queue is not excluded by the negative conditions, see TaskQueueDB.__generateNotSQL"""
+        if isinstance(negativeCond, (list, tuple)):
+            return any(self.__matchNegativeCondDict(cond, owner, ownerGroup, requirements) for cond in negativeCond)
+        return self.__matchNegativeCondDict(negativeCond, owner, ownerGroup, requirements)
+
+    def __matchNegativeCondDict(self, negativeCond, owner, ownerGroup, requirements):
+        singleValues = {"Owner": owner, "OwnerGroup": ownerGroup, "CPUTime": requirements[0]}
+        for field, values in negativeCond.items():
+            if field in multiValueMatchFields:
+                tqValues = self.__getValues(requirements, field)
+                if not any(value in tqValues for value in _asList(values)):
+                    return True
+            elif field in singleValueDefFields:
+                if any(str(value) != str(singleValues[field]) for value in values):
+                    return True
+        return False
@@ -2,7 +2,7 @@ import math
 from typing import Any
 
 import pytest
-from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import TQ_MIN_SHARE, calculate_priority
+from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import TQ_MIN_SHARE, TaskQueueMatchIndex, calculate_priority
 
 
 @pytest.mark.parametrize("allow_bg_tqs", [True, False])
@@ -214,3 +214,103 @@ def test_calculate_priority_different_priority_different_number_of_jobs_differen
             delta = min(delta, abs(priority - expected_priority))
         assert delta < 1e-6
         assert len(result[priority]) == 1
+
+
+# TQId, Owner, OwnerGroup, CPUTime, Priority, Enabled
+tqRecords = [
+    (1, "userA", "groupA", 3600, 1.0, 1),
+    (2, "userB", "groupA", 3600, 1.0, 1),
+    (3, "userA", "groupA", 86400, 1.0, 1),
+    (4, "userA", "groupB", 3600, 1.0, 1),
+    (5, "userA", "groupA", 3600, 1.0, 1),
+    (6, "userA", "groupA", 3600, 1.0, 1),
+    (7, "userA", "groupA", 3600, 1.0, 1),
+    (8, "userA", "groupA", 3600, 1.0, 0),
+]
+tqMultiValues = {
+    5: {"Sites": ["Site1", "Site2"], "BannedSites": ["Site3"]},
+    6: {"Tags": ["MultiProcessor", "4Processors"], "Platforms": ["EL9"]},
+    7: {"BannedSites": ["Site1"], "JobTypes": ["MonteCarlo"]},
+    8: {"Sites": ["Site1"]},
+}
+
+
+@pytest.fixture
+def matchIndex(mocker):
+    mocker.patch(
+        "DIRAC.WorkloadManagementSystem.DB.TaskQueueDB.Registry.getPropertiesForGroup",
+        side_effect=lambda group: ["JobSharing"] if group == "groupB" else [],
+    )
+    index = TaskQueueMatchIndex()
+    index.update(tqRecords, tqMultiValues)
+    return index
+
+
+def matchedTQs(index, tqMatchDict, negativeCond=None):
+    result = index.match(tqMatchDict, numQueuesToGet=0, negativeCond=negativeCond)
+    assert result["OK"], result
+    return sorted(tq[0] for tq in result["Value"])
+
+
+@pytest.mark.parametrize(
+    "tqMatchDict, expected",
+    [
+        ({"CPUTime": 100000}, [1, 2, 3, 4, 5, 7]),
+        ({"CPUTime": 3600}, [1, 2, 4, 5, 7]),
+        ({"CPUTime": 60}, []),
+        ({"CPUTime": 3600, "Site": "Site1"}, [1, 2, 4, 5]),
+        ({"CPUTime": 3600, "Site": ["Site1", "Site3"]}, [1, 2, 4, 5, 7]),
+        ({"CPUTime": 3600, "Site": "Site3"}, [1, 2, 4, 7]),
+        ({"CPUTime": 3600, "Site": "ANY"}, [1, 2, 4, 5, 7]),
+        ({"CPUTime": 3600, "JobType": "User"}, [1, 2, 4, 5]),
+        ({"CPUTime": 3600, "BannedJobType": ["MonteCarlo"]}, [1, 2, 4, 5]),
+        ({"CPUTime": 3600, "Tag": ["MultiProcessor", "4Processors", "8Processors"]}, [1, 2, 4, 5, 6, 7]),
+        ({"CPUTime": 3600, "Tag": ["MultiProcessor", "4Processors"], "Platform": "EL7"}, [1, 2, 4, 5, 7]),
+        ({"CPUTime": 3600, "Tag": ["MultiProcessor"]}, [1, 2, 4, 5, 7]),
+        ({"CPUTime": 3600, "Tag": ["MultiProcessor", "4Processors"], "RequiredTag": "MultiProcessor"}, [6]),
+        ({"CPUTime": 3600, "RequiredTag": []}, [1, 2, 4, 5, 6, 7]),
+        ({"CPUTime": 3600, "OwnerGroup": "groupA"}, [1, 2, 5, 7]),
+        ({"CPUTime": 3600, "Owner": "userB"}, [2]),
+        ({"CPUTime": 3600, "Owner": "userB", "OwnerGroup": ["groupA", "groupB"]}, [2, 4]),
+    ],
+)
+def test_matchIndex(matchIndex, tqMatchDict, expected):
+    """The task queue 8 was never enabled, so it's not in the index"""
+    assert matchedTQs(matchIndex, tqMatchDict) == expected
+
+
+def test_matchIndexWrongConditions(matchIndex):
+    assert not matchIndex.match({"CPUTime": 3600, "Tag": ["A"], "RequiredTag": ["B"]})["OK"]
+
+
+def test_matchIndexNegativeCond(matchIndex):
+    tqMatchDict = {"CPUTime": 3600, "Site": "Site1"}
+    assert matchedTQs(matchIndex, tqMatchDict, {"Owner": ["userA"]}) == [2]
+    assert matchedTQs(matchIndex, tqMatchDict, {"Site": "Site1"}) == [1, 2, 4]
+    assert matchedTQs(matchIndex, tqMatchDict, [{"Site": "Site1"}, {"Owner": ["userB"]}]) == [1, 2, 4, 5]
+
+
+def test_matchIndexUpdates(matchIndex):
+    tqMatchDict = {"CPUTime": 3600, "Site": "Site1", "PilotReference": "pilot1"}
+    assert matchedTQs(matchIndex, tqMatchDict) == [1, 2, 4, 5]
+
+    # 8 is enabled and 2 deleted: the cached match is not used anymore
+    records = [record[:5] + (1,) for record in tqRecords if record[0] != 2]
+    matchIndex.update(records, tqMultiValues)
+    assert matchedTQs(matchIndex, tqMatchDict) == [1, 4, 5, 8]
+    assert 8 in matchIndex
+
+    matchIndex.removeTaskQueues([1, 4])
+    tqMatchDict["PilotReference"] = "pilot2"
+    assert matchedTQs(matchIndex, tqMatchDict) == [5, 8]
+    assert sorted(matchIndex.getTaskQueueIds()) == [3, 5, 6, 7, 8]
+
+
+def test_matchIndexPriorities(matchIndex):
+    """The task queues are ordered randomly according to their priorities"""
+    records = [record[:4] + (1000.0 if record[0] == 3 else 0.001, 1) for record in tqRecords]
+    matchIndex.update(records, tqMultiValues)
+    result = matchIndex.match({"CPUTime": 100000}, numQueuesToGet=2)
+    assert result["OK"]
+    assert len(result["Value"]) == 2
+    assert result["Value"][0] == (3, "userA", "groupA")
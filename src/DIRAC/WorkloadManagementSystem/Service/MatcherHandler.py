@@ -42,6 +42,15 @@ class MatcherHandlerMixin:
 
         cls.limiter = Limiter(jobDB=cls.jobDB)
 
+        # Find the matching task queues in memory, only claim the jobs from the DB
+        opsHelper = Operations()
+        if opsHelper.getValue("JobScheduling/TaskQueueMatchIndex", False):
+            result = cls.taskQueueDB.enableMatchIndex(
+                refreshPeriod=opsHelper.getValue("JobScheduling/MatchIndexRefreshPeriod", 5)
+            )
+            if not result["OK"]:
+                return result
+
         return S_OK()
 
     ##############################################################################
@@ -10,6 +10,7 @@ from pytest import fixture
 
 from DIRAC.RequestManagementSystem.DB.RequestDB import RequestDB
 from DIRAC.RequestManagementSystem.DB.test.RMSTestScenari import (  # pylint: disable=unused-import
+    test_claimRequests,
     test_dirty,
     test_scheduled,
     test_stress,
@@ -1122,3 +1122,35 @@ def test_TQ():
 
     result = tqDB.deleteTaskQueueIfEmpty(tq)
     assert result["OK"]
+
+
+def test_atomicMatch():
+    """matching with the atomic claim of the jobs"""
+    tqDefDict = {"Owner": "atomicUser", "OwnerGroup": "atomicGroup", "CPUTime": 50000}
+    tqMatchDict = {"OwnerGroup": "atomicGroup", "CPUTime": 300000}
+    for jobId in (201, 202, 203):
+        result = tqDB.insertJob(jobId, tqDefDict, 10)
+        assert result["OK"]
+
+    # A given job can be requested
+    result = tqDB.matchAndGetJob(dict(tqMatchDict, JobID=202), atomicMatch=True)
+    assert result["OK"]
+    assert result["Value"]["matchFound"] is True
+    assert result["Value"]["jobId"] == 202
+
+    matched = []
+    for _ in range(2):
+        result = tqDB.matchAndGetJob(tqMatchDict, atomicMatch=True)
+        assert result["OK"]
+        assert result["Value"]["matchFound"] is True
+        matched.append(result["Value"]["jobId"])
+    assert sorted(matched) == [201, 203]
+    tq = result["Value"]["taskQueueId"]
+
+    # The TQ is now empty
+    result = tqDB.matchAndGetJob(tqMatchDict, atomicMatch=True)
+    assert result["OK"]
+    assert result["Value"]["matchFound"] is False
+
+    result = tqDB.deleteTaskQueueIfEmpty(tq)
+    assert result["OK"]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+""" This script measures how many files per second a DFC service registers with addFile and addReplica,
+    depending on the number of files per call, as a production registering its outputs would do.
+
+    For each chunk size, it registers nbOfLfns new files spread over nbOfDirs directories that do not exist yet,
+    with their master replica on the first SE, then adds a replica of all of them on the second SE.
+    It prints the rate of each call, and the files are removed at the end.
+
+    Tunable parameters:
+      * hostname, port: where to find the DFC service
+      * basePath: directory under which the files are registered. It must be writable
+      * storageElements: SEs on which the replicas are registered (nothing is written on them)
+      * nbOfLfns: number of files registered for each chunk size
+      * nbOfDirs: number of directories over which the files are spread
+      * chunkSizes: number of files registered by each call
+"""
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+import time
+
+from DIRAC.Core.Utilities.File import makeGuid
+from DIRAC.Core.Utilities.List import breakListIntoChunks
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+hostname = "yourmachine.somewhere.something"
+port = 9197
+servAddress = f"dips://{hostname}:{port}/DataManagement/FileCatalog"
+
+basePath = "/vo/test/addFilePerf"
+storageElements = ["se0", "se1"]
+nbOfLfns = 100000
+nbOfDirs = 100
+chunkSizes = [100, 1000, 10000]
+
+fc = FileCatalogClient(servAddress)
+
+
+def generateLfns(chunkSize):
+    """LFNs spread evenly over nbOfDirs directories"""
+    return [f"{basePath}/chunk{chunkSize}/dir{i % nbOfDirs}/file{i}.txt" for i in range(nbOfLfns)]
+
+
+def timeCalls(methodName, lfnDict, chunkSize):
+    """Return the number of files registered per second by calls of chunkSize files"""
+    elapsed = 0.0
+    for lfnChunk in breakListIntoChunks(list(lfnDict), chunkSize):
+        chunkDict = {lfn: lfnDict[lfn] for lfn in lfnChunk}
+        before = time.time()
+        res = getattr(fc, methodName)(chunkDict)
+        elapsed += time.time() - before
+        if not res["OK"]:
+            return f"Error: {res['Message']}"
+        if res["Value"]["Failed"]:
+            return f"Error: {len(res['Value']['Failed'])} files failed"
+    return f"{len(lfnDict) / elapsed:.0f}"
+
+
+def removeFiles(lfns):
+    for lfnChunk in breakListIntoChunks(lfns, 1000):
+        fc.removeFile(lfnChunk)
+
+
+print(f"{'chunk':>8} {'files':>8} {'addFile (files/s)':>20} {'addReplica (files/s)':>22}")
+for chunkSize in chunkSizes:
+    lfns = generateLfns(chunkSize)
+    fileDict = {
+        lfn: {"PFN": lfn, "SE": storageElements[0], "Size": 1, "GUID": makeGuid(), "Checksum": "1"} for lfn in lfns
+    }
+    replicaDict = {lfn: {"PFN": lfn, "SE": storageElements[1]} for lfn in lfns}
+    try:
+        addFileRate = timeCalls("addFile", fileDict, chunkSize)
+        addReplicaRate = timeCalls("addReplica", replicaDict, chunkSize)
+        print(f"{chunkSize:>8} {len(lfns):>8} {addFileRate:>20} {addReplicaRate:>22}")
+    finally:
+        removeFiles(lfns)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+""" This script measures how many LFNs per second a DFC service resolves in bulk calls,
+    depending on the number of directories the LFNs are spread over (the fan-out).
+
+    It registers nbOfLfns files for each fan-out under basePath, then times exists, getFileMetadata
+    and getReplicas on all of them at once, several times, and prints the best rate of each call.
+    The files are removed at the end.
+
+    Tunable parameters:
+      * hostname, port: where to find the DFC service
+      * basePath: directory under which the files are registered. It must be writable
+      * storageElement: SE on which the replicas are registered (nothing is written on it)
+      * nbOfLfns: number of LFNs resolved by each call
+      * fanOuts: number of directories over which the LFNs are spread
+      * nbOfRepeats: number of times each call is timed
+      * insertChunkSize: number of files registered by each addFile call
+"""
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+import time
+
+from DIRAC.Core.Utilities.File import makeGuid
+from DIRAC.Core.Utilities.List import breakListIntoChunks
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+hostname = "yourmachine.somewhere.something"
+port = 9197
+servAddress = f"dips://{hostname}:{port}/DataManagement/FileCatalog"
+
+basePath = "/vo/test/findFilesPerf"
+storageElement = "se0"
+nbOfLfns = 10000
+fanOuts = [1, 10, 100, 1000, 3000]
+nbOfRepeats = 3
+insertChunkSize = 1000
+
+fc = FileCatalogClient(servAddress)
+
+
+def generateLfns(fanOut):
+    """LFNs spread evenly over fanOut directories"""
+    return [f"{basePath}/fanOut{fanOut}/dir{i % fanOut}/file{i}.txt" for i in range(nbOfLfns)]
+
+
+def registerFiles(lfns):
+    for lfnChunk in breakListIntoChunks(lfns, insertChunkSize):
+        lfnDict = {
+            lfn: {"PFN": lfn, "SE": storageElement, "Size": 1, "GUID": makeGuid(), "Checksum": "1"} for lfn in lfnChunk
+        }
+        res = fc.addFile(lfnDict)
+        if not res["OK"]:
+            DIRAC.exit(f"Failed to register the files: {res['Message']}")
+        if res["Value"]["Failed"]:
+            DIRAC.exit(f"Failed to register {len(res['Value']['Failed'])} files")
+
+
+def removeFiles(lfns):
+    for lfnChunk in breakListIntoChunks(lfns, insertChunkSize):
+        fc.removeFile(lfnChunk)
+
+
+def timeCall(methodName, lfns):
+    """Return the best number of LFNs resolved per second by a call over nbOfRepeats"""
+    bestTime = None
+    for _ in range(nbOfRepeats):
+        before = time.time()
+        res = getattr(fc, methodName)(lfns)
+        elapsed = time.time() - before
+        if not res["OK"]:
+            return f"Error: {res['Message']}"
+        if len(res["Value"]["Successful"]) != len(lfns):
+            return f"Error: {len(res['Value']['Failed'])} LFNs failed"
+        bestTime = elapsed if bestTime is None else min(bestTime, elapsed)
+    return f"{len(lfns) / bestTime:.0f}"
+
+
+methods = ["exists", "getFileMetadata", "getReplicas"]
+print(f"{'fan-out':>8} {'LFNs':>8} " + " ".join(f"{method + ' (LFN/s)':>24}" for method in methods))
+for fanOut in fanOuts:
+    lfns = generateLfns(fanOut)
+    registerFiles(lfns)
+    try:
+        rates = [timeCall(method, lfns) for method in methods]
+        print(f"{fanOut:>8} {len(lfns):>8} " + " ".join(f"{rate:>24}" for rate in rates))
+    finally:
+        removeFiles(lfns)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+""" This script times the metadata queries of a DFC service, for the usual shapes of MetaQuery:
+    equality on one or several fields, ranges, lists of values, restricted to a path or not.
+
+    It creates a tree of directories under basePath: years / types / runs, with the metadata set at each
+    level so that the leaves inherit it, and registers a few files in each leaf directory.
+    Each query is then timed nbOfRepeats times with findDirectoriesByMetadata and findFilesByMetadata,
+    and the best time is printed. Everything, the metadata fields included, is removed at the end.
+
+    Run it once against a service with MetadataIndex = True and once without, to compare.
+
+    Tunable parameters:
+      * hostname, port: where to find the DFC service
+      * basePath: directory under which the tree is created. It must be writable
+      * storageElement: SE on which the replicas are registered (nothing is written on it)
+      * nbOfYears, nbOfTypes, nbOfRuns: number of directories at each level of the tree
+      * nbOfFilesPerDir: number of files registered in each leaf directory
+      * nbOfRepeats: number of times each query is timed
+      * fieldPrefix: prefix of the metadata fields, which must not exist yet
+"""
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+import time
+
+from DIRAC.Core.Utilities.File import makeGuid
+from DIRAC.Core.Utilities.List import breakListIntoChunks
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+hostname = "yourmachine.somewhere.something"
+port = 9197
+servAddress = f"dips://{hostname}:{port}/DataManagement/FileCatalog"
+
+basePath = "/vo/test/metaQueryPerf"
+storageElement = "se0"
+nbOfYears = 5
+nbOfTypes = 4
+nbOfRuns = 50
+nbOfFilesPerDir = 2
+nbOfRepeats = 3
+fieldPrefix = "perf"
+
+fc = FileCatalogClient(servAddress)
+
+fields = {"Year": "INT", "Type": "VARCHAR(128)", "Run": "INT", "Energy": "FLOAT", "Config": "VARCHAR(128)"}
+fields = {f"{fieldPrefix}{name}": fieldType for name, fieldType in fields.items()}
+year, dataType, run, energy, config = fields
+
+queries = [
+    ("one field", {year: 2001}, "/"),
+    ("two fields", {year: 2001, dataType: "type1"}, "/"),
+    ("four fields", {year: 2001, dataType: "type1", config: "config1", energy: 1.5}, "/"),
+    ("range", {run: {">=": 10, "<": 20}}, "/"),
+    ("range and list", {run: {">": 40}, dataType: ["type0", "type2"]}, "/"),
+    ("not equal", {year: {"!=": 2000}, config: "config0"}, "/"),
+    ("path", {dataType: "type1", run: 7}, f"{basePath}/year2002"),
+]
+
+
+def check(res, action):
+    if not res["OK"]:
+        DIRAC.exit(f"Failed to {action}: {res['Message']}")
+    if isinstance(res["Value"], dict) and res["Value"].get("Failed"):
+        DIRAC.exit(f"Failed to {action}: {res['Value']['Failed']}")
+
+
+def createTree():
+    """Create the directories, set their metadata and register the files"""
+    for name, fieldType in fields.items():
+        check(fc.addMetadataField(name, fieldType), f"add the {name} field")
+    lfnDict = {}
+    for y in range(nbOfYears):
+        yearPath = f"{basePath}/year{2000 + y}"
+        check(fc.createDirectory(yearPath), f"create {yearPath}")
+        check(fc.setMetadata(yearPath, {year: 2000 + y}), f"set the metadata of {yearPath}")
+        for t in range(nbOfTypes):
+            typePath = f"{yearPath}/type{t}"
+            check(fc.createDirectory(typePath), f"create {typePath}")
+            check(fc.setMetadata(typePath, {dataType: f"type{t}", config: f"config{t % 2}"}), f"set {typePath}")
+            for r in range(nbOfRuns):
+                runPath = f"{typePath}/run{r}"
+                check(fc.createDirectory(runPath), f"create {runPath}")
+                check(fc.setMetadata(runPath, {run: r, energy: 0.5 * (r % 4)}), f"set the metadata of {runPath}")
+                for i in range(nbOfFilesPerDir):
+                    lfnDict[f"{runPath}/file{i}.txt"] = {
+                        "PFN": f"{runPath}/file{i}.txt",
+                        "SE": storageElement,
+                        "Size": 1,
+                        "GUID": makeGuid(),
+                        "Checksum": "1",
+                    }
+    for lfns in breakListIntoChunks(list(lfnDict), 1000):
+        check(fc.addFile({lfn: lfnDict[lfn] for lfn in lfns}), "register the files")
+    return list(lfnDict)
+
+
+def removeTree(lfns):
+    for lfnChunk in breakListIntoChunks(lfns, 1000):
+        fc.removeFile(lfnChunk)
+    for y in range(nbOfYears):
+        yearPath = f"{basePath}/year{2000 + y}"
+        for t in range(nbOfTypes):
+            for r in range(nbOfRuns):
+                fc.removeDirectory(f"{yearPath}/type{t}/run{r}")
+            fc.removeDirectory(f"{yearPath}/type{t}")
+        fc.removeDirectory(yearPath)
+    for name in fields:
+        fc.deleteMetadataField(name)
+
+
+def timeQuery(methodName, metaDict, path):
+    """Return the best time of a query over nbOfRepeats, with the number of results"""
+    bestTime = None
+    for _ in range(nbOfRepeats):
+        before = time.time()
+        res = getattr(fc, methodName)(metaDict, path)
+        elapsed = time.time() - before
+        if not res["OK"]:
+            return f"Error: {res['Message']}"
+        bestTime = elapsed if bestTime is None else min(bestTime, elapsed)
+    return f"{bestTime:.3f}s ({len(res['Value'])})"
+
+
+methods = ["findDirectoriesByMetadata", "findFilesByMetadata"]
+allLfns = createTree()
+try:
+    print(f"{'query':>16} " + " ".join(f"{method:>28}" for method in methods))
+    for queryName, metaDict, path in queries:
+        times = [timeQuery(method, metaDict, path) for method in methods]
+        print(f"{queryName:>16} " + " ".join(f"{result:>28}" for result in times))
+finally:
+    removeTree(allLfns)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+""" Micro-benchmark of the Registry helper reverse lookups.
+
+    For several registry sizes, it loads a synthetic /Registry section in the local
+    configuration and times getUsernameForDN, getGroupsForUser, getGroupsWithProperty and
+    getGroupsWithVOMSAttribute, both through the RegistryIndex and through a linear scan
+    of the sections (which is how the lookups were done before the index existed).
+
+    Tunable parameters:
+      * registrySizes: number of users to generate. There is one group for every 10 users
+      * nLookups: number of lookups timed for each function and size
+
+    Nothing is contacted, it can be run on any machine where DIRAC is installed.
+"""
+import random
+import time
+
+from diraccfg import CFG
+
+from DIRAC import gConfig
+from DIRAC.ConfigurationSystem.Client.Helpers import Registry
+
+registrySizes = [100, 1000, 10000, 50000]
+nLookups = 1000
+
+
+def generateRegistry(nUsers):
+    """Generate a Registry CFG with nUsers users spread over nUsers / 10 groups"""
+    nGroups = max(nUsers // 10, 1)
+    users = {f"user{user}": {"DN": f"/O=Bench/CN=user{user}"} for user in range(nUsers)}
+    groups = {
+        f"group{group}": {
+            "Users": ", ".join(f"user{user}" for user in range(group, nUsers, nGroups)),
+            "Properties": f"NormalUser, Property{group}",
+            "VOMSRole": f"/bench/Role=role{group}",
+        }
+        for group in range(nGroups)
+    }
+    cfg = CFG()
+    cfg.loadFromDict({"Registry": {"Users": users, "Groups": groups}})
+    return cfg, nGroups
+
+
+def scanUsernameForDN(dn):
+    for username in gConfig.getSections("/Registry/Users")["Value"]:
+        if dn in gConfig.getValue(f"/Registry/Users/{username}/DN", []):
+            return username
+
+
+def scanGroupsWithAttr(attrName, value):
+    return sorted(
+        group
+        for group in gConfig.getSections("/Registry/Groups")["Value"]
+        if value in gConfig.getValue(f"/Registry/Groups/{group}/{attrName}", [])
+    )
+
+
+def scanGroupsWithVOMSAttribute(vomsAttr):
+    return [
+        group
+        for group in gConfig.getSections("/Registry/Groups")["Value"]
+        if vomsAttr == gConfig.getValue(f"/Registry/Groups/{group}/VOMSRole", "")
+    ]
+
+
+def timeIt(func, args):
+    """Return the mean time in microseconds of func over the list of args"""
+    start = time.perf_counter()
+    for arg in args:
+        func(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def main():
+    print(f"{'users':>8} {'lookup':<28} {'scan (us)':>12} {'index (us)':>12} {'speedup':>10}")
+    for nUsers in registrySizes:
+        cfg, nGroups = generateRegistry(nUsers)
+        gConfig.loadCFG(cfg)
+
+        start = time.perf_counter()
+        Registry.RegistryIndex.reset()
+        Registry.RegistryIndex.get()
+        print(f"{nUsers:>8} {'index build':<28} {'':>12} {(time.perf_counter() - start) * 1e6:>12.1f}")
+
+        # The scans are much slower, time them on fewer lookups for big registries
+        nScans = max(min(nLookups, 10**6 // nUsers), 10)
+        users = [f"user{random.randrange(nUsers)}" for _ in range(nLookups)]
+        dns = [f"/O=Bench/CN={user}" for user in users]
+        props = [f"Property{random.randrange(nGroups)}" for _ in range(nLookups)]
+        roles = [f"/bench/Role=role{random.randrange(nGroups)}" for _ in range(nLookups)]
+
+        benchmarks = [
+            ("getUsernameForDN", scanUsernameForDN, Registry.getUsernameForDN, dns),
+            ("getGroupsForUser", lambda u: scanGroupsWithAttr("Users", u), Registry.getGroupsForUser, users),
+            (
+                "getGroupsWithProperty",
+                lambda p: scanGroupsWithAttr("Properties", p),
+                Registry.getGroupsWithProperty,
+                props,
+            ),
+            ("getGroupsWithVOMSAttribute", scanGroupsWithVOMSAttribute, Registry.getGroupsWithVOMSAttribute, roles),
+        ]
+        for name, scanFunc, indexFunc, args in benchmarks:
+            scanTime = timeIt(scanFunc, args[:nScans])
+            indexTime = timeIt(indexFunc, args)
+            print(f"{nUsers:>8} {name:<28} {scanTime:>12.1f} {indexTime:>12.1f} {scanTime / indexTime:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
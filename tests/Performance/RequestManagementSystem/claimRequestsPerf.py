@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+""" This script measures the request claiming throughput of the ReqDB against the number of
+    concurrent RequestExecutingAgent-like claimers, each calling getBulkRequests in a loop.
+
+    It connects directly to the ReqDB, which has to be defined in the configuration
+    (as for tests/Integration/RequestManagementSystem/Test_ReqDB.py). The DB should
+    be a test one: it is filled with requests that are all claimed, then deleted.
+
+    For each number of claimers, it inserts nRequests waiting requests, then starts as many threads
+    as claimers, each of them claiming chunks of bulkSize requests until there is none left.
+    It prints the claimed requests per second and checks that no request was claimed twice.
+
+    Tunable parameters:
+      * nRequests: number of requests inserted for each measurement
+      * bulkSize: number of requests claimed by each call
+      * claimerCounts: numbers of concurrent claimers to test
+"""
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+import threading
+import time
+from collections import Counter
+
+from DIRAC.RequestManagementSystem.Client.File import File
+from DIRAC.RequestManagementSystem.Client.Operation import Operation
+from DIRAC.RequestManagementSystem.Client.Request import Request
+from DIRAC.RequestManagementSystem.DB.RequestDB import RequestDB
+
+nRequests = 2000
+bulkSize = 50
+claimerCounts = [1, 2, 4, 8, 16]
+
+reqDB = RequestDB()
+
+
+def fillRequests(nClaimers):
+    """Insert nRequests waiting requests, return their IDs"""
+    reqIDs = set()
+    for i in range(nRequests):
+        request = Request({"RequestName": f"claimPerf-{nClaimers}-{i}"})
+        op = Operation({"Type": "RemoveFile"})
+        op += File({"LFN": f"/vo/test/claimPerf/file{i}"})
+        request += op
+        result = reqDB.putRequest(request)
+        if not result["OK"]:
+            raise RuntimeError(result["Message"])
+        reqIDs.add(result["Value"])
+    # putRequest sets NotBefore to now, and only requests with NotBefore in the past are claimed
+    time.sleep(1)
+    return reqIDs
+
+
+def claimer(claimed, failures):
+    """Claim requests until there is nothing left"""
+    while True:
+        result = reqDB.getBulkRequests(bulkSize, True)
+        if not result["OK"]:
+            failures.append(result["Message"])
+            continue
+        if not result["Value"]:
+            return
+        claimed.extend(result["Value"])
+
+
+def measure(nClaimers):
+    """Return the claims per second and the number of failed claims"""
+    reqIDs = fillRequests(nClaimers)
+    claimed = []
+    failures = []
+    threads = [threading.Thread(target=claimer, args=(claimed, failures)) for _ in range(nClaimers)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    duplicates = [reqID for reqID, count in Counter(claimed).items() if count > 1]
+    if duplicates:
+        raise RuntimeError(f"Requests claimed more than once: {duplicates}")
+    if set(claimed) != reqIDs:
+        print(f"WARNING: {len(reqIDs - set(claimed))} requests were not claimed")
+    for reqID in reqIDs:
+        reqDB.deleteRequest(reqID)
+    return len(claimed) / elapsed, len(failures)
+
+
+def main():
+    print(f"{'claimers':>9} {'claims/s':>10} {'failures':>9}")
+    for nClaimers in claimerCounts:
+        rate, failures = measure(nClaimers)
+        print(f"{nClaimers:>9} {rate:>10.1f} {failures:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+""" This script measures the job matching throughput of the TaskQueueDB
+    against the number of concurrent pilots, with and without the atomic job claiming
+    (JobScheduling/AtomicJobMatching).
+
+    It connects directly to the TaskQueueDB, which has to be defined in the configuration
+    (as for tests/Integration/WorkloadManagementSystem/Test_TaskQueueDB.py). The DB should
+    be a test one: it is filled with jobs that are all matched away.
+
+    For each matching mode and number of pilots, it inserts nJobs jobs spread over nTQs task queues,
+    then starts as many threads as pilots, each of them calling matchAndGetJob in a loop until
+    no job can be matched anymore. It prints the matches per second, the number of failed matches
+    (e.g. "Could not find a match after 3 match retries") and checks that no job was matched twice.
+
+    Tunable parameters:
+      * nJobs: number of jobs inserted for each measurement
+      * nTQs: number of task queues the jobs are spread over
+      * pilotCounts: numbers of concurrent pilots to test
+"""
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+import threading
+import time
+from collections import Counter
+
+from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import TaskQueueDB
+
+nJobs = 2000
+nTQs = 10
+pilotCounts = [1, 2, 4, 8, 16, 32]
+
+tqDB = TaskQueueDB()
+tqMatchDict = {"CPUTime": 300000, "Site": "DIRAC.Performance.ch"}
+
+
+def fillTaskQueues(firstJobId):
+    """Insert nJobs jobs in nTQs task queues, return the inserted job IDs"""
+    jobIds = range(firstJobId, firstJobId + nJobs)
+    for jobId in jobIds:
+        tqDefDict = {"Owner": "perfUser", "OwnerGroup": f"perfGroup{jobId % nTQs}", "CPUTime": 50000}
+        result = tqDB.insertJob(jobId, tqDefDict, 10)
+        if not result["OK"]:
+            raise RuntimeError(result["Message"])
+    return set(jobIds)
+
+
+def pilot(atomicMatch, matched, failures):
+    """Match jobs until there is nothing left"""
+    while True:
+        result = tqDB.matchAndGetJob(tqMatchDict, atomicMatch=atomicMatch)
+        if not result["OK"]:
+            failures.append(result["Message"])
+            continue
+        if not result["Value"]["matchFound"]:
+            return
+        matched.append(result["Value"]["jobId"])
+
+
+def measure(atomicMatch, nPilots, firstJobId):
+    """Return the matches per second and the number of failed matches"""
+    jobIds = fillTaskQueues(firstJobId)
+    matched = []
+    failures = []
+    threads = [threading.Thread(target=pilot, args=(atomicMatch, matched, failures)) for _ in range(nPilots)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    duplicates = [jobId for jobId, count in Counter(matched).items() if count > 1]
+    if duplicates:
+        raise RuntimeError(f"Jobs matched more than once: {duplicates}")
+    if set(matched) != jobIds:
+        print(f"WARNING: {len(jobIds - set(matched))} jobs left in the task queues")
+    tqDB.cleanOrphanedTaskQueues()
+    return len(matched) / elapsed, len(failures)
+
+
+def main():
+    print(f"{'mode':>8} {'pilots':>7} {'matches/s':>10} {'failures':>9}")
+    firstJobId = 10**8
+    for atomicMatch in (False, True):
+        mode = "atomic" if atomicMatch else "legacy"
+        for nPilots in pilotCounts:
+            rate, failures = measure(atomicMatch, nPilots, firstJobId)
+            firstJobId += nJobs
+            print(f"{mode:>8} {nPilots:>7} {rate:>10.1f} {failures:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+""" Micro-benchmark of the encodings of the RPC responses.
+
+    It compares the size of the encoded data and the encoding and decoding times of JEncode
+    (JSON, used by the HTTPS services by default), MsgPackEncode (sent by the HTTPS services
+    to the clients accepting it) and DEncode (DISET), as well as the reference implementation
+    of DEncode in DIRAC.Core.Utilities.test.DEncodeReference, on synthetic but realistic responses:
+      * FileCatalog getReplicas: {"Successful": {lfn: {se: pfn}}, "Failed": {lfn: error}}
+      * JobMonitoring getJobsSummary: {jobID: {attribute: value}}, with datetimes
+
+    Tunable parameters:
+      * responseSizes: number of files or jobs in the responses
+      * nReplicas: number of replicas of each file
+      * nRepeats: number of times each encoding and decoding is timed, the best time is kept
+
+    Nothing is contacted, it can be run on any machine where DIRAC and msgpack are installed.
+"""
+import datetime
+import random
+import time
+
+from DIRAC import S_OK
+from DIRAC.Core.Utilities import DEncode, JEncode, MsgPackEncode
+from DIRAC.Core.Utilities.test import DEncodeReference
+
+responseSizes = [100, 1000, 10000, 100000]
+nReplicas = 3
+nRepeats = 5
+
+storageElements = ["CERN-DST", "CNAF-DST", "GRIDKA-DST", "IN2P3-DST", "PIC-DST", "RAL-DST", "SARA-DST"]
+statuses = ["Received", "Checking", "Waiting", "Matched", "Running", "Completed", "Done", "Failed"]
+
+
+def getReplicasResponse(nFiles):
+    """Response of FileCatalog.getReplicas for nFiles files, 1% of them failing"""
+    successful = {}
+    failed = {}
+    for i in range(nFiles):
+        lfn = f"/lhcb/MC/2018/ALLSTREAMS.DST/00012345/0000/00012345_{i:08d}_7.AllStreams.dst"
+        if random.random() < 0.01:
+            failed[lfn] = "No such file or directory"
+            continue
+        successful[lfn] = {
+            se: f"root://{se.lower()}.example.org:1094/eos/lhcb/grid/prod{lfn}"
+            for se in random.sample(storageElements, nReplicas)
+        }
+    return S_OK({"Successful": successful, "Failed": failed})
+
+
+def getJobsSummaryResponse(nJobs):
+    """Response of JobMonitoring.getJobsSummary for nJobs jobs"""
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    jobs = {}
+    for jobID in range(10**8, 10**8 + nJobs):
+        submission = now - datetime.timedelta(seconds=random.randrange(10**6))
+        jobs[jobID] = {
+            "JobID": jobID,
+            "JobName": f"MCSimulation_{jobID}",
+            "JobGroup": "00012345",
+            "Owner": "produser",
+            "OwnerGroup": "lhcb_mc",
+            "Site": random.choice(["LCG.CERN.cern", "LCG.CNAF.it", "LCG.GRIDKA.de", "LCG.RAL.uk"]),
+            "Status": random.choice(statuses),
+            "MinorStatus": "Application Finished Successfully",
+            "ApplicationStatus": "Unknown",
+            "SubmissionTime": submission,
+            "LastUpdateTime": submission + datetime.timedelta(seconds=random.randrange(10**5)),
+            "HeartBeatTime": submission + datetime.timedelta(seconds=random.randrange(10**5)),
+            "RescheduleCounter": 0,
+            "UserPriority": 1,
+            "VerifiedFlag": True,
+        }
+    return S_OK(jobs)
+
+
+def bestTime(func, arg):
+    """Return the best time in milliseconds of func(arg) over nRepeats calls, and its result"""
+    best = None
+    for _ in range(nRepeats):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3, result
+
+
+def main():
+    encodings = [
+        # The HTTPS clients decode the text of the JSON responses
+        ("JEncode", lambda data: JEncode.encode(data).encode(), lambda data: JEncode.decode(data.decode())),
+        ("MsgPackEncode", MsgPackEncode.encode, MsgPackEncode.decode),
+        ("DEncode", DEncode.encode, DEncode.decode),
+        ("DEncodeRef", DEncodeReference.encode, DEncodeReference.decode),
+    ]
+    responses = [("getReplicas", getReplicasResponse), ("getJobsSummary", getJobsSummaryResponse)]
+
+    print(
+        f"{'response':<16} {'size':>8} {'encoding':<14} {'bytes':>12} {'encode (ms)':>12} {'decode (ms)':>12}"
+        f" {'vs JSON':>8}"
+    )
+    for name, generate in responses:
+        for size in responseSizes:
+            response = generate(size)
+            jsonTotal = None
+            for encodingName, encodeFunc, decodeFunc in encodings:
+                encodeTime, encoded = bestTime(encodeFunc, response)
+                decodeTime, _decoded = bestTime(decodeFunc, encoded)
+                total = encodeTime + decodeTime
+                jsonTotal = jsonTotal or total
+                print(
+                    f"{name:<16} {size:>8} {encodingName:<14} {len(encoded):>12} {encodeTime:>12.2f}"
+                    f" {decodeTime:>12.2f} {jsonTotal / total:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()